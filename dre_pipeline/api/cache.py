@@ -0,0 +1,303 @@
+"""
+DRE Analytics 2025 - API
+Cache de Respostas por Execução
+
+Os dados das consultas só mudam quando uma execução do pipeline termina.
+As respostas ficam em memória com chave (endpoint, parâmetros, versão dos
+dados); a versão é (última execução com sucesso, execução mais recente,
+status dela): quando uma execução termina, com sucesso ou não, a chave
+muda e o cache é esvaziado, sem TTL nos dados.
+
+Enquanto a execução mais recente está RUNNING as tabelas fato podem estar
+truncadas ou pela metade: as consultas vão direto ao banco e nada é
+guardado (nem recebe validadores HTTP).
+
+A versão é relida de dw.etl_run no máximo a cada `version_ttl` segundos
+(uma consulta pequena, sem tocar nas tabelas fato), então dashboards que
+consultam a cada poucos segundos não reagregam nada.
+
+O tamanho é limitado (`max_entries`, LRU); acertos, falhas e remoções vão
+para o /metrics (dre_api_cache_*).
+
+A mesma versão gera os validadores HTTP das respostas: ETag a partir da
+chave da versão e dos parâmetros e Last-Modified a partir do finished_at
+da última execução concluída. Clientes que repetem a consulta com
+If-None-Match / If-Modified-Since recebem 304 sem corpo e sem consulta às
+tabelas fato. Durante uma execução a resposta vai com
+Cache-Control: no-store, sem validadores (e nunca 304).
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import (
+    Any, Awaitable, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple,
+    Union
+)
+
+from etl._00_metrics import record_cache, record_cache_size
+
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+DEFAULT_MAX_ENTRIES = 256       # Respostas guardadas (LRU)
+DEFAULT_VERSION_TTL = 1.0       # Segundos entre releituras do run_id vigente
+
+STATUS_RUNNING = 'RUNNING'
+
+# Última execução com sucesso + execução mais recente (qualquer status)
+DATA_VERSION_SQL = """
+    SELECT s.run_id, s.finished_at, l.run_id, l.status, l.finished_at
+    FROM (
+        SELECT run_id, status, finished_at
+        FROM dw.etl_run
+        ORDER BY run_id DESC
+        LIMIT 1
+    ) l
+    LEFT JOIN (
+        SELECT run_id, finished_at
+        FROM dw.etl_run
+        WHERE status = 'SUCCESS'
+        ORDER BY run_id DESC
+        LIMIT 1
+    ) s ON TRUE
+"""
+
+
+# =============================================================================
+# VERSÃO DOS DADOS
+# =============================================================================
+
+class DataVersion(NamedTuple):
+    """Versão dos dados do DW segundo dw.etl_run"""
+
+    run_id: int                                 # Última execução com sucesso
+    success_finished_at: Optional[datetime]
+    latest_run_id: int                          # Execução mais recente
+    latest_status: str
+    latest_finished_at: Optional[datetime]
+
+    @property
+    def running(self) -> bool:
+        """Execução em andamento: fatos possivelmente pela metade"""
+        return self.latest_status == STATUS_RUNNING
+
+    @property
+    def key(self) -> Tuple[int, int, str]:
+        """Chave do cache: muda quando qualquer execução termina"""
+        return (self.run_id, self.latest_run_id, self.latest_status)
+
+    @property
+    def tag(self) -> str:
+        """Versão no ETag: run_id, ou run_id.latest após execução com falha"""
+        if self.latest_run_id == self.run_id:
+            return str(self.run_id)
+        return f"{self.run_id}.{self.latest_run_id}"
+
+    @property
+    def finished_at(self) -> Optional[datetime]:
+        """Última alteração do DW (fim da execução concluída mais recente)"""
+        if self.latest_finished_at is not None and not self.running:
+            return self.latest_finished_at
+        return self.success_finished_at
+
+
+class RunVersion:
+    """
+    Versão dos dados (DataVersion), relida a cada `ttl`.
+
+    None quando ainda não houve execução com sucesso.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_VERSION_TTL):
+        self.ttl = ttl
+        self._value: Optional[DataVersion] = None
+        self._checked_at: Optional[float] = None
+
+    async def current(
+        self, fetch_all: Callable[[str], Awaitable[List[Any]]]
+    ) -> Optional[DataVersion]:
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.ttl:
+            return self._value
+
+        rows = await fetch_all(DATA_VERSION_SQL)
+        row = rows[0] if rows else None
+        self._value = DataVersion(*row) if row is not None and row[0] is not None else None
+        self._checked_at = now
+        return self._value
+
+    def expire(self) -> None:
+        """Força a releitura na próxima consulta"""
+        self._checked_at = None
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class ResponseCache:
+    """
+    Respostas por (endpoint, parâmetros) para a versão vigente dos dados.
+
+    Uso:
+        cache = ResponseCache(max_entries=256)
+        cache.set_version(run_id)       # Versão nova: esvazia o cache
+        hit, value = cache.get(key)
+        cache.put(key, value)
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.enabled = True
+        self.version: Optional[Hashable] = None
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_version(self, version: Optional[Hashable]) -> None:
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._entries.clear()
+                record_cache_size(0)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            return True, self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            record_cache_size(len(self._entries), evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.version = None
+            self._entries.clear()
+            record_cache_size(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+async def cached_call(
+    cache: ResponseCache,
+    version: RunVersion,
+    fetch_all: Callable[[str], Awaitable[List[Any]]],
+    endpoint: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Resposta do cache para a versão vigente ou calculada por `compute`.
+
+    Sem execução com sucesso registrada, com uma execução em andamento (ou
+    com o cache desligado), não guarda nada.
+    """
+    if not cache.enabled:
+        return await compute()
+
+    try:
+        current = await version.current(fetch_all)
+    except Exception as e:
+        logger.warning(f"Versão dos dados indisponível; consulta sem cache: {e}")
+        current = None
+    if current is None or current.running:
+        return await compute()
+
+    cache.set_version(current.key)
+    key = (endpoint, tuple(sorted(params.items())))
+    hit, value = cache.get(key)
+    record_cache(endpoint, hit)
+    if hit:
+        return value
+
+    value = await compute()
+    cache.put(key, value)
+    return value
+
+
+# =============================================================================
+# GET CONDICIONAL (ETag / Last-Modified)
+# =============================================================================
+
+def make_etag(version: Union[int, str], path: str, query: Iterable[Tuple[str, str]]) -> str:
+    """
+    ETag fraco da resposta: versão dos dados (DataVersion.tag) + endpoint +
+    parâmetros (em ordem).
+
+    Fraco (W/) porque a igualdade é semântica: o mesmo JSON pode ter outra
+    codificação (ex: compressão) entre proxies.
+    """
+    canonical = f"{path}?{'&'.join(f'{k}={v}' for k, v in sorted(query))}"
+    digest = hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    """Data no formato HTTP (IMF-fixdate, GMT)"""
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparação fraca (RFC 9110): ignora o prefixo W/"""
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+    etag: str,
+    last_modified: Optional[datetime]
+) -> bool:
+    """
+    True se o cliente já tem a versão vigente (responder 304).
+
+    If-None-Match tem precedência: com ele, If-Modified-Since é ignorado.
+    """
+    if if_none_match:
+        return _etag_matches(if_none_match, etag)
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.astimezone()
+        # HTTP-date tem resolução de segundos
+        return last_modified.replace(microsecond=0) <= since
+    return False
@@ -0,0 +1,278 @@
+"""
+DRE Analytics 2025 - API
+Exportação em Massa (CSV, Parquet, Arrow IPC)
+
+GET /api/v1/export/{tabela} devolve uma tabela do DW inteira (ou filtrada)
+numa única resposta HTTP em streaming. As linhas saem de um cursor no
+servidor (stream_results: cursor nomeado no psycopg2) em lotes de
+EXPORT_BATCH_ROWS e cada lote é codificado e enviado antes do próximo ser
+lido, então a memória da API fica no tamanho de um lote, qualquer que seja
+o tamanho da tabela.
+
+Formatos:
+- csv: cabeçalho + linhas (UTF-8, separador vírgula)
+- parquet: um row group por lote
+- arrow: Arrow IPC stream (um record batch por lote); pyarrow.ipc.open_stream
+  ou pandas lê direto da resposta
+
+Parquet e Arrow usam o schema declarado em EXPORT_TABLES (valores
+monetários como float64), igual em todos os lotes.
+"""
+
+import csv
+import io
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+EXPORT_BATCH_ROWS = 50_000
+
+FORMAT_CSV = 'csv'
+FORMAT_PARQUET = 'parquet'
+FORMAT_ARROW = 'arrow'
+
+MEDIA_TYPES = {
+    FORMAT_CSV: 'text/csv; charset=utf-8',
+    FORMAT_PARQUET: 'application/vnd.apache.parquet',
+    FORMAT_ARROW: 'application/vnd.apache.arrow.stream',
+}
+EXTENSIONS = {FORMAT_CSV: 'csv', FORMAT_PARQUET: 'parquet', FORMAT_ARROW: 'arrows'}
+
+# Tabelas exportáveis: nome na URL → (tabela, [(coluna, tipo)])
+EXPORT_TABLES: Dict[str, Tuple[str, List[Tuple[str, str]]]] = {
+    'fact_receita': ('dw.fact_receita', [
+        ('receita_key', 'int'), ('data_key', 'str'), ('cenario', 'str'),
+        ('tipo_receita', 'str'), ('unidade', 'str'), ('valor', 'float'),
+    ]),
+    'fact_despesa': ('dw.fact_despesa', [
+        ('despesa_key', 'int'), ('data_key', 'str'), ('cenario', 'str'),
+        ('unidade', 'str'), ('pacote', 'str'), ('conta', 'str'), ('valor', 'float'),
+    ]),
+    'fact_dre': ('dw.fact_dre', [
+        ('dre_key', 'int'), ('data_key', 'str'), ('cenario', 'str'),
+        ('linha_dre', 'str'), ('valor', 'float'),
+    ]),
+    'fact_aliquota': ('dw.fact_aliquota', [
+        ('aliquota_key', 'int'), ('data_key', 'str'), ('tipo_imposto', 'str'),
+        ('aliquota', 'float'),
+    ]),
+    'dim_calendario': ('dw.dim_calendario', [
+        ('data_key', 'str'), ('mes_num', 'int'), ('mes_nome', 'str'),
+        ('mes_nome_completo', 'str'), ('trimestre', 'str'), ('semestre', 'str'),
+        ('ano', 'int'),
+    ]),
+    'dim_unidade': ('dw.dim_unidade', [
+        ('unidade_key', 'int'), ('unidade', 'str'), ('is_active', 'bool'),
+    ]),
+    'dim_tipo_receita': ('dw.dim_tipo_receita', [
+        ('tipo_receita_key', 'int'), ('tipo_receita', 'str'), ('descricao', 'str'),
+    ]),
+    'dim_cenario': ('dw.dim_cenario', [
+        ('cenario_key', 'int'), ('cenario', 'str'), ('descricao', 'str'),
+    ]),
+    'dim_pacote': ('dw.dim_pacote', [
+        ('pacote_key', 'int'), ('pacote', 'str'), ('is_active', 'bool'),
+    ]),
+    'dim_linha_dre': ('dw.dim_linha_dre', [
+        ('linha_dre_key', 'int'), ('linha_dre', 'str'), ('categoria', 'str'),
+        ('ordem', 'int'), ('nivel', 'int'), ('is_total', 'bool'),
+    ]),
+}
+
+# Filtros de igualdade (parâmetro = coluna), válidos onde a coluna existe
+EQUALITY_FILTERS = ['cenario', 'unidade', 'pacote', 'tipo_receita', 'linha_dre', 'tipo_imposto']
+
+
+# =============================================================================
+# EXCEÇÕES
+# =============================================================================
+
+class ExportError(ValueError):
+    """Tabela, formato ou filtro inválidos (a API responde 400/404)"""
+
+
+# =============================================================================
+# CONSULTA
+# =============================================================================
+
+def export_query(table: str, filters: Dict[str, Any]) -> Tuple[str, Dict[str, Any], List[str]]:
+    """
+    SELECT da exportação com os filtros no WHERE (parâmetros, não SQL).
+
+    `filters` aceita as colunas de EQUALITY_FILTERS e data_key_inicio /
+    data_key_fim (inclusive); valores None são ignorados.
+
+    Returns:
+        (query, params, colunas)
+
+    Raises:
+        ExportError: filtro sem coluna correspondente na tabela
+    """
+    qualified, columns = EXPORT_TABLES[table]
+    names = [name for name, _ in columns]
+
+    where, params = [], {}
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if key in ('data_key_inicio', 'data_key_fim'):
+            column, op = 'data_key', '>=' if key == 'data_key_inicio' else '<='
+        elif key in EQUALITY_FILTERS:
+            column, op = key, '='
+        else:
+            raise ExportError(f"Filtro desconhecido: {key}")
+        if column not in names:
+            raise ExportError(f"Filtro {key} não se aplica a {table}")
+        where.append(f"{column} {op} :{key}")
+        params[key] = value
+
+    query = f"SELECT {', '.join(names)} FROM {qualified}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    return query, params, names
+
+
+def stream_batches(engine, query: str, params: Dict[str, Any],
+                   batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[List[Tuple]]:
+    """
+    Lotes de linhas de um cursor no servidor.
+
+    A conexão fica aberta só enquanto o gerador é consumido (e é devolvida
+    ao pool se o cliente desconectar no meio).
+    """
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=batch_rows).execute(text(query), params)
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+
+# =============================================================================
+# CODIFICAÇÃO
+# =============================================================================
+
+class _ChunkSink(io.RawIOBase):
+    """Destino dos writers do pyarrow: acumula bytes até serem drenados"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def arrow_schema(table: str):
+    import pyarrow as pa
+
+    types = {'int': pa.int64(), 'float': pa.float64(), 'str': pa.string(), 'bool': pa.bool_()}
+    return pa.schema([(name, types[kind]) for name, kind in EXPORT_TABLES[table][1]])
+
+
+def _to_record_batch(schema, rows: List[Tuple]):
+    import pyarrow as pa
+
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_floating(field.type):
+            values = [None if v is None else float(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def encode_csv(columns: List[str], batches: Iterator[List[Tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def encode_parquet(table: str, batches: Iterator[List[Tuple]]) -> Iterator[bytes]:
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(table)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in batches:
+            writer.write_batch(_to_record_batch(schema, rows))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def encode_arrow(table: str, batches: Iterator[List[Tuple]]) -> Iterator[bytes]:
+    import pyarrow as pa
+
+    schema = arrow_schema(table)
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    try:
+        for rows in batches:
+            writer.write_batch(_to_record_batch(schema, rows))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_stream(engine, table: str, fmt: str, filters: Optional[Dict[str, Any]] = None,
+                  batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[bytes]:
+    """
+    Bytes da exportação no formato pedido, lote a lote.
+
+    Valida tabela, formato e filtros antes de abrir a conexão.
+
+    Raises:
+        ExportError: tabela, formato ou filtro inválidos
+    """
+    if table not in EXPORT_TABLES:
+        raise ExportError(f"Tabela não exportável: {table}")
+    if fmt not in MEDIA_TYPES:
+        raise ExportError(f"Formato inválido: {fmt} (use {', '.join(MEDIA_TYPES)})")
+    query, params, columns = export_query(table, filters or {})
+
+    def generate() -> Iterator[bytes]:
+        batches = stream_batches(engine, query, params, batch_rows)
+        if fmt == FORMAT_CSV:
+            chunks = encode_csv(columns, batches)
+        elif fmt == FORMAT_PARQUET:
+            chunks = encode_parquet(table, batches)
+        else:
+            chunks = encode_arrow(table, batches)
+        try:
+            for chunk in chunks:
+                if chunk:
+                    yield chunk
+        finally:
+            # Cliente desconectou no meio: fecha o cursor e devolve a conexão
+            chunks.close()
+            batches.close()
+
+    return generate()
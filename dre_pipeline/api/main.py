@@ -5,8 +5,27 @@ DRE Analytics 2025 - API
 API REST para ingestão e consulta de dados da DRE.
 
 FLUXO:
-1. POST /api/v1/upload    → Recebe Excel, salva, dispara pipeline
-2. GET  /api/v1/dre/*     → Consulta dados processados
+1. POST /api/v1/upload    → Recebe Excel, salva, enfileira o pipeline (202);
+                             reenvio do último arquivo processado → 200
+2. GET  /api/v1/jobs/{id} → Acompanha o job (execução e steps)
+3. GET  /api/v1/dre/*     → Consulta dados processados (listas paginadas
+                             por cursor, ver api/pagination.py)
+4. GET  /api/v1/export/*  → Tabela inteira em streaming (csv, parquet, arrow)
+5. POST /api/v1/query     → Agregação por dimensões/medidas/filtros escolhidos
+                             (lê os agregados dw.agg_* quando o grão permite,
+                             ver api/olap.py)
+
+As consultas usam um engine assíncrono (asyncpg) com pool próprio, então
+uma agregação lenta não bloqueia o event loop nem as demais requisições.
+Backends sem driver assíncrono (DuckDB) executam a consulta no threadpool.
+
+As respostas de consulta ficam em cache até a próxima execução com
+sucesso (api/cache.py) e levam ETag / Last-Modified da execução: GETs
+condicionais (If-None-Match / If-Modified-Since) recebem 304 sem consultar
+as tabelas fato.
+
+O pipeline roda fora da requisição, nos workers da fila de jobs
+(etl/_05_jobs.py), iniciados junto com a API (api.jobs.workers no config).
 
 Para executar:
     uvicorn api.main:app --reload --port 8000
@@ -15,32 +34,105 @@ Documentação:
     http://localhost:8000/docs
 """
 
+import logging
 import os
 import sys
-import shutil
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Optional
+from functools import wraps
+from typing import Annotated, Any, Dict, List, Optional, Union
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from sqlalchemy import text
 
 # Adiciona o diretório raiz ao path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from etl._00_config import get_config, get_engine, PROJECT_ROOT
+from api.cache import (
+    DEFAULT_MAX_ENTRIES, DEFAULT_VERSION_TTL, ResponseCache, RunVersion, cached_call,
+    http_date, is_not_modified, make_etag
+)
+from api.export import EXPORT_TABLES, EXTENSIONS, MEDIA_TYPES, ExportError, export_stream
+from api.olap import DEFAULT_MEASURES, OlapError, build_query, to_items
+from api.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PaginationError, contains_pattern, decode_cursor,
+    page, parse_fields
+)
+from api.queries import DIMENSIONS, INTEGER, TEXT, run_query, statement, statement_for
+from api.upload import (
+    DEFAULT_MAX_BYTES, UploadError, UploadTooLarge, check_content_length, stage_multipart
+)
+from etl._00_config import (
+    Config, ConfigError, get_config, get_engine, get_async_engine, PROJECT_ROOT
+)
+from etl._00_metrics import observe_request, register_pool, render_latest
+from etl._05_jobs import (
+    DEFAULT_POLL_INTERVAL, DEFAULT_WORKERS, JOB_QUEUED, JOB_STATUS_SQL, JOB_STEPS_SQL,
+    JOB_SUCCESS, KIND_PIPELINE, KIND_UPLOAD, JobQueue, WorkerPool, job_progress
+)
 
 
 # =============================================================================
 # APP
 # =============================================================================
 
+logger = logging.getLogger(__name__)
+
+# Respostas de consulta por versão dos dados (última execução com sucesso)
+response_cache = ResponseCache()
+run_version = RunVersion()
+
+
+def configure_cache() -> None:
+    """Aplica api.cache do config (enabled, max_entries, version_ttl)"""
+    try:
+        cache_config = get_config().get_api_config().get('cache') or {}
+    except ConfigError:
+        return
+    response_cache.enabled = cache_config.get('enabled', True)
+    response_cache.max_entries = cache_config.get('max_entries', DEFAULT_MAX_ENTRIES)
+    run_version.ttl = cache_config.get('version_ttl', DEFAULT_VERSION_TTL)
+
+
+def start_job_workers() -> Optional[WorkerPool]:
+    """Workers da fila de jobs (api.jobs.workers; 0 = só workers avulsos)"""
+    try:
+        jobs_config = get_config().get_api_config().get('jobs') or {}
+    except ConfigError as e:
+        logger.warning(f"⚠️ Fila de jobs desativada: {e}", extra={'error': str(e)})
+        return None
+    
+    workers = jobs_config.get('workers', DEFAULT_WORKERS)
+    if workers <= 0:
+        return None
+    poll_interval = jobs_config.get('poll_interval', DEFAULT_POLL_INTERVAL)
+    return WorkerPool(get_engine(), workers, poll_interval).start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicia os workers da fila; no shutdown, espera os jobs e fecha o pool"""
+    configure_cache()
+    workers = start_job_workers()
+    yield
+    if workers is not None:
+        await run_in_threadpool(workers.stop)
+    # Sem config.yml não há engine a fechar (não carrega o config aqui)
+    if Config._instance is not None:
+        await Config._instance.dispose_async_engine()
+
+
 app = FastAPI(
     title="DRE Analytics 2025",
     description="Ingestão e consulta de dados da DRE",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -51,6 +143,25 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def request_metrics(request: Request, call_next):
+    """Latência por rota (template, não a URL concreta) para o /metrics"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        observe_request(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            status,
+            time.perf_counter() - start
+        )
+
+
 # =============================================================================
 # MODELOS
 # =============================================================================
@@ -62,11 +173,14 @@ class HealthResponse(BaseModel):
     timestamp: datetime
 
 
-class UploadResponse(BaseModel):
+class JobAccepted(BaseModel):
     message: str
-    filename: str
-    pipeline_status: str
-    rows_processed: Optional[int]
+    job_id: int
+    status: str
+    status_url: str
+    filename: Optional[str] = None
+    sha256: Optional[str] = None
+    duplicate: bool = False
 
 
 class DREResumo(BaseModel):
@@ -78,10 +192,27 @@ class DREResumo(BaseModel):
     margem_liquida: float
 
 
-class DREItem(BaseModel):
-    mes: str
-    linha: str
-    valor: float
+class DREPage(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+    limit: int
+
+
+class AggregateQuery(BaseModel):
+    fato: str
+    dimensoes: List[str] = []
+    medidas: List[str] = DEFAULT_MEASURES
+    filtros: Dict[str, Union[str, List[str]]] = {}
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+
+
+class AggregateResult(BaseModel):
+    fato: str
+    source: str
+    columns: List[str]
+    items: List[Dict[str, Any]]
+    truncated: bool
+    limit: int
 
 
 # =============================================================================
@@ -98,10 +229,122 @@ def get_last_upload_info() -> Optional[str]:
     return None
 
 
-def run_pipeline_sync() -> dict:
-    """Executa pipeline de forma síncrona"""
-    from etl._05_run_pipeline import run_pipeline
-    return run_pipeline(triggered_by='API Upload')
+def _fetch_all_sync(query: str, params: Dict[str, Any]) -> List[Any]:
+    with get_engine().connect() as conn:
+        return conn.execute(text(query), params).fetchall()
+
+
+async def fetch_all(query: str, params: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """
+    Executa uma consulta de leitura sem bloquear o event loop.
+    
+    Usa o engine assíncrono (pool próprio, ver api.db_pool no config); em
+    backends sem driver assíncrono, o engine síncrono roda no threadpool.
+    """
+    params = params or {}
+    if not get_config().get_backend().supports_async:
+        return await run_in_threadpool(_fetch_all_sync, query, params)
+    
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(text(query), params)
+        return result.fetchall()
+
+
+def cached_query(endpoint: str):
+    """Guarda a resposta do endpoint (por parâmetros) até a próxima execução"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(**params):
+            return await cached_call(
+                response_cache, run_version, fetch_all, endpoint, params,
+                lambda: func(**params)
+            )
+        return wrapper
+    return decorator
+
+
+async def conditional_get(request: Request, response: Response) -> None:
+    """
+    Validadores da resposta (ETag / Last-Modified) a partir da versão dos
+    dados (a mesma chave do cache); 304 se o cliente já tem essa versão.
+    
+    Com uma execução em andamento a resposta pode refletir fatos pela
+    metade: sai com no-store e sem validadores.
+    
+    Roda antes do endpoint: o 304 não consulta as tabelas fato.
+    """
+    try:
+        current = await run_version.current(fetch_all)
+    except Exception:
+        return      # Sem versão: o endpoint responde (ou falha) normalmente
+    if current is None:
+        return
+    if current.running:
+        response.headers['Cache-Control'] = 'no-store'
+        return
+    
+    finished_at = current.finished_at
+    headers = {
+        'ETag': make_etag(current.tag, request.url.path, request.query_params.multi_items()),
+        'Cache-Control': 'no-cache',    # Pode guardar, mas revalida a cada uso
+    }
+    if finished_at is not None:
+        headers['Last-Modified'] = http_date(finished_at)
+    
+    if is_not_modified(
+        request.headers.get('if-none-match'),
+        request.headers.get('if-modified-since'),
+        headers['ETag'],
+        finished_at
+    ):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+def get_upload_max_bytes() -> int:
+    """Tamanho máximo do upload (api.upload.max_bytes)"""
+    upload_config = get_config().get_api_config().get('upload') or {}
+    return int(upload_config.get('max_bytes', DEFAULT_MAX_BYTES))
+
+
+def find_processed_upload(sha256: str) -> Optional[Dict[str, Any]]:
+    """
+    Job do upload com esse hash, se foi o último processado com sucesso.
+    
+    Com outro upload na fila o arquivo em disco já é outro: não é reenvio.
+    """
+    queue = JobQueue(get_engine())
+    if queue.pending(KIND_UPLOAD):
+        return None
+    last = queue.last_processed_upload()
+    if last is not None and last['params'].get('sha256') == sha256:
+        return last
+    return None
+
+
+async def dimension_values(name: str) -> List[str]:
+    """Valores de uma dimensão (dw.dim_*), em cache até a próxima execução"""
+    async def compute():
+        return [row[0] for row in await run_query(statement(f'dim_{name}'))]
+    
+    return await cached_call(
+        response_cache, run_version, fetch_all, f'dim_{name}', {}, compute
+    )
+
+
+async def validate_dimensions(**values: Optional[str]) -> None:
+    """400 se algum valor de filtro não existir na dimensão correspondente"""
+    for name, value in values.items():
+        if value is None or name not in DIMENSIONS:
+            continue
+        valid = await dimension_values(name)
+        if value not in valid:
+            raise HTTPException(400, f"{name} inválido: {value} (válidos: {', '.join(valid)})")
+
+
+async def enqueue_job(kind: str, params: Dict[str, Any], triggered_by: str) -> int:
+    """Grava o job em dw.etl_job (os workers executam o pipeline)"""
+    return await run_in_threadpool(JobQueue(get_engine()).enqueue, kind, params, triggered_by)
 
 
 # =============================================================================
@@ -115,8 +358,10 @@ async def root():
         "docs": "/docs",
         "endpoints": {
             "upload": "POST /api/v1/upload",
+            "jobs": "GET /api/v1/jobs/{job_id}",
             "dre": "GET /api/v1/dre",
-            "health": "GET /api/v1/health"
+            "health": "GET /api/v1/health",
+            "metrics": "GET /metrics"
         }
     }
 
@@ -125,9 +370,7 @@ async def root():
 async def health():
     """Status do sistema"""
     try:
-        engine = get_engine()
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        await fetch_all("SELECT 1")
         db_status = "connected"
     except Exception as e:
         db_status = f"error: {str(e)}"
@@ -140,77 +383,144 @@ async def health():
     )
 
 
-@app.post("/api/v1/upload", response_model=UploadResponse, tags=["Ingestão"])
-async def upload_excel(file: UploadFile = File(...)):
+@app.get("/metrics", tags=["Sistema"])
+def metrics():
+    """Métricas no formato Prometheus (pipeline, DQ, pool e latência da API)"""
+    try:
+        config = get_config()
+        register_pool(config.get_engine())
+        if config.get_backend().supports_async:
+            register_pool(config.get_async_engine().sync_engine, 'async')
+    except Exception:
+        pass  # Sem config/banco: expõe o restante das métricas
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+
+# Corpo lido em streaming (sem UploadFile): o schema do multipart vai à mão
+UPLOAD_REQUEST_BODY = {
+    'requestBody': {
+        'required': True,
+        'content': {'multipart/form-data': {'schema': {
+            'type': 'object',
+            'properties': {'file': {'type': 'string', 'format': 'binary'}},
+            'required': ['file'],
+        }}},
+    }
+}
+
+
+@app.post("/api/v1/upload", response_model=JobAccepted, status_code=202, tags=["Ingestão"],
+          openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_excel(request: Request, response: Response):
     """
-    Upload de arquivo Excel para processamento.
+    Upload de arquivo Excel para processamento (multipart, campo `file`).
     
     Fluxo:
-    1. Recebe arquivo .xlsx
-    2. Salva em 01_dados_originais/
-    3. Executa pipeline ETL completo
-    4. Retorna status
+    1. Recebe arquivo .xlsx em blocos direto do corpo (SHA-256 e limite de
+       tamanho; Content-Length acima do limite → 413 sem ler o corpo)
+    2. Mesmo hash do último arquivo processado → 200, sem executar o pipeline
+    3. Substitui o arquivo em 01_dados_originais/ (rename atômico)
+    4. Enfileira o pipeline ETL completo
+    5. Retorna 202 com o job_id (acompanhe em GET /api/v1/jobs/{job_id})
     """
-    # Validar extensão
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(400, "Apenas arquivos Excel (.xlsx, .xls)")
-    
     try:
         # Caminho de destino
         config = get_config()
         dest_path = Path(PROJECT_ROOT) / config.get('paths', {}).get('source_excel', 'data/input.xlsx')
-        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        max_bytes = get_upload_max_bytes()
+        check_content_length(request.headers, max_bytes)
         
-        # Salvar arquivo
-        with open(dest_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        # Copiar em blocos para um temporário ao lado do destino
+        filename, staged = await stage_multipart(
+            request.stream(), request.headers.get('content-type', ''), dest_path.parent,
+            max_bytes, suffixes=('.xlsx', '.xls')
+        )
+        try:
+            processed = await run_in_threadpool(find_processed_upload, staged.sha256)
+        except BaseException:
+            staged.discard()
+            raise
         
-        # Executar pipeline
-        result = run_pipeline_sync()
+        if processed is not None:
+            staged.discard()
+            response.status_code = 200
+            return JobAccepted(
+                message="Arquivo idêntico ao último processado; pipeline não executado",
+                job_id=processed['job_id'],
+                status=JOB_SUCCESS,
+                status_url=f"/api/v1/jobs/{processed['job_id']}",
+                filename=filename,
+                sha256=staged.sha256,
+                duplicate=True
+            )
         
-        return UploadResponse(
-            message="Arquivo processado com sucesso",
-            filename=file.filename,
-            pipeline_status=result.get('status', 'unknown'),
-            rows_processed=result.get('total_rows', 0)
+        staged.commit(dest_path)
+        job_id = await enqueue_job(KIND_UPLOAD, {
+            'filename': filename,
+            'sha256': staged.sha256,
+            'size_bytes': staged.size
+        }, 'API Upload')
+        return JobAccepted(
+            message="Arquivo recebido; pipeline enfileirado",
+            job_id=job_id,
+            status=JOB_QUEUED,
+            status_url=f"/api/v1/jobs/{job_id}",
+            filename=filename,
+            sha256=staged.sha256
         )
         
+    except UploadTooLarge as e:
+        raise HTTPException(413, f"Arquivo excede o limite de {e.max_bytes} bytes")
+    except UploadError as e:
+        raise HTTPException(400, str(e))
     except Exception as e:
         raise HTTPException(500, f"Erro no processamento: {str(e)}")
 
 
-@app.post("/api/v1/pipeline/run", tags=["Ingestão"])
+@app.post("/api/v1/pipeline/run", response_model=JobAccepted, status_code=202, tags=["Ingestão"])
 async def trigger_pipeline():
-    """Executa pipeline manualmente (sem upload)"""
+    """Enfileira o pipeline manualmente (sem upload)"""
     try:
-        result = run_pipeline_sync()
-        return {
-            "message": "Pipeline executado",
-            "status": result.get('status'),
-            "duration_seconds": result.get('duration_seconds')
-        }
+        job_id = await enqueue_job(KIND_PIPELINE, {}, 'API')
+        return JobAccepted(
+            message="Pipeline enfileirado",
+            job_id=job_id,
+            status=JOB_QUEUED,
+            status_url=f"/api/v1/jobs/{job_id}"
+        )
     except Exception as e:
         raise HTTPException(500, str(e))
 
 
+@app.get("/api/v1/jobs/{job_id}", tags=["Ingestão"])
+async def get_job(job_id: int):
+    """Status de um job: execução em dw.etl_run e steps já concluídos"""
+    try:
+        rows = await fetch_all(JOB_STATUS_SQL, {'job_id': job_id})
+    except Exception as e:
+        raise HTTPException(500, str(e))
+    if not rows:
+        raise HTTPException(404, f"Job {job_id} não encontrado")
+    
+    job = dict(rows[0]._mapping)
+    steps = []
+    if job['run_id'] is not None:
+        steps = [dict(r._mapping) for r in await fetch_all(JOB_STEPS_SQL, {'run_id': job['run_id']})]
+    return job_progress(job, steps)
+
+
 # =============================================================================
 # ENDPOINTS - CONSULTA
 # =============================================================================
 
-@app.get("/api/v1/dre", response_model=DREResumo, tags=["Consulta"])
+@app.get("/api/v1/dre", response_model=DREResumo, tags=["Consulta"],
+         dependencies=[Depends(conditional_get)])
+@cached_query('dre')
 async def get_dre():
     """Resumo da DRE (totais anuais)"""
     try:
-        engine = get_engine()
-        
-        query = """
-            SELECT linha_dre, SUM(valor) as total
-            FROM dw.fact_dre
-            GROUP BY linha_dre
-        """
-        
-        with engine.connect() as conn:
-            rows = conn.execute(text(query)).fetchall()
+        rows = await run_query(statement('dre_resumo'))
         
         values = {row[0].upper(): float(row[1]) for row in rows}
         
@@ -231,48 +541,132 @@ async def get_dre():
         raise HTTPException(500, str(e))
 
 
-@app.get("/api/v1/dre/mensal", response_model=List[DREItem], tags=["Consulta"])
-async def get_dre_mensal(linha: Optional[str] = None):
-    """DRE detalhado por mês"""
+# Colunas de /dre/mensal disponíveis em fields= (nome → expressão SQL)
+DRE_MENSAL_FIELDS = {
+    'data_key': 'f.data_key',
+    'ano': 'c.ano',
+    'mes': 'c.mes_nome',
+    'cenario': 'f.cenario',
+    'linha': 'f.linha_dre',
+    'valor': 'f.valor',
+}
+DRE_MENSAL_DEFAULT_FIELDS = ['mes', 'linha', 'valor']
+DATA_KEY_PATTERN = r'^\d{4}-\d{2}$'
+
+
+def dre_mensal_query(
+    selected: List[str],
+    linha: Optional[str],
+    data_key_min: Optional[str],
+    data_key_max: Optional[str],
+    after: Optional[List[Any]],
+    limit: int
+):
+    """
+    Statement de uma página de /dre/mensal: só as colunas pedidas e a chave
+    (data_key, dre_key), filtros e cursor no WHERE, limit + 1 linhas.
+    
+    As colunas entram sempre na mesma ordem (a de DRE_MENSAL_FIELDS), para
+    que pedidos com os mesmos campos reaproveitem o mesmo statement.
+    
+    Returns:
+        (statement, valores)
+    """
+    names = [name for name in DRE_MENSAL_FIELDS if name in selected]
+    columns = ['f.data_key AS _data_key', 'f.dre_key AS _dre_key']
+    columns += [f"{DRE_MENSAL_FIELDS[name]} AS {name}" for name in names]
+    # Calendário só entra se alguma coluna dele foi pedida
+    join = ""
+    if any(DRE_MENSAL_FIELDS[name].startswith('c.') for name in names):
+        join = "JOIN dw.dim_calendario c ON f.data_key = c.data_key"
+    
+    where, values, declared = [], {'limit': limit + 1}, {'limit': INTEGER}
+    if linha:
+        # % e _ do cliente são literais, não curingas
+        where.append("UPPER(f.linha_dre) LIKE UPPER(:linha) ESCAPE '\\'")
+        values['linha'], declared['linha'] = contains_pattern(linha), TEXT
+    if data_key_min:
+        where.append("f.data_key >= :data_key_min")
+        values['data_key_min'], declared['data_key_min'] = data_key_min, TEXT
+    if data_key_max:
+        where.append("f.data_key <= :data_key_max")
+        values['data_key_max'], declared['data_key_max'] = data_key_max, TEXT
+    if after is not None:
+        where.append("(f.data_key, f.dre_key) > (:after_data_key, :after_dre_key)")
+        values['after_data_key'], values['after_dre_key'] = after
+        declared['after_data_key'], declared['after_dre_key'] = TEXT, INTEGER
+    
+    sql = f"""
+        SELECT {', '.join(columns)}
+        FROM dw.fact_dre f
+        {join}
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY f.data_key, f.dre_key
+        LIMIT :limit
+    """
+    return statement_for(sql, declared), values
+
+
+@app.get("/api/v1/dre/mensal", response_model=DREPage, tags=["Consulta"],
+         dependencies=[Depends(conditional_get)])
+@cached_query('dre_mensal')
+async def get_dre_mensal(
+    linha: Optional[str] = None,
+    ano_inicio: Optional[int] = None,
+    ano_fim: Optional[int] = None,
+    data_key_inicio: Annotated[Optional[str], Query(pattern=DATA_KEY_PATTERN)] = None,
+    data_key_fim: Annotated[Optional[str], Query(pattern=DATA_KEY_PATTERN)] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE
+):
+    """
+    DRE detalhado por mês, em páginas de até `limit` linhas.
+    
+    Repasse `next_cursor` em `cursor` para a próxima página (nulo na
+    última). `fields` escolhe as colunas (data_key, ano, mes, cenario,
+    linha, valor); `ano_*` e `data_key_*` filtram o período (inclusive).
+    """
     try:
-        engine = get_engine()
-        
-        query = """
-            SELECT c.mes_nome, f.linha_dre, f.valor
-            FROM dw.fact_dre f
-            JOIN dw.dim_calendario c ON f.data_key = c.data_key
-        """
-        if linha:
-            query += f" WHERE UPPER(f.linha_dre) LIKE UPPER('%{linha}%')"
-        query += " ORDER BY c.mes_num"
-        
-        with engine.connect() as conn:
-            rows = conn.execute(text(query)).fetchall()
+        selected = parse_fields(fields, DRE_MENSAL_FIELDS, DRE_MENSAL_DEFAULT_FIELDS)
+        after = decode_cursor(cursor, 2) if cursor else None
+    except PaginationError as e:
+        raise HTTPException(400, str(e))
+    if linha and not any(linha.upper() in v.upper() for v in await dimension_values('linha_dre')):
+        raise HTTPException(400, f"linha não corresponde a nenhuma linha da DRE: {linha}")
+    
+    # data_key é YYYY-MM: o período vira um range no índice de data_key
+    lower = [k for k in (data_key_inicio, ano_inicio and f"{ano_inicio:04d}-01") if k]
+    upper = [k for k in (data_key_fim, ano_fim and f"{ano_fim:04d}-12") if k]
+    
+    try:
+        compiled, values = dre_mensal_query(
+            selected, linha, max(lower, default=None), min(upper, default=None), after, limit
+        )
+        rows = await run_query(compiled, values)
         
-        return [DREItem(mes=r[0], linha=r[1], valor=float(r[2])) for r in rows]
+        result = page([dict(r._mapping) for r in rows], ['_data_key', '_dre_key'], limit)
+        result['items'] = [
+            {name: float(r[name]) if name == 'valor' else r[name] for name in selected}
+            for r in result['items']
+        ]
+        return DREPage(**result)
         
     except Exception as e:
         raise HTTPException(500, str(e))
 
 
-@app.get("/api/v1/receita", tags=["Consulta"])
+@app.get("/api/v1/receita", tags=["Consulta"],
+         dependencies=[Depends(conditional_get)])
+@cached_query('receita')
 async def get_receita(cenario: Optional[str] = None):
     """Resumo de receitas por tipo"""
+    await validate_dimensions(cenario=cenario)
     try:
-        engine = get_engine()
-        
-        where = f"WHERE cenario = '{cenario}'" if cenario else ""
-        
-        query = f"""
-            SELECT cenario, tipo_receita, SUM(valor) as total
-            FROM dw.fact_receita
-            {where}
-            GROUP BY cenario, tipo_receita
-            ORDER BY cenario, total DESC
-        """
-        
-        with engine.connect() as conn:
-            rows = conn.execute(text(query)).fetchall()
+        if cenario:
+            rows = await run_query(statement('receita_por_cenario'), {'cenario': cenario})
+        else:
+            rows = await run_query(statement('receita'))
         
         return [{"cenario": r[0], "tipo": r[1], "total": float(r[2])} for r in rows]
         
@@ -280,25 +674,22 @@ async def get_receita(cenario: Optional[str] = None):
         raise HTTPException(500, str(e))
 
 
-@app.get("/api/v1/despesa", tags=["Consulta"])
-async def get_despesa(cenario: Optional[str] = None, top: int = 10):
+@app.get("/api/v1/despesa", tags=["Consulta"],
+         dependencies=[Depends(conditional_get)])
+@cached_query('despesa')
+async def get_despesa(
+    cenario: Optional[str] = None,
+    top: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 10
+):
     """Top despesas por pacote"""
+    await validate_dimensions(cenario=cenario)
     try:
-        engine = get_engine()
-        
-        where = f"WHERE cenario = '{cenario}'" if cenario else ""
-        
-        query = f"""
-            SELECT cenario, pacote, SUM(valor) as total
-            FROM dw.fact_despesa
-            {where}
-            GROUP BY cenario, pacote
-            ORDER BY ABS(SUM(valor)) DESC
-            LIMIT {top}
-        """
-        
-        with engine.connect() as conn:
-            rows = conn.execute(text(query)).fetchall()
+        if cenario:
+            rows = await run_query(
+                statement('despesa_top_por_cenario'), {'cenario': cenario, 'top': top}
+            )
+        else:
+            rows = await run_query(statement('despesa_top'), {'top': top})
         
         return [{"cenario": r[0], "pacote": r[1], "total": float(r[2])} for r in rows]
         
@@ -306,6 +697,91 @@ async def get_despesa(cenario: Optional[str] = None, top: int = 10):
         raise HTTPException(500, str(e))
 
 
+@app.post("/api/v1/query", response_model=AggregateResult, tags=["Consulta"])
+async def aggregate_query(body: AggregateQuery):
+    """
+    Agregação livre sobre o Star Schema.
+    
+    `fato` (receita, despesa, dre), `dimensoes` para agrupar (cenario,
+    data_key, trimestre, unidade, pacote, tipo_receita, linha_dre),
+    `medidas` (total, linhas, media, minimo, maximo) e `filtros`
+    ({dimensão: valor ou [valores]}). Vira um único GROUP BY
+    parametrizado, lido do agregado dw.agg_* quando as dimensões cabem no
+    grão dele (`source` indica a tabela lida).
+    """
+    try:
+        query = build_query(body.fato, body.dimensoes, body.medidas, body.filtros, body.limit)
+    except OlapError as e:
+        raise HTTPException(400, str(e))
+    for name, options in query.filters.items():
+        for value in options:
+            await validate_dimensions(**{name: value})
+    
+    async def compute():
+        try:
+            rows = await run_query(statement_for(query.sql, query.params), query.values)
+        except Exception as e:
+            raise HTTPException(500, str(e))
+        return AggregateResult(
+            fato=body.fato,
+            source=query.source,
+            columns=query.columns,
+            items=to_items(query, rows[:body.limit]),
+            truncated=len(rows) > body.limit,
+            limit=body.limit
+        )
+    
+    return await cached_call(
+        response_cache, run_version, fetch_all, 'query', {'key': query.key}, compute
+    )
+
+
+# =============================================================================
+# ENDPOINTS - EXPORTAÇÃO
+# =============================================================================
+
+@app.get("/api/v1/export/{table}", tags=["Exportação"],
+         dependencies=[Depends(conditional_get)])
+async def export_table(
+    table: str,
+    format: Annotated[str, Query(pattern='^(csv|parquet|arrow)$')] = 'csv',
+    cenario: Optional[str] = None,
+    unidade: Optional[str] = None,
+    pacote: Optional[str] = None,
+    tipo_receita: Optional[str] = None,
+    linha_dre: Optional[str] = None,
+    tipo_imposto: Optional[str] = None,
+    data_key_inicio: Annotated[Optional[str], Query(pattern=DATA_KEY_PATTERN)] = None,
+    data_key_fim: Annotated[Optional[str], Query(pattern=DATA_KEY_PATTERN)] = None
+):
+    """
+    Exporta uma tabela do DW (fato ou dimensão) em streaming.
+    
+    As linhas saem de um cursor no servidor em lotes, sem montar o
+    resultado inteiro em memória (api/export.py).
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(404, f"Tabela não exportável: {table} "
+                                 f"(disponíveis: {', '.join(EXPORT_TABLES)})")
+    filters = {
+        'cenario': cenario, 'unidade': unidade, 'pacote': pacote,
+        'tipo_receita': tipo_receita, 'linha_dre': linha_dre, 'tipo_imposto': tipo_imposto,
+        'data_key_inicio': data_key_inicio, 'data_key_fim': data_key_fim,
+    }
+    await validate_dimensions(**filters)
+    try:
+        chunks = export_stream(get_engine(), table, format, filters)
+    except ExportError as e:
+        raise HTTPException(400, str(e))
+    
+    filename = f"{table}.{EXTENSIONS[format]}"
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
 # =============================================================================
 # MAIN
 # =============================================================================
@@ -0,0 +1,255 @@
+"""
+DRE Analytics 2025 - API
+Consulta Genérica (slice-and-dice sobre o Star Schema)
+
+POST /api/v1/query recebe um fato, dimensões, medidas e filtros e compila
+tudo num único SELECT ... GROUP BY parametrizado. Nomes de dimensão e de
+medida vêm de listas fechadas (DIMENSION_COLUMNS, MEASURES) e viram
+expressões SQL fixas; valores de filtro entram só como parâmetros.
+
+Roteamento para agregados: se todas as dimensões usadas (agrupamento e
+filtros) existem num agregado do fato (dw.agg_*, grão mensal sem unidade),
+a consulta lê o agregado em vez da fato. As medidas são reagregáveis
+(soma de somas, soma de contagens, mínimo de mínimos...), então o
+resultado é o mesmo com bem menos linhas lidas. `trimestre` vem de
+dw.dim_calendario via data_key e serve tanto à fato quanto ao agregado.
+
+Exemplo:
+    {"fato": "receita", "dimensoes": ["trimestre", "tipo_receita"],
+     "medidas": ["total", "linhas"], "filtros": {"cenario": ["Realizado"]}}
+    → SELECT c.trimestre, f.tipo_receita, SUM(f.valor), SUM(f.linhas)
+      FROM dw.agg_receita_mensal f JOIN dw.dim_calendario c ...
+      WHERE f.cenario IN ($1) GROUP BY ... ORDER BY ...
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from api.pagination import DEFAULT_PAGE_SIZE
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Dimensões aceitas: nome → expressão SQL (f = fato/agregado, c = calendário)
+DIMENSION_COLUMNS = {
+    'cenario': 'f.cenario',
+    'data_key': 'f.data_key',
+    'trimestre': 'c.trimestre',
+    'unidade': 'f.unidade',
+    'pacote': 'f.pacote',
+    'tipo_receita': 'f.tipo_receita',
+    'linha_dre': 'f.linha_dre',
+}
+
+# Dimensões que não estão em dw.dim_*: validadas pelo formato
+DIMENSION_PATTERNS = {
+    'data_key': r'^\d{4}-\d{2}$',
+    'trimestre': r'^Q[1-4]$',
+}
+
+# Medidas: nome → (expressão na fato, expressão no agregado)
+MEASURES = {
+    'total': ('SUM(f.valor)', 'SUM(f.valor)'),
+    'linhas': ('COUNT(*)', 'SUM(f.linhas)'),
+    'media': ('AVG(f.valor)', 'SUM(f.valor) / SUM(f.linhas)'),
+    'minimo': ('MIN(f.valor)', 'MIN(f.valor_min)'),
+    'maximo': ('MAX(f.valor)', 'MAX(f.valor_max)'),
+}
+DEFAULT_MEASURES = ['total']
+
+# Fatos: nome → (tabela, dimensões, [(agregado, dimensões do agregado)])
+# Agregados em ordem de preferência (o primeiro que cobrir o grão vence)
+FACTS: Dict[str, Tuple[str, set, List[Tuple[str, set]]]] = {
+    'receita': (
+        'dw.fact_receita',
+        {'cenario', 'data_key', 'trimestre', 'unidade', 'tipo_receita'},
+        [('dw.agg_receita_mensal', {'cenario', 'data_key', 'trimestre', 'tipo_receita'})],
+    ),
+    'despesa': (
+        'dw.fact_despesa',
+        {'cenario', 'data_key', 'trimestre', 'unidade', 'pacote'},
+        [('dw.agg_despesa_mensal', {'cenario', 'data_key', 'trimestre', 'pacote'})],
+    ),
+    'dre': (
+        'dw.fact_dre',
+        {'cenario', 'data_key', 'trimestre', 'linha_dre'},
+        [],
+    ),
+}
+
+MAX_FILTER_VALUES = 100     # Valores por filtro (cada um é um parâmetro)
+
+
+# =============================================================================
+# EXCEÇÕES
+# =============================================================================
+
+class OlapError(ValueError):
+    """Fato, dimensão, medida ou filtro inválidos (a API responde 400)"""
+
+
+# =============================================================================
+# COMPILAÇÃO
+# =============================================================================
+
+class OlapQuery:
+    """
+    Consulta compilada: SQL com :param, parâmetros declarados e valores.
+
+    `source` é a tabela lida (fato ou agregado), `filters` os filtros
+    normalizados e `key` a forma canônica do pedido (chave de cache:
+    pedidos equivalentes têm a mesma chave).
+    """
+
+    def __init__(self, sql: str, params: Dict[str, Dict], values: Dict[str, Any],
+                 source: str, dimensions: List[str], measures: List[str],
+                 filters: Dict[str, List[str]], key: str):
+        self.sql = sql
+        self.params = params
+        self.values = values
+        self.source = source
+        self.dimensions = dimensions
+        self.measures = measures
+        self.filters = filters
+        self.key = key
+
+    @property
+    def columns(self) -> List[str]:
+        return self.dimensions + self.measures
+
+
+def _unique(names: List[str], available, kind: str) -> List[str]:
+    selected = []
+    for name in names:
+        if name not in available:
+            raise OlapError(f"{kind} inválida: {name} (disponíveis: {', '.join(available)})")
+        if name not in selected:
+            selected.append(name)
+    return selected
+
+
+def normalize_filters(filters: Optional[Dict[str, Union[str, List[str]]]],
+                      allowed: set) -> Dict[str, List[str]]:
+    """
+    Filtros como {dimensão: [valores]} ordenados e sem repetição.
+
+    Raises:
+        OlapError: dimensão fora do fato, lista vazia/longa ou valor fora
+            do formato (data_key, trimestre)
+    """
+    normalized = {}
+    for name, values in (filters or {}).items():
+        if name not in DIMENSION_COLUMNS:
+            raise OlapError(f"Filtro inválido: {name} (disponíveis: {', '.join(DIMENSION_COLUMNS)})")
+        if name not in allowed:
+            raise OlapError(f"Filtro {name} não se aplica a este fato")
+        if isinstance(values, str):
+            values = [values]
+        values = sorted(set(values))
+        if not values:
+            raise OlapError(f"Filtro {name} sem valores")
+        if len(values) > MAX_FILTER_VALUES:
+            raise OlapError(f"Filtro {name} com mais de {MAX_FILTER_VALUES} valores")
+        pattern = DIMENSION_PATTERNS.get(name)
+        if pattern:
+            invalid = [v for v in values if not re.match(pattern, v)]
+            if invalid:
+                raise OlapError(f"{name} inválido: {', '.join(invalid)}")
+        normalized[name] = values
+    return normalized
+
+
+def choose_source(fact: str, used: set) -> Tuple[str, bool]:
+    """
+    Tabela que atende às dimensões usadas: o primeiro agregado que cobre
+    o grão ou, se nenhum cobrir, a própria fato.
+
+    Returns:
+        (tabela, é agregado)
+    """
+    table, _, aggregates = FACTS[fact]
+    for aggregate, dimensions in aggregates:
+        if used <= dimensions:
+            return aggregate, True
+    return table, False
+
+
+def build_query(
+    fact: str,
+    dimensions: Optional[List[str]] = None,
+    measures: Optional[List[str]] = None,
+    filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+    limit: int = DEFAULT_PAGE_SIZE
+) -> OlapQuery:
+    """
+    Compila o pedido num SELECT ... GROUP BY parametrizado.
+
+    Colunas e agrupamento seguem a ordem das dimensões pedidas; filtros
+    viram `coluna IN (:f_<dim>_<i>, ...)`. Busca limit + 1 linhas (a extra
+    só indica que o resultado foi truncado).
+
+    Raises:
+        OlapError: pedido inválido
+    """
+    if fact not in FACTS:
+        raise OlapError(f"Fato inválido: {fact} (disponíveis: {', '.join(FACTS)})")
+    _, allowed, _ = FACTS[fact]
+
+    dimensions = _unique(dimensions or [], DIMENSION_COLUMNS, 'Dimensão')
+    outside = [d for d in dimensions if d not in allowed]
+    if outside:
+        raise OlapError(f"Dimensão {', '.join(outside)} não se aplica ao fato {fact}")
+    measures = _unique(measures or DEFAULT_MEASURES, MEASURES, 'Medida')
+    filters = normalize_filters(filters, allowed)
+
+    source, aggregated = choose_source(fact, set(dimensions) | set(filters))
+
+    columns = [f"{DIMENSION_COLUMNS[d]} AS {d}" for d in dimensions]
+    columns += [f"{MEASURES[m][1 if aggregated else 0]} AS {m}" for m in measures]
+
+    # Calendário só entra se trimestre for usado
+    join = ""
+    if 'trimestre' in dimensions or 'trimestre' in filters:
+        join = "JOIN dw.dim_calendario c ON f.data_key = c.data_key"
+
+    where, values, params = [], {'limit': limit + 1}, {'limit': {'type': 'integer'}}
+    for name, options in filters.items():
+        placeholders = []
+        for i, value in enumerate(options):
+            param = f"f_{name}_{i}"
+            placeholders.append(f":{param}")
+            values[param], params[param] = value, {'type': 'text'}
+        where.append(f"{DIMENSION_COLUMNS[name]} IN ({', '.join(placeholders)})")
+
+    positions = ', '.join(str(i + 1) for i in range(len(dimensions)))
+    sql = f"""
+        SELECT {', '.join(columns)}
+        FROM {source} f
+        {join}
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        {'GROUP BY ' + positions if dimensions else ''}
+        {'ORDER BY ' + positions if dimensions else ''}
+        LIMIT :limit
+    """
+
+    key = json.dumps(
+        {'fato': fact, 'dimensoes': dimensions, 'medidas': measures,
+         'filtros': filters, 'limit': limit},
+        sort_keys=True, separators=(',', ':')
+    )
+    return OlapQuery(sql, params, values, source, dimensions, measures, filters, key)
+
+
+def to_items(query: OlapQuery, rows: List[Any]) -> List[Dict[str, Any]]:
+    """Linhas → dicionários (medidas como float; linhas como int)"""
+    items = []
+    for row in rows:
+        item = dict(zip(query.columns, row))
+        for m in query.measures:
+            if item[m] is not None:
+                item[m] = int(item[m]) if m == 'linhas' else float(item[m])
+        items.append(item)
+    return items
@@ -0,0 +1,124 @@
+"""
+DRE Analytics 2025 - API
+Paginação por Cursor e Projeção de Colunas
+
+Listas que crescem com o DW (anos, áreas, cenários) são devolvidas em
+páginas de tamanho limitado. A paginação é por chave (keyset): o cursor
+carrega a chave de ordenação da última linha entregue e a próxima página
+começa com `WHERE (chave) > (cursor)`, sem OFFSET. Cada página custa o
+mesmo (um range scan no índice), qualquer que seja a posição na lista.
+
+O cursor é opaco para o cliente (base64 do JSON da chave): basta repassar
+o `next_cursor` recebido até ele vir nulo.
+
+`fields=` escolhe as colunas da resposta; só elas (mais a chave) entram
+no SELECT. Filtros de texto por substring passam por `contains_pattern`,
+que escapa os curingas do LIKE.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+
+# =============================================================================
+# EXCEÇÕES
+# =============================================================================
+
+class PaginationError(ValueError):
+    """Cursor ou fields inválidos (a API responde 400)"""
+
+
+# =============================================================================
+# CURSOR
+# =============================================================================
+
+def encode_cursor(key: List[Any]) -> str:
+    """Cursor opaco com a chave de ordenação da última linha"""
+    payload = json.dumps(key, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Chave de ordenação do cursor.
+
+    Raises:
+        PaginationError: cursor malformado ou com outro número de colunas
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise PaginationError(f"Cursor inválido: {cursor}") from e
+    if not isinstance(key, list) or len(key) != size:
+        raise PaginationError(f"Cursor inválido: {cursor}")
+    return key
+
+
+# =============================================================================
+# FILTROS
+# =============================================================================
+
+LIKE_ESCAPE = '\\'
+
+
+def contains_pattern(value: str) -> str:
+    """
+    Padrão LIKE "contém `value`", com `%` e `_` do cliente como literais.
+
+    Usar com `LIKE :param ESCAPE '\\'` (LIKE_ESCAPE).
+    """
+    for char in (LIKE_ESCAPE, '%', '_'):
+        value = value.replace(char, LIKE_ESCAPE + char)
+    return f"%{value}%"
+
+
+# =============================================================================
+# PROJEÇÃO
+# =============================================================================
+
+def parse_fields(fields: Optional[str], available: Dict[str, str],
+                 default: List[str]) -> List[str]:
+    """
+    Colunas pedidas em `fields` (separadas por vírgula), na ordem pedida.
+
+    Raises:
+        PaginationError: coluna fora de `available`
+    """
+    if not fields:
+        return list(default)
+
+    selected = []
+    for name in (f.strip() for f in fields.split(',')):
+        if not name:
+            continue
+        if name not in available:
+            raise PaginationError(
+                f"Campo inválido: {name} (disponíveis: {', '.join(available)})"
+            )
+        if name not in selected:
+            selected.append(name)
+    return selected or list(default)
+
+
+def page(rows: List[Dict[str, Any]], key_columns: List[str], limit: int) -> Dict[str, Any]:
+    """
+    Página a partir de `limit + 1` linhas buscadas: a linha extra só indica
+    que há próxima página.
+    """
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_next and rows:
+        next_cursor = encode_cursor([rows[-1][c] for c in key_columns])
+    return {'items': rows, 'next_cursor': next_cursor, 'limit': limit}
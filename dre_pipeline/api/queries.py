@@ -0,0 +1,152 @@
+"""
+DRE Analytics 2025 - API
+Consultas Nomeadas (statements preparados)
+
+Cada consulta da API é um statement nomeado com parâmetros declarados e
+tipados (como as regras de DQ), compilado uma vez (:param → $n) pelo
+etl/_00_prepared.py. O texto do SQL nunca muda com os valores, então o
+PostgreSQL faz parse e plano uma vez por conexão do pool e reaproveita:
+
+- asyncpg (consultas da API no PostgreSQL): o driver prepara o statement
+  na primeira execução em cada conexão e guarda no cache da conexão
+  (api.db_pool.connect_args.prepared_statement_cache_size; padrão 256)
+- psycopg2: PREPARE/EXECUTE explícitos, uma vez por conexão física
+- DuckDB: SQL compilado executado com parâmetros posicionais
+
+Consultas com forma variável (colunas e filtros de /dre/mensal) passam por
+`statement_for`: cada forma distinta vira um statement próprio, nomeado
+pelo hash do SQL, e também é preparada uma única vez por conexão.
+
+Valores de filtro que correspondem a dimensões (cenário, unidade, pacote,
+tipo de receita, linha da DRE) são validados contra as tabelas dw.dim_*
+antes de consultar as fatos (ver validate_dimensions em api/main.py).
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from etl._00_config import get_config, get_engine, get_async_engine
+from etl._00_prepared import CompiledStatement, execute_statement
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+STATEMENT_PREFIX = 'api'
+MAX_DYNAMIC_STATEMENTS = 256    # Formas distintas guardadas (LRU)
+
+TEXT = {'type': 'text'}
+INTEGER = {'type': 'integer'}
+
+# Consultas nomeadas: nome → (SQL com :param, parâmetros declarados)
+QUERIES: Dict[str, Tuple[str, Dict[str, Dict]]] = {
+    'dre_resumo': ("""
+        SELECT linha_dre, SUM(valor) AS total
+        FROM dw.fact_dre
+        GROUP BY linha_dre
+    """, {}),
+    'receita': ("""
+        SELECT cenario, tipo_receita, SUM(valor) AS total
+        FROM dw.fact_receita
+        GROUP BY cenario, tipo_receita
+        ORDER BY cenario, total DESC
+    """, {}),
+    'receita_por_cenario': ("""
+        SELECT cenario, tipo_receita, SUM(valor) AS total
+        FROM dw.fact_receita
+        WHERE cenario = :cenario
+        GROUP BY cenario, tipo_receita
+        ORDER BY cenario, total DESC
+    """, {'cenario': TEXT}),
+    'despesa_top': ("""
+        SELECT cenario, pacote, SUM(valor) AS total
+        FROM dw.fact_despesa
+        GROUP BY cenario, pacote
+        ORDER BY ABS(SUM(valor)) DESC
+        LIMIT :top
+    """, {'top': INTEGER}),
+    'despesa_top_por_cenario': ("""
+        SELECT cenario, pacote, SUM(valor) AS total
+        FROM dw.fact_despesa
+        WHERE cenario = :cenario
+        GROUP BY cenario, pacote
+        ORDER BY ABS(SUM(valor)) DESC
+        LIMIT :top
+    """, {'cenario': TEXT, 'top': INTEGER}),
+}
+
+# Parâmetros validados contra as dimensões: nome → (tabela, coluna)
+DIMENSIONS: Dict[str, Tuple[str, str]] = {
+    'cenario': ('dw.dim_cenario', 'cenario'),
+    'unidade': ('dw.dim_unidade', 'unidade'),
+    'pacote': ('dw.dim_pacote', 'pacote'),
+    'tipo_receita': ('dw.dim_tipo_receita', 'tipo_receita'),
+    'linha_dre': ('dw.dim_linha_dre', 'linha_dre'),
+}
+QUERIES.update({
+    f'dim_{name}': (f"SELECT DISTINCT {column} FROM {table} ORDER BY 1", {})
+    for name, (table, column) in DIMENSIONS.items()
+})
+
+
+# =============================================================================
+# STATEMENTS
+# =============================================================================
+
+_named: Dict[str, CompiledStatement] = {}
+_dynamic: 'OrderedDict[str, CompiledStatement]' = OrderedDict()
+
+
+def statement(name: str) -> CompiledStatement:
+    """Statement nomeado de QUERIES (compilado na primeira chamada)"""
+    if name not in _named:
+        sql, params = QUERIES[name]
+        _named[name] = CompiledStatement(f"{STATEMENT_PREFIX}_{name}", sql, params)
+    return _named[name]
+
+
+def statement_for(sql: str, params: Dict[str, Dict]) -> CompiledStatement:
+    """
+    Statement de uma consulta montada em tempo de execução.
+
+    O SQL só pode variar na forma (colunas, filtros presentes); valores vão
+    sempre em `params`. Mesma forma → mesmo statement (e mesmo nome).
+    """
+    if sql in _dynamic:
+        _dynamic.move_to_end(sql)
+        return _dynamic[sql]
+    compiled = CompiledStatement(STATEMENT_PREFIX, sql, params)
+    _dynamic[sql] = compiled
+    while len(_dynamic) > MAX_DYNAMIC_STATEMENTS:
+        _dynamic.popitem(last=False)
+    return compiled
+
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+def _run_query_sync(compiled: CompiledStatement, values: Dict[str, Any]) -> List[Any]:
+    with get_engine().connect() as conn:
+        return execute_statement(conn, compiled, values).fetchall()
+
+
+async def run_query(compiled: CompiledStatement,
+                    values: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """
+    Executa um statement sem bloquear o event loop.
+
+    Engine assíncrono quando o backend tem driver (o asyncpg recebe o SQL
+    compilado com os parâmetros posicionais e reaproveita o statement já
+    preparado na conexão); senão, execute_statement no threadpool.
+    """
+    values = values or {}
+    if not get_config().get_backend().supports_async:
+        return await run_in_threadpool(_run_query_sync, compiled, values)
+
+    async with get_async_engine().connect() as conn:
+        result = await conn.exec_driver_sql(compiled.sql, compiled.positional_params(values))
+        return result.fetchall()
@@ -0,0 +1,318 @@
+"""
+DRE Analytics 2025 - API
+Recebimento de Arquivos
+
+O upload é copiado em blocos para um arquivo temporário no diretório de
+destino, calculando o SHA-256 no caminho e abortando acima do tamanho
+máximo (api.upload.max_bytes). Só depois o arquivo entra no lugar do
+anterior com os.replace (atômico no mesmo sistema de arquivos), então o
+pipeline nunca lê um Excel pela metade.
+
+O corpo multipart é lido direto de `request.stream()` (stage_multipart):
+a parte do arquivo vai para o temporário conforme chega, sem o
+UploadFile do Starlette gravar o corpo inteiro antes. Um Content-Length
+acima do limite é recusado antes de ler qualquer byte, e o limite vale
+também durante a leitura (corpo chunked ou Content-Length falso).
+
+Com o hash em mãos, a API compara com o do último upload processado com
+sucesso: reenvios do mesmo arquivo (comuns no financeiro) são descartados
+sem enfileirar o pipeline.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional, Tuple, Union
+
+from python_multipart import MultipartParser
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024    # 50 MiB
+CHUNK_SIZE = 1024 * 1024                # Bloco de leitura/escrita (1 MiB)
+FORM_OVERHEAD = 64 * 1024               # Folga do corpo multipart além do arquivo
+
+
+# =============================================================================
+# EXCEÇÕES
+# =============================================================================
+
+class UploadTooLarge(Exception):
+    """Upload acima de api.upload.max_bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"Arquivo excede o limite de {max_bytes} bytes")
+
+
+class UploadError(ValueError):
+    """Corpo multipart inválido ou sem o arquivo (a API responde 400)"""
+
+
+# =============================================================================
+# ARQUIVO TEMPORÁRIO
+# =============================================================================
+
+class StagedUpload:
+    """
+    Upload completo em arquivo temporário, ainda fora do destino.
+
+    Uso:
+        staged = stage_upload(file.file, dest.parent, max_bytes)
+        if duplicado:
+            staged.discard()
+        else:
+            staged.commit(dest)
+    """
+
+    def __init__(self, path: Path, sha256: str, size: int):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+
+    def commit(self, dest: Union[str, Path]) -> Path:
+        """Move para o destino (substitui o arquivo anterior atomicamente)"""
+        os.replace(self.path, dest)
+        return Path(dest)
+
+    def discard(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class UploadWriter:
+    """
+    Temporário em `directory` gravado em blocos, com SHA-256 e limite.
+
+    Uso:
+        writer = UploadWriter(directory, max_bytes)
+        try:
+            writer.write(chunk)         # quantas vezes for preciso
+        except BaseException:
+            writer.abort()
+            raise
+        staged = writer.finish()
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = DEFAULT_MAX_BYTES):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=directory, prefix='.upload-', suffix='.part')
+        self.path = Path(tmp_name)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._file = os.fdopen(fd, 'wb')
+        self._digest = hashlib.sha256()
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Raises:
+            UploadTooLarge: acima de `max_bytes` (nada além do limite é gravado)
+        """
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        self._digest.update(chunk)
+        self._file.write(chunk)
+
+    def finish(self) -> StagedUpload:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        return StagedUpload(self.path, self._digest.hexdigest(), self.size)
+
+    def abort(self) -> None:
+        """Fecha e remove o temporário"""
+        self._file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def stage_upload(
+    source: BinaryIO,
+    directory: Union[str, Path],
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    chunk_size: int = CHUNK_SIZE
+) -> StagedUpload:
+    """
+    Copia `source` em blocos para um temporário em `directory`.
+
+    O temporário fica no mesmo diretório do destino para que o commit seja
+    um rename (e não uma cópia entre sistemas de arquivos).
+
+    Raises:
+        UploadTooLarge: acima de `max_bytes` (o temporário é removido)
+    """
+    writer = UploadWriter(directory, max_bytes)
+    try:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            writer.write(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.finish()
+
+
+# =============================================================================
+# MULTIPART EM STREAMING
+# =============================================================================
+
+def body_limit(max_bytes: int) -> int:
+    """Tamanho máximo do corpo multipart para um arquivo de até `max_bytes`"""
+    return max_bytes + FORM_OVERHEAD
+
+
+def check_content_length(headers: Dict[str, str], max_bytes: int) -> None:
+    """
+    Recusa pelo Content-Length, antes de ler o corpo.
+
+    Raises:
+        UploadTooLarge: Content-Length acima de body_limit(max_bytes)
+    """
+    try:
+        length = int(headers.get('content-length', ''))
+    except ValueError:
+        return      # Sem Content-Length (chunked): o limite vale na leitura
+    if length > body_limit(max_bytes):
+        raise UploadTooLarge(max_bytes)
+
+
+class _FormReader:
+    """Callbacks do parser: só a parte `field` (com filename) vai para o writer"""
+
+    def __init__(self, field: str, open_writer):
+        self.field = field
+        self.open_writer = open_writer
+        self.filename: Optional[str] = None
+        self.writer: Optional[UploadWriter] = None
+        self.pending: List[bytes] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b''
+        self._header_value = b''
+        self._in_file = False
+        self.complete = False
+
+    def callbacks(self) -> Dict:
+        return {
+            'on_part_begin': self.on_part_begin,
+            'on_header_field': self.on_header_field,
+            'on_header_value': self.on_header_value,
+            'on_header_end': self.on_header_end,
+            'on_headers_finished': self.on_headers_finished,
+            'on_part_data': self.on_part_data,
+            'on_part_end': self.on_part_end,
+            'on_end': self.on_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b''
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b'content-disposition', b''))
+        name = options.get(b'name', b'').decode('utf-8', 'replace')
+        self._in_file = name == self.field and b'filename' in options and self.writer is None
+        if self._in_file:
+            self.filename = options[b'filename'].decode('utf-8', 'replace')
+            self.writer = self.open_writer(self.filename)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self.pending.append(data[start:end])
+
+    def on_part_end(self) -> None:
+        self._in_file = False
+
+    def on_end(self) -> None:
+        self.complete = True
+
+
+async def stage_multipart(
+    stream: AsyncIterator[bytes],
+    content_type: str,
+    directory: Union[str, Path],
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    field: str = 'file',
+    suffixes: Tuple[str, ...] = ()
+) -> Tuple[str, StagedUpload]:
+    """
+    Lê o corpo multipart de `stream` e grava a parte `field` num temporário.
+
+    O corpo inteiro é limitado a body_limit(max_bytes) e o arquivo a
+    `max_bytes`: a leitura para no primeiro bloco acima do limite. A
+    gravação em disco roda no threadpool, fora do event loop.
+
+    Returns:
+        (nome do arquivo enviado, upload no temporário)
+
+    Raises:
+        UploadTooLarge: acima do limite (o temporário é removido)
+        UploadError: corpo não multipart (ou incompleto), sem a parte
+            `field` ou com extensão fora de `suffixes`
+    """
+    content_type, options = parse_options_header(content_type)
+    if content_type != b'multipart/form-data' or b'boundary' not in options:
+        raise UploadError("Envie o arquivo como multipart/form-data")
+
+    def open_writer(filename: str) -> UploadWriter:
+        if suffixes and not filename.endswith(suffixes):
+            raise UploadError(f"Extensão não aceita: {filename}")
+        return UploadWriter(directory, max_bytes)
+
+    form = _FormReader(field, open_writer)
+    parser = MultipartParser(options[b'boundary'], form.callbacks())
+    limit, received = body_limit(max_bytes), 0
+
+    try:
+        async for chunk in stream:
+            received += len(chunk)
+            if received > limit:
+                raise UploadTooLarge(max_bytes)
+            parser.write(chunk)
+            if form.pending:
+                pending, form.pending = form.pending, []
+                await run_in_threadpool(_write_all, form.writer, pending)
+        parser.finalize()
+        if not form.complete:
+            raise UploadError("Corpo multipart incompleto")
+    except MultipartParseError as e:
+        if form.writer is not None:
+            form.writer.abort()
+        raise UploadError(f"Corpo multipart inválido: {e}") from e
+    except BaseException:
+        if form.writer is not None:
+            form.writer.abort()
+        raise
+
+    if form.writer is None:
+        raise UploadError(f"Campo '{field}' com o arquivo não encontrado")
+    staged = await run_in_threadpool(form.writer.finish)
+    return form.filename, staged
+
+
+def _write_all(writer: UploadWriter, chunks: List[bytes]) -> None:
+    for chunk in chunks:
+        writer.write(chunk)
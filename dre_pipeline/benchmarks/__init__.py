@@ -0,0 +1,5 @@
+"""
+DRE Analytics 2025 - Benchmarks
+
+Gerador de planilhas sintéticas e harness de desempenho do pipeline.
+"""
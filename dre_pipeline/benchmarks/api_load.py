@@ -0,0 +1,199 @@
+"""
+DRE Analytics 2025 - Benchmarks
+Teste de Carga da API
+
+Dispara requisições GET contra os endpoints de consulta com níveis
+crescentes de concorrência e mede vazão (req/s) e latência (p50/p95/p99)
+em cada nível. Com consultas que não bloqueiam o event loop, a vazão cresce
+com a concorrência até saturar o pool (api.db_pool) ou o banco; com
+consultas bloqueantes ela fica estável e só a latência cresce.
+
+A API precisa estar no ar (ou use --start-server para subir um uvicorn
+com o config.yml do projeto).
+
+Uso:
+    python -m benchmarks.api_load --url http://localhost:8000
+    python -m benchmarks.api_load --start-server --concurrency 1 4 16 64 --requests 400
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+RESULTS_DIR = Path(__file__).parent / 'results'
+
+DEFAULT_URL = 'http://127.0.0.1:8000'
+DEFAULT_PATHS = [
+    '/api/v1/dre',
+    '/api/v1/dre/mensal',
+    '/api/v1/receita',
+    '/api/v1/despesa?top=10',
+]
+DEFAULT_CONCURRENCY = [1, 2, 4, 8, 16, 32]
+DEFAULT_REQUESTS = 200       # Requisições por nível de concorrência
+SERVER_STARTUP_TIMEOUT = 30  # Segundos até o /api/v1/health responder
+
+
+# =============================================================================
+# CARGA
+# =============================================================================
+
+def _request(url: str, timeout: float) -> Optional[float]:
+    """Latência (s) de um GET; None se falhar"""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            if response.status >= 400:
+                return None
+    except (urllib.error.URLError, OSError):
+        return None
+    return time.perf_counter() - start
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize_level(concurrency: int, latencies: List[Optional[float]],
+                    elapsed: float) -> Dict[str, Any]:
+    """Resume um nível de concorrência (vazão conta só as respostas com sucesso)"""
+    ok = [lat for lat in latencies if lat is not None]
+    ms = [lat * 1000 for lat in ok]
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': len(latencies) - len(ok),
+        'elapsed_seconds': round(elapsed, 3),
+        'requests_per_sec': round(len(ok) / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(statistics.median(ms), 1) if ms else None,
+        'p95_ms': round(_percentile(ms, 95), 1) if ms else None,
+        'p99_ms': round(_percentile(ms, 99), 1) if ms else None,
+    }
+
+
+def run_level(base_url: str, paths: List[str], concurrency: int,
+              requests: int, timeout: float = 30.0) -> Dict[str, Any]:
+    """Executa `requests` GETs (alternando os paths) com `concurrency` clientes"""
+    urls = [base_url.rstrip('/') + paths[i % len(paths)] for i in range(requests)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(lambda url: _request(url, timeout), urls))
+        elapsed = time.perf_counter() - start
+    return summarize_level(concurrency, latencies, elapsed)
+
+
+def add_scaling(levels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Acrescenta o ganho de vazão de cada nível em relação ao primeiro"""
+    base = levels[0]['requests_per_sec'] if levels else 0
+    for level in levels:
+        level['speedup'] = round(level['requests_per_sec'] / base, 2) if base else None
+    return levels
+
+
+# =============================================================================
+# SERVIDOR
+# =============================================================================
+
+def start_server(port: int, workers: int = 1) -> subprocess.Popen:
+    """Sobe um uvicorn local e espera o health check"""
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api.main:app',
+         '--port', str(port), '--workers', str(workers), '--log-level', 'warning'],
+        cwd=PROJECT_ROOT
+    )
+    deadline = time.time() + SERVER_STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn terminou com código {proc.returncode}")
+        if _request(f'http://127.0.0.1:{port}/api/v1/health', timeout=1) is not None:
+            return proc
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("A API não respondeu ao health check a tempo")
+
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+def run_load_test(base_url: str, paths: List[str], concurrency: List[int],
+                  requests: int) -> List[Dict[str, Any]]:
+    """Aquece a API e mede cada nível de concorrência"""
+    run_level(base_url, paths, 1, len(paths))
+
+    print("=" * 70)
+    print(f"   🔥 TESTE DE CARGA - {base_url}")
+    print("=" * 70)
+    print(f"   {'conc.':>5} {'req/s':>9} {'ganho':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'erros':>6}")
+
+    levels = []
+    for level in concurrency:
+        levels.append(run_level(base_url, paths, level, requests))
+        add_scaling(levels)
+        r = levels[-1]
+        print(f"   {r['concurrency']:>5} {r['requests_per_sec']:>9.1f} {r['speedup']:>6.2f}x "
+              f"{r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms {r['errors']:>6}")
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga dos endpoints de consulta')
+    parser.add_argument('--url', default=DEFAULT_URL, help=f'URL base da API (default: {DEFAULT_URL})')
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS, help='Endpoints (alternados)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=DEFAULT_CONCURRENCY,
+                        help=f'Níveis de concorrência (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS,
+                        help='Requisições por nível')
+    parser.add_argument('--start-server', action='store_true',
+                        help='Sobe um uvicorn local (porta da --url) durante o teste')
+    parser.add_argument('--output', type=Path, help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    server = None
+    if args.start_server:
+        port = urllib.parse.urlparse(args.url).port or 8000
+        server = start_server(port)
+    try:
+        levels = run_load_test(args.url, args.paths, args.concurrency, args.requests)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output is None:
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        args.output = RESULTS_DIR / f"api_load_{stamp}.json"
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        'timestamp': datetime.now().isoformat(),
+        'url': args.url,
+        'paths': args.paths,
+        'levels': levels,
+    }, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\n💾 Resultados: {args.output}")
+
+    if any(level['errors'] for level in levels):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+DRE Analytics 2025 - Benchmarks
+Tempo de Import (cold start)
+
+Mede, num interpretador novo para cada alvo, o tempo de import dos
+pontos de entrada (pacote etl, CLI e API) com `python -X importtime`, e o
+tempo de parede de `python -m etl._05_run_pipeline --help`.
+
+Para cada alvo lista os módulos mais pesados (tempo cumulativo), o que
+ajuda a achar imports que deveriam ser adiados para dentro das funções.
+
+Uso:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --top 15 --max-ms 300
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+
+# Módulos medidos com -X importtime
+DEFAULT_TARGETS = ['etl', 'etl._05_run_pipeline', 'api.main']
+
+# Comando medido por tempo de parede
+CLI_HELP = [sys.executable, '-m', 'etl._05_run_pipeline', '--help']
+
+# Bibliotecas pesadas que o caminho de CLI/config não deve carregar
+HEAVY_MODULES = ['pandas', 'numpy', 'sqlalchemy', 'openpyxl', 'duckdb', 'yaml', 'prometheus_client']
+
+
+# =============================================================================
+# MEDIÇÃO
+# =============================================================================
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Interpreta a saída de -X importtime.
+
+    Returns:
+        Lista de (módulo, self_us, cumulative_us) na ordem de import
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            entries.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return entries
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """Importa o módulo num interpretador novo e resume o -X importtime"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}:\n{proc.stderr[-2000:]}")
+
+    entries = parse_importtime(proc.stderr)
+    loaded = {name for name, _, _ in entries}
+    total_us = next((cum for name, _, cum in entries if name == module), 0)
+    return {
+        'module': module,
+        'total_ms': round(total_us / 1000, 1),
+        'modules_loaded': len(entries),
+        'heavy_loaded': [m for m in HEAVY_MODULES if m in loaded],
+        # Apenas pacotes de primeiro nível: o cumulativo já inclui os filhos
+        'heaviest': sorted(
+            ((name, round(cum / 1000, 1)) for name, _, cum in entries if '.' not in name),
+            key=lambda item: item[1], reverse=True
+        ),
+    }
+
+
+def measure_command(command: List[str], repeat: int = 3) -> float:
+    """Tempo de parede (ms, mediana) de um comando"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=PROJECT_ROOT, capture_output=True, check=True)
+        durations.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(durations), 1)
+
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+def run_import_benchmark(targets: List[str], top: int = 10,
+                         repeat: int = 3) -> Dict[str, Any]:
+    """Mede os alvos e o --help, imprimindo o resumo"""
+    results = {'imports': [], 'python_startup_ms': None, 'cli_help_ms': None}
+
+    print("=" * 70)
+    print("   ⏱️ TEMPO DE IMPORT (python -X importtime)")
+    print("=" * 70)
+    for module in targets:
+        result = measure_import(module)
+        results['imports'].append(result)
+        heavy = ', '.join(result['heavy_loaded']) or '-'
+        print(f"\n📦 {module}: {result['total_ms']:.1f} ms "
+              f"({result['modules_loaded']} módulos; pesados: {heavy})")
+        for name, ms in result['heaviest'][:top]:
+            print(f"   {name:<32} {ms:>9.1f} ms")
+
+    results['python_startup_ms'] = measure_command([sys.executable, '-c', 'pass'], repeat)
+    results['cli_help_ms'] = measure_command(CLI_HELP, repeat)
+    print(f"\n🚀 python -c pass:                    {results['python_startup_ms']:.1f} ms")
+    print(f"🚀 python -m etl._05_run_pipeline --help: {results['cli_help_ms']:.1f} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo de import dos pontos de entrada')
+    parser.add_argument('--targets', nargs='+', default=DEFAULT_TARGETS,
+                        help=f'Módulos a medir (default: {DEFAULT_TARGETS})')
+    parser.add_argument('--top', type=int, default=10, help='Módulos mais pesados listados por alvo')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetições do --help (mediana)')
+    parser.add_argument('--max-ms', type=float,
+                        help='Orçamento para o --help; acima dele o comando sai com código 2')
+    args = parser.parse_args()
+
+    results = run_import_benchmark(args.targets, args.top, args.repeat)
+
+    if args.max_ms is not None and results['cli_help_ms'] > args.max_ms:
+        print(f"\n❌ --help levou {results['cli_help_ms']:.1f} ms (orçamento: {args.max_ms:.0f} ms)")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
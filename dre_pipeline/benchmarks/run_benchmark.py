@@ -0,0 +1,419 @@
+"""
+DRE Analytics 2025 - Benchmarks
+Harness de Desempenho do Pipeline
+
+Para cada escala gera uma planilha sintética e mede extração (Excel → RAW),
+transformações (RAW → STG, STG → DW) e DQ contra o banco do config.yml:
+duração, linhas, vazão (linhas/s), CPU e pico de memória (RSS) por fase.
+
+Cada escala roda num subprocesso próprio, então o pico de RSS é da escala
+e não do maior tamanho já processado. O resultado vai para
+benchmarks/results/bench_<data>_<commit>.json e pode ser comparado com
+uma execução anterior (--compare).
+
+ATENÇÃO: as fases truncam e recarregam as tabelas RAW/STG/DW do banco
+configurado. Use um banco de desenvolvimento (exige --yes).
+
+O preset de cada escala pode ser ajustado com --unidades, --pacotes e
+--rows; as opções usadas ficam em 'options' no JSON. --years aceita só 1:
+o pipeline carrega um ano (dw.dim_calendario tem os meses de
+etl.ano_referencia e o STG atribui as despesas a esse ano).
+
+Uso:
+    python -m benchmarks.run_benchmark --yes --scales 1 10 100
+    python -m benchmarks.run_benchmark --yes --scales 10 --unidades 200 --rows 50000
+    python -m benchmarks.run_benchmark --yes --compare benchmarks/results/bench_anterior.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.synthetic_workbook import WorkbookSpec, generate_workbook, spec_for_scale
+from etl._00_config import PROJECT_ROOT, get_config, get_engine
+from etl._00_step_metrics import StepMetrics, peak_rss_mb, record_result, step_context
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+DEFAULT_SCALES = [1, 10, 100]
+RESULTS_DIR = Path(__file__).parent / 'results'
+
+# Variação relativa destacada na comparação (vazão menor / memória maior)
+REGRESSION_THRESHOLD = 0.10
+
+# Dimensões do preset que podem ser sobrescritas na linha de comando
+SPEC_OVERRIDES = ('unidades', 'pacotes', 'rows')
+
+
+# =============================================================================
+# FASES
+# =============================================================================
+
+def _run_phase(name: str, calls: List[Tuple[str, Callable[[], Any]]]) -> Dict[str, Any]:
+    """Executa as chamadas como sub-steps de uma fase e resume as métricas"""
+    with step_context(name) as phase:
+        for step_name, call in calls:
+            with step_context(step_name) as step:
+                record_result(step, call())
+
+    # Linhas da fase = soma dos steps (filhos já trazem seus próprios sub-steps)
+    phase.add_rows(
+        read=sum(c.rows_read for c in phase.children),
+        written=sum(c.rows_written for c in phase.children)
+    )
+    return _phase_record(phase)
+
+
+def _phase_record(metrics: StepMetrics) -> Dict[str, Any]:
+    return {
+        'phase': metrics.name,
+        'duration_seconds': round(metrics.duration_seconds, 3),
+        'rows_read': metrics.rows_read,
+        'rows_written': metrics.rows_written,
+        'rows_per_sec': round(metrics.rows_per_sec, 1) if metrics.rows_per_sec else None,
+        'cpu_seconds': round(metrics.cpu_seconds, 3),
+        # Fases rodam em sequência: pico do processo da escala ao fim da fase
+        'process_peak_rss_mb': (
+            round(metrics.process_peak_rss_mb, 1) if metrics.process_peak_rss_mb else None
+        ),
+        'steps': {
+            c.name: {
+                'duration_seconds': round(c.duration_seconds, 3),
+                'rows_written': c.rows_written,
+                'rows_per_sec': round(c.rows_per_sec, 1) if c.rows_per_sec else None,
+            }
+            for c in metrics.children
+        },
+    }
+
+
+def benchmark_spec(
+    factor: int,
+    ano: int,
+    years: int = 1,
+    overrides: Optional[Dict[str, Optional[int]]] = None
+) -> WorkbookSpec:
+    """
+    Preset da escala com as dimensões sobrescritas.
+
+    Raises:
+        ValueError: years > 1 (o DW só tem o calendário de um ano) ou
+            dimensões inválidas
+    """
+    if years != 1:
+        raise ValueError(
+            f"--years {years} não é suportado: dw.dim_calendario só tem os meses de "
+            f"etl.ano_referencia ({ano}) e o STG atribui as despesas a esse ano. "
+            f"Para medir só a extração de vários anos, gere o arquivo com "
+            f"benchmarks.synthetic_workbook --years"
+        )
+    return spec_for_scale(factor, years=years, ano=ano).replace(**(overrides or {}))
+
+
+def run_scale(
+    factor: int,
+    workdir: Path,
+    years: int = 1,
+    overrides: Optional[Dict[str, Optional[int]]] = None
+) -> Dict[str, Any]:
+    """
+    Gera a planilha da escala e mede as fases do pipeline (no processo atual).
+
+    Returns:
+        Resultado da escala: spec, arquivo, fases e pico de memória
+    """
+    from etl._01_extract_excel import run_extract
+    from etl._02_transform_raw_to_stg import (
+        transform_receita, transform_despesa, transform_dre, transform_aliquota
+    )
+    from etl._03_transform_stg_to_dw import (
+        load_dim_unidade, load_dim_pacote, load_dim_linha_dre,
+        load_fact_receita, load_fact_despesa, load_fact_dre, load_fact_aliquota,
+        load_agg_receita_mensal, load_agg_despesa_mensal
+    )
+    from etl._04_dq_checks import run_dq_checks
+
+    config = get_config()
+    etl_config = config.get_etl_config()
+    engine = get_engine()
+
+    spec = benchmark_spec(factor, etl_config.get('ano_referencia', 2025), years, overrides)
+    path = Path(workdir) / f'synthetic_{factor}x.xlsx'
+
+    started = time.perf_counter()
+    sheet_rows = generate_workbook(path, spec, etl_config.get('sheets'))
+    generate_seconds = time.perf_counter() - started
+
+    def extract():
+        results = run_extract(engine, file_path=path)
+        return {
+            'rows_read': sum(r.get('rows_read', 0) for r in results.values()),
+            'rows_written': sum(r.get('rows_loaded', 0) for r in results.values()),
+        }
+
+    def dq_checks():
+        results = run_dq_checks(engine)
+        return {'rows_read': results['total']}
+
+    phases = [
+        _run_phase('extract', [('extract_excel', extract)]),
+        _run_phase('transform_stg', [
+            ('stg_receita', lambda: transform_receita(engine)),
+            ('stg_despesa', lambda: transform_despesa(engine)),
+            ('stg_dre', lambda: transform_dre(engine)),
+            ('stg_aliquota', lambda: transform_aliquota(engine)),
+        ]),
+        _run_phase('load_dw', [
+            ('dim_unidade', lambda: load_dim_unidade(engine)),
+            ('dim_pacote', lambda: load_dim_pacote(engine)),
+            ('dim_linha_dre', lambda: load_dim_linha_dre(engine)),
+            ('fact_receita', lambda: load_fact_receita(engine)),
+            ('fact_despesa', lambda: load_fact_despesa(engine)),
+            ('fact_dre', lambda: load_fact_dre(engine)),
+            ('fact_aliquota', lambda: load_fact_aliquota(engine)),
+            ('agg_receita_mensal', lambda: load_agg_receita_mensal(engine)),
+            ('agg_despesa_mensal', lambda: load_agg_despesa_mensal(engine)),
+        ]),
+        _run_phase('dq', [('dq_checks', dq_checks)]),
+    ]
+
+    return {
+        'scale': factor,
+        'spec': spec.to_dict(),
+        'sheet_rows': sheet_rows,
+        'file_mb': round(path.stat().st_size / 1024 / 1024, 2),
+        'generate_seconds': round(generate_seconds, 3),
+        'total_seconds': round(sum(p['duration_seconds'] for p in phases), 3),
+        'peak_rss_mb': peak_rss_mb(),
+        'phases': phases,
+    }
+
+
+# =============================================================================
+# COMPARAÇÃO
+# =============================================================================
+
+def _relative(new: Optional[float], old: Optional[float]) -> Optional[float]:
+    if new is None or not old:
+        return None
+    return round((new - old) / old, 4)
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = REGRESSION_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """
+    Compara vazão e memória por escala/fase com um resultado anterior.
+
+    Returns:
+        Uma linha por escala/fase presente nos dois resultados, com as
+        variações relativas e 'regression' = vazão caiu ou memória subiu
+        mais que `threshold`
+    """
+    old_scales = {s['scale']: s for s in baseline.get('scales', [])}
+    rows = []
+    for scale in current.get('scales', []):
+        old = old_scales.get(scale['scale'])
+        if not old:
+            continue
+        old_phases = {p['phase']: p for p in old['phases']}
+        for phase in scale['phases']:
+            before = old_phases.get(phase['phase'])
+            if not before:
+                continue
+            throughput = _relative(phase['rows_per_sec'], before['rows_per_sec'])
+            memory = _relative(phase.get('process_peak_rss_mb'), before.get('process_peak_rss_mb'))
+            rows.append({
+                'scale': scale['scale'],
+                'phase': phase['phase'],
+                'rows_per_sec': phase['rows_per_sec'],
+                'baseline_rows_per_sec': before['rows_per_sec'],
+                'throughput_change': throughput,
+                'memory_change': memory,
+                'regression': (
+                    (throughput is not None and throughput < -threshold)
+                    or (memory is not None and memory > threshold)
+                ),
+            })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], baseline_commit: Optional[str]) -> None:
+    print("\n" + "=" * 70)
+    print(f"   COMPARAÇÃO COM {baseline_commit or 'baseline'}")
+    print("=" * 70)
+    for row in rows:
+        emoji = '⚠️' if row['regression'] else '✅'
+        throughput = f"{row['throughput_change']:+.1%}" if row['throughput_change'] is not None else 'n/a'
+        memory = f"{row['memory_change']:+.1%}" if row['memory_change'] is not None else 'n/a'
+        print(f"   {emoji} {row['scale']:>5}x {row['phase']:<14} vazão {throughput:>8}  memória {memory:>8}")
+
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+def _git_commit() -> Dict[str, Any]:
+    try:
+        sha = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip())
+        return {'commit': sha, 'dirty': dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def worker_command(
+    factor: int,
+    workdir: Path,
+    output: Path,
+    years: int = 1,
+    overrides: Optional[Dict[str, Optional[int]]] = None
+) -> List[str]:
+    """Linha de comando do subprocesso de uma escala"""
+    command = [
+        sys.executable, '-m', 'benchmarks.run_benchmark', '--worker', str(factor),
+        '--workdir', str(workdir), '--worker-output', str(output), '--years', str(years)
+    ]
+    for name, value in (overrides or {}).items():
+        if value is not None:
+            command += [f'--{name}', str(value)]
+    return command
+
+
+def _run_isolated(
+    factor: int,
+    workdir: Path,
+    years: int = 1,
+    overrides: Optional[Dict[str, Optional[int]]] = None
+) -> Dict[str, Any]:
+    """Roda uma escala num subprocesso (pico de RSS isolado)"""
+    output = workdir / f'result_{factor}x.json'
+    subprocess.run(
+        worker_command(factor, workdir, output, years, overrides),
+        cwd=PROJECT_ROOT, check=True
+    )
+    return json.loads(output.read_text(encoding='utf-8'))
+
+
+def run_benchmark(
+    scales: List[int],
+    output: Optional[Path] = None,
+    years: int = 1,
+    overrides: Optional[Dict[str, Optional[int]]] = None
+) -> Path:
+    """
+    Executa todas as escalas e grava o JSON de resultados.
+
+    Args:
+        scales: Fatores de escala
+        output: Arquivo JSON (default: benchmarks/results/bench_<data>_<commit>.json)
+        years: Anos cobertos pelas despesas
+        overrides: Dimensões que substituem as do preset (unidades, pacotes, rows)
+
+    Returns:
+        Caminho do arquivo de resultados
+    """
+    overrides = {name: (overrides or {}).get(name) for name in SPEC_OVERRIDES}
+    git = _git_commit()
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git['commit'],
+        'git_dirty': git['dirty'],
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {'years': years, **overrides},
+        'scales': [],
+    }
+
+    with tempfile.TemporaryDirectory(prefix='dre_bench_') as tmp:
+        for factor in scales:
+            print("\n" + "=" * 70)
+            print(f"   BENCHMARK {factor}x")
+            print("=" * 70)
+            scale = _run_isolated(factor, Path(tmp), years, overrides)
+            results['scales'].append(scale)
+            for phase in scale['phases']:
+                rate = f"{phase['rows_per_sec']:,.0f} linhas/s" if phase['rows_per_sec'] else '-'
+                print(f"   ⏱️ {phase['phase']:<14} {phase['duration_seconds']:>9.2f}s  {rate}")
+            print(f"   🧠 Pico de memória: {scale['peak_rss_mb']} MB")
+
+    if output is None:
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = RESULTS_DIR / f"bench_{stamp}_{git['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\n💾 Resultados: {output}")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do pipeline com planilhas sintéticas')
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help=f'Escalas a medir (default: {DEFAULT_SCALES}; 1000 ≈ 1M linhas por aba)')
+    parser.add_argument('--years', type=int, default=1,
+                        help='Anos cobertos pelas despesas (o pipeline carrega um ano: só 1)')
+    parser.add_argument('--unidades', type=int, help='Sobrescreve o número de unidades do preset')
+    parser.add_argument('--pacotes', type=int, help='Sobrescreve o número de pacotes do preset')
+    parser.add_argument('--rows', type=int, help='Sobrescreve as linhas por aba de despesas do preset')
+    parser.add_argument('--output', type=Path, help='Arquivo JSON de saída')
+    parser.add_argument('--compare', type=Path, help='Resultado anterior para comparação')
+    parser.add_argument('--yes', action='store_true',
+                        help='Confirma que as tabelas RAW/STG/DW do banco configurado serão recarregadas')
+    # Uso interno: execução de uma escala no subprocesso
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', type=Path, help=argparse.SUPPRESS)
+    parser.add_argument('--worker-output', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    overrides = {name: getattr(args, name) for name in SPEC_OVERRIDES}
+
+    if args.worker:
+        result = run_scale(args.worker, args.workdir, args.years, overrides)
+        args.worker_output.write_text(json.dumps(result, default=str), encoding='utf-8')
+        return
+
+    if not args.yes:
+        print("❌ O benchmark trunca e recarrega RAW/STG/DW do banco do config.yml.")
+        print("   Use um banco de desenvolvimento e rode novamente com --yes.")
+        sys.exit(1)
+
+    # Valida antes de gerar qualquer planilha ou tocar no banco
+    ano = get_config().get_etl_config().get('ano_referencia', 2025)
+    try:
+        for factor in args.scales:
+            benchmark_spec(factor, ano, args.years, overrides)
+    except ValueError as e:
+        parser.error(str(e))
+
+    path = run_benchmark(args.scales, args.output, args.years, overrides)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding='utf-8'))
+        current = json.loads(path.read_text(encoding='utf-8'))
+        rows = compare_results(baseline, current)
+        if baseline.get('options') != current['options']:
+            print(f"\n⚠️ Opções diferentes do baseline: {baseline.get('options')} → {current['options']}")
+        print_comparison(rows, baseline.get('git_commit'))
+        if any(r['regression'] for r in rows):
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""
+DRE Analytics 2025 - Benchmarks
+Gerador de Planilhas Sintéticas
+
+Gera arquivos no mesmo layout de dados_case_pbi.xlsx, lidos sem ajustes
+pelo _01_extract_excel.py:
+
+- Receita (Realizado/Orçado): relatório com meses na linha 0 e seções
+  SALES/SERVICE, uma linha por unidade, subtotais TOTAL e CONSOLIDADO
+- Despesas (Realizado/Orçado): tabela Data | Unidade | Pacote | Conta | Valor
+- Modelo DRE: linhas DRE × meses, coerentes com receita e despesas
+- Aliquotas: Imposto sobre Faturamento e IR & CSLL × meses
+
+O tamanho é controlado por unidades, pacotes, contas, linhas de despesa
+e anos (spec_for_scale gera os presets 1x/10x/100x/1000x). O relatório de
+receita só tem colunas de mês, então `anos` espalha apenas as datas das
+despesas; o pipeline carrega um ano só (etl.ano_referencia), então
+arquivos com mais de um ano servem para medir a extração, não o DW. Os valores seguem as proporções do case (SERVICE ~77% da receita,
+margem líquida entre 20% e 40%), então as regras de DQ de sanidade passam.
+
+Uso:
+    python -m benchmarks.synthetic_workbook --scale 10 --output data/bench_10x.xlsx
+"""
+
+import argparse
+import math
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from openpyxl import Workbook
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+MESES = ['JAN', 'FEV', 'MAR', 'ABR', 'MAI', 'JUN', 'JUL', 'AGO', 'SET', 'OUT', 'NOV', 'DEZ']
+
+# Mesmos nomes de aba do config.yml.example (etl.sheets)
+DEFAULT_SHEETS = {
+    'receita_realizado': 'Receita_Realizado',
+    'receita_orcado': 'Receita_Orç',
+    'despesas_realizado': 'Despesas_Realizado',
+    'despesas_orcado': 'Despesas_Orç',
+    'modelo_dre': 'Modelo DRE',
+    'aliquotas': 'Aliquotas',
+}
+
+# Limite de linhas de uma aba do Excel (menos o cabeçalho)
+EXCEL_MAX_ROWS = 1_048_575
+
+# Tamanho de referência (1x)
+BASE_UNIDADES = 10
+BASE_PACOTES = 12
+BASE_CONTAS = 5
+BASE_ROWS = 1_000
+
+ALIQUOTA_FATURAMENTO = 0.0925
+ALIQUOTA_IR_CSLL = 0.34
+
+
+# =============================================================================
+# ESPECIFICAÇÃO
+# =============================================================================
+
+class WorkbookSpec:
+    """
+    Dimensões da planilha sintética.
+
+    Args:
+        unidades: Unidades de negócio (linhas por seção da receita)
+        pacotes: Pacotes de despesa
+        contas: Contas por pacote
+        rows: Linhas por aba de despesas (Realizado e Orçado)
+        years: Anos cobertos pelas datas das despesas
+        ano: Primeiro ano (default: etl.ano_referencia do case)
+        seed: Semente do gerador (mesma spec → mesmo arquivo)
+    """
+
+    def __init__(
+        self,
+        unidades: int = BASE_UNIDADES,
+        pacotes: int = BASE_PACOTES,
+        contas: int = BASE_CONTAS,
+        rows: int = BASE_ROWS,
+        years: int = 1,
+        ano: int = 2025,
+        seed: int = 42
+    ):
+        if min(unidades, pacotes, contas, rows, years) < 1:
+            raise ValueError("Dimensões da planilha devem ser positivas")
+        if rows > EXCEL_MAX_ROWS:
+            raise ValueError(f"Máximo de {EXCEL_MAX_ROWS:,} linhas por aba (pedido: {rows:,})")
+        self.unidades = unidades
+        self.pacotes = pacotes
+        self.contas = contas
+        self.rows = rows
+        self.years = years
+        self.ano = ano
+        self.seed = seed
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            'unidades': self.unidades,
+            'pacotes': self.pacotes,
+            'contas': self.contas,
+            'rows': self.rows,
+            'years': self.years,
+            'ano': self.ano,
+            'seed': self.seed,
+        }
+
+    def replace(self, **changes: Optional[int]) -> 'WorkbookSpec':
+        """Cópia com as dimensões informadas (None mantém a atual)"""
+        dims = self.to_dict()
+        dims.update({k: v for k, v in changes.items() if v is not None})
+        return WorkbookSpec(**dims)
+
+    def __repr__(self) -> str:
+        return f"WorkbookSpec({self.to_dict()})"
+
+
+def spec_for_scale(factor: int, years: int = 1, ano: int = 2025) -> WorkbookSpec:
+    """
+    Preset de tamanho: linhas de despesa crescem linearmente com o fator;
+    unidades e pacotes crescem mais devagar (como num grupo que cresce
+    em volume mais do que em estrutura).
+    """
+    if factor < 1:
+        raise ValueError("Fator de escala deve ser >= 1")
+    return WorkbookSpec(
+        unidades=max(1, round(BASE_UNIDADES * math.sqrt(factor))),
+        pacotes=max(1, round(BASE_PACOTES * factor ** 0.25)),
+        contas=BASE_CONTAS,
+        rows=min(BASE_ROWS * factor, EXCEL_MAX_ROWS),
+        years=years,
+        ano=ano,
+    )
+
+
+# =============================================================================
+# GERAÇÃO DOS DADOS
+# =============================================================================
+
+def _receita(rng: np.random.Generator, unidades: int) -> Dict[str, np.ndarray]:
+    """Receita por unidade × mês (SERVICE ~3,3x SALES)"""
+    base = rng.uniform(80_000, 180_000, size=(unidades, 1))
+    sazonal = 1 + 0.15 * np.sin(np.linspace(0, 2 * np.pi, 12, endpoint=False))
+    sales = base * sazonal * rng.uniform(0.9, 1.1, size=(unidades, 12))
+    service = sales * rng.uniform(3.0, 3.7, size=(unidades, 12))
+    return {'SALES': sales.round(2), 'SERVICE': service.round(2)}
+
+
+def _orcado(rng: np.random.Generator, realizado: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return {
+        tipo: (valores * rng.uniform(0.95, 1.08, size=valores.shape)).round(2)
+        for tipo, valores in realizado.items()
+    }
+
+
+def _despesas(
+    rng: np.random.Generator,
+    spec: WorkbookSpec,
+    unidades: List[str],
+    pacotes: List[str],
+    total: float
+) -> List[List[Any]]:
+    """Lançamentos de despesa (valores negativos) somando `total`"""
+    n = spec.rows
+    anos = spec.ano + rng.integers(0, spec.years, size=n)
+    meses = rng.integers(1, 13, size=n)
+    dias = rng.integers(1, 29, size=n)
+    unidade_idx = rng.integers(0, len(unidades), size=n)
+    pacote_idx = rng.integers(0, len(pacotes), size=n)
+    conta_idx = rng.integers(1, spec.contas + 1, size=n)
+    pesos = rng.uniform(0.5, 1.5, size=n)
+    valores = -(pesos / pesos.sum() * total).round(2)
+
+    return [
+        [
+            date(int(anos[i]), int(meses[i]), int(dias[i])),
+            unidades[unidade_idx[i]],
+            pacotes[pacote_idx[i]],
+            f"{pacotes[pacote_idx[i]]} - Conta {conta_idx[i]:02d}",
+            float(valores[i]),
+        ]
+        for i in range(n)
+    ]
+
+
+def _despesa_mensal(linhas: List[List[Any]], ano: int) -> np.ndarray:
+    """Total de despesas por mês do primeiro ano (para o Modelo DRE)"""
+    totais = np.zeros(12)
+    for data, _, _, _, valor in linhas:
+        if data.year == ano:
+            totais[data.month - 1] += valor
+    return totais
+
+
+def _modelo_dre(receita_mensal: np.ndarray, despesa_mensal: np.ndarray) -> List[List[Any]]:
+    """Linhas DRE × meses, na ordem e com os nomes do extrator"""
+    bruta = receita_mensal
+    imposto = -bruta * ALIQUOTA_FATURAMENTO
+    comissoes = -bruta * 0.03
+    liquida = bruta + imposto + comissoes
+    custos = despesa_mensal
+    ebitda_meta = liquida + custos
+    plr = -np.maximum(ebitda_meta, 0) * 0.05
+    ebitda = ebitda_meta + plr
+    nao_operacional = bruta * 0.005
+    financeiro = -bruta * 0.01
+    ebt = ebitda + nao_operacional + financeiro
+    ir = -np.maximum(ebt, 0) * ALIQUOTA_IR_CSLL
+    lucro = ebt + ir
+
+    linhas = [
+        ('Receita Bruta', bruta), ('Imposto Sobre Faturamento', imposto),
+        ('Comissões de Venda', comissoes), ('Receita Líquida', liquida),
+        ('Custos', custos), ('EBITDA META', ebitda_meta), ('PLR', plr),
+        ('EBITDA', ebitda), ('Resultado Não Operacional', nao_operacional),
+        ('Resultado Financeiro', financeiro), ('EBT', ebt),
+        ('IR & CSLL', ir), ('Lucro Líquido', lucro),
+    ]
+    return [[nome] + [round(float(v), 2) for v in valores] for nome, valores in linhas]
+
+
+# =============================================================================
+# ESCRITA DO ARQUIVO
+# =============================================================================
+
+def _write_receita(wb: Workbook, title: str, unidades: List[str], valores: Dict[str, np.ndarray]) -> int:
+    ws = wb.create_sheet(title)
+    ws.append(['Receita Bruta'] + MESES + ['TOTAL'])
+    rows = 1
+    for tipo in ('SALES', 'SERVICE'):
+        ws.append([tipo])
+        for i, unidade in enumerate(unidades):
+            mensal = [float(v) for v in valores[tipo][i]]
+            ws.append([unidade] + mensal + [round(sum(mensal), 2)])
+        subtotal = valores[tipo].sum(axis=0)
+        ws.append(['TOTAL'] + [round(float(v), 2) for v in subtotal] + [round(float(subtotal.sum()), 2)])
+        rows += len(unidades) + 2
+    consolidado = valores['SALES'].sum(axis=0) + valores['SERVICE'].sum(axis=0)
+    ws.append(['CONSOLIDADO'] + [round(float(v), 2) for v in consolidado] + [round(float(consolidado.sum()), 2)])
+    return rows + 1
+
+
+def _write_despesas(wb: Workbook, title: str, linhas: List[List[Any]]) -> int:
+    ws = wb.create_sheet(title)
+    ws.append(['Data', 'Unidade', 'Pacote', 'Conta', 'Valor'])
+    for linha in linhas:
+        ws.append(linha)
+    return len(linhas) + 1
+
+
+def _write_mensal(wb: Workbook, title: str, header: str, linhas: List[List[Any]]) -> int:
+    ws = wb.create_sheet(title)
+    ws.append([header] + MESES)
+    for linha in linhas:
+        ws.append(linha)
+    return len(linhas) + 1
+
+
+def generate_workbook(
+    path: Path,
+    spec: Optional[WorkbookSpec] = None,
+    sheets: Optional[Dict[str, str]] = None
+) -> Dict[str, int]:
+    """
+    Grava a planilha sintética.
+
+    Args:
+        path: Arquivo .xlsx de saída
+        spec: Dimensões (default: 1x)
+        sheets: Nomes das abas (seção etl.sheets do config)
+
+    Returns:
+        Linhas gravadas por aba (chave de etl.sheets → linhas)
+    """
+    spec = spec or WorkbookSpec()
+    sheets = {**DEFAULT_SHEETS, **(sheets or {})}
+    rng = np.random.default_rng(spec.seed)
+
+    unidades = [f"Unidade {i:04d}" for i in range(1, spec.unidades + 1)]
+    pacotes = [f"Pacote {i:03d}" for i in range(1, spec.pacotes + 1)]
+
+    receita_real = _receita(rng, spec.unidades)
+    receita_orc = _orcado(rng, receita_real)
+    receita_mensal = receita_real['SALES'].sum(axis=0) + receita_real['SERVICE'].sum(axis=0)
+
+    # Despesas ~50% da receita bruta de cada ano coberto
+    total_real = float(receita_mensal.sum()) * 0.5 * spec.years
+    despesas_real = _despesas(rng, spec, unidades, pacotes, total_real)
+    despesas_orc = _despesas(rng, spec, unidades, pacotes, total_real * rng.uniform(1.05, 1.2))
+
+    # write_only: grava em streaming, sem manter as células em memória
+    wb = Workbook(write_only=True)
+    rows = {
+        'receita_realizado': _write_receita(wb, sheets['receita_realizado'], unidades, receita_real),
+        'receita_orcado': _write_receita(wb, sheets['receita_orcado'], unidades, receita_orc),
+        'despesas_realizado': _write_despesas(wb, sheets['despesas_realizado'], despesas_real),
+        'despesas_orcado': _write_despesas(wb, sheets['despesas_orcado'], despesas_orc),
+        'modelo_dre': _write_mensal(
+            wb, sheets['modelo_dre'], 'DRE',
+            _modelo_dre(receita_mensal, _despesa_mensal(despesas_real, spec.ano))
+        ),
+        'aliquotas': _write_mensal(wb, sheets['aliquotas'], 'Alíquota', [
+            ['Imposto sobre Faturamento'] + [ALIQUOTA_FATURAMENTO] * 12,
+            ['IR & CSLL'] + [ALIQUOTA_IR_CSLL] * 12,
+        ]),
+    }
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return rows
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera planilha sintética no layout do case')
+    parser.add_argument('--output', type=Path, required=True, help='Arquivo .xlsx de saída')
+    parser.add_argument('--scale', type=int, default=1, help='Preset de tamanho (1, 10, 100, 1000...)')
+    parser.add_argument('--unidades', type=int, help='Sobrescreve o número de unidades')
+    parser.add_argument('--pacotes', type=int, help='Sobrescreve o número de pacotes')
+    parser.add_argument('--contas', type=int, help='Sobrescreve contas por pacote')
+    parser.add_argument('--rows', type=int, help='Sobrescreve linhas por aba de despesas')
+    parser.add_argument('--years', type=int, default=1, help='Anos cobertos pelas despesas')
+    parser.add_argument('--ano', type=int, default=2025, help='Primeiro ano')
+    parser.add_argument('--seed', type=int, default=42, help='Semente do gerador')
+    args = parser.parse_args()
+
+    spec = spec_for_scale(args.scale, years=args.years, ano=args.ano).replace(
+        unidades=args.unidades,
+        pacotes=args.pacotes,
+        contas=args.contas,
+        rows=args.rows,
+        seed=args.seed,
+    )
+
+    print(f"📝 Gerando {args.output} ({spec.to_dict()})")
+    rows = generate_workbook(args.output, spec)
+    size_mb = args.output.stat().st_size / 1024 / 1024
+    print(f"✅ {sum(rows.values()):,} linhas em {len(rows)} abas ({size_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
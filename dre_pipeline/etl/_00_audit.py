@@ -0,0 +1,179 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Gravação em Lote da Trilha de Auditoria
+
+Os registros de auditoria do pipeline (dw.etl_step_log, dw.etl_checkpoint)
+não precisam estar no banco no instante em que o step termina. Em vez de
+abrir uma conexão e fazer commit por registro no caminho crítico do DAG,
+o ETLRun enfileira cada registro num buffer em memória e uma thread de
+fundo grava o buffer em lote: uma conexão e um commit por lote.
+
+O lote é gravado quando:
+- o buffer atinge `batch_size` registros;
+- passam `flush_interval` segundos desde o último lote;
+- flush()/close() é chamado (o ETLRun fecha o writer no finish, também
+  quando a execução falha);
+- o processo termina (atexit), mesmo sem finish — ex: Ctrl+C.
+
+A ordem de chegada é preservada. Se um lote falhar, ele volta para o
+início do buffer e é regravado no próximo flush; no close, a falha é
+registrada no log e os registros restantes são descartados.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import weakref
+from itertools import groupby
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+DEFAULT_BATCH_SIZE = 50         # Registros que disparam um lote antecipado
+DEFAULT_FLUSH_INTERVAL = 1.0    # Segundos máximos de um registro no buffer
+
+# Writers com thread ativa, fechados no atexit
+_open_writers: 'weakref.WeakSet[AuditWriter]' = weakref.WeakSet()
+
+
+# =============================================================================
+# WRITER
+# =============================================================================
+
+class AuditWriter:
+    """
+    Buffer de escrita com flush em lote numa thread de fundo.
+
+    Uso:
+        writer = AuditWriter(engine)
+        writer.write("INSERT INTO dw.t (a) VALUES (:a)", {'a': 1})
+        ...
+        writer.close()      # Grava o que falta e encerra a thread
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    ):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self.batches_written = 0
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._lock = threading.Lock()           # Protege o buffer
+        self._flush_lock = threading.Lock()     # Um lote por vez, na ordem
+        self._wake = threading.Event()
+        self._closing = False
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self, statement: str, params: Dict[str, Any]) -> None:
+        """Enfileira um registro (não bloqueia em I/O)"""
+        with self._lock:
+            self._pending.append((statement, params))
+            pending = len(self._pending)
+            if self._thread is None:
+                self._start()
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def _start(self) -> None:
+        self._closing = False
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+        _open_writers.add(self)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Falha ao gravar auditoria (nova tentativa no próximo lote): {e}")
+            if self._closing:
+                return
+
+    def flush(self) -> int:
+        """
+        Grava tudo o que está no buffer numa única transação.
+
+        Returns:
+            Registros gravados
+
+        Raises:
+            Exception: erro do banco (o lote volta para o buffer)
+        """
+        from sqlalchemy import text
+
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            try:
+                with self.engine.connect() as conn:
+                    # Registros consecutivos do mesmo statement vão num executemany
+                    for statement, items in groupby(batch, key=lambda item: item[0]):
+                        conn.execute(text(statement), [params for _, params in items])
+                    conn.commit()
+            except Exception:
+                with self._lock:
+                    self._pending[:0] = batch
+                raise
+
+            self.rows_written += len(batch)
+            self.batches_written += 1
+            return len(batch)
+
+    def close(self) -> None:
+        """Grava o buffer e encerra a thread; falhas vão para o log"""
+        thread = self._thread
+        if thread is not None:
+            self._closing = True
+            self._wake.set()
+            if thread is not threading.current_thread():
+                thread.join()
+            self._thread = None
+            _open_writers.discard(self)
+
+        try:
+            self.flush()
+        except Exception as e:
+            with self._lock:
+                lost, self._pending = len(self._pending), []
+            logger.error(f"Auditoria não gravada ({lost} registros descartados): {e}")
+
+    @property
+    def pending(self) -> int:
+        """Registros ainda não gravados"""
+        with self._lock:
+            return len(self._pending)
+
+
+def _close_open_writers() -> None:
+    """Saída do processo: nenhum registro enfileirado fica para trás"""
+    for writer in list(_open_writers):
+        writer.close()
+
+
+atexit.register(_close_open_writers)
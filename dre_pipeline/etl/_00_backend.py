@@ -0,0 +1,278 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Backends do Data Warehouse
+
+O pipeline roda sobre PostgreSQL (padrão) ou sobre DuckDB embarcado, um
+arquivo local sem servidor: útil para desenvolvimento, CI e análises
+rápidas sobre a mesma modelagem RAW → STG → DW.
+
+O backend é escolhido em config.yml:
+
+    database:
+      backend: duckdb            # postgresql (default) | duckdb
+      path: data/dre.duckdb      # relativo à raiz do projeto
+
+Os SQLs de transformação e as regras de DQ são os mesmos nos dois
+backends. As diferenças ficam aqui, como capacidades do backend:
+
+- DDL: sql/ (PostgreSQL) ou sql/duckdb/ (sequências no lugar de SERIAL,
+  sem FKs e sem índices secundários; funções de compatibilidade como
+  to_char/to_jsonb criadas como macros)
+- PREPARE tipado: o DuckDB não aceita tipos no PREPARE nem binds no
+  EXECUTE, então as regras de DQ rodam direto com parâmetros posicionais
+- Advisory lock, EXPLAIN (FORMAT JSON) e detecção de anomalias
+  (TO_DATE/MAKE_INTERVAL) existem só no PostgreSQL; no DuckDB o próprio
+  arquivo só pode ser aberto para escrita por um processo
+- Engine assíncrono (asyncpg) para as consultas da API: só no PostgreSQL;
+  no DuckDB a API executa as consultas no threadpool
+- Fila de jobs da API (_05_jobs): no PostgreSQL, workers em processos
+  separados consomem com FOR UPDATE SKIP LOCKED; no DuckDB, threads do
+  processo da API
+
+Uso:
+    python -m etl._00_backend     # Cria os schemas no backend configurado
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+# Só para anotações: o módulo é importado pelo _00_config e deve ser leve
+if TYPE_CHECKING:
+    import pandas as pd
+    from sqlalchemy.engine import CursorResult, Engine
+
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Diretório raiz do projeto (um nível acima de /etl)
+PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+SQL_FOLDER = PROJECT_ROOT / "sql"
+
+BACKEND_POSTGRES = 'postgresql'
+BACKEND_DUCKDB = 'duckdb'
+
+# Nome da view temporária usada na carga em lote do DuckDB
+_BULK_VIEW = '_dre_bulk_insert'
+
+
+class BackendError(Exception):
+    """Backend desconhecido ou mal configurado"""
+    pass
+
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+
+class Backend:
+    """
+    Backend do Data Warehouse: conexão, DDL e capacidades.
+    """
+
+    name: str = ''
+    required_keys: List[str] = []
+    ddl_folder: Path = SQL_FOLDER
+
+    # Capacidades usadas pelo pipeline
+    supports_prepare = True          # PREPARE tipado + EXECUTE com binds (regras de DQ)
+    supports_advisory_lock = True    # Coordenação entre processos (_05_run_lock)
+    supports_explain = True          # EXPLAIN (FORMAT JSON): --explain/--capture-plans
+    supports_anomalies = True        # Funções de data do _04_dq_anomalies
+    supports_async = True            # Driver asyncio (consultas da API)
+    supports_skip_locked = True      # SELECT ... FOR UPDATE SKIP LOCKED (fila de jobs)
+    supports_worker_processes = True # Vários processos escrevendo no DW
+
+    def connection_string(self, db: Dict[str, Any]) -> str:
+        """URL SQLAlchemy a partir da seção database do config"""
+        raise NotImplementedError
+
+    def engine_options(self) -> Dict[str, Any]:
+        """Argumentos extras do create_engine"""
+        return {}
+
+    def async_connection_string(self, db: Dict[str, Any]) -> str:
+        """URL SQLAlchemy com driver asyncio"""
+        raise BackendError(f"O backend {self.name} não tem driver assíncrono")
+
+    def async_engine_options(self) -> Dict[str, Any]:
+        """Argumentos padrão do create_async_engine (pool da API)"""
+        return {}
+
+    def ddl_files(self) -> List[Path]:
+        """Scripts de criação dos schemas, na ordem de execução"""
+        return sorted(self.ddl_folder.glob('*.sql'))
+
+    def bulk_insert(self, engine: Engine, df: pd.DataFrame, schema: str, table: str) -> int:
+        """Insere um DataFrame numa tabela existente"""
+        df.to_sql(table, engine, schema=schema, if_exists='append', index=False)
+        return len(df)
+
+
+class PostgresBackend(Backend):
+    """PostgreSQL (servidor; backend padrão)"""
+
+    name = BACKEND_POSTGRES
+    required_keys = ["host", "port", "name", "user", "password"]
+    ddl_folder = SQL_FOLDER
+
+    def connection_string(self, db: Dict[str, Any]) -> str:
+        return (
+            f"postgresql://{db['user']}:{db['password']}"
+            f"@{db['host']}:{db['port']}/{db['name']}"
+        )
+
+    def engine_options(self) -> Dict[str, Any]:
+        return {'pool_size': 5, 'max_overflow': 10, 'pool_pre_ping': True}
+
+    def async_connection_string(self, db: Dict[str, Any]) -> str:
+        return self.connection_string(db).replace('postgresql://', 'postgresql+asyncpg://', 1)
+
+    def async_engine_options(self) -> Dict[str, Any]:
+        return {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 30,
+            'pool_recycle': 1800,
+            'pool_pre_ping': True,
+            # Statements preparados guardados por conexão (consultas da API)
+            'connect_args': {'prepared_statement_cache_size': 256},
+        }
+
+
+class DuckDBBackend(Backend):
+    """DuckDB embarcado (arquivo local, sem servidor)"""
+
+    name = BACKEND_DUCKDB
+    required_keys = ["path"]
+    ddl_folder = SQL_FOLDER / "duckdb"
+
+    supports_prepare = False
+    supports_advisory_lock = False
+    supports_explain = False
+    supports_anomalies = False
+    supports_async = False
+    supports_skip_locked = False
+    supports_worker_processes = False
+
+    def database_path(self, db: Dict[str, Any]) -> Path:
+        """Arquivo do banco (relativo à raiz do projeto)"""
+        path = Path(db['path'])
+        return path if path.is_absolute() else PROJECT_ROOT / path
+
+    def connection_string(self, db: Dict[str, Any]) -> str:
+        path = self.database_path(db)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return f"duckdb:///{path.as_posix()}"
+
+    def bulk_insert(self, engine: Engine, df: pd.DataFrame, schema: str, table: str) -> int:
+        """
+        Carga vetorizada: o DataFrame é registrado como view e inserido com
+        um único INSERT ... SELECT (em vez de INSERTs linha a linha).
+        """
+        with engine.connect() as conn:
+            duck = conn.connection.driver_connection
+            duck.register(_BULK_VIEW, df)
+            try:
+                conn.exec_driver_sql(
+                    f"INSERT INTO {schema}.{table} BY NAME SELECT * FROM {_BULK_VIEW}"
+                )
+                conn.commit()
+            finally:
+                duck.unregister(_BULK_VIEW)
+        return len(df)
+
+
+BACKENDS = {
+    BACKEND_POSTGRES: PostgresBackend,
+    BACKEND_DUCKDB: DuckDBBackend,
+}
+
+
+# =============================================================================
+# FUNÇÕES AUXILIARES
+# =============================================================================
+
+def get_backend(db_config: Optional[Dict[str, Any]] = None) -> Backend:
+    """
+    Backend da seção database do config (default: postgresql).
+
+    Raises:
+        BackendError: se database.backend não for suportado
+    """
+    name = (db_config or {}).get('backend') or BACKEND_POSTGRES
+    if name not in BACKENDS:
+        raise BackendError(
+            f"database.backend inválido: {name} (opções: {', '.join(BACKENDS)})"
+        )
+    return BACKENDS[name]()
+
+
+def engine_backend(engine: Engine) -> Backend:
+    """Backend de um Engine já criado (pelo dialeto SQLAlchemy)"""
+    return get_backend({'backend': engine.dialect.name})
+
+
+def affected_rows(result: CursorResult) -> int:
+    """
+    Linhas afetadas por um INSERT/UPDATE/DELETE.
+
+    O PostgreSQL informa via rowcount; o DuckDB devolve rowcount = -1 e
+    retorna a contagem como uma linha de resultado.
+    """
+    if result.rowcount >= 0:
+        return result.rowcount
+    row = result.fetchone() if result.returns_rows else None
+    return int(row[0]) if row else 0
+
+
+def bulk_insert(engine: Engine, df: pd.DataFrame, schema: str, table: str) -> int:
+    """
+    Insere um DataFrame numa tabela existente, pelo caminho mais rápido do
+    backend do engine.
+
+    Returns:
+        Linhas inseridas
+    """
+    return engine_backend(engine).bulk_insert(engine, df, schema, table)
+
+
+def init_schema(engine: Engine) -> List[Path]:
+    """
+    Executa os scripts de DDL do backend (recria as tabelas).
+
+    Returns:
+        Scripts executados
+    """
+    files = engine_backend(engine).ddl_files()
+    with engine.connect() as conn:
+        for path in files:
+            conn.exec_driver_sql(path.read_text(encoding='utf-8'))
+            script = path.relative_to(PROJECT_ROOT).as_posix()
+            logger.info(f"   ✅ {script}", extra={'script': script})
+        conn.commit()
+    return files
+
+
+# =============================================================================
+# EXECUÇÃO DIRETA
+# =============================================================================
+
+if __name__ == "__main__":
+    from ._00_config import get_config, get_engine
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    backend = get_backend(get_config().get_database_config())
+    logger.info(f"🗄️ Criando schemas RAW/STG/DW ({backend.name})...")
+    init_schema(get_engine())
@@ -5,15 +5,23 @@ Módulo de Configuração
 Carrega e valida configurações do arquivo config.yml
 """
 
+from __future__ import annotations
+
 import os
 import sys
 import hashlib
+import logging
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from ._00_backend import Backend, BackendError, get_backend
+
+# PyYAML e SQLAlchemy são importados sob demanda (ver etl/__init__.py)
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
-import yaml
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
+logger = logging.getLogger(__name__)
 
 
 # =============================================================================
@@ -26,8 +34,7 @@ PROJECT_ROOT = Path(__file__).parent.parent.absolute()
 # Caminhos padrão
 DEFAULT_CONFIG_PATH = PROJECT_ROOT / "config.yml"
 
-# Chaves obrigatórias no config
-REQUIRED_DATABASE_KEYS = ["host", "port", "name", "user", "password"]
+# Chaves obrigatórias no config (as de database dependem do backend)
 REQUIRED_ETL_KEYS = ["source_file", "sheets", "ano_referencia"]
 
 
@@ -67,6 +74,7 @@ class Config:
     _instance: Optional['Config'] = None
     _config: Dict[str, Any] = {}
     _engine: Optional[Engine] = None
+    _async_engine: Optional[AsyncEngine] = None
     
     def __new__(cls, config_path: Optional[Path] = None):
         """Singleton pattern para garantir única instância"""
@@ -93,6 +101,8 @@ class Config:
     
     def _load_config(self) -> None:
         """Carrega o arquivo de configuração YAML"""
+        import yaml
+        
         if not self._config_path.exists():
             raise ConfigNotFoundError(
                 f"Arquivo de configuração não encontrado: {self._config_path}\n"
@@ -116,7 +126,12 @@ class Config:
             errors.append("Seção 'database' não encontrada")
         else:
             db = self._config["database"]
-            for key in REQUIRED_DATABASE_KEYS:
+            try:
+                required = get_backend(db).required_keys
+            except BackendError as e:
+                errors.append(str(e))
+                required = []
+            for key in required:
                 if key not in db or db[key] is None:
                     errors.append(f"database.{key} é obrigatório")
         
@@ -166,8 +181,30 @@ class Config:
         return self._config.get("logging", {"level": "INFO", "folder": "logs"})
     
     def get_dq_config(self) -> Dict[str, Any]:
-        """Retorna configurações de Data Quality"""
-        return self._config.get("dq", {})
+        """
+        Retorna configurações de Data Quality.
+
+        A seção canônica é `data_quality` (ver config.yml.example). A seção
+        legada `dq`, com chaves planas, ainda é aceita como fallback.
+        """
+        dq_config = dict(self._config.get("data_quality") or {})
+        legacy = self._config.get("dq") or {}
+
+        expected = dict(dq_config.get("expected") or {})
+        for key, value in legacy.items():
+            if key == "tolerance_percent":
+                dq_config.setdefault("tolerance_pct", value)
+            elif isinstance(value, (int, float)):
+                expected.setdefault(key, value)
+            else:
+                dq_config.setdefault(key, value)
+
+        dq_config["expected"] = expected
+        return dq_config
+    
+    def get_api_config(self) -> Dict[str, Any]:
+        """Retorna configurações da API"""
+        return self._config.get("api") or {}
     
     def get_output_config(self) -> Dict[str, Any]:
         """Retorna configurações de output"""
@@ -200,13 +237,13 @@ class Config:
     # DATABASE ENGINE
     # =========================================================================
     
+    def get_backend(self) -> Backend:
+        """Retorna o backend do DW (database.backend: postgresql | duckdb)"""
+        return get_backend(self.get_database_config())
+    
     def get_connection_string(self) -> str:
-        """Retorna a string de conexão do PostgreSQL"""
-        db = self.get_database_config()
-        return (
-            f"postgresql://{db['user']}:{db['password']}"
-            f"@{db['host']}:{db['port']}/{db['name']}"
-        )
+        """Retorna a string de conexão do backend configurado"""
+        return self.get_backend().connection_string(self.get_database_config())
     
     def get_engine(self) -> Engine:
         """
@@ -216,15 +253,44 @@ class Config:
             Engine SQLAlchemy configurado
         """
         if self._engine is None:
+            from sqlalchemy import create_engine
+            
             conn_string = self.get_connection_string()
             self._engine = create_engine(
                 conn_string,
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True
+                **self.get_backend().engine_options()
             )
         return self._engine
     
+    def get_async_engine(self) -> AsyncEngine:
+        """
+        Retorna AsyncEngine SQLAlchemy (singleton) para as consultas da API.
+        
+        O pool é separado do engine síncrono do pipeline; os padrões do
+        backend podem ser ajustados em api.db_pool (pool_size,
+        max_overflow, pool_timeout, pool_recycle).
+        
+        Raises:
+            BackendError: se o backend não tiver driver assíncrono
+        """
+        if self._async_engine is None:
+            from sqlalchemy.ext.asyncio import create_async_engine
+            
+            backend = self.get_backend()
+            conn_string = backend.async_connection_string(self.get_database_config())
+            options = {
+                **backend.async_engine_options(),
+                **(self.get_api_config().get("db_pool") or {})
+            }
+            self._async_engine = create_async_engine(conn_string, **options)
+        return self._async_engine
+    
+    async def dispose_async_engine(self) -> None:
+        """Fecha as conexões do pool assíncrono (shutdown da API)"""
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+            self._async_engine = None
+    
     def test_connection(self) -> bool:
         """
         Testa a conexão com o banco de dados.
@@ -232,13 +298,15 @@ class Config:
         Returns:
             True se conexão bem sucedida
         """
+        from sqlalchemy import text
+        
         try:
             engine = self.get_engine()
             with engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
             return True
         except Exception as e:
-            print(f"❌ Erro de conexão: {e}")
+            logger.error(f"❌ Erro de conexão: {e}", extra={'error': str(e)})
             return False
 
 
@@ -269,6 +337,16 @@ def get_engine() -> Engine:
     return get_config().get_engine()
 
 
+def get_async_engine() -> AsyncEngine:
+    """
+    Retorna AsyncEngine SQLAlchemy (consultas da API).
+    
+    Returns:
+        AsyncEngine SQLAlchemy configurado
+    """
+    return get_config().get_async_engine()
+
+
 def test_connection() -> bool:
     """
     Testa a conexão com o banco de dados.
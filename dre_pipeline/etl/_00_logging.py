@@ -0,0 +1,95 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Logging Estruturado (JSON)
+
+Formatter JSON (python-json-logger) e um filtro que anexa a cada registro
+o run_id da execução corrente e o step aberto na thread. Assim cada linha
+do arquivo de log pode ser filtrada por execução/step sem parsing de texto.
+
+Campos extras padronizados: run_id, step, status, duration_seconds,
+rows_read, rows_written.
+
+O progresso do pipeline também sai pelo logger (nada de print): o console
+é só mais um handler, configurado em setup_logging.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from ._00_step_metrics import current_step
+
+
+# =============================================================================
+# CONTEXTO DA EXECUÇÃO
+# =============================================================================
+
+# Um pipeline por processo (garantido pelo lock): contexto global basta
+_context: Dict[str, Any] = {'run_id': None}
+
+
+def set_log_context(run_id: Optional[int] = None) -> None:
+    """Define o run_id anexado aos próximos registros (None limpa)"""
+    _context['run_id'] = run_id
+
+
+class ContextFilter(logging.Filter):
+    """Anexa run_id e step aos registros que não os informam via `extra`"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'run_id'):
+            record.run_id = _context['run_id']
+        if not hasattr(record, 'step'):
+            step = current_step()
+            record.step = step.name if step else None
+        return True
+
+
+# =============================================================================
+# FORMATTERS
+# =============================================================================
+
+JSON_FIELDS = '%(asctime)s %(levelname)s %(name)s %(message)s %(run_id)s %(step)s'
+
+
+def get_json_formatter() -> logging.Formatter:
+    """Formatter JSON com os campos padrão e os extras de cada registro"""
+    try:
+        from pythonjsonlogger.json import JsonFormatter
+    except ImportError:  # python-json-logger < 3
+        from pythonjsonlogger.jsonlogger import JsonFormatter
+    
+    return JsonFormatter(
+        JSON_FIELDS,
+        rename_fields={'asctime': 'timestamp', 'levelname': 'level', 'name': 'logger'},
+        json_ensure_ascii=False
+    )
+
+
+def step_record(
+    step: str,
+    status: str,
+    duration_seconds: float = 0.0,
+    rows_read: int = 0,
+    rows_written: int = 0,
+    **fields: Any
+) -> Dict[str, Any]:
+    """Campos `extra` padronizados para o registro de fim de step"""
+    return {
+        'step': step,
+        'status': status,
+        'duration_seconds': round(duration_seconds, 3),
+        'rows_read': rows_read,
+        'rows_written': rows_written,
+        **fields,
+    }
+
+
+# =============================================================================
+# MENSAGENS
+# =============================================================================
+
+def banner(title: str, *lines: str, width: int = 70) -> str:
+    """Cabeçalho em várias linhas (um único registro de log)"""
+    rule = "=" * width
+    body = [f"   {line}" for line in lines]
+    return "\n".join(["", rule, f"   {title}", rule] + (body + [rule] if body else []))
@@ -0,0 +1,231 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Métricas Prometheus
+
+Registro único de métricas do pipeline e da API:
+- Pipeline: duração/linhas/CPU por step, duração e vazão da execução,
+  status da última execução e resultados de DQ por camada
+- Banco: uso do pool de conexões (lido no momento da coleta)
+- API: histograma de latência por rota e acertos/falhas do cache de respostas
+
+A API expõe o registro em GET /metrics. Execuções via CLI (cron) gravam
+um arquivo .prom para o textfile collector do node_exporter.
+"""
+
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, write_to_textfile
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy.engine import Engine
+
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# REGISTRO E MÉTRICAS
+# =============================================================================
+
+REGISTRY = CollectorRegistry(auto_describe=True)
+
+# --- Pipeline ---------------------------------------------------------------
+
+STEP_DURATION = Gauge(
+    'dre_etl_step_duration_seconds', 'Duração do step na última execução',
+    ['step'], registry=REGISTRY
+)
+STEP_ROWS = Gauge(
+    'dre_etl_step_rows', 'Linhas lidas/gravadas pelo step na última execução',
+    ['step', 'direction'], registry=REGISTRY
+)
+STEP_CPU = Gauge(
+    'dre_etl_step_cpu_seconds', 'Tempo de CPU do step na última execução',
+    ['step'], registry=REGISTRY
+)
+ROWS_PROCESSED = Counter(
+    'dre_etl_rows_processed', 'Linhas gravadas pelo pipeline (acumulado do processo)',
+    ['step'], registry=REGISTRY
+)
+RUNS = Counter(
+    'dre_etl_runs', 'Execuções do pipeline por status', ['status'], registry=REGISTRY
+)
+RUN_DURATION = Gauge(
+    'dre_etl_run_duration_seconds', 'Duração da última execução', registry=REGISTRY
+)
+RUN_ROWS_PER_SEC = Gauge(
+    'dre_etl_run_rows_per_second', 'Vazão da última execução (linhas gravadas/s)',
+    registry=REGISTRY
+)
+LAST_RUN_SUCCESS = Gauge(
+    'dre_etl_last_run_success', '1 se a última execução terminou com sucesso',
+    registry=REGISTRY
+)
+LAST_RUN_TIMESTAMP = Gauge(
+    'dre_etl_last_run_timestamp_seconds', 'Fim da última execução (epoch)',
+    registry=REGISTRY
+)
+LAST_RUN_ID = Gauge(
+    'dre_etl_last_run_id', 'run_id da última execução', registry=REGISTRY
+)
+
+# --- Data Quality -----------------------------------------------------------
+
+DQ_RULES = Gauge(
+    'dre_dq_rules', 'Regras de DQ por status na última verificação',
+    ['layer', 'status'], registry=REGISTRY
+)
+
+# --- API --------------------------------------------------------------------
+
+API_LATENCY = Histogram(
+    'dre_api_request_duration_seconds', 'Latência das requisições da API',
+    ['method', 'route', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    registry=REGISTRY
+)
+API_CACHE_REQUESTS = Counter(
+    'dre_api_cache_requests', 'Consultas ao cache de respostas da API',
+    ['endpoint', 'result'], registry=REGISTRY
+)
+API_CACHE_EVICTIONS = Counter(
+    'dre_api_cache_evictions', 'Respostas removidas do cache por limite de tamanho (LRU)',
+    registry=REGISTRY
+)
+API_CACHE_ENTRIES = Gauge(
+    'dre_api_cache_entries', 'Respostas no cache da API', registry=REGISTRY
+)
+
+
+# =============================================================================
+# POOL DE CONEXÕES
+# =============================================================================
+
+class PoolCollector:
+    """Lê o estado do pool do engine a cada coleta (sem custo entre coletas)"""
+
+    def __init__(self, engine: Engine, name: str = 'sync'):
+        self.engine = engine
+        self.name = name
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        pool = self.engine.pool
+        family = GaugeMetricFamily(
+            'dre_db_pool_connections', 'Conexões do pool por estado',
+            labels=['pool', 'state']
+        )
+        for state, attr in (('size', 'size'), ('checked_out', 'checkedout'),
+                            ('checked_in', 'checkedin'), ('overflow', 'overflow')):
+            getter = getattr(pool, attr, None)
+            if getter is not None:
+                family.add_metric([self.name, state], getter())
+        yield family
+
+    def describe(self) -> Iterable[GaugeMetricFamily]:
+        return []
+
+
+_pools: Dict[str, PoolCollector] = {}
+
+
+def register_pool(engine: Engine, name: str = 'sync') -> None:
+    """Passa a expor o pool do engine (idempotente por nome)"""
+    if name in _pools:
+        _pools[name].engine = engine
+        return
+    _pools[name] = PoolCollector(engine, name)
+    REGISTRY.register(_pools[name])
+
+
+# =============================================================================
+# REGISTRO DE EVENTOS
+# =============================================================================
+
+def record_step(
+    step: str,
+    duration_seconds: float,
+    rows_read: int = 0,
+    rows_written: int = 0,
+    cpu_seconds: float = 0.0
+) -> None:
+    """Registra o fim de um step"""
+    STEP_DURATION.labels(step).set(duration_seconds)
+    STEP_ROWS.labels(step, 'read').set(rows_read)
+    STEP_ROWS.labels(step, 'written').set(rows_written)
+    STEP_CPU.labels(step).set(cpu_seconds)
+    ROWS_PROCESSED.labels(step).inc(rows_written)
+
+
+def record_run(
+    run_id: Optional[int],
+    status: str,
+    duration_seconds: float = 0.0,
+    total_rows: int = 0
+) -> None:
+    """Registra o fim de uma execução"""
+    RUNS.labels(status).inc()
+    RUN_DURATION.set(duration_seconds)
+    RUN_ROWS_PER_SEC.set(total_rows / duration_seconds if duration_seconds > 0 else 0)
+    LAST_RUN_SUCCESS.set(1 if status == 'SUCCESS' else 0)
+    LAST_RUN_TIMESTAMP.set(time.time())
+    if run_id is not None:
+        LAST_RUN_ID.set(run_id)
+
+
+def record_dq(layer: str, results: Dict) -> None:
+    """Registra o resumo de run_dq_checks (passed/warned/failed)"""
+    DQ_RULES.labels(layer, 'PASS').set(results.get('passed', 0))
+    DQ_RULES.labels(layer, 'WARN').set(results.get('warned', 0))
+    DQ_RULES.labels(layer, 'FAIL').set(results.get('failed', 0))
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    """Registra a latência de uma requisição da API"""
+    API_LATENCY.labels(method, route, str(status)).observe(seconds)
+
+
+def record_cache(endpoint: str, hit: bool) -> None:
+    """Registra uma consulta ao cache de respostas (hit/miss)"""
+    API_CACHE_REQUESTS.labels(endpoint, 'hit' if hit else 'miss').inc()
+
+
+def record_cache_size(entries: int, evicted: int = 0) -> None:
+    """Registra o tamanho do cache e as remoções por LRU"""
+    API_CACHE_ENTRIES.set(entries)
+    if evicted:
+        API_CACHE_EVICTIONS.inc(evicted)
+
+
+# =============================================================================
+# EXPOSIÇÃO
+# =============================================================================
+
+def render_latest() -> Tuple[bytes, str]:
+    """Corpo e content-type no formato de exposição do Prometheus"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def write_textfile(path: Path) -> Optional[Path]:
+    """
+    Grava as métricas para o textfile collector do node_exporter.
+
+    A escrita é atômica (arquivo temporário + rename), então o collector
+    nunca lê um arquivo pela metade. Falhas só geram aviso.
+    """
+    try:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_to_textfile(str(path), REGISTRY)
+        return path
+    except OSError as e:
+        logger.warning(f"Não foi possível gravar métricas em {path}: {e}")
+        return None
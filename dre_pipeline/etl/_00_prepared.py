@@ -0,0 +1,226 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Statements Preparados
+
+Queries com placeholders nomeados (:param) compiladas uma vez para
+placeholders posicionais ($1, $2, ...) e executadas como prepared
+statements: o PostgreSQL faz parse e plano uma vez por conexão do pool e
+as execuções seguintes só vinculam os valores. Valores nunca entram no
+texto do SQL.
+
+Usado pelas regras de DQ (_04_dq_checks) e pela camada de consultas da
+API (api/queries.py).
+
+- PostgreSQL (psycopg2): PREPARE na primeira execução em cada conexão
+  física, EXECUTE nas demais (execute_statement)
+- PostgreSQL (asyncpg): o driver já prepara e guarda os statements por
+  conexão; basta enviar sempre o mesmo SQL compilado
+- DuckDB: sem tipos no PREPARE nem binds no EXECUTE; o SQL compilado roda
+  direto com os parâmetros posicionais
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+from ._00_backend import engine_backend
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection, CursorResult
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+def _to_bool(value: Any) -> bool:
+    """Converte valores de YAML/CLI para booleano"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'sim', 'yes')
+
+
+# Tipos aceitos nos parâmetros: nome declarado → (tipo PostgreSQL, conversor)
+PARAM_TYPES = {
+    'numeric': ('numeric', float),
+    'integer': ('integer', int),
+    'text': ('text', str),
+    'boolean': ('boolean', _to_bool),
+}
+
+# Literais SQL ('...') ou placeholders nomeados (:param), ignorando casts (::tipo)
+_SQL_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|(?<![:\w]):([A-Za-z_]\w*)")
+
+# Chave em connection.info com os statements já preparados na conexão física
+PREPARED_INFO_KEY = 'prepared_statements'
+
+# SQLSTATE do PostgreSQL: statement já existe / não existe na sessão
+DUPLICATE_PREPARED_STATEMENT = '42P05'
+INVALID_SQL_STATEMENT_NAME = '26000'
+
+
+class StatementError(Exception):
+    """Statement com parâmetro não declarado ou de tipo desconhecido"""
+    pass
+
+
+# =============================================================================
+# COMPILAÇÃO
+# =============================================================================
+
+def compile_statement_sql(sql: str, params: Dict[str, Dict]) -> Tuple[str, List[str]]:
+    """
+    Converte placeholders nomeados (:param) em posicionais ($1, $2, ...).
+
+    Args:
+        sql: Query com placeholders nomeados
+        params: Parâmetros declarados (ordem de declaração)
+
+    Returns:
+        Tupla (sql compilado, nomes dos parâmetros na ordem posicional)
+    """
+    declared = list(params)
+    used = set()
+
+    def _collect(match):
+        if match.group(1):
+            used.add(match.group(1))
+        return match.group(0)
+
+    _SQL_TOKEN_RE.sub(_collect, sql)
+
+    undeclared = used - set(declared)
+    if undeclared:
+        raise StatementError(f"Parâmetros não declarados: {', '.join(sorted(undeclared))}")
+
+    order = [name for name in declared if name in used]
+    positions = {name: idx + 1 for idx, name in enumerate(order)}
+
+    def _replace(match):
+        name = match.group(1)
+        return f"${positions[name]}" if name else match.group(0)
+
+    return _SQL_TOKEN_RE.sub(_replace, sql).strip(), order
+
+
+class CompiledStatement:
+    """
+    Query compilada (placeholders → $n) pronta para PREPARE/EXECUTE.
+
+    O nome do statement deriva do conteúdo compilado, então mudanças no SQL
+    geram outro statement sem colidir com versões já preparadas na conexão.
+    """
+
+    def __init__(self, prefix: str, sql: str, params: Dict[str, Dict]):
+        for name, spec in params.items():
+            if spec.get('type') not in PARAM_TYPES:
+                raise StatementError(f"Tipo inválido para '{name}': {spec.get('type')}")
+
+        self.sql, self.param_order = compile_statement_sql(sql, params)
+        self.param_types = [PARAM_TYPES[params[n]['type']][0] for n in self.param_order]
+
+        digest = hashlib.sha1(self.sql.encode('utf-8')).hexdigest()[:10]
+        self.name = f"{prefix}_{digest}"
+
+    @property
+    def prepare_sql(self) -> str:
+        """Comando PREPARE"""
+        if self.param_order:
+            return f"PREPARE {self.name} ({', '.join(self.param_types)}) AS {self.sql}"
+        return f"PREPARE {self.name} AS {self.sql}"
+
+    @property
+    def execute_sql(self) -> str:
+        """Comando EXECUTE (parâmetros :p0, :p1, ...)"""
+        if self.param_order:
+            binds = ', '.join(f":p{i}" for i in range(len(self.param_order)))
+            return f"EXECUTE {self.name} ({binds})"
+        return f"EXECUTE {self.name}"
+
+    def execute_params(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Mapeia valores nomeados para os binds posicionais do EXECUTE"""
+        return {f"p{i}": values[name] for i, name in enumerate(self.param_order)}
+
+    def positional_params(self, values: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Valores na ordem dos placeholders $n (execução sem PREPARE)"""
+        return tuple(values[name] for name in self.param_order)
+
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+def _sqlstate(error: Exception) -> str:
+    """SQLSTATE do erro do driver (psycopg2: pgcode), se houver"""
+    return getattr(getattr(error, 'orig', None), 'pgcode', None) or ''
+
+
+def ensure_prepared(conn: Connection, statement: CompiledStatement) -> None:
+    """
+    Prepara o statement na conexão (uma vez por conexão física do pool).
+
+    Se a sessão já tem o statement (registro local perdido), só volta a
+    registrá-lo: mesmo nome → mesmo SQL compilado.
+    """
+    from sqlalchemy import text
+    from sqlalchemy.exc import DBAPIError
+
+    prepared = conn.connection.info.setdefault(PREPARED_INFO_KEY, set())
+    if statement.name in prepared:
+        return
+
+    try:
+        conn.execute(text(statement.prepare_sql))
+        conn.commit()
+    except DBAPIError as e:
+        if _sqlstate(e) != DUPLICATE_PREPARED_STATEMENT:
+            raise
+        conn.rollback()
+    prepared.add(statement.name)
+
+
+def forget_prepared(conn: Connection, *statements: CompiledStatement) -> None:
+    """
+    Descarta os statements na sessão (DEALLOCATE) e no registro local, para
+    que a próxima execução faça um PREPARE limpo.
+
+    Chamar depois do rollback da transação que falhou: o PREPARE não é
+    transacional, então o statement continua existindo na sessão.
+    """
+    from sqlalchemy import text
+    from sqlalchemy.exc import DBAPIError
+
+    prepared = conn.connection.info.get(PREPARED_INFO_KEY, set())
+    for statement in statements:
+        if statement.name not in prepared:
+            continue
+        prepared.discard(statement.name)
+        try:
+            conn.execute(text(f"DEALLOCATE {statement.name}"))
+            conn.commit()
+        except DBAPIError as e:
+            conn.rollback()
+            if _sqlstate(e) != INVALID_SQL_STATEMENT_NAME:
+                raise
+
+
+def execute_statement(
+    conn: Connection,
+    statement: CompiledStatement,
+    values: Dict[str, Any]
+) -> CursorResult:
+    """
+    Executa uma query compilada com os valores nomeados.
+
+    PostgreSQL: PREPARE (uma vez por conexão) + EXECUTE. DuckDB: não aceita
+    tipos no PREPARE nem binds no EXECUTE, então o SQL compilado ($n) é
+    executado direto pelo driver com os parâmetros posicionais.
+    """
+    from sqlalchemy import text
+
+    if engine_backend(conn.engine).supports_prepare:
+        ensure_prepared(conn, statement)
+        return conn.execute(text(statement.execute_sql), statement.execute_params(values))
+    return conn.exec_driver_sql(statement.sql, statement.positional_params(values))
@@ -0,0 +1,217 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Profiling de Steps (--profile)
+
+Envolve a função de cada step num profiler e grava um arquivo por step em
+logs/profiles/run_<run_id>/:
+
+- cprofile: determinístico (cProfile), gera <step>.pstats
+            (abrir com `python -m pstats`, snakeviz, tuna...)
+- sampling: amostra a pilha da thread do step a cada poucos ms e gera
+            <step>.collapsed no formato "a;b;c N" (flamegraph.pl, speedscope)
+
+Os profilers são por thread, então steps em paralelo não se misturam.
+Steps com memória rastreada (extract) usam também tracemalloc: o pico de
+alocação é exibido e as maiores origens vão para <step>.tracemalloc.txt.
+"""
+
+import cProfile
+import logging
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+PROFILE_CPROFILE = 'cprofile'
+PROFILE_SAMPLING = 'sampling'
+PROFILE_MODES = (PROFILE_CPROFILE, PROFILE_SAMPLING)
+
+DEFAULT_SAMPLE_INTERVAL = 0.005     # Segundos entre amostras da pilha
+TRACEMALLOC_FRAMES = 10             # Profundidade guardada por alocação
+TRACEMALLOC_TOP = 25                # Origens listadas no relatório
+
+
+# =============================================================================
+# PROFILER POR AMOSTRAGEM
+# =============================================================================
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Amostra periodicamente a pilha de uma thread (sem instrumentar chamadas).
+
+    Uso:
+        sampler = StackSampler().start()
+        ...
+        sampler.stop()
+        sampler.write_collapsed(path)
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def start(self) -> 'StackSampler':
+        self._thread = threading.Thread(target=self._sample, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def write_collapsed(self, path: Path) -> Path:
+        """Grava as pilhas no formato collapsed (uma pilha por linha + contagem)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+# =============================================================================
+# PROFILING DE UM STEP
+# =============================================================================
+
+def _write_tracemalloc_report(snapshot: tracemalloc.Snapshot, peak_mb: float, path: Path) -> Path:
+    stats = snapshot.statistics('traceback')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"Pico de alocação (tracemalloc): {peak_mb:.1f} MB\n")
+        f.write(f"Maiores origens ainda alocadas ao fim do step (top {TRACEMALLOC_TOP}):\n\n")
+        for stat in stats[:TRACEMALLOC_TOP]:
+            f.write(f"{stat.size / 1024 / 1024:.2f} MB em {stat.count} blocos\n")
+            for line in stat.traceback.format():
+                f.write(f"    {line}\n")
+            f.write("\n")
+    return path
+
+
+@contextmanager
+def profile_step(
+    name: str,
+    folder: Path,
+    mode: str = PROFILE_CPROFILE,
+    trace_memory: bool = False
+):
+    """
+    Perfila o bloco e grava os arquivos do step em `folder`.
+
+    Yields:
+        Dicionário preenchido na saída com 'path', 'mode' e, com
+        trace_memory, 'traced_peak_mb' e 'tracemalloc_path'
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Modo de profiling inválido: {mode}")
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    report: Dict[str, Any] = {'step': name, 'mode': mode}
+
+    # tracemalloc é global ao processo; só é iniciado se ninguém o ligou
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    if trace_memory:
+        tracemalloc.reset_peak()
+
+    if mode == PROFILE_CPROFILE:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = StackSampler().start()
+
+    try:
+        yield report
+    finally:
+        if mode == PROFILE_CPROFILE:
+            profiler.disable()
+            report['path'] = folder / f"{name}.pstats"
+            profiler.dump_stats(str(report['path']))
+        else:
+            profiler.stop()
+            report['path'] = profiler.write_collapsed(folder / f"{name}.collapsed")
+
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            report['traced_peak_mb'] = round(peak / 1024 / 1024, 2)
+            report['tracemalloc_path'] = _write_tracemalloc_report(
+                tracemalloc.take_snapshot(), report['traced_peak_mb'],
+                folder / f"{name}.tracemalloc.txt"
+            )
+            if started_tracing:
+                tracemalloc.stop()
+
+        tracemalloc_path = report.get('tracemalloc_path')
+        logger.info(
+            f"🔬 Perfil do step {name} em {report['path']}",
+            extra={
+                'profile_path': str(report['path']),
+                'profile_mode': mode,
+                'traced_peak_mb': report.get('traced_peak_mb'),
+                'tracemalloc_path': str(tracemalloc_path) if tracemalloc_path else None,
+            }
+        )
+
+
+def profiled(
+    func: Callable[[], Any],
+    name: str,
+    folder: Path,
+    mode: str = PROFILE_CPROFILE,
+    trace_memory: bool = False
+) -> Callable[[], Any]:
+    """Envolve a função de um step com profile_step"""
+    @wraps(func)
+    def _wrapper():
+        with profile_step(name, folder, mode, trace_memory):
+            return func()
+    return _wrapper
+
+
+def profile_folder(logs_folder: Path, run_id: int) -> Path:
+    """Pasta dos perfis de uma execução"""
+    return Path(logs_folder) / 'profiles' / f'run_{run_id}'
+
+
+def profile_steps(
+    steps: Iterable[Any],
+    folder: Path,
+    mode: str = PROFILE_CPROFILE,
+    memory_steps: Iterable[str] = ()
+) -> None:
+    """Troca a função de cada step pela versão perfilada (in place)"""
+    memory_steps = set(memory_steps)
+    for step in steps:
+        step.func = profiled(step.func, step.name, folder, mode, step.name in memory_steps)
@@ -0,0 +1,380 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Planos de Execução (EXPLAIN)
+
+Todo statement SQL das camadas STG, DW e DQ passa por run_statement /
+explain_statement, que respeitam o modo de plano do processo:
+
+- execute: execução normal (padrão)
+- explain: dry-run; roda só EXPLAIN (FORMAT JSON) e não altera dados.
+           Statements sem plano (TRUNCATE, DDL) são ignorados.
+- capture: execução real via EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON);
+           os planos são gravados em dw.etl_query_plan e comparados com
+           a execução anterior (mudança de plano / regressão de duração)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from ._00_backend import affected_rows
+from ._00_step_metrics import current_step
+
+# O orquestrador usa os modos no import: SQLAlchemy só quando há conexão
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection, Engine
+
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+MODE_EXECUTE = 'execute'
+MODE_EXPLAIN = 'explain'
+MODE_CAPTURE = 'capture'
+
+# Regressão de duração: mais lento que a execução anterior em REGRESSION_RATIO
+# e em pelo menos REGRESSION_MIN_MS (ignora ruído de statements rápidos)
+DEFAULT_REGRESSION_RATIO = 0.5
+DEFAULT_REGRESSION_MIN_MS = 100.0
+
+# Statements que aceitam EXPLAIN
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'EXECUTE', 'VALUES', 'MERGE')
+
+# Atributos do nó que definem a forma do plano (custos e contagens ficam de fora)
+_SHAPE_KEYS = ('Node Type', 'Strategy', 'Join Type', 'Relation Name', 'Index Name', 'Parent Relationship')
+
+
+# =============================================================================
+# ESTADO DO PROCESSO
+# =============================================================================
+
+# Um pipeline por processo (garantido pelo lock): estado global basta
+_state: Dict[str, Any] = {'mode': MODE_EXECUTE}
+_plans: List[Dict[str, Any]] = []
+_plans_lock = threading.Lock()
+
+
+def set_plan_mode(mode: str) -> None:
+    """Define o modo de plano (execute, explain, capture) e limpa os planos"""
+    if mode not in (MODE_EXECUTE, MODE_EXPLAIN, MODE_CAPTURE):
+        raise ValueError(f"Modo de plano inválido: {mode}")
+    _state['mode'] = mode
+    with _plans_lock:
+        _plans.clear()
+
+
+def get_plan_mode() -> str:
+    return _state['mode']
+
+
+def collected_plans() -> List[Dict[str, Any]]:
+    """Planos coletados desde o último set_plan_mode, em ordem de execução"""
+    with _plans_lock:
+        return list(_plans)
+
+
+# =============================================================================
+# LEITURA DO PLANO
+# =============================================================================
+
+def _iter_nodes(node: Dict[str, Any]):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _iter_nodes(child)
+
+
+def _shape(node: Dict[str, Any]) -> List[Any]:
+    return [
+        [node.get(key) for key in _SHAPE_KEYS],
+        [_shape(child) for child in node.get('Plans', [])]
+    ]
+
+
+def plan_shape_hash(plan: Dict[str, Any]) -> str:
+    """Hash da árvore de nós do plano (tipos, tabelas e índices)"""
+    payload = json.dumps(_shape(plan['Plan']), ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def rows_affected(plan: Dict[str, Any]) -> int:
+    """
+    Linhas afetadas por um EXPLAIN ANALYZE (equivalente ao rowcount).
+
+    Em INSERT/UPDATE/DELETE sem RETURNING o nó ModifyTable retorna 0
+    linhas: usa o nó filho, descontando conflitos ignorados (DO NOTHING).
+    """
+    root = plan['Plan']
+    if root.get('Node Type') != 'ModifyTable':
+        return int(root.get('Actual Rows', 0) * root.get('Actual Loops', 1))
+    children = root.get('Plans', [])
+    if not children:
+        return 0
+    child = children[0]
+    rows = int(child.get('Actual Rows', 0) * child.get('Actual Loops', 1))
+    if root.get('Conflict Resolution') == 'NOTHING':
+        rows -= int(root.get('Conflicting Tuples', 0))
+    return max(rows, 0)
+
+
+def summarize_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Custo, linhas estimadas/reais, tempos e buffers do plano"""
+    root = plan['Plan']
+    nodes = list(_iter_nodes(root))
+    analyzed = 'Actual Rows' in root
+    return {
+        'plan_hash': plan_shape_hash(plan),
+        'root_node': root.get('Node Type'),
+        'total_cost': root.get('Total Cost'),
+        'plan_rows': root.get('Plan Rows'),
+        'actual_rows': rows_affected(plan) if analyzed else None,
+        'planning_ms': plan.get('Planning Time'),
+        'execution_ms': plan.get('Execution Time'),
+        'shared_hit_blocks': root.get('Shared Hit Blocks'),
+        'shared_read_blocks': root.get('Shared Read Blocks'),
+        'seq_scans': sorted({n['Relation Name'] for n in nodes if n.get('Node Type') == 'Seq Scan'}),
+    }
+
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+def is_explainable(sql: str) -> bool:
+    """True se o statement aceita EXPLAIN (TRUNCATE e DDL não aceitam)"""
+    words = sql.lstrip().split(None, 1)
+    return bool(words) and words[0].upper() in _EXPLAINABLE
+
+
+def explain_statement(
+    conn: Connection,
+    name: str,
+    sql: str,
+    params: Optional[Dict[str, Any]] = None,
+    analyze: bool = False
+) -> Dict[str, Any]:
+    """
+    Roda EXPLAIN no statement e guarda o plano coletado.
+
+    Com analyze=True o statement É executado (EXPLAIN ANALYZE).
+
+    Returns:
+        Registro do plano (ver summarize_plan) com statement, step e plano
+    """
+    from sqlalchemy import text
+
+    options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze else 'FORMAT JSON'
+    output = conn.execute(text(f"EXPLAIN ({options}) {sql}"), params or {}).scalar()
+    if isinstance(output, str):
+        output = json.loads(output)
+    plan = output[0]
+
+    step = current_step()
+    entry = {
+        'statement': name,
+        'step': step.name if step else None,
+        'analyzed': analyze,
+        'plan': plan,
+        **summarize_plan(plan),
+    }
+    with _plans_lock:
+        _plans.append(entry)
+
+    fields = {
+        'statement': name,
+        'total_cost': entry['total_cost'],
+        'plan_rows': entry['plan_rows'],
+        'root_node': entry['root_node'],
+    }
+    if analyze:
+        logger.info(
+            f"   📐 {name}: {entry['execution_ms']:.1f} ms, "
+            f"{entry['actual_rows']} linhas (custo {entry['total_cost']:.0f})",
+            extra={**fields, 'execution_ms': entry['execution_ms'], 'actual_rows': entry['actual_rows']}
+        )
+    else:
+        logger.info(
+            f"   📐 {name}: custo={entry['total_cost']:.2f}, "
+            f"linhas estimadas={entry['plan_rows']} ({entry['root_node']})",
+            extra=fields
+        )
+    return entry
+
+
+def run_statement(
+    conn: Connection,
+    name: str,
+    sql: str,
+    params: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Executa um statement de escrita do pipeline respeitando o modo de plano.
+
+    Args:
+        conn: Conexão SQLAlchemy
+        name: Identificador estável do statement (ex: 'stg_receita.insert')
+        sql: Statement SQL (parâmetros no formato :nome)
+        params: Parâmetros do statement
+
+    Returns:
+        Linhas afetadas (0 no modo explain)
+    """
+    from sqlalchemy import text
+
+    mode = _state['mode']
+    if mode == MODE_EXECUTE or not is_explainable(sql):
+        if mode == MODE_EXPLAIN:
+            return 0
+        return affected_rows(conn.execute(text(sql), params or {}))
+
+    entry = explain_statement(conn, name, sql, params, analyze=(mode == MODE_CAPTURE))
+    return entry['actual_rows'] or 0
+
+
+# =============================================================================
+# COMPARAÇÃO ENTRE EXECUÇÕES
+# =============================================================================
+
+def detect_regressions(
+    current: Dict[str, Any],
+    previous: Optional[Dict[str, Any]],
+    ratio: float = DEFAULT_REGRESSION_RATIO,
+    min_ms: float = DEFAULT_REGRESSION_MIN_MS
+) -> Dict[str, bool]:
+    """
+    Compara o plano de um statement com o da execução anterior.
+
+    Returns:
+        {'plan_changed': bool, 'duration_regression': bool}
+    """
+    if not previous:
+        return {'plan_changed': False, 'duration_regression': False}
+
+    plan_changed = previous.get('plan_hash') != current.get('plan_hash')
+    duration_regression = False
+    now_ms, before_ms = current.get('execution_ms'), previous.get('execution_ms')
+    if now_ms is not None and before_ms is not None:
+        duration_regression = (
+            now_ms > before_ms * (1 + ratio) and now_ms - before_ms >= min_ms
+        )
+    return {'plan_changed': plan_changed, 'duration_regression': duration_regression}
+
+
+def save_captured_plans(
+    engine: Engine,
+    run_id: int,
+    ratio: float = DEFAULT_REGRESSION_RATIO,
+    min_ms: float = DEFAULT_REGRESSION_MIN_MS
+) -> List[Dict[str, Any]]:
+    """
+    Grava os planos capturados em dw.etl_query_plan, comparando cada
+    statement com a última execução anterior que o capturou.
+
+    Returns:
+        Statements com mudança de plano ou regressão de duração
+    """
+    from sqlalchemy import text
+
+    plans = [p for p in collected_plans() if p['analyzed']]
+    flagged = []
+
+    with engine.connect() as conn:
+        for entry in plans:
+            previous = conn.execute(text("""
+                SELECT run_id, plan_hash, execution_ms
+                FROM dw.etl_query_plan
+                WHERE statement_name = :statement AND run_id < :run_id
+                ORDER BY run_id DESC
+                LIMIT 1
+            """), {'statement': entry['statement'], 'run_id': run_id}).mappings().first()
+
+            flags = detect_regressions(entry, previous, ratio, min_ms)
+            conn.execute(text("""
+                INSERT INTO dw.etl_query_plan (
+                    run_id, step_name, statement_name, plan_hash, total_cost,
+                    plan_rows, actual_rows, planning_ms, execution_ms,
+                    shared_hit_blocks, shared_read_blocks, plan,
+                    previous_run_id, plan_changed, duration_regression
+                ) VALUES (
+                    :run_id, :step, :statement, :plan_hash, :total_cost,
+                    :plan_rows, :actual_rows, :planning_ms, :execution_ms,
+                    :shared_hit_blocks, :shared_read_blocks, CAST(:plan AS JSONB),
+                    :previous_run_id, :plan_changed, :duration_regression
+                )
+            """), {
+                **{k: entry[k] for k in (
+                    'step', 'statement', 'plan_hash', 'total_cost', 'plan_rows',
+                    'actual_rows', 'planning_ms', 'execution_ms',
+                    'shared_hit_blocks', 'shared_read_blocks'
+                )},
+                'run_id': run_id,
+                'plan': json.dumps(entry['plan']),
+                'previous_run_id': previous['run_id'] if previous else None,
+                **flags,
+            })
+
+            if flags['plan_changed'] or flags['duration_regression']:
+                flagged.append({
+                    **entry, **flags,
+                    'previous_run_id': previous['run_id'],
+                    'previous_ms': previous['execution_ms'],
+                })
+        conn.commit()
+
+    logger.info(
+        f"   ✅ {len(plans)} planos gravados em dw.etl_query_plan",
+        extra={'table': 'dw.etl_query_plan', 'rows_written': len(plans), 'flagged': len(flagged)}
+    )
+    return flagged
+
+
+# =============================================================================
+# RELATÓRIO
+# =============================================================================
+
+def print_plan_report(plans: List[Dict[str, Any]]) -> None:
+    """Tabela dos planos coletados, do mais caro para o mais barato"""
+    print("\n" + "=" * 70)
+    print("   PLANOS DE EXECUÇÃO")
+    print("=" * 70)
+    if not plans:
+        print("   Nenhum statement coletado")
+        return
+
+    for entry in sorted(plans, key=lambda p: p['total_cost'] or 0, reverse=True):
+        seq = f" | seq scan: {', '.join(entry['seq_scans'])}" if entry['seq_scans'] else ''
+        print(f"   {entry['total_cost']:>14,.2f}  {entry['plan_rows']:>10,}  "
+              f"{entry['statement']}{seq}")
+    print(f"\n   {len(plans)} statements (custo total estimado | linhas estimadas)")
+
+
+def log_regressions(flagged: List[Dict[str, Any]]) -> None:
+    """Aviso (um registro por statement) das mudanças de plano e regressões de duração"""
+    for entry in flagged:
+        details = []
+        if entry['plan_changed']:
+            details.append(f"plano mudou (vs run {entry['previous_run_id']})")
+        if entry['duration_regression']:
+            details.append(f"{entry['previous_ms']:.1f} ms → {entry['execution_ms']:.1f} ms")
+        logger.warning(
+            f"   ⚠️ Regressão de plano: {entry['statement']}: {'; '.join(details)}",
+            extra={
+                'statement': entry['statement'],
+                'previous_run_id': entry['previous_run_id'],
+                'plan_changed': entry['plan_changed'],
+                'duration_regression': entry['duration_regression'],
+                'execution_ms': entry['execution_ms'],
+                'previous_ms': entry['previous_ms'],
+            }
+        )
@@ -0,0 +1,221 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Métricas por Step
+
+Context manager e decorator que medem cada step (e sub-step) do pipeline:
+início/fim reais, linhas lidas/gravadas, linhas/s e tempo de CPU do step,
+mais o pico de memória (RSS) do processo ao fim dele. Sub-steps abertos dentro de um step viram filhos dele e são
+gravados junto em dw.etl_step_log (coluna parent_step).
+
+Uso:
+    with step_context('stg_receita') as step:
+        step.add_rows(read=1000, written=980)
+
+    @track_step()
+    def extract_aliquotas(...): ...
+"""
+
+import functools
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage
+    resource = None
+
+
+# =============================================================================
+# MEDIÇÃO DE RECURSOS
+# =============================================================================
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Pico de memória residente do processo até agora, em MB.
+
+    É o high-water mark do processo (getrusage): medido no fim de um step,
+    indica o maior RSS atingido até ali. None onde não há getrusage.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# =============================================================================
+# MÉTRICAS DE UM STEP
+# =============================================================================
+
+class StepMetrics:
+    """Medições de um step; sub-steps ficam em `children`"""
+
+    def __init__(self, name: str, parent: Optional['StepMetrics'] = None):
+        self.name = name
+        self.parent = parent
+        self.children: List['StepMetrics'] = []
+        self.status: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.rows_read = 0
+        self.rows_written = 0
+        self.cpu_seconds = 0.0
+        # High-water mark do processo, não do step: os steps do DAG rodam em
+        # threads do mesmo processo, então não há RSS por step
+        self.process_peak_rss_mb: Optional[float] = None
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+        self.duration_seconds = 0.0
+
+    def add_rows(self, read: int = 0, written: int = 0) -> None:
+        """Acumula linhas lidas/gravadas"""
+        self.rows_read += int(read or 0)
+        self.rows_written += int(written or 0)
+
+    @property
+    def rows_per_sec(self) -> Optional[float]:
+        """Vazão: linhas gravadas (ou lidas, se nada foi gravado) por segundo"""
+        rows = self.rows_written or self.rows_read
+        if not rows or self.duration_seconds <= 0:
+            return None
+        return rows / self.duration_seconds
+
+    def _start(self) -> None:
+        self.started_at = datetime.now()
+        self._wall_start = time.perf_counter()
+        # CPU da thread: steps do DAG rodam em threads separadas
+        self._cpu_start = time.thread_time()
+
+    def _stop(self) -> None:
+        self.duration_seconds = time.perf_counter() - self._wall_start
+        self.cpu_seconds = time.thread_time() - self._cpu_start
+        self.finished_at = datetime.now()
+        self.process_peak_rss_mb = peak_rss_mb()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representação serializável (com sub-steps)"""
+        return {
+            'step_name': self.name,
+            'status': self.status,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'duration_seconds': round(self.duration_seconds, 3),
+            'rows_read': self.rows_read,
+            'rows_written': self.rows_written,
+            'rows_per_sec': round(self.rows_per_sec, 2) if self.rows_per_sec else None,
+            'cpu_seconds': round(self.cpu_seconds, 3),
+            'process_peak_rss_mb': (
+                round(self.process_peak_rss_mb, 1) if self.process_peak_rss_mb else None
+            ),
+            'children': [c.to_dict() for c in self.children],
+        }
+
+
+# =============================================================================
+# CONTEXTO DE STEP
+# =============================================================================
+
+# Pilha de steps abertos por thread (cada worker do DAG tem a sua)
+_local = threading.local()
+
+
+def _stack() -> List[StepMetrics]:
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def current_step() -> Optional[StepMetrics]:
+    """Step aberto na thread atual (None fora do pipeline)"""
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def step_context(name: str) -> Iterator[StepMetrics]:
+    """
+    Mede um bloco como step. Se houver um step aberto na thread, o novo
+    bloco vira sub-step dele. Exceções marcam o step como FAILED e são
+    propagadas.
+    """
+    parent = current_step()
+    metrics = StepMetrics(name, parent)
+    if parent is not None:
+        parent.children.append(metrics)
+
+    stack = _stack()
+    stack.append(metrics)
+    metrics._start()
+    try:
+        yield metrics
+        metrics.status = metrics.status or 'SUCCESS'
+    except BaseException as e:
+        metrics.status = 'FAILED'
+        metrics.error = e
+        raise
+    finally:
+        metrics._stop()
+        stack.pop()
+
+
+def track_step(name: Optional[str] = None) -> Callable:
+    """
+    Decorator: executa a função dentro de step_context.
+
+    Retorno int conta como linhas gravadas; dict pode trazer
+    'rows_read' e 'rows_written' (ou 'rows_loaded').
+    """
+    def decorator(func: Callable) -> Callable:
+        step_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with step_context(step_name) as metrics:
+                result = func(*args, **kwargs)
+                record_result(metrics, result)
+                return result
+        return wrapper
+    return decorator
+
+
+def record_result(metrics: StepMetrics, result: Any) -> None:
+    """Acumula as linhas informadas no retorno de um step"""
+    if isinstance(result, bool):
+        return
+    if isinstance(result, int):
+        metrics.add_rows(written=result)
+    elif isinstance(result, dict):
+        metrics.add_rows(
+            read=result.get('rows_read', 0),
+            written=result.get('rows_written', result.get('rows_loaded', 0))
+        )
+
+
+def record_rows(read: int = 0, written: int = 0) -> None:
+    """Soma linhas ao step aberto na thread (no-op fora do pipeline)"""
+    step = current_step()
+    if step is not None:
+        step.add_rows(read=read, written=written)
+
+
+def record_source_rows(conn, table: str) -> Optional[int]:
+    """
+    Conta as linhas da tabela de origem de uma transformação e registra
+    como lidas no step atual. Fora de um step não consulta o banco.
+
+    Args:
+        conn: Conexão SQLAlchemy (mesma transação da transformação)
+        table: Tabela qualificada (ex: 'raw.receita'), nunca entrada do usuário
+    """
+    if current_step() is None:
+        return None
+    from sqlalchemy import text
+    
+    rows = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+    record_rows(read=rows)
+    return rows
@@ -14,10 +14,13 @@ import pandas as pd
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
+from ._00_backend import bulk_insert
 from ._00_config import (
     get_config, get_engine, generate_batch_id,
     MESES_MAP, get_data_key
 )
+from ._00_logging import banner
+from ._00_step_metrics import step_context, track_step
 
 
 # =============================================================================
@@ -27,10 +30,25 @@ from ._00_config import (
 logger = logging.getLogger(__name__)
 
 
+# =============================================================================
+# MAPEAMENTO TABELA RAW → ABAS
+# =============================================================================
+
+# Chaves de etl.sheets carregadas em cada tabela RAW. A tabela é a unidade
+# de recarga: mudou uma aba, a tabela inteira é truncada e recarregada.
+RAW_TABLE_SHEETS = {
+    'receita': ['receita_realizado', 'receita_orcado'],
+    'despesa': ['despesas_realizado', 'despesas_orcado'],
+    'dre': ['modelo_dre'],
+    'aliquota': ['aliquotas'],
+}
+
+
 # =============================================================================
 # FUNÇÕES DE EXTRAÇÃO - RECEITA
 # =============================================================================
 
+@track_step()
 def extract_receita_realizado(
     file_path: Path,
     sheet_name: str,
@@ -44,7 +62,7 @@ def extract_receita_realizado(
     - Linha 0: header com meses
     - Linhas seguintes: SALES/SERVICE > Unidades > Valores
     """
-    print(f"\n📥 Extraindo Receita Realizado: {sheet_name}")
+    logger.info(f"📥 Extraindo Receita Realizado: {sheet_name}", extra={'sheet': sheet_name})
     
     config = get_config()
     ano = config.get_etl_config().get("ano_referencia", 2025)
@@ -103,12 +121,16 @@ def extract_receita_realizado(
     # Carregar no banco
     if records:
         df_insert = pd.DataFrame(records)
-        df_insert.to_sql('receita', engine, schema='raw', if_exists='append', index=False)
-        logger.info(f"   ✅ Inseridos {len(records)} registros em raw.receita")
+        bulk_insert(engine, df_insert, 'raw', 'receita')
+        logger.info(
+            f"   ✅ Inseridos {len(records)} registros em raw.receita",
+            extra={'table': 'raw.receita', 'sheet': sheet_name, 'rows_written': len(records)}
+        )
     
-    return {'rows_loaded': len(records), 'status': 'success'}
+    return {'rows_loaded': len(records), 'rows_read': len(df_raw), 'status': 'success'}
 
 
+@track_step()
 def extract_receita_orcado(
     file_path: Path,
     sheet_name: str,
@@ -119,7 +141,7 @@ def extract_receita_orcado(
     Extrai dados de Receita Bruta Orçamento para RAW.
     Mesma estrutura do Realizado.
     """
-    print(f"\n📥 Extraindo Receita Orçado: {sheet_name}")
+    logger.info(f"📥 Extraindo Receita Orçado: {sheet_name}", extra={'sheet': sheet_name})
     
     config = get_config()
     ano = config.get_etl_config().get("ano_referencia", 2025)
@@ -173,16 +195,20 @@ def extract_receita_orcado(
     
     if records:
         df_insert = pd.DataFrame(records)
-        df_insert.to_sql('receita', engine, schema='raw', if_exists='append', index=False)
-        logger.info(f"   ✅ Inseridos {len(records)} registros em raw.receita")
+        bulk_insert(engine, df_insert, 'raw', 'receita')
+        logger.info(
+            f"   ✅ Inseridos {len(records)} registros em raw.receita",
+            extra={'table': 'raw.receita', 'sheet': sheet_name, 'rows_written': len(records)}
+        )
     
-    return {'rows_loaded': len(records), 'status': 'success'}
+    return {'rows_loaded': len(records), 'rows_read': len(df_raw), 'status': 'success'}
 
 
 # =============================================================================
 # FUNÇÕES DE EXTRAÇÃO - DESPESAS
 # =============================================================================
 
+@track_step()
 def extract_despesas_realizado(
     file_path: Path,
     sheet_name: str,
@@ -195,7 +221,7 @@ def extract_despesas_realizado(
     Formato tabular com colunas:
     - Data, Unidade, Pacote, Conta, Valor
     """
-    print(f"\n📥 Extraindo Despesas Realizado: {sheet_name}")
+    logger.info(f"📥 Extraindo Despesas Realizado: {sheet_name}", extra={'sheet': sheet_name})
     
     df = pd.read_excel(file_path, sheet_name=sheet_name)
     
@@ -251,12 +277,16 @@ def extract_despesas_realizado(
     
     if records:
         df_insert = pd.DataFrame(records)
-        df_insert.to_sql('despesa', engine, schema='raw', if_exists='append', index=False)
-        logger.info(f"   ✅ Inseridos {len(records)} registros em raw.despesa")
+        bulk_insert(engine, df_insert, 'raw', 'despesa')
+        logger.info(
+            f"   ✅ Inseridos {len(records)} registros em raw.despesa",
+            extra={'table': 'raw.despesa', 'sheet': sheet_name, 'rows_written': len(records)}
+        )
     
-    return {'rows_loaded': len(records), 'status': 'success'}
+    return {'rows_loaded': len(records), 'rows_read': len(df), 'status': 'success'}
 
 
+@track_step()
 def extract_despesas_orcado(
     file_path: Path,
     sheet_name: str,
@@ -266,7 +296,7 @@ def extract_despesas_orcado(
     """
     Extrai dados de Despesas Orçamento para RAW.
     """
-    print(f"\n📥 Extraindo Despesas Orçado: {sheet_name}")
+    logger.info(f"📥 Extraindo Despesas Orçado: {sheet_name}", extra={'sheet': sheet_name})
     
     df = pd.read_excel(file_path, sheet_name=sheet_name)
     df.columns = [str(c).strip().lower() for c in df.columns]
@@ -316,16 +346,20 @@ def extract_despesas_orcado(
     
     if records:
         df_insert = pd.DataFrame(records)
-        df_insert.to_sql('despesa', engine, schema='raw', if_exists='append', index=False)
-        logger.info(f"   ✅ Inseridos {len(records)} registros em raw.despesa")
+        bulk_insert(engine, df_insert, 'raw', 'despesa')
+        logger.info(
+            f"   ✅ Inseridos {len(records)} registros em raw.despesa",
+            extra={'table': 'raw.despesa', 'sheet': sheet_name, 'rows_written': len(records)}
+        )
     
-    return {'rows_loaded': len(records), 'status': 'success'}
+    return {'rows_loaded': len(records), 'rows_read': len(df), 'status': 'success'}
 
 
 # =============================================================================
 # FUNÇÕES DE EXTRAÇÃO - DRE E ALÍQUOTAS
 # =============================================================================
 
+@track_step()
 def extract_modelo_dre(
     file_path: Path,
     sheet_name: str,
@@ -337,7 +371,7 @@ def extract_modelo_dre(
     
     Estrutura de relatório com linhas DRE × meses.
     """
-    print(f"\n📥 Extraindo Modelo DRE: {sheet_name}")
+    logger.info(f"📥 Extraindo Modelo DRE: {sheet_name}", extra={'sheet': sheet_name})
     
     df_raw = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
     
@@ -402,12 +436,16 @@ def extract_modelo_dre(
     
     if records:
         df_insert = pd.DataFrame(records)
-        df_insert.to_sql('dre', engine, schema='raw', if_exists='append', index=False)
-        logger.info(f"   ✅ Inseridos {len(records)} registros em raw.dre")
+        bulk_insert(engine, df_insert, 'raw', 'dre')
+        logger.info(
+            f"   ✅ Inseridos {len(records)} registros em raw.dre",
+            extra={'table': 'raw.dre', 'sheet': sheet_name, 'rows_written': len(records)}
+        )
     
-    return {'rows_loaded': len(records), 'status': 'success'}
+    return {'rows_loaded': len(records), 'rows_read': len(df_raw), 'status': 'success'}
 
 
+@track_step()
 def extract_aliquotas(
     file_path: Path,
     sheet_name: str,
@@ -419,7 +457,7 @@ def extract_aliquotas(
     
     Estrutura com tipos de imposto × meses.
     """
-    print(f"\n📥 Extraindo Alíquotas: {sheet_name}")
+    logger.info(f"📥 Extraindo Alíquotas: {sheet_name}", extra={'sheet': sheet_name})
     
     df_raw = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
     
@@ -465,10 +503,13 @@ def extract_aliquotas(
     
     if records:
         df_insert = pd.DataFrame(records)
-        df_insert.to_sql('aliquota', engine, schema='raw', if_exists='append', index=False)
-        logger.info(f"   ✅ Inseridos {len(records)} registros em raw.aliquota")
+        bulk_insert(engine, df_insert, 'raw', 'aliquota')
+        logger.info(
+            f"   ✅ Inseridos {len(records)} registros em raw.aliquota",
+            extra={'table': 'raw.aliquota', 'sheet': sheet_name, 'rows_written': len(records)}
+        )
     
-    return {'rows_loaded': len(records), 'status': 'success'}
+    return {'rows_loaded': len(records), 'rows_read': len(df_raw), 'status': 'success'}
 
 
 # =============================================================================
@@ -477,7 +518,9 @@ def extract_aliquotas(
 
 def run_extract(
     engine: Optional[Engine] = None,
-    truncate_before: bool = True
+    truncate_before: bool = True,
+    tables: Optional[List[str]] = None,
+    file_path: Optional[Path] = None
 ) -> Dict[str, Dict]:
     """
     Executa extração completa do arquivo Excel para camada RAW.
@@ -485,39 +528,51 @@ def run_extract(
     Args:
         engine: Engine SQLAlchemy (opcional)
         truncate_before: Se True, limpa tabelas RAW antes de carregar
+        tables: Extrai só essas tabelas RAW (ver RAW_TABLE_SHEETS);
+                default: todas
+        file_path: Arquivo Excel alternativo (default: etl.source_file)
         
     Returns:
         Dicionário com estatísticas por extração
     """
-    print("\n" + "=" * 60)
-    print("   EXTRAÇÃO: Excel → RAW")
-    print("=" * 60)
+    logger.info(banner("EXTRAÇÃO: Excel → RAW", width=60))
     
     config = get_config()
     engine = engine or get_engine()
     batch_id = generate_batch_id()
     
     # Obter arquivo fonte
-    file_path = config.get_source_file_path()
+    file_path = Path(file_path) if file_path else config.get_source_file_path()
     if not file_path.exists():
         raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
     
-    print(f"📄 Arquivo: {file_path}")
-    print(f"🔖 Batch ID: {batch_id}")
-    
-    # Obter nomes das abas
-    sheets = config.get_etl_config().get("sheets", {})
+    logger.info(
+        f"📄 Arquivo: {file_path} | 🔖 Batch ID: {batch_id}",
+        extra={'source_file': str(file_path), 'batch_id': batch_id}
+    )
+    
+    # Obter nomes das abas (apenas as das tabelas selecionadas)
+    tables = list(tables or RAW_TABLE_SHEETS)
+    unknown = set(tables) - set(RAW_TABLE_SHEETS)
+    if unknown:
+        raise ValueError(f"Tabelas RAW desconhecidas: {sorted(unknown)}")
+    
+    selected = {key for table in tables for key in RAW_TABLE_SHEETS[table]}
+    sheets = {
+        key: name for key, name in config.get_etl_config().get("sheets", {}).items()
+        if key in selected
+    }
+    if len(tables) < len(RAW_TABLE_SHEETS):
+        logger.info(f"🎯 Extração incremental: {', '.join(tables)}", extra={'tables': tables})
     
     # Truncar tabelas se solicitado
     if truncate_before:
-        print("\n🧹 Limpando tabelas RAW...")
-        with engine.connect() as conn:
-            conn.execute(text("TRUNCATE TABLE raw.receita CASCADE"))
-            conn.execute(text("TRUNCATE TABLE raw.despesa CASCADE"))
-            conn.execute(text("TRUNCATE TABLE raw.dre CASCADE"))
-            conn.execute(text("TRUNCATE TABLE raw.aliquota CASCADE"))
+        logger.info("🧹 Limpando tabelas RAW...", extra={'tables': tables})
+        with step_context('truncate_raw'), engine.connect() as conn:
+            for table in tables:
+                conn.execute(text(f"TRUNCATE TABLE raw.{table} CASCADE"))
             conn.commit()
-        print("   ✅ Tabelas RAW limpas")
+        logger.info("   ✅ Tabelas RAW limpas")
     
     # Executar extrações
     results = {}
@@ -560,7 +615,10 @@ def run_extract(
     
     # Resumo
     total_rows = sum(r.get('rows_loaded', 0) for r in results.values())
-    print(f"\n✅ Extração completa: {total_rows} registros carregados")
+    logger.info(
+        f"✅ Extração completa: {total_rows} registros carregados",
+        extra={'batch_id': batch_id, 'total_rows': total_rows}
+    )
     
     return results
 
@@ -570,4 +628,5 @@ def run_extract(
 # =============================================================================
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     run_extract()
@@ -0,0 +1,162 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Validação Fail-Fast da Camada RAW
+
+Roda logo após a extração, antes das transformações: volume por aba vs.
+histórico, meses esperados, seções SALES/SERVICE e taxa de nulos. Regras
+com status FAIL são bloqueantes e abortam o pipeline, evitando reconstruir
+STG e DW a partir de uma planilha quebrada.
+
+As regras ficam em etl/raw_rules.yml (mesmo formato do catálogo de DQ).
+As verificações por aba são geradas aqui a partir da lista `sheets` e dos
+modelos em `sheet_rules`, em vez de repetir o SQL de cada aba no YAML.
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+from sqlalchemy.engine import Engine
+
+from ._04_dq_checks import DQCatalog, DQCatalogError, parse_dq_catalog, run_dq_checks
+
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+RAW_CATALOG_PATH = Path(__file__).parent / "raw_rules.yml"
+
+
+# =============================================================================
+# EXCEÇÕES
+# =============================================================================
+
+class RawValidationError(Exception):
+    """Validação bloqueante da camada RAW falhou"""
+    pass
+
+
+# =============================================================================
+# CATÁLOGO
+# =============================================================================
+
+def _fill(value: Any, fields: Dict[str, str]) -> Any:
+    """Substitui {sheet}, {name}, {table}, {month} nos textos do modelo"""
+    if isinstance(value, str):
+        return value.format_map(fields)
+    if isinstance(value, dict):
+        return {k: _fill(v, fields) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, fields) for v in value]
+    return value
+
+
+def expand_sheet_rules(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Regras por aba: cada modelo de `sheet_rules` aplicado às abas de `sheets`.
+    
+    A regra da i-ésima aba (entre as que atendem ao `when` do modelo) recebe
+    rule_id = first_rule_id + i e o parâmetro `sheet` (etl.sheets.<key>,
+    com o nome padrão da aba como default).
+    """
+    sheets = data.get('sheets') or []
+    rules = []
+    
+    for template in data.get('sheet_rules') or []:
+        if 'first_rule_id' not in template:
+            raise DQCatalogError(f"Modelo de regra sem first_rule_id: {template}")
+        condition = template.get('when')
+        body = {k: v for k, v in template.items() if k not in ('first_rule_id', 'when')}
+        selected = [s for s in sheets if not condition or s.get(condition)]
+        
+        for i, sheet in enumerate(selected):
+            fields = {
+                'sheet': sheet['key'],
+                'name': sheet['name'],
+                'table': sheet['table'],
+                'month': sheet.get('month', ''),
+            }
+            rule = _fill(body, fields)
+            rule['rule_id'] = int(template['first_rule_id']) + i
+            rule['params'] = {
+                'sheet': {'type': 'text', 'config': f"etl.sheets.{sheet['key']}", 'default': sheet['name']},
+                **(rule.get('params') or {}),
+            }
+            rules.append(rule)
+    
+    return rules
+
+
+def load_raw_catalog(path: Path = RAW_CATALOG_PATH) -> DQCatalog:
+    """Catálogo RAW: regras geradas por aba + regras escritas por extenso"""
+    path = Path(path)
+    if not path.exists():
+        raise DQCatalogError(f"Catálogo RAW não encontrado: {path}")
+    
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=loader)
+    if not isinstance(data, dict):
+        raise DQCatalogError(f"Catálogo inválido: {path}")
+    
+    data = {**data, 'rules': expand_sheet_rules(data) + (data.get('rules') or [])}
+    return parse_dq_catalog(data, path)
+
+
+# =============================================================================
+# FUNÇÃO PRINCIPAL
+# =============================================================================
+
+def run_raw_validation(
+    engine: Optional[Engine] = None,
+    run_id: Optional[int] = None,
+    fail_on_error: bool = True,
+    params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Valida as tabelas RAW recém-carregadas.
+    
+    Args:
+        engine: Engine SQLAlchemy (opcional)
+        run_id: ID da execução (resultados vão para dw.data_quality_results
+                e alimentam o histórico de volume das próximas execuções)
+        fail_on_error: Se True, levanta RawValidationError em caso de FAIL
+        params: Sobrescreve parâmetros das regras
+        
+    Returns:
+        Dicionário com estatísticas e resultados (ver run_dq_checks)
+    """
+    results = run_dq_checks(
+        engine=engine,
+        run_id=run_id,
+        params=params,
+        catalog=load_raw_catalog(),
+        title="VALIDAÇÃO DA CAMADA RAW"
+    )
+    
+    if fail_on_error and results['failed'] > 0:
+        failed_rules = [r['rule_name'] for r in results['results'] if r['status'] == 'FAIL']
+        detail = ', '.join(failed_rules) if failed_rules else 'erro na execução das regras'
+        raise RawValidationError(
+            f"Validação RAW bloqueou o pipeline: {results['failed']} regra(s) falharam ({detail})"
+        )
+    
+    return results
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    run_raw_validation(fail_on_error=False)
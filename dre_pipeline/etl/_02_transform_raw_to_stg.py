@@ -10,10 +10,12 @@ from datetime import datetime
 from typing import Dict, Optional
 
 import pandas as pd
-from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
 from ._00_config import get_engine, get_config, MESES_MAP, get_data_key
+from ._00_logging import banner
+from ._00_query_plans import run_statement
+from ._00_step_metrics import record_source_rows
 
 
 # =============================================================================
@@ -36,7 +38,7 @@ def transform_receita(engine: Engine) -> int:
     - Padroniza cenário e tipo_receita
     - Remove registros inválidos
     """
-    print("\n🔄 Transformando receita: RAW → STG")
+    logger.info("🔄 Transformando receita: RAW → STG", extra={'table': 'stg.receita'})
     
     config = get_config()
     ano = config.get_etl_config().get("ano_referencia", 2025)
@@ -81,12 +83,15 @@ def transform_receita(engine: Engine) -> int:
     """
     
     with engine.connect() as conn:
-        conn.execute(text("TRUNCATE TABLE stg.receita"))
-        result = conn.execute(text(query))
+        record_source_rows(conn, 'raw.receita')
+        run_statement(conn, "stg_receita.truncate", "TRUNCATE TABLE stg.receita")
+        rows = run_statement(conn, "stg_receita.insert", query)
         conn.commit()
-        rows = result.rowcount
     
-    logger.info(f"   ✅ Transformados {rows} registros para stg.receita")
+    logger.info(
+        f"   ✅ Transformados {rows} registros para stg.receita",
+        extra={'table': 'stg.receita', 'rows_written': rows}
+    )
     return rows
 
 
@@ -100,7 +105,7 @@ def transform_despesa(engine: Engine) -> int:
     - Padroniza campos de texto
     - Remove registros inválidos (valores zerados, sem pacote)
     """
-    print("\n🔄 Transformando despesa: RAW → STG")
+    logger.info("🔄 Transformando despesa: RAW → STG", extra={'table': 'stg.despesa'})
     
     config = get_config()
     ano = config.get_etl_config().get("ano_referencia", 2025)
@@ -139,12 +144,15 @@ def transform_despesa(engine: Engine) -> int:
     """
     
     with engine.connect() as conn:
-        conn.execute(text("TRUNCATE TABLE stg.despesa"))
-        result = conn.execute(text(query))
+        record_source_rows(conn, 'raw.despesa')
+        run_statement(conn, "stg_despesa.truncate", "TRUNCATE TABLE stg.despesa")
+        rows = run_statement(conn, "stg_despesa.insert", query)
         conn.commit()
-        rows = result.rowcount
     
-    logger.info(f"   ✅ Transformados {rows} registros para stg.despesa")
+    logger.info(
+        f"   ✅ Transformados {rows} registros para stg.despesa",
+        extra={'table': 'stg.despesa', 'rows_written': rows}
+    )
     return rows
 
 
@@ -157,7 +165,7 @@ def transform_dre(engine: Engine) -> int:
     - Determina nível hierárquico
     - Padroniza categorias
     """
-    print("\n🔄 Transformando DRE: RAW → STG")
+    logger.info("🔄 Transformando DRE: RAW → STG", extra={'table': 'stg.dre'})
     
     config = get_config()
     ano = config.get_etl_config().get("ano_referencia", 2025)
@@ -201,12 +209,15 @@ def transform_dre(engine: Engine) -> int:
     """
     
     with engine.connect() as conn:
-        conn.execute(text("TRUNCATE TABLE stg.dre"))
-        result = conn.execute(text(query))
+        record_source_rows(conn, 'raw.dre')
+        run_statement(conn, "stg_dre.truncate", "TRUNCATE TABLE stg.dre")
+        rows = run_statement(conn, "stg_dre.insert", query)
         conn.commit()
-        rows = result.rowcount
     
-    logger.info(f"   ✅ Transformados {rows} registros para stg.dre")
+    logger.info(
+        f"   ✅ Transformados {rows} registros para stg.dre",
+        extra={'table': 'stg.dre', 'rows_written': rows}
+    )
     return rows
 
 
@@ -218,7 +229,7 @@ def transform_aliquota(engine: Engine) -> int:
     - Adiciona mes_num e data_key
     - Padroniza tipo de imposto
     """
-    print("\n🔄 Transformando alíquotas: RAW → STG")
+    logger.info("🔄 Transformando alíquotas: RAW → STG", extra={'table': 'stg.aliquota'})
     
     config = get_config()
     ano = config.get_etl_config().get("ano_referencia", 2025)
@@ -255,12 +266,15 @@ def transform_aliquota(engine: Engine) -> int:
     """
     
     with engine.connect() as conn:
-        conn.execute(text("TRUNCATE TABLE stg.aliquota"))
-        result = conn.execute(text(query))
+        record_source_rows(conn, 'raw.aliquota')
+        run_statement(conn, "stg_aliquota.truncate", "TRUNCATE TABLE stg.aliquota")
+        rows = run_statement(conn, "stg_aliquota.insert", query)
         conn.commit()
-        rows = result.rowcount
     
-    logger.info(f"   ✅ Transformados {rows} registros para stg.aliquota")
+    logger.info(
+        f"   ✅ Transformados {rows} registros para stg.aliquota",
+        extra={'table': 'stg.aliquota', 'rows_written': rows}
+    )
     return rows
 
 
@@ -278,9 +292,7 @@ def run_transform_raw_to_stg(engine: Optional[Engine] = None) -> Dict[str, int]:
     Returns:
         Dicionário com contagem de registros por tabela
     """
-    print("\n" + "=" * 60)
-    print("   TRANSFORMAÇÃO: RAW → STG (Silver)")
-    print("=" * 60)
+    logger.info(banner("TRANSFORMAÇÃO: RAW → STG (Silver)", width=60))
     
     engine = engine or get_engine()
     
@@ -292,7 +304,7 @@ def run_transform_raw_to_stg(engine: Optional[Engine] = None) -> Dict[str, int]:
     }
     
     total = sum(results.values())
-    print(f"\n✅ Transformação RAW→STG completa: {total} registros")
+    logger.info(f"✅ Transformação RAW→STG completa: {total} registros", extra={'total_rows': total})
     
     return results
 
@@ -302,4 +314,5 @@ def run_transform_raw_to_stg(engine: Optional[Engine] = None) -> Dict[str, int]:
 # =============================================================================
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     run_transform_raw_to_stg()
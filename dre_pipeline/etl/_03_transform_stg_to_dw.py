@@ -2,7 +2,7 @@
 DRE Analytics 2025 - Pipeline ETL
 Transformação STG → DW
 
-Popula as tabelas dimensão e fato do Star Schema.
+Popula as tabelas dimensão e fato do Star Schema e os agregados mensais.
 """
 
 import logging
@@ -10,10 +10,12 @@ from datetime import datetime
 from typing import Dict, Optional
 
 import pandas as pd
-from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
 from ._00_config import get_engine
+from ._00_logging import banner
+from ._00_query_plans import run_statement
+from ._00_step_metrics import record_source_rows
 
 
 # =============================================================================
@@ -33,7 +35,7 @@ def load_dim_unidade(engine: Engine) -> int:
     
     Extrai unidades únicas das despesas e receitas.
     """
-    print("\n📊 Carregando dimensão: dim_unidade")
+    logger.info("📊 Carregando dimensão: dim_unidade", extra={'table': 'dw.dim_unidade'})
     
     query = """
         INSERT INTO dw.dim_unidade (unidade, is_active, dw_loaded_at)
@@ -49,12 +51,16 @@ def load_dim_unidade(engine: Engine) -> int:
     """
     
     with engine.connect() as conn:
+        record_source_rows(conn, 'stg.receita')
+        record_source_rows(conn, 'stg.despesa')
         # Não truncar - usar UPSERT para manter histórico
-        result = conn.execute(text(query))
+        rows = run_statement(conn, "dim_unidade.upsert", query)
         conn.commit()
-        rows = result.rowcount
     
-    logger.info(f"   ✅ Carregadas {rows} unidades em dw.dim_unidade")
+    logger.info(
+        f"   ✅ Carregadas {rows} unidades em dw.dim_unidade",
+        extra={'table': 'dw.dim_unidade', 'rows_written': rows}
+    )
     return rows
 
 
@@ -64,7 +70,7 @@ def load_dim_pacote(engine: Engine) -> int:
     
     Extrai pacotes únicos das despesas.
     """
-    print("\n📊 Carregando dimensão: dim_pacote")
+    logger.info("📊 Carregando dimensão: dim_pacote", extra={'table': 'dw.dim_pacote'})
     
     query = """
         INSERT INTO dw.dim_pacote (pacote, is_active, dw_loaded_at)
@@ -76,11 +82,14 @@ def load_dim_pacote(engine: Engine) -> int:
     """
     
     with engine.connect() as conn:
-        result = conn.execute(text(query))
+        record_source_rows(conn, 'stg.despesa')
+        rows = run_statement(conn, "dim_pacote.upsert", query)
         conn.commit()
-        rows = result.rowcount
     
-    logger.info(f"   ✅ Carregados {rows} pacotes em dw.dim_pacote")
+    logger.info(
+        f"   ✅ Carregados {rows} pacotes em dw.dim_pacote",
+        extra={'table': 'dw.dim_pacote', 'rows_written': rows}
+    )
     return rows
 
 
@@ -90,7 +99,7 @@ def load_dim_linha_dre(engine: Engine) -> int:
     
     Extrai linhas DRE únicas com hierarquia.
     """
-    print("\n📊 Carregando dimensão: dim_linha_dre")
+    logger.info("📊 Carregando dimensão: dim_linha_dre", extra={'table': 'dw.dim_linha_dre'})
     
     query = """
         INSERT INTO dw.dim_linha_dre (linha_dre, categoria, ordem, nivel, is_total, dw_loaded_at)
@@ -116,11 +125,14 @@ def load_dim_linha_dre(engine: Engine) -> int:
     """
     
     with engine.connect() as conn:
-        result = conn.execute(text(query))
+        record_source_rows(conn, 'stg.dre')
+        rows = run_statement(conn, "dim_linha_dre.upsert", query)
         conn.commit()
-        rows = result.rowcount
     
-    logger.info(f"   ✅ Carregadas {rows} linhas DRE em dw.dim_linha_dre")
+    logger.info(
+        f"   ✅ Carregadas {rows} linhas DRE em dw.dim_linha_dre",
+        extra={'table': 'dw.dim_linha_dre', 'rows_written': rows}
+    )
     return rows
 
 
@@ -132,7 +144,7 @@ def load_fact_receita(engine: Engine) -> int:
     """
     Carrega stg.receita → dw.fact_receita
     """
-    print("\n📈 Carregando fato: fact_receita")
+    logger.info("📈 Carregando fato: fact_receita", extra={'table': 'dw.fact_receita'})
     
     query = """
         INSERT INTO dw.fact_receita (
@@ -149,12 +161,15 @@ def load_fact_receita(engine: Engine) -> int:
     """
     
     with engine.connect() as conn:
-        conn.execute(text("TRUNCATE TABLE dw.fact_receita"))
-        result = conn.execute(text(query))
+        record_source_rows(conn, 'stg.receita')
+        run_statement(conn, "fact_receita.truncate", "TRUNCATE TABLE dw.fact_receita")
+        rows = run_statement(conn, "fact_receita.insert", query)
         conn.commit()
-        rows = result.rowcount
     
-    logger.info(f"   ✅ Carregados {rows} registros em dw.fact_receita")
+    logger.info(
+        f"   ✅ Carregados {rows} registros em dw.fact_receita",
+        extra={'table': 'dw.fact_receita', 'rows_written': rows}
+    )
     return rows
 
 
@@ -162,7 +177,7 @@ def load_fact_despesa(engine: Engine) -> int:
     """
     Carrega stg.despesa → dw.fact_despesa
     """
-    print("\n📈 Carregando fato: fact_despesa")
+    logger.info("📈 Carregando fato: fact_despesa", extra={'table': 'dw.fact_despesa'})
     
     query = """
         INSERT INTO dw.fact_despesa (
@@ -180,12 +195,15 @@ def load_fact_despesa(engine: Engine) -> int:
     """
     
     with engine.connect() as conn:
-        conn.execute(text("TRUNCATE TABLE dw.fact_despesa"))
-        result = conn.execute(text(query))
+        record_source_rows(conn, 'stg.despesa')
+        run_statement(conn, "fact_despesa.truncate", "TRUNCATE TABLE dw.fact_despesa")
+        rows = run_statement(conn, "fact_despesa.insert", query)
         conn.commit()
-        rows = result.rowcount
     
-    logger.info(f"   ✅ Carregados {rows} registros em dw.fact_despesa")
+    logger.info(
+        f"   ✅ Carregados {rows} registros em dw.fact_despesa",
+        extra={'table': 'dw.fact_despesa', 'rows_written': rows}
+    )
     return rows
 
 
@@ -193,7 +211,7 @@ def load_fact_dre(engine: Engine) -> int:
     """
     Carrega stg.dre → dw.fact_dre
     """
-    print("\n📈 Carregando fato: fact_dre")
+    logger.info("📈 Carregando fato: fact_dre", extra={'table': 'dw.fact_dre'})
     
     query = """
         INSERT INTO dw.fact_dre (
@@ -209,12 +227,15 @@ def load_fact_dre(engine: Engine) -> int:
     """
     
     with engine.connect() as conn:
-        conn.execute(text("TRUNCATE TABLE dw.fact_dre"))
-        result = conn.execute(text(query))
+        record_source_rows(conn, 'stg.dre')
+        run_statement(conn, "fact_dre.truncate", "TRUNCATE TABLE dw.fact_dre")
+        rows = run_statement(conn, "fact_dre.insert", query)
         conn.commit()
-        rows = result.rowcount
     
-    logger.info(f"   ✅ Carregados {rows} registros em dw.fact_dre")
+    logger.info(
+        f"   ✅ Carregados {rows} registros em dw.fact_dre",
+        extra={'table': 'dw.fact_dre', 'rows_written': rows}
+    )
     return rows
 
 
@@ -222,7 +243,7 @@ def load_fact_aliquota(engine: Engine) -> int:
     """
     Carrega stg.aliquota → dw.fact_aliquota
     """
-    print("\n📈 Carregando fato: fact_aliquota")
+    logger.info("📈 Carregando fato: fact_aliquota", extra={'table': 'dw.fact_aliquota'})
     
     query = """
         INSERT INTO dw.fact_aliquota (
@@ -237,12 +258,95 @@ def load_fact_aliquota(engine: Engine) -> int:
     """
     
     with engine.connect() as conn:
-        conn.execute(text("TRUNCATE TABLE dw.fact_aliquota"))
-        result = conn.execute(text(query))
+        record_source_rows(conn, 'stg.aliquota')
+        run_statement(conn, "fact_aliquota.truncate", "TRUNCATE TABLE dw.fact_aliquota")
+        rows = run_statement(conn, "fact_aliquota.insert", query)
         conn.commit()
-        rows = result.rowcount
     
-    logger.info(f"   ✅ Carregados {rows} registros em dw.fact_aliquota")
+    logger.info(
+        f"   ✅ Carregados {rows} registros em dw.fact_aliquota",
+        extra={'table': 'dw.fact_aliquota', 'rows_written': rows}
+    )
+    return rows
+
+
+# =============================================================================
+# FUNÇÕES DE CARGA - AGREGADOS
+# =============================================================================
+
+def load_agg_receita_mensal(engine: Engine) -> int:
+    """
+    Carrega dw.fact_receita → dw.agg_receita_mensal
+    
+    Grão: mês × cenário × tipo de receita (soma todas as unidades).
+    """
+    logger.info("🧮 Carregando agregado: agg_receita_mensal", extra={'table': 'dw.agg_receita_mensal'})
+    
+    query = """
+        INSERT INTO dw.agg_receita_mensal (
+            data_key, cenario, tipo_receita, valor, linhas, valor_min, valor_max, dw_loaded_at
+        )
+        SELECT
+            data_key,
+            cenario,
+            tipo_receita,
+            SUM(valor),
+            COUNT(*),
+            MIN(valor),
+            MAX(valor),
+            NOW()
+        FROM dw.fact_receita
+        GROUP BY data_key, cenario, tipo_receita
+    """
+    
+    with engine.connect() as conn:
+        record_source_rows(conn, 'dw.fact_receita')
+        run_statement(conn, "agg_receita_mensal.truncate", "TRUNCATE TABLE dw.agg_receita_mensal")
+        rows = run_statement(conn, "agg_receita_mensal.insert", query)
+        conn.commit()
+    
+    logger.info(
+        f"   ✅ Carregados {rows} registros em dw.agg_receita_mensal",
+        extra={'table': 'dw.agg_receita_mensal', 'rows_written': rows}
+    )
+    return rows
+
+
+def load_agg_despesa_mensal(engine: Engine) -> int:
+    """
+    Carrega dw.fact_despesa → dw.agg_despesa_mensal
+    
+    Grão: mês × cenário × pacote (soma todas as unidades e contas).
+    """
+    logger.info("🧮 Carregando agregado: agg_despesa_mensal", extra={'table': 'dw.agg_despesa_mensal'})
+    
+    query = """
+        INSERT INTO dw.agg_despesa_mensal (
+            data_key, cenario, pacote, valor, linhas, valor_min, valor_max, dw_loaded_at
+        )
+        SELECT
+            data_key,
+            cenario,
+            pacote,
+            SUM(valor),
+            COUNT(*),
+            MIN(valor),
+            MAX(valor),
+            NOW()
+        FROM dw.fact_despesa
+        GROUP BY data_key, cenario, pacote
+    """
+    
+    with engine.connect() as conn:
+        record_source_rows(conn, 'dw.fact_despesa')
+        run_statement(conn, "agg_despesa_mensal.truncate", "TRUNCATE TABLE dw.agg_despesa_mensal")
+        rows = run_statement(conn, "agg_despesa_mensal.insert", query)
+        conn.commit()
+    
+    logger.info(
+        f"   ✅ Carregados {rows} registros em dw.agg_despesa_mensal",
+        extra={'table': 'dw.agg_despesa_mensal', 'rows_written': rows}
+    )
     return rows
 
 
@@ -260,14 +364,12 @@ def run_transform_stg_to_dw(engine: Optional[Engine] = None) -> Dict[str, int]:
     Returns:
         Dicionário com contagem de registros por tabela
     """
-    print("\n" + "=" * 60)
-    print("   TRANSFORMAÇÃO: STG → DW (Gold)")
-    print("=" * 60)
+    logger.info(banner("TRANSFORMAÇÃO: STG → DW (Gold)", width=60))
     
     engine = engine or get_engine()
     
     # Carregar dimensões primeiro
-    print("\n--- Dimensões ---")
+    logger.info("--- Dimensões ---")
     dim_results = {
         'dim_unidade': load_dim_unidade(engine),
         'dim_pacote': load_dim_pacote(engine),
@@ -275,7 +377,7 @@ def run_transform_stg_to_dw(engine: Optional[Engine] = None) -> Dict[str, int]:
     }
     
     # Depois carregar fatos
-    print("\n--- Fatos ---")
+    logger.info("--- Fatos ---")
     fact_results = {
         'fact_receita': load_fact_receita(engine),
         'fact_despesa': load_fact_despesa(engine),
@@ -283,10 +385,17 @@ def run_transform_stg_to_dw(engine: Optional[Engine] = None) -> Dict[str, int]:
         'fact_aliquota': load_fact_aliquota(engine)
     }
     
-    results = {**dim_results, **fact_results}
+    # Agregados leem as fatos já carregadas
+    logger.info("--- Agregados ---")
+    agg_results = {
+        'agg_receita_mensal': load_agg_receita_mensal(engine),
+        'agg_despesa_mensal': load_agg_despesa_mensal(engine)
+    }
+    
+    results = {**dim_results, **fact_results, **agg_results}
     total = sum(results.values())
     
-    print(f"\n✅ Transformação STG→DW completa: {total} registros")
+    logger.info(f"✅ Transformação STG→DW completa: {total} registros", extra={'total_rows': total})
     
     return results
 
@@ -296,4 +405,5 @@ def run_transform_stg_to_dw(engine: Optional[Engine] = None) -> Dict[str, int]:
 # =============================================================================
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     run_transform_stg_to_dw()
@@ -0,0 +1,301 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Detecção Estatística de Anomalias (DQ)
+
+Compara cada mês com o histórico da própria série (cenário × unidade × item)
+usando z-score robusto (mediana/MAD) e z-score móvel (janela de meses
+anteriores). O item é o pacote (despesa), o tipo de receita (receita) ou a
+linha da DRE (dre).
+
+Todo o cálculo é feito no PostgreSQL, em SQL set-based com window functions,
+sobre dw.dq_metric_snapshot: uma foto mensal agregada dos fatos gravada a
+cada execução. Assim o histórico sobrevive aos TRUNCATEs das tabelas fato.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from ._00_config import get_engine, get_config
+from ._00_logging import banner
+from ._00_query_plans import MODE_EXPLAIN, explain_statement, get_plan_mode, run_statement
+
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# PARÂMETROS
+# =============================================================================
+
+# Regra registrada em dw.data_quality_results com o resumo das anomalias
+ANOMALY_RULE_ID = 900
+ANOMALY_RULE_NAME = 'anomalias_estatisticas'
+
+# |z| máximo gravado: MAD ou desvio móvel quase nulos (mas não zero) geram
+# scores enormes que estourariam robust_z/rolling_z (DECIMAL(10,2))
+MAX_ABS_Z = 1_000_000
+
+DEFAULT_ANOMALY_PARAMS = {
+    'mad_threshold': 3.5,     # |z robusto| a partir do qual o mês é anômalo
+    'z_threshold': 3.0,       # |z móvel| a partir do qual o mês é anômalo
+    'window_months': 12,      # Meses anteriores na janela móvel
+    'history_months': 36,     # Profundidade do histórico considerado
+    'min_points': 6,          # Pontos mínimos na série para avaliar
+    'min_desvio': 1000.0,     # Desvio absoluto mínimo (R$) para sinalizar
+}
+
+
+def get_anomaly_params(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Resolve os parâmetros de detecção.
+
+    Precedência: overrides > config.yml (data_quality.anomalies) > default.
+    """
+    configured = get_config().get_dq_config().get('anomalies') or {}
+    params = {**DEFAULT_ANOMALY_PARAMS, **configured, **(overrides or {})}
+
+    for key in ('window_months', 'history_months', 'min_points'):
+        params[key] = int(params[key])
+    for key in ('mad_threshold', 'z_threshold', 'min_desvio'):
+        params[key] = float(params[key])
+
+    return params
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+
+# Foto mensal agregada dos fatos desta execução (idempotente por run_id)
+SNAPSHOT_QUERY = """
+    INSERT INTO dw.dq_metric_snapshot (run_id, fonte, cenario, unidade, item, data_key, valor)
+    SELECT :run_id, 'receita', cenario, unidade, tipo_receita, data_key, SUM(valor)
+    FROM dw.fact_receita
+    GROUP BY cenario, unidade, tipo_receita, data_key
+    UNION ALL
+    SELECT :run_id, 'despesa', cenario, unidade, pacote, data_key, SUM(valor)
+    FROM dw.fact_despesa
+    GROUP BY cenario, unidade, pacote, data_key
+    UNION ALL
+    SELECT :run_id, 'dre', cenario, '', linha_dre, data_key, SUM(valor)
+    FROM dw.fact_dre
+    GROUP BY cenario, linha_dre, data_key
+    ON CONFLICT (run_id, fonte, cenario, unidade, item, data_key) DO NOTHING
+"""
+
+# Scores por série/mês e gravação dos meses anômalos desta execução
+DETECTION_QUERY = """
+    INSERT INTO dw.data_quality_anomalies (
+        run_id, fonte, cenario, unidade, item, data_key, valor,
+        mediana, mad, robust_z, rolling_mean, rolling_std, rolling_z
+    )
+    WITH meses_run AS (
+        SELECT DISTINCT data_key
+        FROM dw.dq_metric_snapshot
+        WHERE run_id = :run_id
+    ),
+    historico AS (
+        -- Valor mais recente de cada série/mês entre todas as execuções
+        SELECT DISTINCT ON (fonte, cenario, unidade, item, data_key)
+            fonte, cenario, unidade, item, data_key, valor
+        FROM dw.dq_metric_snapshot
+        WHERE run_id <= :run_id
+          AND data_key >= TO_CHAR(
+              TO_DATE((SELECT MAX(data_key) FROM meses_run), 'YYYY-MM')
+                  - MAKE_INTERVAL(months => :history_months),
+              'YYYY-MM'
+          )
+        ORDER BY fonte, cenario, unidade, item, data_key, run_id DESC
+    ),
+    movel AS (
+        SELECT
+            h.*,
+            AVG(valor) OVER w AS rolling_mean,
+            STDDEV_SAMP(valor) OVER w AS rolling_std,
+            COUNT(*) OVER w AS rolling_n
+        FROM historico h
+        WINDOW w AS (
+            PARTITION BY fonte, cenario, unidade, item
+            ORDER BY data_key
+            ROWS BETWEEN :window_months PRECEDING AND 1 PRECEDING
+        )
+    ),
+    medianas AS (
+        SELECT
+            fonte, cenario, unidade, item,
+            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY valor) AS mediana,
+            COUNT(*) AS n
+        FROM historico
+        GROUP BY fonte, cenario, unidade, item
+    ),
+    desvios AS (
+        SELECT
+            h.fonte, h.cenario, h.unidade, h.item,
+            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY ABS(h.valor - m.mediana)) AS mad,
+            AVG(ABS(h.valor - m.mediana)) AS mean_ad
+        FROM historico h
+        JOIN medianas m USING (fonte, cenario, unidade, item)
+        GROUP BY h.fonte, h.cenario, h.unidade, h.item
+    ),
+    scores AS (
+        SELECT
+            mv.fonte, mv.cenario, mv.unidade, mv.item, mv.data_key, mv.valor,
+            m.mediana, d.mad, m.n,
+            -- MAD = 0 (série quase constante): usa desvio absoluto médio.
+            -- Scores limitados a ±MAX_ABS_Z dentro de cada ramo (LEAST /
+            -- GREATEST ignoram NULL, que precisa continuar NULL)
+            CASE
+                WHEN d.mad > 0 THEN LEAST(GREATEST(
+                    0.6745 * (mv.valor - m.mediana) / d.mad, -:max_abs_z), :max_abs_z)
+                WHEN d.mean_ad > 0 THEN LEAST(GREATEST(
+                    (mv.valor - m.mediana) / (1.253314 * d.mean_ad), -:max_abs_z), :max_abs_z)
+            END AS robust_z,
+            mv.rolling_mean,
+            mv.rolling_std,
+            CASE
+                WHEN mv.rolling_n >= :min_points AND mv.rolling_std > 0 THEN LEAST(GREATEST(
+                    (mv.valor - mv.rolling_mean) / mv.rolling_std, -:max_abs_z), :max_abs_z)
+            END AS rolling_z
+        FROM movel mv
+        JOIN medianas m USING (fonte, cenario, unidade, item)
+        JOIN desvios d USING (fonte, cenario, unidade, item)
+        WHERE mv.data_key IN (SELECT data_key FROM meses_run)
+    )
+    SELECT
+        :run_id, fonte, cenario, unidade, item, data_key, valor,
+        mediana, mad, robust_z, rolling_mean, rolling_std, rolling_z
+    FROM scores
+    WHERE n >= :min_points
+      AND ABS(valor - mediana) >= :min_desvio
+      AND (ABS(robust_z) >= :mad_threshold OR ABS(rolling_z) >= :z_threshold)
+    RETURNING fonte, cenario, unidade, item, data_key, valor, mediana, robust_z, rolling_z
+"""
+
+
+# =============================================================================
+# FUNÇÃO PRINCIPAL
+# =============================================================================
+
+def run_anomaly_detection(
+    engine: Optional[Engine] = None,
+    run_id: Optional[int] = None,
+    params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Grava a foto mensal da execução e sinaliza meses anômalos.
+
+    Args:
+        engine: Engine SQLAlchemy (opcional)
+        run_id: ID da execução (default: última execução registrada)
+        params: Sobrescreve limiares/janelas (ver DEFAULT_ANOMALY_PARAMS)
+
+    Returns:
+        Dicionário com total de anomalias e as linhas sinalizadas
+    """
+    logger.info(banner("DETECÇÃO DE ANOMALIAS (z-score / MAD)", width=60))
+
+    engine = engine or get_engine()
+    params = get_anomaly_params(params)
+
+    with engine.connect() as conn:
+        if run_id is None:
+            run_id = conn.execute(text("SELECT MAX(run_id) FROM dw.etl_run")).scalar()
+            if run_id is None:
+                logger.info("   ⏭️ Nenhuma execução registrada em dw.etl_run")
+                return {'status': 'SKIPPED', 'total': 0, 'anomalies': []}
+
+        detection_params = {'run_id': run_id, 'max_abs_z': MAX_ABS_Z, **params}
+
+        # Dry-run (--explain): planos da foto e da detecção, sem gravar nada
+        if get_plan_mode() == MODE_EXPLAIN:
+            explain_statement(conn, 'anomalies.snapshot', SNAPSHOT_QUERY, {'run_id': run_id})
+            explain_statement(conn, 'anomalies.detection', DETECTION_QUERY, detection_params)
+            return {'status': 'SKIPPED', 'total': 0, 'anomalies': []}
+
+        snapshot = run_statement(conn, 'anomalies.snapshot', SNAPSHOT_QUERY, {'run_id': run_id})
+        logger.info(
+            f"   ✅ {snapshot} pontos gravados em dw.dq_metric_snapshot",
+            extra={'table': 'dw.dq_metric_snapshot', 'rows_written': snapshot}
+        )
+
+        # Reexecução para o mesmo run_id substitui o resultado anterior
+        conn.execute(
+            text("DELETE FROM dw.data_quality_anomalies WHERE run_id = :run_id"),
+            {'run_id': run_id}
+        )
+        rows = conn.execute(text(DETECTION_QUERY), detection_params).fetchall()
+
+        anomalies = [dict(r._mapping) for r in rows]
+        status = 'WARN' if anomalies else 'PASS'
+        message = (
+            f"{len(anomalies)} meses anômalos (|z robusto| ≥ {params['mad_threshold']} "
+            f"ou |z móvel| ≥ {params['z_threshold']})"
+        )
+
+        conn.execute(text("""
+            INSERT INTO dw.data_quality_results (
+                run_id, rule_id, rule_name, rule_description,
+                status, expected_value, actual_value, message
+            ) VALUES (
+                :run_id, :rule_id, :rule_name, :rule_description,
+                :status, 0, :actual_value, :message
+            )
+        """), {
+            'run_id': run_id,
+            'rule_id': ANOMALY_RULE_ID,
+            'rule_name': ANOMALY_RULE_NAME,
+            'rule_description': 'Meses fora do padrão histórico por unidade, pacote e linha DRE',
+            'status': status,
+            'actual_value': len(anomalies),
+            'message': message,
+        })
+        conn.commit()
+
+    emoji = '⚠️' if anomalies else '✅'
+    logger.log(
+        logging.WARNING if anomalies else logging.INFO,
+        f"   {emoji} {message}",
+        extra={'rule_name': ANOMALY_RULE_NAME, 'status': status, 'anomalies': len(anomalies)}
+    )
+
+    # Mostrar as mais extremas
+    top = sorted(
+        anomalies,
+        key=lambda a: abs(a['robust_z'] or a['rolling_z'] or 0),
+        reverse=True
+    )[:10]
+    for a in top:
+        z = a['robust_z'] if a['robust_z'] is not None else a['rolling_z']
+        local = ' / '.join(p for p in (a['unidade'], a['item']) if p)
+        logger.warning(
+            f"      🔎 {a['fonte']} | {a['cenario']} | {local} | {a['data_key']}: "
+            f"R$ {float(a['valor']):,.2f} (mediana R$ {float(a['mediana']):,.2f}, z={float(z):.1f})",
+            extra={
+                'fonte': a['fonte'], 'cenario': a['cenario'], 'unidade': a['unidade'],
+                'item': a['item'], 'data_key': a['data_key'], 'valor': float(a['valor']),
+                'mediana': float(a['mediana']), 'z': float(z),
+            }
+        )
+
+    return {
+        'status': status,
+        'run_id': run_id,
+        'total': len(anomalies),
+        'anomalies': anomalies
+    }
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    run_anomaly_detection()
@@ -7,13 +7,22 @@ Executa validações e registra resultados na tabela dw.data_quality_results.
 
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
+import yaml
 from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine
 
-from ._00_config import get_engine, get_config
+from ._00_backend import affected_rows
+from ._00_config import get_engine, get_config, PROJECT_ROOT
+from ._00_logging import banner
+from ._00_prepared import (
+    PARAM_TYPES, CompiledStatement, StatementError, compile_statement_sql,
+    ensure_prepared, execute_statement, forget_prepared
+)
+from ._00_query_plans import MODE_CAPTURE, MODE_EXPLAIN, explain_statement, get_plan_mode
 
 
 # =============================================================================
@@ -24,255 +33,288 @@ logger = logging.getLogger(__name__)
 
 
 # =============================================================================
-# DEFINIÇÃO DOS CHECKS
+# CATÁLOGO DE REGRAS
 # =============================================================================
 
-def get_dq_checks() -> List[Dict]:
+# Catálogo padrão (versionado junto ao código)
+DEFAULT_CATALOG_PATH = Path(__file__).parent / "dq_rules.yml"
+
+# Parâmetros adicionais das queries de amostragem
+SAMPLE_PARAMS = {
+    'sample_run_id': {'type': 'integer'},
+    'sample_limit': {'type': 'integer'},
+}
+
+# Limite padrão de linhas de amostra por regra
+DEFAULT_SAMPLE_LIMIT = 20
+
+# Cache de catálogos carregados: caminho → (mtime, catálogo)
+_CATALOG_CACHE: Dict[Path, Tuple[float, 'DQCatalog']] = {}
+
+
+class DQCatalogError(Exception):
+    """Erro de definição ou parametrização do catálogo de DQ"""
+    pass
+
+
+def compile_rule_sql(sql: str, params: Dict[str, Dict]) -> Tuple[str, List[str]]:
     """
-    Retorna lista de verificações de DQ.
+    Converte placeholders nomeados (:param) em posicionais ($1, $2, ...).
     
-    Cada check retorna:
-    - status: PASS, FAIL, WARN
-    - actual_value: valor encontrado
-    - expected_value: valor esperado
-    - message: descrição do resultado
+    Args:
+        sql: Query da regra com placeholders nomeados
+        params: Parâmetros declarados na regra (ordem de declaração)
+        
+    Returns:
+        Tupla (sql compilado, nomes dos parâmetros na ordem posicional)
     """
-    config = get_config()
-    dq_config = config.get_dq_config()
+    try:
+        return compile_statement_sql(sql, params)
+    except StatementError as e:
+        raise DQCatalogError(str(e))
+
+
+def _lookup_path(context: Dict[str, Any], path: str) -> Any:
+    """Resolve um caminho pontuado (ex: data_quality.expected.lucro_liquido)"""
+    value: Any = context
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+class DQRule:
+    """
+    Regra de DQ compilada.
     
-    receita_real = dq_config.get('receita_bruta_realizado', 67629718.14)
-    receita_orc = dq_config.get('receita_bruta_orcado', 68369172.32)
-    desp_real = dq_config.get('despesas_realizado', -41613267.98)
-    desp_orc = dq_config.get('despesas_orcado', -48774529.00)
-    lucro = dq_config.get('lucro_liquido', 18572919.69)
-    tolerance = dq_config.get('tolerance_percent', 0.01)
+    A query é compilada uma única vez (placeholders → $n) e executada como
+    prepared statement do PostgreSQL, com os parâmetros vinculados em cada
+    execução (no DuckDB, a query compilada roda direto com os parâmetros
+    posicionais; ver execute_statement).
     
-    return [
-        {
-            'rule_id': 1,
-            'rule_name': 'receita_realizado_total',
-            'description': 'Valida total de Receita Bruta Realizado',
-            'query': f"""
-                WITH totals AS (
-                    SELECT SUM(valor) as total
-                    FROM dw.fact_receita
-                    WHERE cenario = 'Realizado'
-                      AND tipo_receita IN ('SALES', 'SERVICE')
-                )
-                SELECT 
-                    CASE 
-                        WHEN ABS(total - {receita_real}) / {receita_real} <= {tolerance}
-                        THEN 'PASS' 
-                        ELSE 'FAIL' 
-                    END as status,
-                    ROUND(total::numeric, 2) as actual_value,
-                    {receita_real} as expected_value,
-                    'Receita Realizado: R$ ' || TO_CHAR(total, 'FM999,999,999.00') as message
-                FROM totals
-            """
-        },
-        {
-            'rule_id': 2,
-            'rule_name': 'receita_orcado_total',
-            'description': 'Valida total de Receita Bruta Orçado',
-            'query': f"""
-                WITH totals AS (
-                    SELECT SUM(valor) as total
-                    FROM dw.fact_receita
-                    WHERE cenario = 'Orçado'
-                      AND tipo_receita IN ('SALES', 'SERVICE')
-                )
-                SELECT 
-                    CASE 
-                        WHEN ABS(total - {receita_orc}) / {receita_orc} <= {tolerance}
-                        THEN 'PASS' 
-                        ELSE 'FAIL' 
-                    END as status,
-                    ROUND(total::numeric, 2) as actual_value,
-                    {receita_orc} as expected_value,
-                    'Receita Orçado: R$ ' || TO_CHAR(total, 'FM999,999,999.00') as message
-                FROM totals
-            """
-        },
-        {
-            'rule_id': 3,
-            'rule_name': 'despesas_realizado_total',
-            'description': 'Valida total de Despesas Realizado',
-            'query': f"""
-                WITH totals AS (
-                    SELECT SUM(valor) as total
-                    FROM dw.fact_despesa
-                    WHERE cenario = 'Realizado'
-                )
-                SELECT 
-                    CASE 
-                        WHEN ABS(total - ({desp_real})) / ABS({desp_real}) <= {tolerance}
-                        THEN 'PASS' 
-                        ELSE 'FAIL' 
-                    END as status,
-                    ROUND(total::numeric, 2) as actual_value,
-                    {desp_real} as expected_value,
-                    'Despesas Realizado: R$ ' || TO_CHAR(total, 'FM999,999,999.00') as message
-                FROM totals
-            """
-        },
-        {
-            'rule_id': 4,
-            'rule_name': 'despesas_orcado_total',
-            'description': 'Valida total de Despesas Orçado',
-            'query': f"""
-                WITH totals AS (
-                    SELECT SUM(valor) as total
-                    FROM dw.fact_despesa
-                    WHERE cenario = 'Orçado'
-                )
-                SELECT 
-                    CASE 
-                        WHEN ABS(total - ({desp_orc})) / ABS({desp_orc}) <= {tolerance}
-                        THEN 'PASS' 
-                        ELSE 'FAIL' 
-                    END as status,
-                    ROUND(total::numeric, 2) as actual_value,
-                    {desp_orc} as expected_value,
-                    'Despesas Orçado: R$ ' || TO_CHAR(total, 'FM999,999,999.00') as message
-                FROM totals
-            """
-        },
-        {
-            'rule_id': 5,
-            'rule_name': 'lucro_liquido_dre',
-            'description': 'Valida Lucro Líquido no modelo DRE',
-            'query': f"""
-                WITH totals AS (
-                    SELECT SUM(valor) as total
-                    FROM dw.fact_dre
-                    WHERE UPPER(linha_dre) = 'LUCRO LÍQUIDO'
-                )
-                SELECT 
-                    CASE 
-                        WHEN ABS(total - {lucro}) / {lucro} <= {tolerance}
-                        THEN 'PASS' 
-                        ELSE 'FAIL' 
-                    END as status,
-                    ROUND(total::numeric, 2) as actual_value,
-                    {lucro} as expected_value,
-                    'Lucro Líquido: R$ ' || TO_CHAR(total, 'FM999,999,999.00') as message
-                FROM totals
-            """
-        },
-        {
-            'rule_id': 6,
-            'rule_name': 'fact_receita_not_empty',
-            'description': 'Verifica se fact_receita tem dados',
-            'query': """
-                SELECT 
-                    CASE WHEN COUNT(*) > 0 THEN 'PASS' ELSE 'FAIL' END as status,
-                    COUNT(*) as actual_value,
-                    1 as expected_value,
-                    'Total de registros: ' || COUNT(*)::text as message
-                FROM dw.fact_receita
-            """
-        },
-        {
-            'rule_id': 7,
-            'rule_name': 'fact_despesa_not_empty',
-            'description': 'Verifica se fact_despesa tem dados',
-            'query': """
-                SELECT 
-                    CASE WHEN COUNT(*) > 0 THEN 'PASS' ELSE 'FAIL' END as status,
-                    COUNT(*) as actual_value,
-                    1 as expected_value,
-                    'Total de registros: ' || COUNT(*)::text as message
-                FROM dw.fact_despesa
-            """
-        },
-        {
-            'rule_id': 8,
-            'rule_name': 'fact_dre_not_empty',
-            'description': 'Verifica se fact_dre tem dados',
-            'query': """
-                SELECT 
-                    CASE WHEN COUNT(*) > 0 THEN 'PASS' ELSE 'FAIL' END as status,
-                    COUNT(*) as actual_value,
-                    1 as expected_value,
-                    'Total de registros: ' || COUNT(*)::text as message
-                FROM dw.fact_dre
-            """
-        },
-        {
-            'rule_id': 9,
-            'rule_name': 'all_months_present_receita',
-            'description': 'Verifica se todos os 12 meses estão presentes em receita',
-            'query': """
-                SELECT 
-                    CASE WHEN COUNT(DISTINCT data_key) = 12 THEN 'PASS' ELSE 'FAIL' END as status,
-                    COUNT(DISTINCT data_key) as actual_value,
-                    12 as expected_value,
-                    'Meses únicos: ' || COUNT(DISTINCT data_key)::text as message
-                FROM dw.fact_receita
-            """
-        },
-        {
-            'rule_id': 10,
-            'rule_name': 'data_keys_valid',
-            'description': 'Verifica se todas as data_keys referenciam dim_calendario',
-            'query': """
-                SELECT 
-                    CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as status,
-                    COUNT(*) as actual_value,
-                    0 as expected_value,
-                    CASE 
-                        WHEN COUNT(*) = 0 THEN 'Todas as data_keys são válidas'
-                        ELSE 'Encontradas ' || COUNT(*)::text || ' data_keys órfãs'
-                    END as message
-                FROM dw.fact_receita f
-                LEFT JOIN dw.dim_calendario d ON f.data_key = d.data_key
-                WHERE d.data_key IS NULL
-            """
-        },
-        {
-            'rule_id': 11,
-            'rule_name': 'margem_liquida_sanity',
-            'description': 'Verifica se margem líquida está em range razoável (20-40%)',
-            'query': f"""
-                WITH metrics AS (
-                    SELECT 
-                        (SELECT SUM(valor) FROM dw.fact_dre WHERE UPPER(linha_dre) = 'LUCRO LÍQUIDO') as lucro,
-                        (SELECT SUM(valor) FROM dw.fact_dre WHERE UPPER(linha_dre) = 'RECEITA BRUTA') as receita
+    Regras em nível de linha podem declarar `sample_sql`, que seleciona as
+    linhas ofensoras. Quando a regra não passa, até `sample_limit` linhas
+    são gravadas em dw.data_quality_samples (INSERT ... SELECT no servidor,
+    sem trazer dados para o Python).
+    """
+    
+    def __init__(
+        self,
+        rule_id: int,
+        rule_name: str,
+        description: str,
+        sql: str,
+        params: Optional[Dict[str, Dict]] = None,
+        sample_sql: Optional[str] = None,
+        sample_limit: Optional[int] = None
+    ):
+        self.rule_id = rule_id
+        self.rule_name = rule_name
+        self.description = description
+        self.sql = sql
+        self.params = params or {}
+        self.sample_sql = sample_sql
+        self.sample_limit = sample_limit
+        
+        for name, spec in self.params.items():
+            if spec.get('type') not in PARAM_TYPES:
+                raise DQCatalogError(
+                    f"Regra {rule_name}: tipo inválido para '{name}': {spec.get('type')}"
                 )
-                SELECT 
-                    CASE 
-                        WHEN (lucro / NULLIF(receita, 0)) BETWEEN 0.20 AND 0.40 
-                        THEN 'PASS' 
-                        ELSE 'WARN' 
-                    END as status,
-                    ROUND((lucro / NULLIF(receita, 0) * 100)::numeric, 2) as actual_value,
-                    27.5 as expected_value,
-                    'Margem Líquida: ' || ROUND((lucro / NULLIF(receita, 0) * 100)::numeric, 2)::text || '%' as message
-                FROM metrics
-            """
-        },
-        {
-            'rule_id': 12,
-            'rule_name': 'service_maior_que_sales',
-            'description': 'Verifica se SERVICE > SALES (esperado no negócio)',
-            'query': """
-                WITH types AS (
-                    SELECT 
-                        SUM(CASE WHEN tipo_receita = 'SALES' THEN valor ELSE 0 END) as sales,
-                        SUM(CASE WHEN tipo_receita = 'SERVICE' THEN valor ELSE 0 END) as service
-                    FROM dw.fact_receita
-                    WHERE cenario = 'Realizado'
+        
+        try:
+            self.statement = CompiledStatement(f"dq_{rule_id}", sql, self.params)
+            self.sample_statement = (
+                CompiledStatement(f"dqs_{rule_id}", self._sample_insert_sql(), {
+                    **self.params,
+                    **SAMPLE_PARAMS,
+                })
+                if sample_sql else None
+            )
+        except StatementError as e:
+            raise DQCatalogError(f"Regra {rule_name}: {e}")
+    
+    def _sample_insert_sql(self) -> str:
+        """INSERT das linhas ofensoras, limitado a :sample_limit"""
+        rule_name = self.rule_name.replace("'", "''")
+        return f"""
+            INSERT INTO dw.data_quality_samples (run_id, rule_id, rule_name, row_data)
+            SELECT :sample_run_id, {int(self.rule_id)}, '{rule_name}', to_jsonb(s)
+            FROM (
+                {self.sample_sql.strip()}
+            ) s
+            LIMIT :sample_limit
+        """
+    
+    def bind(
+        self,
+        context: Optional[Dict[str, Any]] = None,
+        overrides: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Resolve e converte os parâmetros da regra.
+        
+        Precedência: overrides > config.yml (chave `config`) > default.
+        
+        Returns:
+            Dicionário {nome: valor tipado}
+        """
+        context = context or {}
+        overrides = overrides or {}
+        values = {}
+        
+        for name, spec in self.params.items():
+            if name in overrides:
+                raw = overrides[name]
+            else:
+                raw = _lookup_path(context, spec['config']) if spec.get('config') else None
+                if raw is None:
+                    raw = spec.get('default')
+            
+            if raw is None:
+                raise DQCatalogError(f"Regra {self.rule_name}: parâmetro '{name}' sem valor")
+            
+            try:
+                values[name] = PARAM_TYPES[spec['type']][1](raw)
+            except (TypeError, ValueError):
+                raise DQCatalogError(
+                    f"Regra {self.rule_name}: '{name}' deve ser {spec['type']}, recebido {raw!r}"
                 )
-                SELECT 
-                    CASE WHEN service > sales THEN 'PASS' ELSE 'WARN' END as status,
-                    ROUND((service / NULLIF(sales + service, 0) * 100)::numeric, 1) as actual_value,
-                    77 as expected_value,
-                    'SERVICE representa ' || ROUND((service / NULLIF(sales + service, 0) * 100)::numeric, 1)::text || '% da receita' as message
-                FROM types
-            """
+        
+        return values
+
+
+class DQCatalog:
+    """
+    Conjunto de regras de DQ carregado de um arquivo YAML.
+    """
+    
+    def __init__(self, rules: List[DQRule], source: Optional[Path] = None):
+        self.rules = rules
+        self.source = source
+    
+    def __iter__(self):
+        return iter(self.rules)
+    
+    def __len__(self) -> int:
+        return len(self.rules)
+    
+    def get(self, rule_name: str) -> Optional[DQRule]:
+        """Retorna uma regra pelo nome"""
+        return next((r for r in self.rules if r.rule_name == rule_name), None)
+
+
+def parse_dq_catalog(data: Dict[str, Any], source: Optional[Path] = None) -> DQCatalog:
+    """
+    Valida e compila o conteúdo de um catálogo.
+    
+    Args:
+        data: Conteúdo do YAML já parseado
+        source: Caminho de origem (para mensagens de erro)
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('rules'), list):
+        raise DQCatalogError(f"Catálogo inválido (seção 'rules' ausente): {source}")
+    
+    rules = []
+    seen = set()
+    
+    for entry in data['rules']:
+        missing = [k for k in ('rule_id', 'rule_name', 'sql') if k not in entry]
+        if missing:
+            raise DQCatalogError(f"Regra sem {', '.join(missing)}: {entry}")
+        if entry['rule_name'] in seen:
+            raise DQCatalogError(f"Regra duplicada: {entry['rule_name']}")
+        seen.add(entry['rule_name'])
+        
+        params = {
+            name: spec if isinstance(spec, dict) else {'type': spec}
+            for name, spec in (entry.get('params') or {}).items()
         }
-    ]
+        sample = entry.get('sample') or {}
+        
+        rules.append(DQRule(
+            rule_id=int(entry['rule_id']),
+            rule_name=entry['rule_name'],
+            description=entry.get('description', ''),
+            sql=entry['sql'],
+            params=params,
+            sample_sql=sample.get('sql'),
+            sample_limit=sample.get('limit')
+        ))
+    
+    return DQCatalog(rules, source)
+
+
+def load_dq_catalog(path: Optional[Path] = None) -> DQCatalog:
+    """
+    Carrega o catálogo de regras (com cache por caminho + mtime).
+    
+    Args:
+        path: Caminho do YAML. Se None, usa data_quality.catalog do
+              config.yml ou o catálogo padrão.
+    """
+    if path is None:
+        configured = get_config().get_dq_config().get('catalog')
+        path = Path(configured) if configured else DEFAULT_CATALOG_PATH
+        if not path.is_absolute():
+            path = PROJECT_ROOT / path
+    
+    path = Path(path)
+    if not path.exists():
+        raise DQCatalogError(f"Catálogo de DQ não encontrado: {path}")
+    
+    mtime = path.stat().st_mtime
+    cached = _CATALOG_CACHE.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=loader)
+    
+    catalog = parse_dq_catalog(data, path)
+    _CATALOG_CACHE[path] = (mtime, catalog)
+    return catalog
+
+
+def get_param_context() -> Dict[str, Any]:
+    """Seções do config.yml referenciáveis pela chave `config` dos parâmetros"""
+    config = get_config()
+    return {
+        'etl': config.get_etl_config(),
+        'data_quality': config.get_dq_config(),
+    }
+
+
+def get_dq_checks(catalog_path: Optional[Path] = None) -> List[DQRule]:
+    """
+    Retorna lista de verificações de DQ do catálogo.
+    
+    Cada regra retorna:
+    - status: PASS, FAIL, WARN
+    - actual_value: valor encontrado
+    - expected_value: valor esperado
+    - message: descrição do resultado
+    """
+    return list(load_dq_catalog(catalog_path))
+
+
+def capture_samples(
+    conn: Connection,
+    rule: DQRule,
+    values: Dict[str, Any],
+    run_id: int,
+    limit: int
+) -> int:
+    """
+    Grava até `limit` linhas ofensoras da regra em dw.data_quality_samples.
+    
+    Returns:
+        Número de linhas capturadas
+    """
+    sample_values = {**values, 'sample_run_id': run_id, 'sample_limit': limit}
+    return affected_rows(execute_statement(conn, rule.sample_statement, sample_values))
 
 
 # =============================================================================
@@ -282,7 +324,12 @@ def get_dq_checks() -> List[Dict]:
 def run_dq_checks(
     engine: Optional[Engine] = None,
     run_id: Optional[int] = None,
-    fail_on_error: bool = False
+    fail_on_error: bool = False,
+    params: Optional[Dict[str, Any]] = None,
+    catalog_path: Optional[Path] = None,
+    sample_limit: Optional[int] = None,
+    title: str = "VERIFICAÇÕES DE QUALIDADE DE DADOS",
+    catalog: Optional[DQCatalog] = None
 ) -> Dict[str, any]:
     """
     Executa todas as verificações de qualidade de dados.
@@ -291,92 +338,135 @@ def run_dq_checks(
         engine: Engine SQLAlchemy (opcional)
         run_id: ID da execução do pipeline (para relacionar resultados)
         fail_on_error: Se True, levanta exceção em caso de FAIL
+        params: Sobrescreve parâmetros das regras (ex: {'ano': 2026})
+        catalog_path: Catálogo de regras alternativo (opcional)
+        catalog: Catálogo já carregado (tem precedência sobre catalog_path)
+        sample_limit: Máximo de linhas ofensoras capturadas por regra
+                      (default: limite da regra ou data_quality.sample_limit)
+        title: Título exibido no cabeçalho
         
     Returns:
         Dicionário com estatísticas e resultados
     """
-    print("\n" + "=" * 60)
-    print("   VERIFICAÇÕES DE QUALIDADE DE DADOS")
-    print("=" * 60)
+    logger.info(banner(title, width=60))
     
     engine = engine or get_engine()
-    checks = get_dq_checks()
+    checks = list(catalog) if catalog is not None else get_dq_checks(catalog_path)
+    context = get_param_context()
+    default_limit = context['data_quality'].get('sample_limit', DEFAULT_SAMPLE_LIMIT)
     
     results = []
     passed = 0
     failed = 0
     warned = 0
     
-    for check in checks:
-        try:
-            with engine.connect() as conn:
-                result = conn.execute(text(check['query']))
-                row = result.fetchone()
+    plan_mode = get_plan_mode()
+    
+    # Uma única conexão: cada regra é preparada uma vez e reutilizada
+    with engine.connect() as conn:
+        for check in checks:
+            try:
+                values = check.bind(context, params)
                 
-                if row:
-                    status = row[0]
-                    actual = row[1]
-                    expected = row[2]
-                    message = row[3]
-                    
-                    # Calcular diferença
-                    try:
-                        diff = float(actual) - float(expected) if actual and expected else 0
-                        diff_pct = (diff / float(expected) * 100) if expected and expected != 0 else 0
-                    except:
-                        diff = 0
-                        diff_pct = 0
-                    
-                    result_record = {
-                        'run_id': run_id,
-                        'rule_id': check['rule_id'],
-                        'rule_name': check['rule_name'],
-                        'rule_description': check['description'],
-                        'status': status,
-                        'expected_value': expected,
-                        'actual_value': actual,
-                        'difference_value': diff,
-                        'difference_percent': diff_pct,
-                        'message': message,
-                        'checked_at': datetime.now()
-                    }
-                    
-                    results.append(result_record)
-                    
-                    # Contagem
-                    if status == 'PASS':
-                        passed += 1
-                        emoji = '✅'
-                    elif status == 'FAIL':
-                        failed += 1
-                        emoji = '❌'
-                    else:
-                        warned += 1
-                        emoji = '⚠️'
-                    
-                    print(f"   {emoji} [{check['rule_id']:02d}] {check['rule_name']}: {message}")
+                # Dry-run (--explain): só o plano da regra, sem avaliá-la
+                if plan_mode == MODE_EXPLAIN:
+                    ensure_prepared(conn, check.statement)
+                    explain_statement(
+                        conn, f"dq.{check.rule_name}", check.statement.execute_sql,
+                        check.statement.execute_params(values)
+                    )
+                    continue
+                
+                row = execute_statement(conn, check.statement, values).fetchone()
+                
+                # Regras só leem: o EXPLAIN ANALYZE roda a consulta de novo
+                if plan_mode == MODE_CAPTURE:
+                    explain_statement(
+                        conn, f"dq.{check.rule_name}", check.statement.execute_sql,
+                        check.statement.execute_params(values), analyze=True
+                    )
+                
+                if not row:
+                    continue
+                
+                status = row[0]
+                actual = row[1]
+                expected = row[2]
+                message = row[3]
+                
+                # Calcular diferença
+                try:
+                    diff = float(actual) - float(expected) if actual and expected else 0
+                    diff_pct = (diff / float(expected) * 100) if expected and expected != 0 else 0
+                except Exception:
+                    diff = 0
+                    diff_pct = 0
+                
+                result_record = {
+                    'run_id': run_id,
+                    'rule_id': check.rule_id,
+                    'rule_name': check.rule_name,
+                    'rule_description': check.description,
+                    'status': status,
+                    'expected_value': expected,
+                    'actual_value': actual,
+                    'difference_value': diff,
+                    'difference_percent': diff_pct,
+                    'message': message,
+                    'checked_at': datetime.now(),
+                    'samples_captured': 0
+                }
+                
+                results.append(result_record)
+                
+                # Contagem
+                if status == 'PASS':
+                    passed += 1
+                    emoji, level = '✅', logging.INFO
+                elif status == 'FAIL':
+                    failed += 1
+                    emoji, level = '❌', logging.ERROR
+                else:
+                    warned += 1
+                    emoji, level = '⚠️', logging.WARNING
+                
+                logger.log(level, f"   {emoji} [{check.rule_id:02d}] {check.rule_name}: {message}")
+                
+                # Inserir resultado no banco
+                if run_id:
+                    conn.execute(text("""
+                        INSERT INTO dw.data_quality_results (
+                            run_id, rule_id, rule_name, rule_description,
+                            status, expected_value, actual_value,
+                            difference_value, difference_percent, message
+                        ) VALUES (
+                            :run_id, :rule_id, :rule_name, :rule_description,
+                            :status, :expected_value, :actual_value,
+                            :difference_value, :difference_percent, :message
+                        )
+                    """), result_record)
                     
-                    # Inserir resultado no banco
-                    if run_id:
-                        conn.execute(text("""
-                            INSERT INTO dw.data_quality_results (
-                                run_id, rule_id, rule_name, rule_description,
-                                status, expected_value, actual_value,
-                                difference_value, difference_percent, message
-                            ) VALUES (
-                                :run_id, :rule_id, :rule_name, :rule_description,
-                                :status, :expected_value, :actual_value,
-                                :difference_value, :difference_percent, :message
-                            )
-                        """), result_record)
-                        conn.commit()
-                        
-        except Exception as e:
-            logger.error(f"   ❌ Erro no check {check['rule_name']}: {e}")
-            failed += 1
+                    # Amostra das linhas ofensoras (regras em nível de linha)
+                    if status != 'PASS' and check.sample_statement:
+                        limit = sample_limit or check.sample_limit or default_limit
+                        captured = capture_samples(conn, check, values, run_id, int(limit))
+                        result_record['samples_captured'] = captured
+                        if captured:
+                            logger.info(f"      🔎 {captured} linhas de amostra em dw.data_quality_samples")
+                conn.commit()
+                
+            except Exception as e:
+                logger.error(f"   ❌ Erro no check {check.rule_name}: {e}")
+                conn.rollback()
+                # DEALLOCATE após o rollback: a próxima execução prepara de novo
+                forget_prepared(conn, *filter(None, [check.statement, check.sample_statement]))
+                failed += 1
     
     # Resumo
-    print(f"\n📊 Resumo DQ: {passed} PASS | {warned} WARN | {failed} FAIL")
+    if plan_mode == MODE_EXPLAIN:
+        logger.info(f"📐 {len(checks) - failed} regras explicadas (sem avaliação)")
+    else:
+        logger.info(f"📊 Resumo DQ: {passed} PASS | {warned} WARN | {failed} FAIL")
     
     if fail_on_error and failed > 0:
         raise Exception(f"DQ Check falhou: {failed} verificações falharam")
@@ -395,4 +485,5 @@ def run_dq_checks(
 # =============================================================================
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     run_dq_checks()
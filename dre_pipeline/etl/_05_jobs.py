@@ -0,0 +1,527 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Fila de Jobs (upload e execução via API)
+
+Os endpoints de ingestão da API não executam o pipeline dentro da
+requisição: gravam um job em dw.etl_job e respondem 202 com o job_id. Os
+workers consomem a fila e executam o pipeline; o cliente acompanha em
+GET /api/v1/jobs/{id}, que junta o job com dw.etl_run e dw.etl_step_log.
+
+- PostgreSQL: workers em processos separados (iniciados pela API conforme
+  api.jobs.workers, ou avulsos com `python -m etl._05_jobs`); cada job é
+  reservado com SELECT ... FOR UPDATE SKIP LOCKED, então dois workers
+  nunca pegam o mesmo job
+- DuckDB: o arquivo só aceita um processo escrevendo, então os workers
+  são threads do processo da API
+
+Jobs simultâneos continuam serializados pelo RunCoordinator (_05_run_lock):
+um job que chega durante uma execução fica COALESCED até o follow-up dela,
+que o vincula ao próprio run_id e define o status final com o resultado
+(ver adopt_coalesced / settle_followup). Ao parar, cada worker termina o
+job em andamento.
+
+Uso:
+    python -m etl._05_jobs                 # Worker avulso
+    python -m etl._05_jobs --workers 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from ._00_backend import Backend, engine_backend
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+JOB_QUEUED = 'QUEUED'
+JOB_RUNNING = 'RUNNING'
+JOB_SUCCESS = 'SUCCESS'
+JOB_FAILED = 'FAILED'
+JOB_COALESCED = 'COALESCED'    # Aguardando o follow-up da execução em andamento
+JOB_FINAL_STATUSES = (JOB_SUCCESS, JOB_FAILED)
+
+KIND_UPLOAD = 'upload'
+KIND_PIPELINE = 'pipeline'
+
+DEFAULT_WORKERS = 1
+DEFAULT_POLL_INTERVAL = 1.0     # Segundos entre consultas à fila vazia
+
+# Job + execução vinculada (consultado pela API)
+JOB_STATUS_SQL = """
+    SELECT
+        j.job_id, j.kind, j.status, j.params, j.triggered_by, j.run_id,
+        j.worker, j.error_message, j.created_at, j.started_at, j.finished_at,
+        r.status AS run_status,
+        r.duration_seconds AS run_duration_seconds,
+        r.total_rows_processed
+    FROM dw.etl_job j
+    LEFT JOIN dw.etl_run r ON r.run_id = j.run_id
+    WHERE j.job_id = :job_id
+"""
+
+# Upload que alimentou a última execução com sucesso (detecção de reenvio)
+LAST_PROCESSED_UPLOAD_SQL = """
+    SELECT r.run_id, j.job_id, j.params
+    FROM dw.etl_run r
+    LEFT JOIN dw.etl_job j ON j.run_id = r.run_id AND j.kind = :kind
+    WHERE r.status = 'SUCCESS'
+    ORDER BY r.run_id DESC, j.job_id DESC
+    LIMIT 1
+"""
+
+# Steps já registrados da execução (sub-steps ficam de fora)
+JOB_STEPS_SQL = """
+    SELECT step_name, status, step_order, duration_seconds, rows_written, finished_at
+    FROM dw.etl_step_log
+    WHERE run_id = :run_id AND parent_step IS NULL
+    ORDER BY step_order, log_id
+"""
+
+
+# =============================================================================
+# FILA
+# =============================================================================
+
+def claim_statement(backend: Backend) -> str:
+    """UPDATE que reserva o job mais antigo da fila"""
+    lock = "FOR UPDATE SKIP LOCKED" if backend.supports_skip_locked else ""
+    return f"""
+        UPDATE dw.etl_job
+        SET status = :running, started_at = NOW(), worker = :worker
+        WHERE status = :queued AND job_id = (
+            SELECT job_id FROM dw.etl_job
+            WHERE status = :queued
+            ORDER BY job_id
+            LIMIT 1
+            {lock}
+        )
+        RETURNING job_id, kind, params, triggered_by
+    """
+
+
+def final_status(result: Dict[str, Any]) -> str:
+    """Status final do job a partir do resultado de uma execução"""
+    status = result.get('status')
+    return status if status in JOB_FINAL_STATUSES else JOB_FAILED
+
+
+def _load_json(value: Any) -> Dict[str, Any]:
+    """JSONB chega como dict (psycopg2); JSON do DuckDB chega como texto"""
+    if value is None:
+        return {}
+    return json.loads(value) if isinstance(value, str) else dict(value)
+
+
+def job_progress(job: Dict[str, Any], steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Resposta de GET /api/v1/jobs/{id}: job, execução e steps concluídos"""
+    run = None
+    if job.get('run_id') is not None:
+        run = {
+            'run_id': job['run_id'],
+            'status': job.get('run_status'),
+            'duration_seconds': job.get('run_duration_seconds'),
+            'total_rows_processed': job.get('total_rows_processed'),
+        }
+    return {
+        'job_id': job['job_id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'params': _load_json(job.get('params')),
+        'triggered_by': job.get('triggered_by'),
+        'worker': job.get('worker'),
+        'error_message': job.get('error_message'),
+        'created_at': job.get('created_at'),
+        'started_at': job.get('started_at'),
+        'finished_at': job.get('finished_at'),
+        'run': run,
+        'progress': {
+            'steps_finished': len(steps),
+            'steps_failed': sum(1 for s in steps if s['status'] == 'FAILED'),
+            'last_step': steps[-1]['step_name'] if steps else None,
+            'steps': steps,
+        },
+    }
+
+
+class JobQueue:
+    """
+    Fila de jobs em dw.etl_job.
+
+    Uso:
+        queue = JobQueue(engine)
+        job_id = queue.enqueue(KIND_UPLOAD, {'filename': 'dados.xlsx'})
+        job = queue.claim('worker-1')
+    """
+
+    # Sem SKIP LOCKED (DuckDB), as threads do processo reservam uma por vez
+    _claim_lock = threading.Lock()
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.backend = engine_backend(engine)
+        self._claim_sql = claim_statement(self.backend)
+
+    def enqueue(self, kind: str, params: Optional[Dict[str, Any]] = None,
+                triggered_by: str = 'API') -> int:
+        """Grava um job QUEUED e retorna o job_id"""
+        from sqlalchemy import text
+
+        with self.engine.connect() as conn:
+            job_id = conn.execute(text("""
+                INSERT INTO dw.etl_job (kind, status, params, triggered_by)
+                VALUES (:kind, :status, :params, :triggered_by)
+                RETURNING job_id
+            """), {
+                'kind': kind,
+                'status': JOB_QUEUED,
+                'params': json.dumps(params or {}),
+                'triggered_by': triggered_by
+            }).scalar()
+            conn.commit()
+        return job_id
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Reserva o job mais antigo (None se a fila estiver vazia)"""
+        from sqlalchemy import text
+
+        def _claim() -> Optional[Dict[str, Any]]:
+            with self.engine.connect() as conn:
+                row = conn.execute(text(self._claim_sql), {
+                    'running': JOB_RUNNING, 'queued': JOB_QUEUED, 'worker': worker
+                }).fetchone()
+                conn.commit()
+            if row is None:
+                return None
+            job = dict(row._mapping)
+            job['params'] = _load_json(job['params'])
+            return job
+
+        if self.backend.supports_skip_locked:
+            return _claim()
+        with self._claim_lock:
+            return _claim()
+
+    def attach_run(self, job_id: int, run_id: int) -> None:
+        """Vincula a execução que atende o job (a primeira, não os follow-ups)"""
+        from sqlalchemy import text
+
+        with self.engine.connect() as conn:
+            conn.execute(text("""
+                UPDATE dw.etl_job SET run_id = :run_id
+                WHERE job_id = :job_id AND run_id IS NULL
+            """), {'job_id': job_id, 'run_id': run_id})
+            conn.commit()
+
+    def finish(self, job_id: int, status: str, error_message: Optional[str] = None) -> None:
+        """Marca o job com o status final"""
+        from sqlalchemy import text
+
+        with self.engine.connect() as conn:
+            conn.execute(text("""
+                UPDATE dw.etl_job
+                SET status = :status, error_message = :error_message, finished_at = NOW()
+                WHERE job_id = :job_id
+            """), {'job_id': job_id, 'status': status, 'error_message': error_message})
+            conn.commit()
+
+    def wait_followup(self, job_id: int) -> None:
+        """Marca o job como COALESCED: o follow-up em andamento o concluirá"""
+        from sqlalchemy import text
+
+        # O follow-up pode ter concluído o job antes deste UPDATE
+        with self.engine.connect() as conn:
+            conn.execute(text("""
+                UPDATE dw.etl_job SET status = :coalesced
+                WHERE job_id = :job_id AND finished_at IS NULL
+            """), {'job_id': job_id, 'coalesced': JOB_COALESCED})
+            conn.commit()
+
+    def adopt_coalesced(self, run_id: int) -> int:
+        """
+        Vincula ao follow-up os jobs COALESCED ainda sem execução.
+
+        Só entram jobs reservados antes do início do follow-up: os que
+        chegaram depois são atendidos pelo próximo.
+
+        Returns:
+            Número de jobs vinculados
+        """
+        from sqlalchemy import text
+
+        with self.engine.connect() as conn:
+            adopted = conn.execute(text("""
+                UPDATE dw.etl_job SET run_id = :run_id
+                WHERE status = :coalesced AND run_id IS NULL
+                  AND started_at <= (SELECT started_at FROM dw.etl_run WHERE run_id = :run_id)
+                RETURNING job_id
+            """), {'run_id': run_id, 'coalesced': JOB_COALESCED}).fetchall()
+            conn.commit()
+        return len(adopted)
+
+    def settle_followup(self, run_id: int, status: str,
+                        error_message: Optional[str] = None) -> int:
+        """
+        Conclui os jobs COALESCED atendidos pelo follow-up run_id.
+
+        Vincula antes os que ficaram COALESCED durante a execução (o
+        pedido deles foi consumido por ela antes do UPDATE do worker).
+
+        Returns:
+            Número de jobs concluídos
+        """
+        from sqlalchemy import text
+
+        self.adopt_coalesced(run_id)
+        with self.engine.connect() as conn:
+            settled = conn.execute(text("""
+                UPDATE dw.etl_job
+                SET status = :status, error_message = :error_message, finished_at = NOW()
+                WHERE run_id = :run_id AND status = :coalesced
+                RETURNING job_id
+            """), {
+                'run_id': run_id,
+                'status': status,
+                'error_message': error_message,
+                'coalesced': JOB_COALESCED
+            }).fetchall()
+            conn.commit()
+        return len(settled)
+
+    def pending(self, kind: str) -> int:
+        """Jobs do tipo ainda na fila, em execução ou aguardando follow-up"""
+        from sqlalchemy import text
+
+        with self.engine.connect() as conn:
+            return conn.execute(text("""
+                SELECT COUNT(*) FROM dw.etl_job
+                WHERE kind = :kind AND status IN (:queued, :running, :coalesced)
+            """), {
+                'kind': kind,
+                'queued': JOB_QUEUED,
+                'running': JOB_RUNNING,
+                'coalesced': JOB_COALESCED
+            }).scalar()
+
+    def last_processed_upload(self) -> Optional[Dict[str, Any]]:
+        """
+        Upload (job_id, run_id, params) da última execução com sucesso.
+
+        None se essa execução não veio de um upload (ex: execução manual
+        depois dele), então o arquivo em disco pode não ser o do upload.
+        """
+        from sqlalchemy import text
+
+        with self.engine.connect() as conn:
+            row = conn.execute(text(LAST_PROCESSED_UPLOAD_SQL), {'kind': KIND_UPLOAD}).fetchone()
+        if row is None or row.job_id is None:
+            return None
+        return {'job_id': row.job_id, 'run_id': row.run_id, 'params': _load_json(row.params)}
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Job com execução e steps (mesma resposta de GET /api/v1/jobs/{id})"""
+        from sqlalchemy import text
+
+        with self.engine.connect() as conn:
+            row = conn.execute(text(JOB_STATUS_SQL), {'job_id': job_id}).fetchone()
+            if row is None:
+                return None
+            job = dict(row._mapping)
+            steps = []
+            if job['run_id'] is not None:
+                steps = [dict(r._mapping) for r in conn.execute(
+                    text(JOB_STEPS_SQL), {'run_id': job['run_id']}
+                )]
+        return job_progress(job, steps)
+
+
+# =============================================================================
+# WORKERS
+# =============================================================================
+
+def run_job(queue: JobQueue, job: Dict[str, Any]) -> str:
+    """
+    Executa o pipeline de um job reservado e grava o status final.
+
+    Se outra execução está em andamento, o job fica COALESCED: o follow-up
+    dela o vincula e grava o status final (settle_followup).
+
+    Returns:
+        Status do job (COALESCED se ficou aguardando o follow-up)
+    """
+    from ._05_run_pipeline import run_pipeline
+
+    job_id = job['job_id']
+    params = job['params']
+    logger.info(f"📥 Job {job_id} ({job['kind']}) iniciado",
+                extra={'job_id': job_id, 'kind': job['kind']})
+
+    try:
+        result = run_pipeline(
+            skip_extract=bool(params.get('skip_extract', False)),
+            triggered_by=job.get('triggered_by') or 'API',
+            engine=queue.engine,
+            on_run_start=lambda run_id: queue.attach_run(job_id, run_id)
+        )
+        if result.get('status') == JOB_COALESCED:
+            queue.wait_followup(job_id)
+            logger.info(f"⏳ Job {job_id}: aguardando o follow-up da execução em andamento",
+                        extra={'job_id': job_id, 'status': JOB_COALESCED})
+            return JOB_COALESCED
+        status = final_status(result)
+        error = result.get('error')
+    except Exception as e:
+        logger.exception(f"Job {job_id} falhou")
+        status, error = JOB_FAILED, str(e)
+
+    queue.finish(job_id, status, error)
+    logger.info(f"📤 Job {job_id}: {status}",
+                extra={'job_id': job_id, 'status': status})
+    return status
+
+
+class JobWorker:
+    """Consome a fila até o stop_event ser sinalizado"""
+
+    def __init__(self, engine: Engine, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 stop_event: Optional[Any] = None):
+        self.queue = JobQueue(engine)
+        self.poll_interval = poll_interval
+        self.stop_event = stop_event or threading.Event()
+
+    @property
+    def name(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+    def run_once(self) -> Optional[int]:
+        """Executa o próximo job da fila (None se vazia)"""
+        job = self.queue.claim(self.name)
+        if job is None:
+            return None
+        run_job(self.queue, job)
+        return job['job_id']
+
+    def run_forever(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                job_id = self.run_once()
+            except Exception as e:
+                logger.error(f"Erro ao consumir a fila de jobs: {e}")
+                job_id = None
+            if job_id is None:
+                self.stop_event.wait(self.poll_interval)
+
+
+def _worker_process(stop_event: Any, poll_interval: float) -> None:
+    """Entrada dos processos worker (engine próprio, criado no processo)"""
+    from ._00_config import get_engine
+
+    try:
+        JobWorker(get_engine(), poll_interval, stop_event).run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+class WorkerPool:
+    """
+    Workers da fila: processos (PostgreSQL) ou threads (DuckDB).
+
+    Uso:
+        pool = WorkerPool(engine, workers=2).start()
+        ...
+        pool.stop()     # Espera os jobs em andamento terminarem
+    """
+
+    def __init__(self, engine: Engine, workers: int = DEFAULT_WORKERS,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.engine = engine
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.uses_processes = engine_backend(engine).supports_worker_processes
+        self._stop: Any = None
+        self._handles: List[Any] = []
+
+    def start(self) -> 'WorkerPool':
+        if self.uses_processes:
+            context = multiprocessing.get_context('spawn')
+            self._stop = context.Event()
+            self._handles = [
+                context.Process(
+                    target=_worker_process, args=(self._stop, self.poll_interval),
+                    name=f'etl-job-worker-{i}'
+                )
+                for i in range(self.workers)
+            ]
+        else:
+            self._stop = threading.Event()
+            self._handles = [
+                threading.Thread(
+                    target=JobWorker(self.engine, self.poll_interval, self._stop).run_forever,
+                    name=f'etl-job-worker-{i}', daemon=True
+                )
+                for i in range(self.workers)
+            ]
+
+        for handle in self._handles:
+            handle.start()
+        kind = 'processos' if self.uses_processes else 'threads'
+        logger.info(f"Fila de jobs: {self.workers} worker(s) ({kind})")
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        if self._stop is None:
+            return
+        self._stop.set()
+        for handle in self._handles:
+            handle.join(timeout)
+        self._handles = []
+
+    def join(self) -> None:
+        for handle in self._handles:
+            handle.join()
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Workers da fila de jobs do pipeline')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Workers em paralelo (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f'Segundos entre consultas à fila vazia (default: {DEFAULT_POLL_INTERVAL:.0f})')
+    args = parser.parse_args()
+
+    from ._00_config import get_engine
+
+    print(f"👷 Consumindo dw.etl_job com {args.workers} worker(s) (Ctrl+C para parar)")
+    pool = WorkerPool(get_engine(), args.workers, args.poll_interval).start()
+    try:
+        pool.join()
+    except KeyboardInterrupt:
+        print("\n⏹️ Parando: jobs em andamento serão concluídos")
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
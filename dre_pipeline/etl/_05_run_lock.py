@@ -0,0 +1,195 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Coordenação de Execuções (advisory lock)
+
+Cron, /api/v1/upload e /api/v1/pipeline/run podem disparar o pipeline ao
+mesmo tempo. O coordenador garante que só um processo altere o DW por vez,
+via pg_try_advisory_lock (liberado automaticamente se o processo morrer).
+
+Pedidos que chegam durante uma execução não entram numa fila: marcam
+dw.etl_run_request como pendente e retornam COALESCED. Ao terminar, quem
+detém o lock faz UMA execução de follow-up para todos eles.
+"""
+
+import logging
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+STATUS_COALESCED = 'COALESCED'
+
+
+def lock_key(pipeline_name: str) -> int:
+    """Chave estável (bigint) do advisory lock de um pipeline"""
+    return zlib.crc32(f"etl:{pipeline_name}".encode('utf-8'))
+
+
+# =============================================================================
+# COORDENADOR
+# =============================================================================
+
+class RunCoordinator:
+    """
+    Serializa execuções do pipeline entre processos e agrega disparos.
+
+    Uso:
+        coordinator = RunCoordinator(engine)
+        result = coordinator.run(lambda claimed: ..., triggered_by='API')
+    """
+
+    def __init__(self, engine: Engine, pipeline_name: str = 'dre_pipeline'):
+        self.engine = engine
+        self.pipeline_name = pipeline_name
+        self.key = lock_key(pipeline_name)
+
+    # -------------------------------------------------------------------------
+    # PEDIDOS PENDENTES
+    # -------------------------------------------------------------------------
+
+    def request(self, triggered_by: str, skip_extract: bool = False) -> None:
+        """
+        Registra um pedido de execução.
+
+        Pedidos acumulados viram uma só execução; se algum deles precisa de
+        extração (ex: upload de arquivo novo), a execução agregada extrai.
+        """
+        with self.engine.connect() as conn:
+            conn.execute(text("""
+                INSERT INTO dw.etl_run_request (
+                    pipeline_name, pending, skip_extract, request_count,
+                    last_triggered_by, requested_at
+                ) VALUES (
+                    :pipeline_name, TRUE, :skip_extract, 1, :triggered_by, NOW()
+                )
+                ON CONFLICT (pipeline_name) DO UPDATE SET
+                    skip_extract = CASE WHEN dw.etl_run_request.pending
+                        THEN dw.etl_run_request.skip_extract AND EXCLUDED.skip_extract
+                        ELSE EXCLUDED.skip_extract END,
+                    request_count = CASE WHEN dw.etl_run_request.pending
+                        THEN dw.etl_run_request.request_count + 1 ELSE 1 END,
+                    pending = TRUE,
+                    last_triggered_by = EXCLUDED.last_triggered_by,
+                    requested_at = EXCLUDED.requested_at
+            """), {
+                'pipeline_name': self.pipeline_name,
+                'skip_extract': skip_extract,
+                'triggered_by': triggered_by
+            })
+            conn.commit()
+
+    def _claim(self, conn: Connection) -> Optional[Dict[str, Any]]:
+        """Consome os pedidos pendentes (None se não houver)"""
+        row = conn.execute(text("""
+            UPDATE dw.etl_run_request
+            SET pending = FALSE
+            WHERE pipeline_name = :pipeline_name AND pending
+            RETURNING skip_extract, request_count, last_triggered_by
+        """), {'pipeline_name': self.pipeline_name}).fetchone()
+        conn.commit()
+        return dict(row._mapping) if row else None
+
+    def _has_pending(self, conn: Connection) -> bool:
+        pending = conn.execute(text("""
+            SELECT pending FROM dw.etl_run_request WHERE pipeline_name = :pipeline_name
+        """), {'pipeline_name': self.pipeline_name}).scalar()
+        conn.commit()
+        return bool(pending)
+
+    # -------------------------------------------------------------------------
+    # LOCK
+    # -------------------------------------------------------------------------
+
+    def _try_lock(self, conn: Connection) -> bool:
+        acquired = conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {'key': self.key}
+        ).scalar()
+        conn.commit()
+        return bool(acquired)
+
+    def _unlock(self, conn: Connection) -> None:
+        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': self.key})
+        conn.commit()
+
+    # -------------------------------------------------------------------------
+    # EXECUÇÃO
+    # -------------------------------------------------------------------------
+
+    def run(
+        self,
+        run_fn: Callable[[Dict], Dict],
+        triggered_by: str = 'MANUAL',
+        skip_extract: bool = False
+    ) -> Dict:
+        """
+        Registra o pedido e, se o lock estiver livre, executa até não haver
+        mais pedidos pendentes.
+
+        Args:
+            run_fn: Executa o pipeline; recebe o pedido consumido
+                (skip_extract agregado, request_count, last_triggered_by)
+            triggered_by: Origem do pedido
+            skip_extract: Se este pedido dispensa a extração
+
+        Returns:
+            Resultado da primeira execução (a que atende este pedido), com
+            'followup_runs' para as execuções agregadas seguintes; ou
+            status COALESCED se outro processo já está executando
+        """
+        self.request(triggered_by, skip_extract)
+        results: List[Dict] = []
+
+        # Conexão dedicada: o advisory lock é da sessão e dura o loop todo
+        with self.engine.connect() as lock_conn:
+            while self._try_lock(lock_conn):
+                try:
+                    while True:
+                        claimed = self._claim(lock_conn)
+                        if claimed is None:
+                            break
+                        if results:
+                            logger.info(
+                                f"🔁 Execução de follow-up: {claimed['request_count']} "
+                                f"disparo(s) agregados durante a execução anterior",
+                                extra={
+                                    'request_count': claimed['request_count'],
+                                    'triggered_by': claimed['last_triggered_by'],
+                                    'skip_extract': claimed['skip_extract'],
+                                }
+                            )
+                        results.append(run_fn(claimed))
+                finally:
+                    self._unlock(lock_conn)
+
+                # Um pedido pode ter chegado entre o último claim e o unlock:
+                # quem pediu viu o lock ocupado, então a vez é nossa de novo
+                if not self._has_pending(lock_conn):
+                    break
+
+        if not results:
+            logger.info(
+                f"⏳ Pipeline já em execução: disparo {triggered_by} agregado ao próximo follow-up",
+                extra={'triggered_by': triggered_by, 'lock_key': self.key, 'status': STATUS_COALESCED}
+            )
+            return {
+                'status': STATUS_COALESCED,
+                'run_id': None,
+                'message': 'Pipeline já em execução; uma nova execução será feita ao final'
+            }
+
+        result = dict(results[0])
+        result['followup_runs'] = [r.get('run_id') for r in results[1:]]
+        return result
@@ -3,25 +3,40 @@ DRE Analytics 2025 - Pipeline ETL
 Orquestrador do Pipeline
 
 Executa o pipeline completo com controle de execução,
-logging e tratamento de erros.
+logging e tratamento de erros. Os steps formam um DAG
+(ver _05_scheduler.py): ramos independentes rodam em paralelo.
 """
 
+from __future__ import annotations
+
 import argparse
 import logging
 import sys
 import traceback
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
-
-from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 
+from ._00_audit import AuditWriter
+from ._00_backend import engine_backend
 from ._00_config import get_config, get_engine, test_connection
-from ._01_extract_excel import run_extract
-from ._02_transform_raw_to_stg import run_transform_raw_to_stg
-from ._03_transform_stg_to_dw import run_transform_stg_to_dw
-from ._04_dq_checks import run_dq_checks
+from ._00_logging import (
+    ContextFilter, banner, get_json_formatter, set_log_context, step_record
+)
+from ._00_profiling import PROFILE_CPROFILE, PROFILE_MODES, profile_folder, profile_steps
+from ._00_query_plans import (
+    MODE_CAPTURE, MODE_EXECUTE, MODE_EXPLAIN, collected_plans, log_regressions,
+    print_plan_report, save_captured_plans, set_plan_mode
+)
+from ._00_step_metrics import StepMetrics, step_context
+from ._05_scheduler import DAGScheduler, Step, StepOutcome, DEFAULT_MAX_WORKERS, summarize
+from ._05_watch import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, watch_source
+
+# SQLAlchemy, prometheus_client e as etapas (pandas/openpyxl) são
+# importados nas funções que os usam: `--help` não paga esse custo
+# (ver benchmarks/import_time.py)
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
 
 
 # =============================================================================
@@ -37,6 +52,11 @@ def setup_logging(log_level: str = 'INFO', log_file: Optional[str] = None):
     
     level = getattr(logging, log_level.upper(), logging.INFO)
     
+    # Processo aquecido (--watch): configura handlers uma única vez
+    if logging.getLogger().handlers:
+        logging.getLogger().setLevel(level)
+        return logging.getLogger(__name__)
+    
     # Criar pasta de logs se não existir
     log_folder = config.project_root / logging_config.get('folder', 'logs')
     log_folder.mkdir(exist_ok=True)
@@ -46,31 +66,71 @@ def setup_logging(log_level: str = 'INFO', log_file: Optional[str] = None):
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         log_file = log_folder / f'etl_run_{timestamp}.log'
     
-    # Configurar handlers
+    # Configurar handlers: console legível, arquivo em JSON (um registro
+    # por linha, com run_id/step) salvo se logging.json = false
     handlers = [logging.StreamHandler(sys.stdout)]
+    json_file = logging_config.get('json', True)
     
+    file_error = None
     try:
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        if json_file:
+            file_handler.setFormatter(get_json_formatter())
         handlers.append(file_handler)
     except Exception as e:
-        print(f"⚠️ Não foi possível criar arquivo de log: {e}")
+        file_error = e
     
+    for handler in handlers:
+        handler.addFilter(ContextFilter())
+    
+    # basicConfig só aplica o formato texto aos handlers sem formatter
     logging.basicConfig(
         level=level,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=handlers
     )
     
-    return logging.getLogger(__name__)
+    logger = logging.getLogger(__name__)
+    if file_error is not None:
+        logger.warning(f"⚠️ Não foi possível criar arquivo de log: {file_error}")
+    return logger
 
 
 # =============================================================================
 # CONTROLE DE EXECUÇÃO
 # =============================================================================
 
+# Registros da trilha de auditoria gravados em lote (ver _00_audit.py)
+STEP_LOG_INSERT = """
+    INSERT INTO dw.etl_step_log (
+        run_id, step_name, parent_step, step_order, status,
+        rows_read, rows_written,
+        started_at, finished_at,
+        duration_seconds, rows_per_sec, cpu_seconds, process_peak_rss_mb,
+        error_message
+    ) VALUES (
+        :run_id, :step_name, :parent_step, :step_order, :status,
+        :rows_read, :rows_written,
+        :started_at, :finished_at,
+        :duration_seconds, :rows_per_sec, :cpu_seconds, :process_peak_rss_mb,
+        :error_message
+    )
+"""
+
+CHECKPOINT_UPSERT = """
+    INSERT INTO dw.etl_checkpoint (run_id, step_name, completed_at)
+    VALUES (:run_id, :step_name, :completed_at)
+    ON CONFLICT (run_id, step_name) DO UPDATE SET completed_at = EXCLUDED.completed_at
+"""
+
+
 class ETLRun:
     """
     Gerencia uma execução do pipeline ETL.
+    
+    start/resume/finish gravam direto em dw.etl_run; steps e checkpoints
+    passam pelo AuditWriter e são gravados em lote fora do caminho crítico.
+    O finish (sucesso ou falha) grava o que falta antes de fechar a execução.
     """
     
     def __init__(self, engine: Engine, pipeline_name: str = 'dre_pipeline'):
@@ -79,11 +139,14 @@ class ETLRun:
         self.run_id = None
         self.started_at = None
         self.steps = []
+        self.audit = AuditWriter(engine)
     
     def start(self, triggered_by: str = 'MANUAL') -> int:
         """
         Inicia uma nova execução.
         """
+        from sqlalchemy import text
+        
         self.started_at = datetime.now()
         
         with self.engine.connect() as conn:
@@ -96,11 +159,71 @@ class ETLRun:
                 'triggered_by': triggered_by,
                 'pipeline_name': self.pipeline_name
             })
-            conn.commit()
             self.run_id = result.fetchone()[0]
+            conn.commit()
         
         return self.run_id
     
+    def resume(self, run_id: int) -> List[str]:
+        """
+        Retoma uma execução que falhou, mantendo o mesmo run_id.
+        
+        Só a execução mais recente pode ser retomada: qualquer execução
+        posterior já reescreveu as tabelas STG/DW e invalida os checkpoints.
+        
+        Returns:
+            Steps concluídos (checkpoints) que não serão executados de novo
+        """
+        from sqlalchemy import text
+        
+        with self.engine.connect() as conn:
+            row = conn.execute(text("""
+                SELECT status, (SELECT MAX(run_id) FROM dw.etl_run) AS last_run_id
+                FROM dw.etl_run
+                WHERE run_id = :run_id
+            """), {'run_id': run_id}).fetchone()
+            
+            if row is None:
+                raise ValueError(f"Execução {run_id} não encontrada em dw.etl_run")
+            if row.status == 'SUCCESS':
+                raise ValueError(f"Execução {run_id} já foi concluída com sucesso")
+            if row.last_run_id != run_id:
+                raise ValueError(
+                    f"Execução {run_id} não é a mais recente (última: {row.last_run_id}); "
+                    f"as tabelas já foram reescritas e os checkpoints não valem mais"
+                )
+            
+            completed = conn.execute(text("""
+                SELECT step_name
+                FROM dw.etl_checkpoint
+                WHERE run_id = :run_id
+                ORDER BY completed_at
+            """), {'run_id': run_id}).scalars().all()
+            
+            conn.execute(text("""
+                UPDATE dw.etl_run
+                SET status = 'RUNNING', finished_at = NULL, error_message = NULL
+                WHERE run_id = :run_id
+            """), {'run_id': run_id})
+            conn.commit()
+        
+        self.run_id = run_id
+        self.started_at = datetime.now()
+        return list(completed)
+    
+    def checkpoint(self, step_name: str):
+        """
+        Marca um step como concluído nesta execução (usado por --resume).
+        
+        Se o processo morrer antes do lote ser gravado, o step apenas roda
+        de novo no --resume (as cargas são idempotentes).
+        """
+        self.audit.write(CHECKPOINT_UPSERT, {
+            'run_id': self.run_id,
+            'step_name': step_name,
+            'completed_at': datetime.now()
+        })
+    
     def log_step(
         self, 
         step_name: str, 
@@ -108,56 +231,103 @@ class ETLRun:
         status: str, 
         rows_read: int = 0,
         rows_written: int = 0,
-        error_message: str = None
+        error_message: str = None,
+        started_at: Optional[datetime] = None,
+        finished_at: Optional[datetime] = None,
+        parent_step: Optional[str] = None,
+        duration_seconds: Optional[float] = None,
+        rows_per_sec: Optional[float] = None,
+        cpu_seconds: Optional[float] = None,
+        process_peak_rss_mb: Optional[float] = None
     ):
         """
         Registra um step do pipeline.
+        
+        started_at/finished_at são os instantes reais do step; sem eles,
+        registra o momento da chamada (steps pulados ficam sem horário).
+        Métricas de desempenho vêm de StepMetrics (ver log_metrics).
         """
+        if started_at is None and status != 'SKIPPED':
+            started_at = finished_at = datetime.now()
+        
         step_info = {
             'run_id': self.run_id,
             'step_name': step_name,
+            'parent_step': parent_step,
             'step_order': step_order,
             'status': status,
             'rows_read': rows_read,
             'rows_written': rows_written,
-            'started_at': datetime.now(),
-            'finished_at': datetime.now(),
+            'started_at': started_at,
+            'finished_at': finished_at,
+            'duration_seconds': duration_seconds,
+            'rows_per_sec': rows_per_sec,
+            'cpu_seconds': cpu_seconds,
+            'process_peak_rss_mb': process_peak_rss_mb,
             'error_message': error_message
         }
         
-        with self.engine.connect() as conn:
-            conn.execute(text("""
-                INSERT INTO dw.etl_step_log (
-                    run_id, step_name, step_order, status,
-                    rows_read, rows_written,
-                    started_at, finished_at, error_message
-                ) VALUES (
-                    :run_id, :step_name, :step_order, :status,
-                    :rows_read, :rows_written,
-                    :started_at, :finished_at, :error_message
-                )
-            """), step_info)
-            conn.commit()
+        self.audit.write(STEP_LOG_INSERT, step_info)
         
-        self.steps.append(step_info)
+        # Sub-steps já estão contabilizados no step pai
+        if parent_step is None:
+            self.steps.append(step_info)
+    
+    def log_metrics(
+        self,
+        metrics: StepMetrics,
+        step_order: int,
+        status: Optional[str] = None,
+        error_message: Optional[str] = None
+    ):
+        """
+        Registra um step medido por step_context e, em seguida, seus sub-steps.
+        """
+        data = metrics.to_dict()
+        
+        def _log(item: Dict, parent: Optional[str], item_status: str, error: Optional[str]):
+            self.log_step(
+                item['step_name'],
+                step_order,
+                item_status,
+                rows_read=item['rows_read'],
+                rows_written=item['rows_written'],
+                error_message=error,
+                started_at=item['started_at'],
+                finished_at=item['finished_at'],
+                parent_step=parent,
+                duration_seconds=item['duration_seconds'],
+                rows_per_sec=item['rows_per_sec'],
+                cpu_seconds=item['cpu_seconds'],
+                process_peak_rss_mb=item['process_peak_rss_mb']
+            )
+            for child in item['children']:
+                _log(child, item['step_name'], child['status'], None)
+        
+        _log(data, None, status or data['status'], error_message)
     
     def finish(self, status: str, error_message: str = None):
         """
         Finaliza a execução.
         """
+        from sqlalchemy import text
+        
         ended_at = datetime.now()
         
-        # Calcular totais
+        # Calcular totais (execuções retomadas somam às tentativas anteriores)
         total_rows = sum(s.get('rows_written', 0) for s in self.steps)
         duration = (ended_at - self.started_at).total_seconds()
         
+        # Steps e checkpoints pendentes chegam ao banco antes do status final
+        self.audit.close()
+        
         with self.engine.connect() as conn:
             conn.execute(text("""
                 UPDATE dw.etl_run
                 SET status = :status,
                     finished_at = :finished_at,
-                    duration_seconds = :duration,
-                    total_rows_processed = :total_rows,
+                    duration_seconds = COALESCE(duration_seconds, 0) + :duration,
+                    total_rows_processed = COALESCE(total_rows_processed, 0) + :total_rows,
                     error_message = :error_message
                 WHERE run_id = :run_id
             """), {
@@ -171,6 +341,145 @@ class ETLRun:
             conn.commit()
 
 
+# =============================================================================
+# DAG DO PIPELINE
+# =============================================================================
+
+def build_pipeline_steps(
+    engine: Engine,
+    run_id: int,
+    skip_extract: bool = False,
+    skip_dq: bool = False,
+    fail_on_dq_error: bool = False,
+    skip_raw_validation: bool = False,
+    tables: Optional[List[str]] = None,
+    skip_anomalies: bool = False
+) -> List[Step]:
+    """
+    Monta o DAG do pipeline.
+
+    Cada tabela é um nó: uma transformação só espera as tabelas que lê.
+    Ex: fact_aliquota depende apenas de stg_aliquota, e as dimensões
+    rodam em paralelo com os fatos (os fatos só referenciam dim_calendario).
+
+    Steps omitidos (--skip-*) são removidos e deixam de ser dependência.
+    `skip_anomalies` remove a detecção de anomalias (backends sem suporte).
+    `tables` limita a extração a essas tabelas RAW (modo incremental).
+    """
+    from ._00_metrics import record_dq
+    from ._01_extract_excel import run_extract
+    from ._01_validate_raw import run_raw_validation
+    from ._02_transform_raw_to_stg import (
+        transform_receita, transform_despesa, transform_dre, transform_aliquota
+    )
+    from ._03_transform_stg_to_dw import (
+        load_dim_unidade, load_dim_pacote, load_dim_linha_dre,
+        load_fact_receita, load_fact_despesa, load_fact_dre, load_fact_aliquota,
+        load_agg_receita_mensal, load_agg_despesa_mensal
+    )
+    from ._04_dq_checks import run_dq_checks
+    from ._04_dq_anomalies import run_anomaly_detection
+
+    def _extract():
+        results = run_extract(engine=engine, tables=tables)
+        return {
+            'rows_read': sum(r.get('rows_read', 0) for r in results.values()),
+            'rows_written': sum(r.get('rows_loaded', 0) for r in results.values())
+        }
+
+    def _validate_raw():
+        results = run_raw_validation(engine=engine, run_id=run_id)
+        record_dq('raw', results)
+        return {'status': 'SUCCESS' if results['warned'] == 0 else 'WARNING'}
+
+    def _dq_checks():
+        results = run_dq_checks(engine=engine, run_id=run_id, fail_on_error=fail_on_dq_error)
+        record_dq('dw', results)
+        return {'status': 'SUCCESS' if results['failed'] == 0 else 'WARNING'}
+
+    def _dq_anomalies():
+        results = run_anomaly_detection(engine=engine, run_id=run_id)
+        return {'status': 'SUCCESS' if results['total'] == 0 else 'WARNING'}
+
+    def _table(func):
+        return lambda: func(engine)
+
+    # STG espera a validação RAW (ou a extração, se a validação for pulada)
+    raw = ['extract_excel'] if skip_raw_validation else ['validate_raw']
+    facts = ['fact_receita', 'fact_despesa', 'fact_dre', 'fact_aliquota']
+    dims = ['dim_unidade', 'dim_pacote', 'dim_linha_dre']
+    aggs = ['agg_receita_mensal', 'agg_despesa_mensal']
+
+    steps = [
+        # Excel → RAW
+        Step('extract_excel', _extract, description='Extração Excel → RAW'),
+        Step('validate_raw', _validate_raw, ['extract_excel'], description='Validação RAW (fail-fast)'),
+
+        # RAW → STG
+        Step('stg_receita', _table(transform_receita), raw),
+        Step('stg_despesa', _table(transform_despesa), raw),
+        Step('stg_dre', _table(transform_dre), raw),
+        Step('stg_aliquota', _table(transform_aliquota), raw),
+
+        # STG → DW: dimensões
+        Step('dim_unidade', _table(load_dim_unidade), ['stg_receita', 'stg_despesa']),
+        Step('dim_pacote', _table(load_dim_pacote), ['stg_despesa']),
+        Step('dim_linha_dre', _table(load_dim_linha_dre), ['stg_dre']),
+
+        # STG → DW: fatos
+        Step('fact_receita', _table(load_fact_receita), ['stg_receita']),
+        Step('fact_despesa', _table(load_fact_despesa), ['stg_despesa']),
+        Step('fact_dre', _table(load_fact_dre), ['stg_dre']),
+        Step('fact_aliquota', _table(load_fact_aliquota), ['stg_aliquota']),
+
+        # DW → agregados (grão mensal, lidos pela consulta genérica da API)
+        Step('agg_receita_mensal', _table(load_agg_receita_mensal), ['fact_receita']),
+        Step('agg_despesa_mensal', _table(load_agg_despesa_mensal), ['fact_despesa']),
+
+        # Qualidade (anomalias são informativas: nunca derrubam a execução)
+        Step('dq_checks', _dq_checks, dims + facts + aggs, critical=fail_on_dq_error,
+             description='Verificações de Qualidade'),
+        Step('dq_anomalies', _dq_anomalies, ['fact_receita', 'fact_despesa', 'fact_dre'],
+             critical=False, description='Detecção de Anomalias'),
+    ]
+
+    skipped = set()
+    if skip_extract:
+        skipped |= {'extract_excel', 'validate_raw'}
+    if skip_raw_validation:
+        skipped.add('validate_raw')
+    if skip_dq:
+        skipped |= {'dq_checks', 'dq_anomalies'}
+    if skip_anomalies:
+        skipped.add('dq_anomalies')
+
+    steps = [s for s in steps if s.name not in skipped]
+    for step in steps:
+        step.depends_on = [d for d in step.depends_on if d not in skipped]
+
+    return steps
+
+
+def incremental_completed(steps: List[Step], tables: List[str]) -> List[str]:
+    """
+    Steps de transformação que NÃO dependem das tabelas RAW alteradas.
+
+    Numa execução incremental eles são tratados como concluídos: suas
+    tabelas STG/DW continuam válidas e não são reprocessadas.
+    """
+    dag = DAGScheduler(steps)
+    changed = set()
+    for table in tables:
+        stg = f'stg_{table}'
+        if stg in dag.steps:
+            changed |= {stg, *dag.descendants(stg)}
+
+    return [
+        name for name in dag.order
+        if name.startswith(('stg_', 'dim_', 'fact_', 'agg_')) and name not in changed
+    ]
+
+
 # =============================================================================
 # PIPELINE
 # =============================================================================
@@ -181,7 +490,15 @@ def run_pipeline(
     fail_on_dq_error: bool = False,
     log_level: str = 'INFO',
     triggered_by: str = 'MANUAL',
-    engine: Optional[Engine] = None
+    engine: Optional[Engine] = None,
+    skip_raw_validation: bool = False,
+    max_workers: Optional[int] = None,
+    resume_run_id: Optional[int] = None,
+    coordinate: bool = True,
+    only_tables: Optional[List[str]] = None,
+    capture_plans: bool = False,
+    profile: Optional[str] = None,
+    on_run_start: Optional[Callable[[int], None]] = None
 ) -> Dict:
     """
     Executa o pipeline ETL completo.
@@ -193,112 +510,360 @@ def run_pipeline(
         log_level: Nível de log (DEBUG, INFO, WARNING, ERROR)
         triggered_by: Origem da execução (MANUAL, SCHEDULED, API)
         engine: Engine SQLAlchemy (opcional)
+        skip_raw_validation: Pular validação fail-fast da camada RAW
+        max_workers: Steps simultâneos (default: etl.max_workers do config)
+        resume_run_id: Retoma essa execução a partir dos steps pendentes
+        coordinate: Serializar com outros processos via advisory lock
+                    (disparos concorrentes viram um único follow-up)
+        only_tables: Execução incremental: recarrega só essas tabelas RAW
+                     e os steps que dependem delas (usado pelo --watch)
+        capture_plans: Executa os statements via EXPLAIN (ANALYZE, BUFFERS),
+                       grava os planos em dw.etl_query_plan e sinaliza
+                       regressões em relação à execução anterior
+        profile: Perfila cada step ('cprofile' ou 'sampling'); arquivos
+                 em logs/profiles/run_<run_id>/
+        on_run_start: Chamado com o run_id de cada execução assim que ela é
+                      registrada em dw.etl_run (inclusive follow-ups)
         
     Returns:
         Dicionário com estatísticas da execução
     """
-    print("\n" + "=" * 70)
-    print("   DRE ANALYTICS 2025 - PIPELINE ETL")
-    print("=" * 70)
-    print(f"   Início: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"   Disparado por: {triggered_by}")
-    print("=" * 70)
-    
-    # Setup
+    # Setup (mensagens vão para o logger; o console é um dos handlers)
     logger = setup_logging(log_level)
+    logger.info(banner(
+        "DRE ANALYTICS 2025 - PIPELINE ETL",
+        f"Início: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"Disparado por: {triggered_by}"
+    ))
+    
     config = get_config()
     engine = engine or get_engine()
+    max_workers = max_workers or config.get_etl_config().get('max_workers', DEFAULT_MAX_WORKERS)
     
     # Verificar conexão
-    print("\n🔌 Verificando conexão com banco de dados...")
+    logger.info("🔌 Verificando conexão com banco de dados...")
     if not test_connection():
-        print("❌ Falha na conexão com o banco. Verifique se o Docker está rodando.")
+        logger.error("❌ Falha na conexão com o banco. Verifique se o Docker está rodando.")
         return {'status': 'FAILED', 'error': 'Database connection failed'}
-    print("   ✅ Conexão OK")
+    logger.info("   ✅ Conexão OK")
     
-    # Iniciar execução
-    etl_run = ETLRun(engine)
-    run_id = etl_run.start(triggered_by)
-    print(f"\n🚀 Execução iniciada - Run ID: {run_id}")
+    # DuckDB: sem EXPLAIN (FORMAT JSON) nem advisory lock; o arquivo do
+    # banco já só aceita um processo escrevendo por vez
+    backend = engine_backend(engine)
+    if capture_plans and not backend.supports_explain:
+        logger.warning(f"⚠️ --capture-plans não é suportado no backend {backend.name}; ignorado")
+        capture_plans = False
+    if coordinate and not backend.supports_advisory_lock:
+        coordinate = False
     
-    try:
-        step_order = 0
-        
-        # =====================================================================
-        # STEP 1: Extração Excel → RAW
-        # =====================================================================
-        if not skip_extract:
-            step_order += 1
-            print(f"\n{'─' * 60}")
-            print(f"   STEP {step_order}: Extração Excel → RAW")
-            print(f"{'─' * 60}")
-            
-            try:
-                extract_results = run_extract(engine=engine)
-                total_extracted = sum(r.get('rows_loaded', 0) for r in extract_results.values())
-                etl_run.log_step('extract_excel', step_order, 'SUCCESS', rows_written=total_extracted)
-            except Exception as e:
-                etl_run.log_step('extract_excel', step_order, 'FAILED', error_message=str(e))
-                raise
-        else:
-            print("\n⏭️ Extração ignorada (--skip-extract)")
-        
-        # =====================================================================
-        # STEP 2: Transformação RAW → STG
-        # =====================================================================
-        step_order += 1
-        print(f"\n{'─' * 60}")
-        print(f"   STEP {step_order}: Transformação RAW → STG")
-        print(f"{'─' * 60}")
+    run_options = {
+        'skip_dq': skip_dq,
+        'fail_on_dq_error': fail_on_dq_error,
+        'skip_raw_validation': skip_raw_validation,
+        'max_workers': max_workers,
+        'capture_plans': capture_plans,
+        'profile': profile,
+        'on_run_start': on_run_start,
+    }
+    
+    if not coordinate:
+        return _execute_pipeline(
+            engine, logger, triggered_by, skip_extract,
+            resume_run_id=resume_run_id, only_tables=only_tables, **run_options
+        )
+    
+    # Só um processo altera o DW por vez; quem chegar durante a execução
+    # é agregado num único follow-up (ver _05_run_lock.py). Retomada e modo
+    # incremental valem só para a primeira execução; follow-ups são completos.
+    from ._05_jobs import JobQueue, final_status
+    
+    first_run = [{'resume_run_id': resume_run_id, 'only_tables': only_tables}]
+    jobs = JobQueue(engine)
+    
+    def _followup_started(run_id: int) -> None:
+        # Jobs da API que ficaram COALESCED passam a apontar para o follow-up
+        jobs.adopt_coalesced(run_id)
+        if on_run_start:
+            on_run_start(run_id)
+    
+    def _run(claimed: Dict) -> Dict:
+        if first_run:
+            return _execute_pipeline(
+                engine, logger,
+                claimed['last_triggered_by'] or triggered_by,
+                claimed['skip_extract'],
+                **first_run.pop(),
+                **run_options
+            )
         
+        result = _execute_pipeline(
+            engine, logger,
+            claimed['last_triggered_by'] or triggered_by,
+            claimed['skip_extract'],
+            **dict(run_options, on_run_start=_followup_started)
+        )
+        if result.get('run_id') is not None:
+            settled = jobs.settle_followup(result['run_id'], final_status(result), result.get('error'))
+            if settled:
+                logger.info(
+                    f"📤 {settled} job(s) agregado(s) concluído(s) pelo follow-up {result['run_id']}",
+                    extra={'run_id': result['run_id'], 'jobs': settled}
+                )
+        return result
+    
+    from ._05_run_lock import RunCoordinator
+    
+    try:
+        return RunCoordinator(engine).run(_run, triggered_by, skip_extract)
+    except Exception as e:
+        logger.error(f"Falha na coordenação da execução: {e}")
+        logger.error(traceback.format_exc())
+        return {'status': 'FAILED', 'error': str(e)}
+
+
+def explain_pipeline(engine: Optional[Engine] = None, log_level: str = 'INFO') -> Dict:
+    """
+    Dry-run: roda EXPLAIN em todos os statements de STG, DW e DQ, na ordem
+    do pipeline, sem alterar dados (nenhum run é registrado em dw.etl_run).
+    
+    Os planos refletem as estatísticas das tabelas atuais: rode depois de
+    uma carga para ver custos realistas.
+    
+    Returns:
+        Dicionário com status e número de statements explicados
+    """
+    logger = setup_logging(log_level)
+    logger.info(banner("DRE ANALYTICS 2025 - PLANOS DE EXECUÇÃO (--explain)"))
+    
+    from ._01_validate_raw import run_raw_validation
+    from ._02_transform_raw_to_stg import (
+        transform_receita, transform_despesa, transform_dre, transform_aliquota
+    )
+    from ._03_transform_stg_to_dw import (
+        load_dim_unidade, load_dim_pacote, load_dim_linha_dre,
+        load_fact_receita, load_fact_despesa, load_fact_dre, load_fact_aliquota,
+        load_agg_receita_mensal, load_agg_despesa_mensal
+    )
+    from ._04_dq_checks import run_dq_checks
+    from ._04_dq_anomalies import run_anomaly_detection
+    
+    engine = engine or get_engine()
+    
+    backend = engine_backend(engine)
+    if not backend.supports_explain:
+        logger.error(f"❌ --explain não é suportado no backend {backend.name}")
+        return {'status': 'FAILED', 'error': f'EXPLAIN not supported on {backend.name}'}
+    
+    logger.info("🔌 Verificando conexão com banco de dados...")
+    if not test_connection():
+        logger.error("❌ Falha na conexão com o banco. Verifique se o Docker está rodando.")
+        return {'status': 'FAILED', 'error': 'Database connection failed'}
+    logger.info("   ✅ Conexão OK")
+    
+    steps = [
+        ('validate_raw', lambda: run_raw_validation(engine, fail_on_error=False)),
+        ('stg_receita', lambda: transform_receita(engine)),
+        ('stg_despesa', lambda: transform_despesa(engine)),
+        ('stg_dre', lambda: transform_dre(engine)),
+        ('stg_aliquota', lambda: transform_aliquota(engine)),
+        ('dim_unidade', lambda: load_dim_unidade(engine)),
+        ('dim_pacote', lambda: load_dim_pacote(engine)),
+        ('dim_linha_dre', lambda: load_dim_linha_dre(engine)),
+        ('fact_receita', lambda: load_fact_receita(engine)),
+        ('fact_despesa', lambda: load_fact_despesa(engine)),
+        ('fact_dre', lambda: load_fact_dre(engine)),
+        ('fact_aliquota', lambda: load_fact_aliquota(engine)),
+        ('agg_receita_mensal', lambda: load_agg_receita_mensal(engine)),
+        ('agg_despesa_mensal', lambda: load_agg_despesa_mensal(engine)),
+        ('dq_checks', lambda: run_dq_checks(engine)),
+        # run_id 0: não existe, mas evita o "nenhuma execução registrada"
+        ('dq_anomalies', lambda: run_anomaly_detection(engine, run_id=0)),
+    ]
+    
+    set_plan_mode(MODE_EXPLAIN)
+    try:
+        for name, func in steps:
+            with step_context(name):
+                func()
+        plans = collected_plans()
+    except Exception as e:
+        logger.error(f"Falha no EXPLAIN: {e}")
+        logger.error(traceback.format_exc())
+        return {'status': 'FAILED', 'error': str(e)}
+    finally:
+        set_plan_mode(MODE_EXECUTE)
+    
+    print_plan_report(plans)
+    return {'status': 'SUCCESS', 'statements': len(plans)}
+
+
+def _save_plans(engine: Engine, logger: logging.Logger, run_id: int) -> int:
+    """Grava os planos capturados e avisa regressões (falha não é fatal)"""
+    try:
+        flagged = save_captured_plans(engine, run_id)
+    except Exception as e:
+        logger.warning(f"Não foi possível gravar os planos capturados: {e}")
+        return 0
+    logger.info(f"📐 {len(collected_plans())} planos capturados em dw.etl_query_plan")
+    log_regressions(flagged)
+    return len(flagged)
+
+
+def _logs_folder() -> Path:
+    """Pasta de logs do config (logging.folder)"""
+    config = get_config()
+    return config.project_root / config.get_logging_config().get('folder', 'logs')
+
+
+def _publish_run(
+    logger: logging.Logger,
+    run_id: int,
+    status: str,
+    duration: float,
+    total_rows: int = 0,
+    error: Optional[str] = None
+):
+    """
+    Publica o fim da execução: registro JSON, métricas Prometheus e o
+    arquivo .prom do textfile collector (metrics.textfile no config).
+    """
+    from ._00_metrics import record_run, write_textfile
+    
+    logger.info(
+        f"Execução {run_id}: {status}",
+        extra={
+            'run_id': run_id, 'status': status, 'duration_seconds': round(duration, 3),
+            'total_rows': total_rows, 'error': error
+        }
+    )
+    record_run(run_id, status, duration, total_rows)
+    
+    config = get_config()
+    textfile = config.get('metrics', {}).get('textfile')
+    path = Path(textfile) if textfile else _logs_folder() / 'dre_etl.prom'
+    write_textfile(path if path.is_absolute() else config.project_root / path)
+    
+    set_log_context(None)
+
+
+def _execute_pipeline(
+    engine: Engine,
+    logger: logging.Logger,
+    triggered_by: str,
+    skip_extract: bool,
+    skip_dq: bool,
+    fail_on_dq_error: bool,
+    skip_raw_validation: bool,
+    max_workers: int,
+    resume_run_id: Optional[int] = None,
+    only_tables: Optional[List[str]] = None,
+    capture_plans: bool = False,
+    profile: Optional[str] = None,
+    on_run_start: Optional[Callable[[int], None]] = None
+) -> Dict:
+    """
+    Executa (ou retoma) uma execução do DAG, já com o lock adquirido.
+    """
+    from ._00_metrics import record_step, register_pool
+    
+    # Iniciar (ou retomar) execução
+    etl_run = ETLRun(engine)
+    completed = []
+    if resume_run_id is not None:
         try:
-            stg_results = run_transform_raw_to_stg(engine=engine)
-            total_stg = sum(stg_results.values())
-            etl_run.log_step('transform_raw_to_stg', step_order, 'SUCCESS', rows_written=total_stg)
-        except Exception as e:
-            etl_run.log_step('transform_raw_to_stg', step_order, 'FAILED', error_message=str(e))
-            raise
+            completed = etl_run.resume(resume_run_id)
+        except ValueError as e:
+            logger.error(f"❌ {e}")
+            return {'status': 'FAILED', 'run_id': resume_run_id, 'error': str(e)}
+        run_id = resume_run_id
+        logger.info(f"🔁 Execução retomada - Run ID: {run_id}")
+        if completed:
+            logger.info(f"   ♻️ Reaproveitando {len(completed)} steps concluídos: {', '.join(completed)}")
+    else:
+        run_id = etl_run.start(triggered_by)
+        logger.info(f"🚀 Execução iniciada - Run ID: {run_id}")
+    
+    if on_run_start:
+        on_run_start(run_id)
+    set_log_context(run_id)
+    register_pool(engine)
+    
+    if skip_extract:
+        logger.info("⏭️ Extração ignorada (--skip-extract)")
+    elif skip_raw_validation:
+        logger.info("⏭️ Validação RAW ignorada (--skip-raw-validation)")
+    if skip_dq:
+        logger.info("⏭️ Verificações DQ ignoradas (--skip-dq)")
+    if capture_plans:
+        logger.info("📐 Capturando planos: statements via EXPLAIN (ANALYZE, BUFFERS)")
+    
+    def _on_start(outcome: StepOutcome):
+        logger.info(f"▶️ STEP {outcome.order}: {outcome.step.description}")
+    
+    def _on_finish(outcome: StepOutcome):
+        emoji = {'SUCCESS': '✅', 'WARNING': '⚠️', 'FAILED': '❌', 'SKIPPED': '⏭️'}[outcome.status]
+        error_message = str(outcome.error) if outcome.error else None
+        logger.log(
+            logging.ERROR if outcome.status == 'FAILED' else logging.INFO,
+            f"   {emoji} Step {outcome.step.name}: {outcome.status} ({outcome.duration_seconds:.2f}s)",
+            extra=step_record(
+                outcome.step.name, outcome.status, outcome.duration_seconds,
+                outcome.rows_read, outcome.rows_written, error=error_message
+            )
+        )
+        if outcome.metrics:
+            record_step(
+                outcome.step.name, outcome.duration_seconds,
+                outcome.rows_read, outcome.rows_written, outcome.metrics.cpu_seconds
+            )
+            etl_run.log_metrics(outcome.metrics, outcome.order, outcome.status, error_message)
+        else:
+            etl_run.log_step(outcome.step.name, outcome.order, outcome.status,
+                             error_message=error_message)
+        if outcome.status in ('SUCCESS', 'WARNING'):
+            etl_run.checkpoint(outcome.step.name)
+    
+    try:
+        steps = build_pipeline_steps(
+            engine, run_id,
+            skip_extract=skip_extract,
+            skip_dq=skip_dq,
+            fail_on_dq_error=fail_on_dq_error,
+            skip_raw_validation=skip_raw_validation,
+            tables=only_tables if not skip_extract else None,
+            skip_anomalies=not engine_backend(engine).supports_anomalies
+        )
+        if profile:
+            folder = profile_folder(_logs_folder(), run_id)
+            profile_steps(steps, folder, profile, memory_steps=['extract_excel'])
+            logger.info(f"🔬 Profiling ({profile}) de cada step em {folder}")
+        if only_tables and not skip_extract:
+            reused = incremental_completed(steps, only_tables)
+            logger.info(f"🎯 Execução incremental: {', '.join(only_tables)} "
+                        f"({len(reused)} steps reaproveitados)")
+            completed = sorted(set(completed) | set(reused))
+            # Reaproveitados contam como concluídos também para --resume
+            for name in reused:
+                etl_run.checkpoint(name)
         
-        # =====================================================================
-        # STEP 3: Transformação STG → DW
-        # =====================================================================
-        step_order += 1
-        print(f"\n{'─' * 60}")
-        print(f"   STEP {step_order}: Transformação STG → DW")
-        print(f"{'─' * 60}")
+        scheduler = DAGScheduler(
+            steps,
+            max_workers=max_workers,
+            on_start=_on_start,
+            on_finish=_on_finish,
+            completed=completed
+        )
+        logger.info(f"🧩 DAG com {len(steps)} steps - até {scheduler.max_workers} em paralelo")
         
+        # Planos são gravados também quando a execução falha
+        set_plan_mode(MODE_CAPTURE if capture_plans else MODE_EXECUTE)
         try:
-            dw_results = run_transform_stg_to_dw(engine=engine)
-            total_dw = sum(dw_results.values())
-            etl_run.log_step('transform_stg_to_dw', step_order, 'SUCCESS', rows_written=total_dw)
-        except Exception as e:
-            etl_run.log_step('transform_stg_to_dw', step_order, 'FAILED', error_message=str(e))
-            raise
-        
-        # =====================================================================
-        # STEP 4: Verificações de DQ
-        # =====================================================================
-        if not skip_dq:
-            step_order += 1
-            print(f"\n{'─' * 60}")
-            print(f"   STEP {step_order}: Verificações de Qualidade")
-            print(f"{'─' * 60}")
-            
-            try:
-                dq_results = run_dq_checks(
-                    engine=engine, 
-                    run_id=run_id,
-                    fail_on_error=fail_on_dq_error
-                )
-                
-                status = 'SUCCESS' if dq_results['failed'] == 0 else 'WARNING'
-                etl_run.log_step('dq_checks', step_order, status)
-            except Exception as e:
-                etl_run.log_step('dq_checks', step_order, 'FAILED', error_message=str(e))
-                if fail_on_dq_error:
-                    raise
-        else:
-            print("\n⏭️ Verificações DQ ignoradas (--skip-dq)")
+            summary = summarize(scheduler.run())
+            plan_regressions = _save_plans(engine, logger, run_id) if capture_plans else 0
+        finally:
+            set_plan_mode(MODE_EXECUTE)
+        if summary['status'] == 'FAILED':
+            raise RuntimeError(summary['error'])
         
         # =====================================================================
         # FINALIZAÇÃO
@@ -307,19 +872,26 @@ def run_pipeline(
         
         duration = (datetime.now() - etl_run.started_at).total_seconds()
         
-        print("\n" + "=" * 70)
-        print("   ✅ PIPELINE CONCLUÍDO COM SUCESSO!")
-        print("=" * 70)
-        print(f"   Run ID: {run_id}")
-        print(f"   Duração: {duration:.2f} segundos")
-        print(f"   Total de steps: {step_order}")
-        print("=" * 70)
+        lines = [
+            f"Run ID: {run_id}",
+            f"Duração: {duration:.2f} segundos",
+            f"Total de steps: {summary['steps_executed']}",
+        ]
+        if summary['steps_failed']:
+            lines.append(f"Steps não críticos com falha: {summary['steps_failed']}")
+        if plan_regressions:
+            lines.append(f"Statements com regressão de plano: {plan_regressions}")
+        logger.info(banner("✅ PIPELINE CONCLUÍDO COM SUCESSO!", *lines))
+        
+        _publish_run(logger, run_id, 'SUCCESS', duration, summary['total_rows'])
         
         return {
             'status': 'SUCCESS',
             'run_id': run_id,
             'duration_seconds': duration,
-            'steps': step_order
+            'steps': summary['steps_executed'],
+            'total_rows': summary['total_rows'],
+            'plan_regressions': plan_regressions
         }
         
     except Exception as e:
@@ -329,11 +901,10 @@ def run_pipeline(
         
         etl_run.finish('FAILED', error_message=error_msg)
         
-        print("\n" + "=" * 70)
-        print("   ❌ PIPELINE FALHOU!")
-        print("=" * 70)
-        print(f"   Erro: {error_msg}")
-        print("=" * 70)
+        logger.error(banner("❌ PIPELINE FALHOU!", f"Erro: {error_msg}"))
+        
+        duration = (datetime.now() - etl_run.started_at).total_seconds()
+        _publish_run(logger, run_id, 'FAILED', duration, error=error_msg)
         
         return {
             'status': 'FAILED',
@@ -358,6 +929,11 @@ Exemplos:
   python -m etl._05_run_pipeline                    # Pipeline completo
   python -m etl._05_run_pipeline --skip-extract     # Sem extração
   python -m etl._05_run_pipeline --skip-dq          # Sem validações
+  python -m etl._05_run_pipeline --resume 42        # Retoma a execução 42
+  python -m etl._05_run_pipeline --watch            # Daemon: roda a cada mudança
+  python -m etl._05_run_pipeline --explain          # Planos (EXPLAIN) sem alterar dados
+  python -m etl._05_run_pipeline --capture-plans    # Grava planos e compara com o run anterior
+  python -m etl._05_run_pipeline --profile          # cProfile por step em logs/profiles/
   python -m etl._05_run_pipeline --log-level DEBUG  # Modo debug
         """
     )
@@ -368,6 +944,12 @@ Exemplos:
         help='Pular extração do Excel (usar dados já carregados)'
     )
     
+    parser.add_argument(
+        '--skip-raw-validation',
+        action='store_true',
+        help='Pular validação fail-fast da camada RAW após a extração'
+    )
+    
     parser.add_argument(
         '--skip-dq',
         action='store_true',
@@ -380,6 +962,68 @@ Exemplos:
         help='Falhar pipeline se verificações DQ encontrarem erros'
     )
     
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=None,
+        help='Máximo de steps executados em paralelo (default: etl.max_workers)'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        type=int,
+        default=None,
+        metavar='RUN_ID',
+        help='Retomar a execução RUN_ID a partir do primeiro step não concluído'
+    )
+    
+    parser.add_argument(
+        '--no-lock',
+        action='store_true',
+        help='Não usar o lock entre processos (apenas para depuração)'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Modo daemon: observa o Excel de origem e roda a cada mudança'
+    )
+    
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f'Segundos entre verificações no modo watch (default: {DEFAULT_POLL_INTERVAL:.0f})'
+    )
+    
+    parser.add_argument(
+        '--debounce',
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help=f'Segundos sem escrita antes de rodar no modo watch (default: {DEFAULT_DEBOUNCE:.0f})'
+    )
+    
+    parser.add_argument(
+        '--explain',
+        action='store_true',
+        help='Dry-run: EXPLAIN de todos os statements (custo e linhas estimadas), sem alterar dados'
+    )
+    
+    parser.add_argument(
+        '--capture-plans',
+        action='store_true',
+        help='Grava EXPLAIN (ANALYZE, BUFFERS) de cada statement e sinaliza regressões'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const=PROFILE_CPROFILE,
+        choices=PROFILE_MODES,
+        default=None,
+        help='Perfilar cada step: cprofile (.pstats, padrão) ou sampling (.collapsed para flamegraph)'
+    )
+    
     parser.add_argument(
         '--log-level',
         choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
@@ -396,15 +1040,49 @@ Exemplos:
     
     args = parser.parse_args()
     
+    if args.explain:
+        result = explain_pipeline(log_level=args.log_level)
+        sys.exit(0 if result['status'] == 'SUCCESS' else 1)
+    
+    if args.watch:
+        config = get_config()
+        watch_source(
+            lambda tables: run_pipeline(
+                skip_dq=args.skip_dq,
+                fail_on_dq_error=args.fail_on_dq_error,
+                log_level=args.log_level,
+                triggered_by='WATCH',
+                skip_raw_validation=args.skip_raw_validation,
+                max_workers=args.max_workers,
+                coordinate=not args.no_lock,
+                only_tables=tables,
+                capture_plans=args.capture_plans,
+                profile=args.profile
+            ),
+            path=config.get_source_file_path(),
+            sheets=config.get_etl_config().get('sheets', {}),
+            engine=get_engine(),
+            poll_interval=args.poll_interval,
+            debounce=args.debounce
+        )
+        sys.exit(0)
+    
     result = run_pipeline(
         skip_extract=args.skip_extract,
         skip_dq=args.skip_dq,
         fail_on_dq_error=args.fail_on_dq_error,
         log_level=args.log_level,
-        triggered_by=args.triggered_by
+        triggered_by=args.triggered_by,
+        skip_raw_validation=args.skip_raw_validation,
+        max_workers=args.max_workers,
+        resume_run_id=args.resume,
+        coordinate=not args.no_lock,
+        capture_plans=args.capture_plans,
+        profile=args.profile
     )
     
-    sys.exit(0 if result['status'] == 'SUCCESS' else 1)
+    # COALESCED: outro processo já está executando e fará o follow-up
+    sys.exit(0 if result['status'] in ('SUCCESS', 'COALESCED') else 1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,300 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Agendador de Steps em DAG
+
+Cada step declara suas dependências; steps independentes rodam em paralelo
+num pool limitado de threads (o trabalho pesado é SQL no PostgreSQL, que
+libera o GIL). A falha de um step só cancela os steps que dependem dele,
+direta ou indiretamente; ramos independentes seguem normalmente.
+"""
+
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ._00_step_metrics import StepMetrics, record_result, step_context
+
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Status possíveis de um step (mesmos valores de dw.etl_step_log)
+STATUS_SUCCESS = 'SUCCESS'
+STATUS_WARNING = 'WARNING'
+STATUS_FAILED = 'FAILED'
+STATUS_SKIPPED = 'SKIPPED'
+
+DEFAULT_MAX_WORKERS = 4
+
+
+# =============================================================================
+# EXCEÇÕES
+# =============================================================================
+
+class DAGError(Exception):
+    """Erro de definição do DAG (dependência inexistente, ciclo, duplicata)"""
+    pass
+
+
+# =============================================================================
+# DEFINIÇÃO DOS STEPS
+# =============================================================================
+
+class Step:
+    """
+    Nó do DAG.
+
+    A função do step não recebe argumentos e pode retornar:
+    - int: linhas gravadas
+    - dict: com 'rows_written', 'rows_read' e/ou 'status' (ex: WARNING)
+    - None
+
+    Steps não críticos (ex: DQ informativo) podem falhar sem marcar a
+    execução inteira como FAILED; seus dependentes ainda são cancelados.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        depends_on: Iterable[str] = (),
+        critical: bool = True,
+        description: Optional[str] = None
+    ):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+        self.critical = critical
+        self.description = description or name
+
+    def __repr__(self) -> str:
+        return f"Step({self.name!r}, depends_on={self.depends_on!r})"
+
+
+class StepOutcome:
+    """Resultado da execução de um step"""
+
+    def __init__(self, step: Step, order: int):
+        self.step = step
+        self.order = order
+        self.status: Optional[str] = None
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.metrics: Optional[StepMetrics] = None
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.metrics.duration_seconds if self.metrics else 0.0
+
+    @property
+    def rows_written(self) -> int:
+        return self.metrics.rows_written if self.metrics else 0
+
+    @property
+    def rows_read(self) -> int:
+        return self.metrics.rows_read if self.metrics else 0
+
+
+# =============================================================================
+# AGENDADOR
+# =============================================================================
+
+class DAGScheduler:
+    """
+    Executa steps respeitando dependências, em paralelo quando possível.
+
+    Uso:
+        scheduler = DAGScheduler(steps, max_workers=4, on_finish=log_fn)
+        outcomes = scheduler.run()
+    """
+
+    def __init__(
+        self,
+        steps: List[Step],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        on_start: Optional[Callable[[StepOutcome], None]] = None,
+        on_finish: Optional[Callable[[StepOutcome], None]] = None,
+        completed: Optional[Iterable[str]] = None
+    ):
+        """
+        Args:
+            steps: Nós do DAG
+            max_workers: Tamanho máximo do pool de threads
+            on_start: Callback chamado quando um step começa
+            on_finish: Callback chamado quando um step termina (qualquer status)
+            completed: Steps já concluídos (não são executados novamente)
+        """
+        self.steps = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise DAGError(f"Step duplicado: {step.name}")
+            self.steps[step.name] = step
+
+        for step in steps:
+            missing = [d for d in step.depends_on if d not in self.steps]
+            if missing:
+                raise DAGError(f"Step {step.name} depende de steps inexistentes: {missing}")
+
+        self.max_workers = max(1, int(max_workers))
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.completed = set(completed or [])
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        """Ordenação topológica estável (Kahn); detecta ciclos"""
+        pending = {name: len(step.depends_on) for name, step in self.steps.items()}
+        dependents = self.dependents()
+        ready = [name for name in self.steps if pending[name] == 0]
+        order = []
+
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for child in dependents[name]:
+                pending[child] -= 1
+                if pending[child] == 0:
+                    ready.append(child)
+
+        if len(order) != len(self.steps):
+            cycle = sorted(set(self.steps) - set(order))
+            raise DAGError(f"Ciclo de dependências entre: {cycle}")
+        return order
+
+    def dependents(self) -> Dict[str, List[str]]:
+        """Mapa step → steps que dependem diretamente dele"""
+        result = {name: [] for name in self.steps}
+        for step in self.steps.values():
+            for dep in step.depends_on:
+                result[dep].append(step.name)
+        return result
+
+    def descendants(self, name: str) -> List[str]:
+        """Todos os steps que dependem (direta ou indiretamente) de `name`"""
+        dependents = self.dependents()
+        seen, stack = [], list(dependents[name])
+        while stack:
+            child = stack.pop()
+            if child not in seen:
+                seen.append(child)
+                stack.extend(dependents[child])
+        return seen
+
+    def _execute(self, outcome: StepOutcome) -> StepOutcome:
+        """Roda um step na thread do pool, medido por step_context"""
+        if self.on_start:
+            self.on_start(outcome)
+
+        try:
+            with step_context(outcome.step.name) as metrics:
+                outcome.metrics = metrics
+                outcome.result = outcome.step.func()
+                record_result(metrics, outcome.result)
+                status = outcome.result.get('status') if isinstance(outcome.result, dict) else None
+                metrics.status = status if status in (STATUS_SUCCESS, STATUS_WARNING) else STATUS_SUCCESS
+        except Exception as e:
+            outcome.error = e
+            logger.error(f"Step {outcome.step.name} falhou: {e}")
+
+        outcome.status = outcome.metrics.status
+        outcome.started_at = outcome.metrics.started_at
+        outcome.finished_at = outcome.metrics.finished_at
+        return outcome
+
+    def _notify_finish(self, outcome: StepOutcome) -> None:
+        if self.on_finish:
+            try:
+                self.on_finish(outcome)
+            except Exception as e:
+                logger.error(f"Erro no callback do step {outcome.step.name}: {e}")
+
+    def run(self) -> Dict[str, StepOutcome]:
+        """
+        Executa o DAG.
+
+        Returns:
+            Dicionário step → StepOutcome, na ordem topológica
+        """
+        outcomes = {
+            name: StepOutcome(self.steps[name], order)
+            for order, name in enumerate(self.order, start=1)
+        }
+        pending = {
+            name: len([d for d in step.depends_on if d not in self.completed])
+            for name, step in self.steps.items()
+        }
+        dependents = self.dependents()
+
+        for name in self.completed & set(self.steps):
+            outcomes[name].status = STATUS_SUCCESS
+
+        ready = [n for n in self.order if pending[n] == 0 and n not in self.completed]
+        running: Dict[Future, str] = {}
+
+        def _release(name: str) -> None:
+            for child in dependents[name]:
+                pending[child] -= 1
+                if pending[child] == 0 and outcomes[child].status is None:
+                    ready.append(child)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='etl') as pool:
+            while ready or running:
+                while ready:
+                    name = ready.pop(0)
+                    running[pool.submit(self._execute, outcomes[name])] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    outcome = future.result()
+                    self._notify_finish(outcome)
+
+                    if outcome.status == STATUS_FAILED:
+                        # Cancela apenas os descendentes; o resto do DAG segue
+                        for child in self.descendants(name):
+                            skipped = outcomes[child]
+                            if skipped.status is None:
+                                skipped.status = STATUS_SKIPPED
+                                skipped.error = DAGError(f"Dependência falhou: {name}")
+                                self._notify_finish(skipped)
+                    else:
+                        _release(name)
+
+        return outcomes
+
+
+def summarize(outcomes: Dict[str, StepOutcome]) -> Dict[str, Any]:
+    """
+    Consolida o resultado do DAG.
+
+    Returns:
+        Dicionário com status geral, primeiro erro crítico e contagens
+    """
+    critical_failures = [
+        o for o in outcomes.values()
+        if o.step.critical and o.status in (STATUS_FAILED, STATUS_SKIPPED)
+    ]
+    first_error = next(
+        (o for o in critical_failures if o.status == STATUS_FAILED),
+        critical_failures[0] if critical_failures else None
+    )
+
+    return {
+        'status': STATUS_FAILED if critical_failures else STATUS_SUCCESS,
+        'error': f"{first_error.step.name}: {first_error.error}" if first_error else None,
+        'steps_executed': sum(1 for o in outcomes.values() if o.started_at),
+        'steps_failed': sum(1 for o in outcomes.values() if o.status == STATUS_FAILED),
+        'steps_skipped': sum(1 for o in outcomes.values() if o.status == STATUS_SKIPPED),
+        'total_rows': sum(o.rows_written for o in outcomes.values()),
+    }
@@ -0,0 +1,269 @@
+"""
+DRE Analytics 2025 - Pipeline ETL
+Modo Watch (daemon)
+
+Mantém o processo aquecido (imports, pandas, engine e pool já carregados)
+e observa o arquivo Excel de origem por polling de mtime/tamanho, que
+funciona igual em Linux, macOS e Windows. Escritas em sequência são
+agrupadas (debounce) até o arquivo ficar estável.
+
+A cada mudança, compara a impressão digital de cada aba (XML da aba dentro
+do .xlsx) com a da última execução e roda o pipeline só para as tabelas
+RAW cujas abas mudaram; os demais ramos do DAG são reaproveitados.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import posixpath
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+# Importado pelo CLI (constantes do argparse): SQLAlchemy e o extrator
+# (pandas) só são carregados quando o watch de fato roda
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+DEFAULT_POLL_INTERVAL = 2.0     # Segundos entre verificações do arquivo
+DEFAULT_DEBOUNCE = 5.0          # Segundos de estabilidade antes de rodar
+
+_NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+# =============================================================================
+# IMPRESSÃO DIGITAL DAS ABAS
+# =============================================================================
+
+def _sheet_members(archive: zipfile.ZipFile) -> Dict[str, str]:
+    """Mapa nome da aba → arquivo XML dentro do .xlsx"""
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {r.get('Id'): r.get('Target') for r in rels.iter(f'{_NS_PKG_REL}Relationship')}
+
+    members = {}
+    for sheet in workbook.iter(f'{_NS_MAIN}sheet'):
+        target = targets.get(sheet.get(f'{_NS_REL}id'), '')
+        if target.startswith('/'):
+            members[sheet.get('name')] = target.lstrip('/')
+        else:
+            members[sheet.get('name')] = posixpath.normpath(posixpath.join('xl', target))
+    return members
+
+
+def table_fingerprints(path: Path, sheets: Dict[str, str]) -> Dict[str, str]:
+    """
+    Impressão digital de cada tabela RAW a partir das abas que a alimentam.
+
+    Lê só o XML das abas (sem pandas). Textos ficam em sharedStrings.xml,
+    compartilhado entre abas: se ele muda, todas as tabelas contam como
+    alteradas (conservador). Arquivos .xls (não-zip) usam o hash do
+    arquivo inteiro.
+
+    Args:
+        path: Arquivo Excel
+        sheets: Seção etl.sheets do config (chave → nome da aba)
+    """
+    from ._01_extract_excel import RAW_TABLE_SHEETS
+
+    if not zipfile.is_zipfile(path):
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        return {table: digest for table in RAW_TABLE_SHEETS}
+
+    with zipfile.ZipFile(path) as archive:
+        members = _sheet_members(archive)
+        names = set(archive.namelist())
+        shared = (
+            archive.read('xl/sharedStrings.xml')
+            if 'xl/sharedStrings.xml' in names else b''
+        )
+        shared_digest = hashlib.sha256(shared).hexdigest()
+
+        fingerprints = {}
+        for table, keys in RAW_TABLE_SHEETS.items():
+            h = hashlib.sha256(shared_digest.encode())
+            for key in keys:
+                member = members.get(sheets.get(key, ''))
+                h.update(key.encode())
+                h.update(archive.read(member) if member in names else b'<ausente>')
+            fingerprints[table] = h.hexdigest()
+
+    return fingerprints
+
+
+def changed_tables(old: Optional[Dict[str, str]], new: Dict[str, str]) -> List[str]:
+    """Tabelas RAW cuja impressão digital mudou (todas, se não há base)"""
+    if not old:
+        return list(new)
+    return [table for table in new if old.get(table) != new[table]]
+
+
+# =============================================================================
+# OBSERVADOR
+# =============================================================================
+
+class SourceWatcher:
+    """
+    Observa um arquivo por polling e devolve mudanças já estabilizadas.
+
+    Uso:
+        watcher = SourceWatcher(path, poll_interval=2, debounce=5)
+        while watcher.wait_for_change(): ...
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._sleep = sleep
+        self._last = self._stat()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        """
+        Bloqueia até o arquivo mudar e ficar `debounce` segundos sem mudar.
+
+        Returns:
+            True na mudança; False se `timeout` esgotar sem mudança
+        """
+        waited = 0.0
+        while True:
+            current = self._stat()
+            if current is not None and current != self._last:
+                break
+            if timeout is not None and waited >= timeout:
+                return False
+            self._sleep(self.poll_interval)
+            waited += self.poll_interval
+
+        # Debounce: espera o arquivo parar de mudar (cópia/salvamento em curso)
+        stable_for = 0.0
+        while stable_for < self.debounce:
+            self._sleep(self.poll_interval)
+            latest = self._stat()
+            if latest != current:
+                current, stable_for = latest, 0.0
+            else:
+                stable_for += self.poll_interval
+
+        self._last = current
+        return current is not None
+
+
+# =============================================================================
+# LOOP PRINCIPAL
+# =============================================================================
+
+def _last_run_id(engine: Engine) -> Optional[int]:
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT MAX(run_id) FROM dw.etl_run")).scalar()
+
+
+def watch_source(
+    run_fn: Callable[[Optional[List[str]]], Dict],
+    path: Path,
+    sheets: Dict[str, str],
+    engine: Engine,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    debounce: float = DEFAULT_DEBOUNCE
+) -> None:
+    """
+    Roda o pipeline a cada mudança do arquivo, até Ctrl+C.
+
+    Começa com uma execução completa (sincroniza o DW com o arquivo atual).
+    Depois, só as tabelas alteradas são reprocessadas, desde que a última
+    execução no banco seja a deste processo e tenha terminado com sucesso;
+    caso contrário (outro processo rodou, falha, COALESCED) volta a ser
+    completa.
+
+    Args:
+        run_fn: Executa o pipeline; recebe as tabelas RAW a recarregar
+                (None = todas)
+        path: Arquivo Excel observado
+        sheets: Seção etl.sheets do config
+        engine: Engine SQLAlchemy (reaproveitado entre execuções)
+    """
+    from ._01_extract_excel import RAW_TABLE_SHEETS
+
+    logger.info(
+        f"👀 Modo watch: {path} (polling a cada {poll_interval:.0f}s, "
+        f"debounce de {debounce:.0f}s; Ctrl+C para sair)",
+        extra={'source_file': str(path), 'poll_interval': poll_interval, 'debounce': debounce}
+    )
+
+    watcher = SourceWatcher(path, poll_interval=poll_interval, debounce=debounce)
+    baseline: Optional[Dict[str, str]] = None
+    our_run_id: Optional[int] = None
+    first = True
+
+    try:
+        while True:
+            if not first and not watcher.wait_for_change():
+                continue
+            first = False
+            if not path.exists():
+                logger.warning(f"   ⚠️ Arquivo não encontrado: {path}", extra={'source_file': str(path)})
+                continue
+
+            try:
+                fingerprints = table_fingerprints(path, sheets)
+            except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+                # Arquivo ainda sendo escrito ou corrompido: espera a próxima mudança
+                logger.warning(f"   ⚠️ Não foi possível ler o arquivo: {e}", extra={'source_file': str(path)})
+                continue
+
+            # Incremental só vale se o DW ainda reflete a nossa última execução
+            if baseline is not None and _last_run_id(engine) != our_run_id:
+                logger.info(
+                    "   ℹ️ Outra execução alterou o DW: reprocessamento completo",
+                    extra={'last_run_id': our_run_id}
+                )
+                baseline = None
+
+            tables = changed_tables(baseline, fingerprints)
+            if not tables:
+                logger.info("   ⏭️ Conteúdo das abas inalterado: nada a processar")
+                continue
+
+            incremental = baseline is not None and len(tables) < len(RAW_TABLE_SHEETS)
+            result = run_fn(tables if incremental else None)
+
+            if result.get('status') == 'SUCCESS' and not result.get('followup_runs'):
+                baseline, our_run_id = fingerprints, result.get('run_id')
+            else:
+                baseline, our_run_id = None, None
+
+            logger.info(f"👀 Aguardando mudanças em {path.name}...", extra={'source_file': str(path)})
+    except KeyboardInterrupt:
+        logger.info("👋 Modo watch encerrado")
@@ -1,24 +1,55 @@
 """
 DRE Analytics 2025 - ETL Package
+
+Os atributos públicos são carregados sob demanda (PEP 562): `import etl`
+não importa pandas, SQLAlchemy nem os módulos das etapas. Cada módulo só é
+importado no primeiro acesso ao atributo, então `--help`, health checks e
+workers da API que usam apenas a configuração iniciam rápido.
 """
 
+import importlib
+from typing import Any, List
+
 __version__ = "1.0.0"
 
-# Imports dos módulos
-from etl._00_config import get_config, get_engine, test_connection
-from etl._01_extract_excel import run_extract
-from etl._02_transform_raw_to_stg import run_transform_raw_to_stg
-from etl._03_transform_stg_to_dw import run_transform_stg_to_dw
-from etl._04_dq_checks import run_dq_checks
-from etl._05_run_pipeline import run_pipeline
+# Atributo público → módulo que o define
+_LAZY_ATTRIBUTES = {
+    'get_config': '_00_config',
+    'get_engine': '_00_config',
+    'test_connection': '_00_config',
+    'run_extract': '_01_extract_excel',
+    'run_raw_validation': '_01_validate_raw',
+    'run_transform_raw_to_stg': '_02_transform_raw_to_stg',
+    'run_transform_stg_to_dw': '_03_transform_stg_to_dw',
+    'run_dq_checks': '_04_dq_checks',
+    'run_anomaly_detection': '_04_dq_anomalies',
+    'run_pipeline': '_05_run_pipeline',
+}
 
 __all__ = [
     'get_config',
-    'get_engine', 
+    'get_engine',
     'test_connection',
     'run_extract',
+    'run_raw_validation',
     'run_transform_raw_to_stg',
     'run_transform_stg_to_dw',
     'run_dq_checks',
+    'run_anomaly_detection',
     'run_pipeline',
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Importa o módulo do atributo no primeiro acesso (PEP 562)"""
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
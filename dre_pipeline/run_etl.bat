@@ -21,7 +21,7 @@ if exist "venv\Scripts\activate.bat" (
 )
 
 REM Executa o pipeline
-python -m etl._05_run_pipeline --log-level INFO --triggered-by "Task Scheduler"
+python -m etl._05_run_pipeline --log-level INFO --triggered-by SCHEDULED
 
 REM Verifica resultado
 if %ERRORLEVEL% EQU 0 (
@@ -17,7 +17,7 @@ if [ -f "venv/bin/activate" ]; then
 fi
 
 # Executa o pipeline
-python -m etl._05_run_pipeline --log-level INFO --triggered-by "Cron"
+python -m etl._05_run_pipeline --log-level INFO --triggered-by SCHEDULED
 
 # Verifica resultado
 if [ $? -eq 0 ]; then
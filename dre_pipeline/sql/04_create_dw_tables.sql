@@ -206,7 +206,8 @@ CREATE TABLE dw.fact_dre (
 
 COMMENT ON TABLE dw.fact_dre IS 'Fato do modelo DRE';
 
-CREATE INDEX idx_fact_dre_data ON dw.fact_dre(data_key);
+-- (data_key, dre_key): filtro de período e paginação por cursor da API
+CREATE INDEX idx_fact_dre_data ON dw.fact_dre(data_key, dre_key);
 CREATE INDEX idx_fact_dre_linha ON dw.fact_dre(linha_dre);
 
 -- -----------------------------------------------------------------------------
@@ -227,3 +228,51 @@ COMMENT ON TABLE dw.fact_aliquota IS 'Fato de alíquotas de imposto';
 
 CREATE INDEX idx_fact_aliquota_data ON dw.fact_aliquota(data_key);
 CREATE INDEX idx_fact_aliquota_tipo ON dw.fact_aliquota(tipo_imposto);
+
+-- =============================================================================
+-- AGREGADOS
+-- =============================================================================
+-- Fatos pré-agregados no grão mensal sem a unidade (e sem a conta, na
+-- despesa). A consulta genérica da API (POST /api/v1/query) lê daqui quando
+-- as dimensões pedidas cabem no grão do agregado. Guardam soma, contagem,
+-- mínimo e máximo para que todas as medidas sejam reagregáveis.
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.agg_receita_mensal
+-- Descrição: Receitas por cenário/tipo/mês (todas as unidades)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.agg_receita_mensal CASCADE;
+
+CREATE TABLE dw.agg_receita_mensal (
+    data_key            VARCHAR(10) NOT NULL REFERENCES dw.dim_calendario(data_key),
+    cenario             VARCHAR(20) NOT NULL,
+    tipo_receita        VARCHAR(20) NOT NULL,
+    valor               DECIMAL(18,2) NOT NULL,    -- SUM(valor)
+    linhas              INTEGER NOT NULL,          -- COUNT(*) da fato
+    valor_min           DECIMAL(18,2) NOT NULL,
+    valor_max           DECIMAL(18,2) NOT NULL,
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (data_key, cenario, tipo_receita)
+);
+
+COMMENT ON TABLE dw.agg_receita_mensal IS 'Agregado mensal de receitas (sem unidade)';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.agg_despesa_mensal
+-- Descrição: Despesas por cenário/pacote/mês (todas as unidades e contas)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.agg_despesa_mensal CASCADE;
+
+CREATE TABLE dw.agg_despesa_mensal (
+    data_key            VARCHAR(10) NOT NULL REFERENCES dw.dim_calendario(data_key),
+    cenario             VARCHAR(20) NOT NULL,
+    pacote              VARCHAR(100) NOT NULL,
+    valor               DECIMAL(18,2) NOT NULL,    -- SUM(valor)
+    linhas              INTEGER NOT NULL,          -- COUNT(*) da fato
+    valor_min           DECIMAL(18,2) NOT NULL,
+    valor_max           DECIMAL(18,2) NOT NULL,
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (data_key, cenario, pacote)
+);
+
+COMMENT ON TABLE dw.agg_despesa_mensal IS 'Agregado mensal de despesas (sem unidade/conta)';
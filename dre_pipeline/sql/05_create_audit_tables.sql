@@ -38,14 +38,19 @@ CREATE TABLE dw.etl_step_log (
     log_id              SERIAL PRIMARY KEY,
     run_id              INTEGER REFERENCES dw.etl_run(run_id),
     step_name           VARCHAR(100) NOT NULL,
+    parent_step         VARCHAR(100),              -- Preenchido em sub-steps
     step_order          INTEGER,
     started_at          TIMESTAMPTZ,
     finished_at         TIMESTAMPTZ,
-    status              VARCHAR(20) NOT NULL,      -- RUNNING, SUCCESS, FAILED, SKIPPED
+    status              VARCHAR(20) NOT NULL,      -- RUNNING, SUCCESS, WARNING, FAILED, SKIPPED
     rows_read           INTEGER DEFAULT 0,
     rows_written        INTEGER DEFAULT 0,
     rows_updated        INTEGER DEFAULT 0,
     rows_deleted        INTEGER DEFAULT 0,
+    duration_seconds    DECIMAL(12,3),             -- Tempo de parede (perf_counter)
+    rows_per_sec        DECIMAL(14,2),
+    cpu_seconds         DECIMAL(12,3),             -- CPU da thread do step
+    process_peak_rss_mb DECIMAL(10,1),             -- Pico de RSS do processo (não do step) ao fim do step
     error_message       TEXT
 );
 
@@ -54,6 +59,95 @@ COMMENT ON TABLE dw.etl_step_log IS 'Log detalhado de cada step do pipeline';
 CREATE INDEX idx_etl_step_run ON dw.etl_step_log(run_id);
 CREATE INDEX idx_etl_step_name ON dw.etl_step_log(step_name);
 
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.etl_checkpoint
+-- Descrição: Steps do DAG concluídos por execução (retomada com --resume)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.etl_checkpoint CASCADE;
+
+CREATE TABLE dw.etl_checkpoint (
+    run_id              INTEGER NOT NULL REFERENCES dw.etl_run(run_id),
+    step_name           VARCHAR(100) NOT NULL,
+    completed_at        TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (run_id, step_name)
+);
+
+COMMENT ON TABLE dw.etl_checkpoint IS 'Checkpoints de steps concluídos por execução';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.etl_run_request
+-- Descrição: Disparos pendentes do pipeline, agregados enquanto há uma
+--            execução em andamento (um follow-up atende todos)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.etl_run_request CASCADE;
+
+CREATE TABLE dw.etl_run_request (
+    pipeline_name       VARCHAR(100) PRIMARY KEY,
+    pending             BOOLEAN NOT NULL DEFAULT FALSE,
+    skip_extract        BOOLEAN NOT NULL DEFAULT FALSE,  -- TRUE só se nenhum disparo pediu extração
+    request_count       INTEGER NOT NULL DEFAULT 0,      -- Disparos agregados no pedido pendente
+    last_triggered_by   VARCHAR(50),
+    requested_at        TIMESTAMPTZ
+);
+
+COMMENT ON TABLE dw.etl_run_request IS 'Disparos pendentes do pipeline (coalescência)';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.etl_job
+-- Descrição: Fila de jobs da API (upload, execução manual); os workers
+--            consomem com SELECT ... FOR UPDATE SKIP LOCKED
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.etl_job CASCADE;
+
+CREATE TABLE dw.etl_job (
+    job_id              SERIAL PRIMARY KEY,
+    kind                VARCHAR(20) NOT NULL,      -- upload, pipeline
+    status              VARCHAR(20) NOT NULL,      -- QUEUED, RUNNING, SUCCESS, FAILED, COALESCED
+    params              JSONB NOT NULL DEFAULT '{}',
+    triggered_by        VARCHAR(50),
+    run_id              INTEGER REFERENCES dw.etl_run(run_id),
+    worker              VARCHAR(100),              -- host:pid do worker que executou
+    error_message       TEXT,
+    created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at          TIMESTAMPTZ,
+    finished_at         TIMESTAMPTZ
+);
+
+COMMENT ON TABLE dw.etl_job IS 'Fila de jobs do pipeline disparados pela API';
+
+CREATE INDEX idx_etl_job_queued ON dw.etl_job(job_id) WHERE status = 'QUEUED';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.etl_query_plan
+-- Descrição: EXPLAIN (ANALYZE, BUFFERS) de cada statement por execução
+--            (--capture-plans), comparado com a execução anterior
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.etl_query_plan CASCADE;
+
+CREATE TABLE dw.etl_query_plan (
+    plan_id             SERIAL PRIMARY KEY,
+    run_id              INTEGER NOT NULL REFERENCES dw.etl_run(run_id),
+    step_name           VARCHAR(100),
+    statement_name      VARCHAR(150) NOT NULL,     -- Ex: fact_dre.insert, dq.receita_positiva
+    plan_hash           VARCHAR(16) NOT NULL,      -- Forma do plano (nós, tabelas, índices)
+    total_cost          DOUBLE PRECISION,
+    plan_rows           BIGINT,                    -- Linhas estimadas
+    actual_rows         BIGINT,                    -- Linhas afetadas/retornadas
+    planning_ms         DOUBLE PRECISION,
+    execution_ms        DOUBLE PRECISION,
+    shared_hit_blocks   BIGINT,
+    shared_read_blocks  BIGINT,
+    plan                JSONB NOT NULL,
+    previous_run_id     INTEGER,                   -- Execução usada na comparação
+    plan_changed        BOOLEAN NOT NULL DEFAULT FALSE,
+    duration_regression BOOLEAN NOT NULL DEFAULT FALSE,
+    captured_at         TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_query_plan_statement ON dw.etl_query_plan(statement_name, run_id DESC);
+
+COMMENT ON TABLE dw.etl_query_plan IS 'Planos de execução capturados por statement e execução';
+
 -- -----------------------------------------------------------------------------
 -- Tabela: dw.data_quality_results
 -- Descrição: Resultados das validações de qualidade de dados
@@ -80,11 +174,105 @@ COMMENT ON TABLE dw.data_quality_results IS 'Resultados das validações de DQ';
 CREATE INDEX idx_dq_results_run ON dw.data_quality_results(run_id);
 CREATE INDEX idx_dq_results_status ON dw.data_quality_results(status);
 
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.data_quality_samples
+-- Descrição: Amostra limitada das linhas ofensoras de regras em nível de linha
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.data_quality_samples CASCADE;
+
+CREATE TABLE dw.data_quality_samples (
+    sample_id           BIGSERIAL PRIMARY KEY,
+    run_id              INTEGER REFERENCES dw.etl_run(run_id),
+    rule_id             INTEGER NOT NULL,
+    rule_name           VARCHAR(100) NOT NULL,
+    row_data            JSONB NOT NULL,            -- Linha ofensora (colunas da query de amostra)
+    captured_at         TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.data_quality_samples IS 'Amostras de linhas que violaram regras de DQ';
+
+CREATE INDEX idx_dq_samples_run_rule ON dw.data_quality_samples(run_id, rule_id);
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.dq_metric_snapshot
+-- Descrição: Foto mensal agregada dos fatos por execução (histórico para
+--            detecção de anomalias; sobrevive aos TRUNCATEs dos fatos)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.dq_metric_snapshot CASCADE;
+
+CREATE TABLE dw.dq_metric_snapshot (
+    run_id              INTEGER NOT NULL REFERENCES dw.etl_run(run_id),
+    fonte               VARCHAR(20) NOT NULL,      -- receita, despesa, dre
+    cenario             VARCHAR(20) NOT NULL,
+    unidade             VARCHAR(100) NOT NULL DEFAULT '',
+    item                VARCHAR(100) NOT NULL,     -- tipo_receita, pacote ou linha_dre
+    data_key            VARCHAR(10) NOT NULL,
+    valor               DECIMAL(18,2) NOT NULL,
+    PRIMARY KEY (run_id, fonte, cenario, unidade, item, data_key)
+);
+
+COMMENT ON TABLE dw.dq_metric_snapshot IS 'Histórico mensal agregado para detecção de anomalias';
+
+CREATE INDEX idx_dq_snapshot_serie ON dw.dq_metric_snapshot(fonte, cenario, unidade, item, data_key, run_id DESC);
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.data_quality_anomalies
+-- Descrição: Meses fora do padrão histórico (z-score robusto / móvel)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.data_quality_anomalies CASCADE;
+
+CREATE TABLE dw.data_quality_anomalies (
+    anomaly_id          SERIAL PRIMARY KEY,
+    run_id              INTEGER REFERENCES dw.etl_run(run_id),
+    fonte               VARCHAR(20) NOT NULL,
+    cenario             VARCHAR(20) NOT NULL,
+    unidade             VARCHAR(100) NOT NULL,
+    item                VARCHAR(100) NOT NULL,
+    data_key            VARCHAR(10) NOT NULL,
+    valor               DECIMAL(18,2) NOT NULL,
+    mediana             DECIMAL(18,2),
+    mad                 DECIMAL(18,2),
+    robust_z            DECIMAL(10,2),             -- 0.6745 * (valor - mediana) / MAD
+    rolling_mean        DECIMAL(18,2),
+    rolling_std         DECIMAL(18,2),
+    rolling_z           DECIMAL(10,2),             -- (valor - média móvel) / desvio móvel
+    detected_at         TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.data_quality_anomalies IS 'Anomalias estatísticas detectadas por execução';
+
+CREATE INDEX idx_dq_anomalies_run ON dw.data_quality_anomalies(run_id);
+
 -- -----------------------------------------------------------------------------
 -- View: dw.v_etl_run_summary
 -- Descrição: Resumo das últimas execuções
 -- -----------------------------------------------------------------------------
 CREATE OR REPLACE VIEW dw.v_etl_run_summary AS
+WITH steps AS (
+    -- Apenas steps de topo (sub-steps já estão contidos no pai)
+    SELECT
+        run_id,
+        COUNT(*) as total_steps,
+        SUM(CASE WHEN status = 'SUCCESS' THEN 1 ELSE 0 END) as steps_success,
+        SUM(CASE WHEN status = 'FAILED' THEN 1 ELSE 0 END) as steps_failed,
+        SUM(rows_read) as rows_read,
+        SUM(rows_written) as rows_written,
+        SUM(cpu_seconds) as cpu_seconds,
+        MAX(process_peak_rss_mb) as process_peak_rss_mb,
+        (ARRAY_AGG(step_name ORDER BY duration_seconds DESC NULLS LAST))[1] as slowest_step,
+        MAX(duration_seconds) as slowest_step_seconds
+    FROM dw.etl_step_log
+    WHERE parent_step IS NULL
+    GROUP BY run_id
+),
+dq AS (
+    SELECT
+        run_id,
+        SUM(CASE WHEN status = 'PASS' THEN 1 ELSE 0 END) as dq_passed,
+        SUM(CASE WHEN status = 'FAIL' THEN 1 ELSE 0 END) as dq_failed
+    FROM dw.data_quality_results
+    GROUP BY run_id
+)
 SELECT 
     r.run_id,
     r.started_at,
@@ -93,16 +281,21 @@ SELECT
     r.duration_seconds,
     r.total_rows_processed,
     r.triggered_by,
-    COUNT(DISTINCT s.log_id) as total_steps,
-    SUM(CASE WHEN s.status = 'SUCCESS' THEN 1 ELSE 0 END) as steps_success,
-    SUM(CASE WHEN s.status = 'FAILED' THEN 1 ELSE 0 END) as steps_failed,
-    SUM(CASE WHEN q.status = 'PASS' THEN 1 ELSE 0 END) as dq_passed,
-    SUM(CASE WHEN q.status = 'FAIL' THEN 1 ELSE 0 END) as dq_failed
+    COALESCE(s.total_steps, 0) as total_steps,
+    COALESCE(s.steps_success, 0) as steps_success,
+    COALESCE(s.steps_failed, 0) as steps_failed,
+    s.rows_read,
+    s.rows_written,
+    ROUND(s.rows_written / NULLIF(r.duration_seconds, 0), 2) as rows_per_sec,
+    s.cpu_seconds,
+    s.process_peak_rss_mb,
+    s.slowest_step,
+    s.slowest_step_seconds,
+    COALESCE(q.dq_passed, 0) as dq_passed,
+    COALESCE(q.dq_failed, 0) as dq_failed
 FROM dw.etl_run r
-LEFT JOIN dw.etl_step_log s ON r.run_id = s.run_id
-LEFT JOIN dw.data_quality_results q ON r.run_id = q.run_id
-GROUP BY r.run_id, r.started_at, r.finished_at, r.status, 
-         r.duration_seconds, r.total_rows_processed, r.triggered_by
+LEFT JOIN steps s ON r.run_id = s.run_id
+LEFT JOIN dq q ON r.run_id = q.run_id
 ORDER BY r.started_at DESC;
 
 COMMENT ON VIEW dw.v_etl_run_summary IS 'Resumo das execuções do ETL';
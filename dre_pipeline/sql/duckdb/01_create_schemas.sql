@@ -0,0 +1,29 @@
+-- =============================================================================
+-- DRE Analytics 2025
+-- duckdb/01_create_schemas.sql
+-- =============================================================================
+-- Descrição: Schemas do Data Warehouse no DuckDB embarcado (database.backend:
+--            duckdb). Mesma modelagem de sql/, com as diferenças:
+--   - SERIAL → SEQUENCE + DEFAULT nextval(...)
+--   - Sem FOREIGN KEY: o DuckDB valida a FK também em UPDATEs da tabela pai
+--     (ex: dw.etl_run ao finalizar a execução) e os rejeitaria
+--   - Sem índices secundários: o armazenamento colunar já poda blocos por
+--     min/max e índices ART só deixariam as cargas mais lentas
+--   - Macros de compatibilidade para funções do PostgreSQL usadas nas
+--     regras de DQ (etl/dq_rules.yml)
+-- =============================================================================
+
+-- O DuckDB não aceita COMMENT ON SCHEMA (comentários só em tabelas/views)
+CREATE SCHEMA IF NOT EXISTS raw;    -- Camada Bronze - Dados brutos extraídos do Excel
+CREATE SCHEMA IF NOT EXISTS stg;    -- Camada Silver - Dados limpos, padronizados e validados
+CREATE SCHEMA IF NOT EXISTS dw;     -- Camada Gold - Star Schema com dimensões e fatos para BI
+
+-- -----------------------------------------------------------------------------
+-- Compatibilidade com PostgreSQL
+-- -----------------------------------------------------------------------------
+
+-- TO_CHAR(valor, 'FM999,999,999.00'): único formato usado nas regras de DQ
+CREATE OR REPLACE MACRO to_char(valor, formato) AS printf('%,.2f', valor);
+
+-- Linha ofensora como JSON (amostras de DQ)
+CREATE OR REPLACE MACRO to_jsonb(linha) AS to_json(linha);
@@ -0,0 +1,106 @@
+-- =============================================================================
+-- DRE Analytics 2025
+-- duckdb/02_create_raw_tables.sql
+-- =============================================================================
+-- Descrição: Tabelas da camada RAW (Bronze) - dados brutos do Excel
+-- =============================================================================
+
+-- -----------------------------------------------------------------------------
+-- Tabela: raw.receita
+-- Descrição: Dados brutos de receita (Realizado e Orçado)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS raw.receita;
+
+CREATE OR REPLACE SEQUENCE raw.receita_id_seq;
+
+CREATE TABLE raw.receita (
+    id                  INTEGER PRIMARY KEY DEFAULT nextval('raw.receita_id_seq'),
+    cenario             VARCHAR(20) NOT NULL,      -- REALIZADO, ORCADO
+    tipo_receita        VARCHAR(50),               -- SALES, SERVICE, CONSOLIDADO
+    unidade             VARCHAR(100),              -- Nome da unidade/cliente
+    mes                 VARCHAR(10),               -- JAN, FEV, etc
+    valor               DECIMAL(18,2),
+    -- Metadados de ingestão
+    source_file         VARCHAR(255),
+    source_sheet        VARCHAR(100),
+    source_row          INTEGER,
+    created_at          TIMESTAMPTZ DEFAULT NOW(),
+    batch_id            VARCHAR(50)
+);
+
+COMMENT ON TABLE raw.receita IS 'Dados brutos de receita extraídos do Excel';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: raw.despesa
+-- Descrição: Dados brutos de despesas (Realizado e Orçado)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS raw.despesa;
+
+CREATE OR REPLACE SEQUENCE raw.despesa_id_seq;
+
+CREATE TABLE raw.despesa (
+    id                  INTEGER PRIMARY KEY DEFAULT nextval('raw.despesa_id_seq'),
+    cenario             VARCHAR(20) NOT NULL,      -- REALIZADO, ORCADO
+    data                DATE,
+    unidade             VARCHAR(100),
+    pacote              VARCHAR(100),
+    conta               VARCHAR(255),
+    valor               DECIMAL(18,2),
+    -- Metadados de ingestão
+    source_file         VARCHAR(255),
+    source_sheet        VARCHAR(100),
+    source_row          INTEGER,
+    created_at          TIMESTAMPTZ DEFAULT NOW(),
+    batch_id            VARCHAR(50)
+);
+
+COMMENT ON TABLE raw.despesa IS 'Dados brutos de despesas extraídos do Excel';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: raw.dre
+-- Descrição: Dados brutos do Modelo DRE
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS raw.dre;
+
+CREATE OR REPLACE SEQUENCE raw.dre_id_seq;
+
+CREATE TABLE raw.dre (
+    id                  INTEGER PRIMARY KEY DEFAULT nextval('raw.dre_id_seq'),
+    linha_dre           VARCHAR(100) NOT NULL,     -- Nome da linha (Receita Bruta, EBITDA, etc)
+    categoria           VARCHAR(50),               -- Categoria (Receita, Custo, etc)
+    mes                 VARCHAR(10),               -- JAN, FEV, etc
+    valor               DECIMAL(18,2),
+    ordem               INTEGER,                   -- Ordem de exibição
+    -- Metadados de ingestão
+    source_file         VARCHAR(255),
+    source_sheet        VARCHAR(100),
+    source_row          INTEGER,
+    created_at          TIMESTAMPTZ DEFAULT NOW(),
+    batch_id            VARCHAR(50)
+);
+
+COMMENT ON TABLE raw.dre IS 'Dados brutos do modelo DRE extraídos do Excel';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: raw.aliquota
+-- Descrição: Dados brutos de alíquotas de imposto
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS raw.aliquota;
+
+CREATE OR REPLACE SEQUENCE raw.aliquota_id_seq;
+
+CREATE TABLE raw.aliquota (
+    id                  INTEGER PRIMARY KEY DEFAULT nextval('raw.aliquota_id_seq'),
+    tipo_imposto        VARCHAR(100) NOT NULL,     -- Imposto Sobre Faturamento, IR & CSLL
+    mes                 VARCHAR(10),               -- JAN, FEV, etc
+    aliquota            DECIMAL(10,6),             -- Valor da alíquota (ex: -0.0826)
+    -- Metadados de ingestão
+    source_file         VARCHAR(255),
+    source_sheet        VARCHAR(100),
+    source_row          INTEGER,
+    created_at          TIMESTAMPTZ DEFAULT NOW(),
+    batch_id            VARCHAR(50)
+);
+
+COMMENT ON TABLE raw.aliquota IS 'Dados brutos de alíquotas extraídos do Excel';
+
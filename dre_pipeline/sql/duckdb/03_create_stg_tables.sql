@@ -0,0 +1,103 @@
+-- =============================================================================
+-- DRE Analytics 2025
+-- duckdb/03_create_stg_tables.sql
+-- =============================================================================
+-- Descrição: Tabelas da camada STG (Silver) - dados limpos e validados
+-- =============================================================================
+
+-- -----------------------------------------------------------------------------
+-- Tabela: stg.receita
+-- Descrição: Receitas limpas e padronizadas
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS stg.receita;
+
+CREATE OR REPLACE SEQUENCE stg.receita_id_seq;
+
+CREATE TABLE stg.receita (
+    id                  INTEGER PRIMARY KEY DEFAULT nextval('stg.receita_id_seq'),
+    cenario             VARCHAR(20) NOT NULL,
+    tipo_receita        VARCHAR(20) NOT NULL,      -- SALES, SERVICE
+    unidade             VARCHAR(100) NOT NULL,
+    mes_num             INTEGER NOT NULL,          -- 1-12
+    mes_nome            VARCHAR(10) NOT NULL,      -- JAN, FEV, etc
+    data_key            VARCHAR(10) NOT NULL,      -- 2025-01, etc
+    valor               DECIMAL(18,2) NOT NULL,
+    -- Metadados
+    raw_created_at      TIMESTAMPTZ,
+    stg_loaded_at       TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE stg.receita IS 'Receitas limpas - camada Silver';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: stg.despesa
+-- Descrição: Despesas limpas e padronizadas
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS stg.despesa;
+
+CREATE OR REPLACE SEQUENCE stg.despesa_id_seq;
+
+CREATE TABLE stg.despesa (
+    id                  INTEGER PRIMARY KEY DEFAULT nextval('stg.despesa_id_seq'),
+    cenario             VARCHAR(20) NOT NULL,
+    unidade             VARCHAR(100) NOT NULL,
+    pacote              VARCHAR(100) NOT NULL,
+    conta               VARCHAR(255),
+    mes_num             INTEGER NOT NULL,
+    mes_nome            VARCHAR(10) NOT NULL,
+    data_key            VARCHAR(10) NOT NULL,
+    valor               DECIMAL(18,2) NOT NULL,
+    -- Metadados
+    raw_created_at      TIMESTAMPTZ,
+    stg_loaded_at       TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE stg.despesa IS 'Despesas limpas - camada Silver';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: stg.dre
+-- Descrição: Linhas DRE limpas e com hierarquia
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS stg.dre;
+
+CREATE OR REPLACE SEQUENCE stg.dre_id_seq;
+
+CREATE TABLE stg.dre (
+    id                  INTEGER PRIMARY KEY DEFAULT nextval('stg.dre_id_seq'),
+    linha_dre           VARCHAR(100) NOT NULL,
+    categoria           VARCHAR(50) NOT NULL,
+    ordem               INTEGER NOT NULL,
+    nivel               INTEGER NOT NULL,          -- 1=Total, 2=Subtotal, 3=Detalhe
+    mes_num             INTEGER NOT NULL,
+    mes_nome            VARCHAR(10) NOT NULL,
+    data_key            VARCHAR(10) NOT NULL,
+    valor               DECIMAL(18,2) NOT NULL,
+    -- Metadados
+    raw_created_at      TIMESTAMPTZ,
+    stg_loaded_at       TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE stg.dre IS 'Modelo DRE limpo - camada Silver';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: stg.aliquota
+-- Descrição: Alíquotas limpas
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS stg.aliquota;
+
+CREATE OR REPLACE SEQUENCE stg.aliquota_id_seq;
+
+CREATE TABLE stg.aliquota (
+    id                  INTEGER PRIMARY KEY DEFAULT nextval('stg.aliquota_id_seq'),
+    tipo_imposto        VARCHAR(100) NOT NULL,
+    mes_num             INTEGER NOT NULL,
+    mes_nome            VARCHAR(10) NOT NULL,
+    data_key            VARCHAR(10) NOT NULL,
+    aliquota            DECIMAL(10,6) NOT NULL,
+    -- Metadados
+    raw_created_at      TIMESTAMPTZ,
+    stg_loaded_at       TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE stg.aliquota IS 'Alíquotas limpas - camada Silver';
+
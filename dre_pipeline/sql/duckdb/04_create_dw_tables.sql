@@ -0,0 +1,276 @@
+-- =============================================================================
+-- DRE Analytics 2025
+-- duckdb/04_create_dw_tables.sql
+-- =============================================================================
+-- Descrição: Tabelas da camada DW (Gold) - Star Schema para Power BI
+-- =============================================================================
+
+-- =============================================================================
+-- DIMENSÕES
+-- =============================================================================
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.dim_calendario
+-- Descrição: Dimensão de tempo (meses de 2025)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.dim_calendario;
+
+CREATE TABLE dw.dim_calendario (
+    data_key            VARCHAR(10) PRIMARY KEY,   -- 2025-01, 2025-02, etc
+    mes_num             INTEGER NOT NULL,
+    mes_nome            VARCHAR(10) NOT NULL,
+    mes_nome_completo   VARCHAR(20) NOT NULL,
+    trimestre           VARCHAR(5) NOT NULL,       -- Q1, Q2, Q3, Q4
+    semestre            VARCHAR(5) NOT NULL,       -- S1, S2
+    ano                 INTEGER NOT NULL,
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.dim_calendario IS 'Dimensão de calendário - meses de 2025';
+
+-- Inserir dados estáticos de calendário
+INSERT INTO dw.dim_calendario (data_key, mes_num, mes_nome, mes_nome_completo, trimestre, semestre, ano)
+VALUES
+    ('2025-01', 1, 'JAN', 'Janeiro', 'Q1', 'S1', 2025),
+    ('2025-02', 2, 'FEV', 'Fevereiro', 'Q1', 'S1', 2025),
+    ('2025-03', 3, 'MAR', 'Março', 'Q1', 'S1', 2025),
+    ('2025-04', 4, 'ABR', 'Abril', 'Q2', 'S1', 2025),
+    ('2025-05', 5, 'MAI', 'Maio', 'Q2', 'S1', 2025),
+    ('2025-06', 6, 'JUN', 'Junho', 'Q2', 'S1', 2025),
+    ('2025-07', 7, 'JUL', 'Julho', 'Q3', 'S2', 2025),
+    ('2025-08', 8, 'AGO', 'Agosto', 'Q3', 'S2', 2025),
+    ('2025-09', 9, 'SET', 'Setembro', 'Q3', 'S2', 2025),
+    ('2025-10', 10, 'OUT', 'Outubro', 'Q4', 'S2', 2025),
+    ('2025-11', 11, 'NOV', 'Novembro', 'Q4', 'S2', 2025),
+    ('2025-12', 12, 'DEZ', 'Dezembro', 'Q4', 'S2', 2025);
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.dim_unidade
+-- Descrição: Dimensão de unidades de negócio
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.dim_unidade;
+
+CREATE OR REPLACE SEQUENCE dw.dim_unidade_unidade_key_seq;
+
+CREATE TABLE dw.dim_unidade (
+    unidade_key         INTEGER PRIMARY KEY DEFAULT nextval('dw.dim_unidade_unidade_key_seq'),
+    unidade             VARCHAR(100) NOT NULL UNIQUE,
+    is_active           BOOLEAN DEFAULT TRUE,
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.dim_unidade IS 'Dimensão de unidades de negócio';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.dim_tipo_receita
+-- Descrição: Dimensão de tipos de receita
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.dim_tipo_receita;
+
+CREATE OR REPLACE SEQUENCE dw.dim_tipo_receita_tipo_receita_key_seq;
+
+CREATE TABLE dw.dim_tipo_receita (
+    tipo_receita_key    INTEGER PRIMARY KEY DEFAULT nextval('dw.dim_tipo_receita_tipo_receita_key_seq'),
+    tipo_receita        VARCHAR(20) NOT NULL UNIQUE,  -- SALES, SERVICE
+    descricao           VARCHAR(100),
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.dim_tipo_receita IS 'Dimensão de tipos de receita';
+
+-- Inserir dados estáticos
+INSERT INTO dw.dim_tipo_receita (tipo_receita, descricao)
+VALUES
+    ('SALES', 'Vendas de Produtos'),
+    ('SERVICE', 'Prestação de Serviços');
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.dim_cenario
+-- Descrição: Dimensão de cenários (Realizado vs Orçado)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.dim_cenario;
+
+CREATE OR REPLACE SEQUENCE dw.dim_cenario_cenario_key_seq;
+
+CREATE TABLE dw.dim_cenario (
+    cenario_key         INTEGER PRIMARY KEY DEFAULT nextval('dw.dim_cenario_cenario_key_seq'),
+    cenario             VARCHAR(20) NOT NULL UNIQUE,  -- Realizado, Orçado
+    descricao           VARCHAR(100),
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.dim_cenario IS 'Dimensão de cenários (Real vs Orçado)';
+
+-- Inserir dados estáticos
+INSERT INTO dw.dim_cenario (cenario, descricao)
+VALUES
+    ('Realizado', 'Valores efetivamente realizados'),
+    ('Orçado', 'Valores planejados/orçados');
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.dim_pacote
+-- Descrição: Dimensão de pacotes de despesa
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.dim_pacote;
+
+CREATE OR REPLACE SEQUENCE dw.dim_pacote_pacote_key_seq;
+
+CREATE TABLE dw.dim_pacote (
+    pacote_key          INTEGER PRIMARY KEY DEFAULT nextval('dw.dim_pacote_pacote_key_seq'),
+    pacote              VARCHAR(100) NOT NULL UNIQUE,
+    is_active           BOOLEAN DEFAULT TRUE,
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.dim_pacote IS 'Dimensão de pacotes de despesas';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.dim_linha_dre
+-- Descrição: Dimensão de linhas da DRE
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.dim_linha_dre;
+
+CREATE OR REPLACE SEQUENCE dw.dim_linha_dre_linha_dre_key_seq;
+
+CREATE TABLE dw.dim_linha_dre (
+    linha_dre_key       INTEGER PRIMARY KEY DEFAULT nextval('dw.dim_linha_dre_linha_dre_key_seq'),
+    linha_dre           VARCHAR(100) NOT NULL UNIQUE,
+    categoria           VARCHAR(50) NOT NULL,
+    ordem               INTEGER NOT NULL,
+    nivel               INTEGER NOT NULL,          -- 1=Total, 2=Subtotal, 3=Detalhe
+    is_total            BOOLEAN DEFAULT FALSE,
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.dim_linha_dre IS 'Dimensão de linhas da DRE com hierarquia';
+
+-- =============================================================================
+-- FATOS
+-- =============================================================================
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.fact_receita
+-- Descrição: Fato de receitas por cenário/tipo/unidade/mês
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.fact_receita;
+
+CREATE OR REPLACE SEQUENCE dw.fact_receita_receita_key_seq;
+
+CREATE TABLE dw.fact_receita (
+    receita_key         INTEGER PRIMARY KEY DEFAULT nextval('dw.fact_receita_receita_key_seq'),
+    data_key            VARCHAR(10) NOT NULL,
+    cenario             VARCHAR(20) NOT NULL,
+    tipo_receita        VARCHAR(20) NOT NULL,
+    unidade             VARCHAR(100) NOT NULL,
+    valor               DECIMAL(18,2) NOT NULL,
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.fact_receita IS 'Fato de receitas';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.fact_despesa
+-- Descrição: Fato de despesas por cenário/pacote/unidade/mês
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.fact_despesa;
+
+CREATE OR REPLACE SEQUENCE dw.fact_despesa_despesa_key_seq;
+
+CREATE TABLE dw.fact_despesa (
+    despesa_key         INTEGER PRIMARY KEY DEFAULT nextval('dw.fact_despesa_despesa_key_seq'),
+    data_key            VARCHAR(10) NOT NULL,
+    cenario             VARCHAR(20) NOT NULL,
+    unidade             VARCHAR(100) NOT NULL,
+    pacote              VARCHAR(100) NOT NULL,
+    conta               VARCHAR(255),
+    valor               DECIMAL(18,2) NOT NULL,
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.fact_despesa IS 'Fato de despesas';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.fact_dre
+-- Descrição: Fato do modelo DRE por linha/mês
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.fact_dre;
+
+CREATE OR REPLACE SEQUENCE dw.fact_dre_dre_key_seq;
+
+CREATE TABLE dw.fact_dre (
+    dre_key             INTEGER PRIMARY KEY DEFAULT nextval('dw.fact_dre_dre_key_seq'),
+    data_key            VARCHAR(10) NOT NULL,
+    cenario             VARCHAR(20) NOT NULL DEFAULT 'Realizado',
+    linha_dre           VARCHAR(100) NOT NULL,
+    valor               DECIMAL(18,2) NOT NULL,
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.fact_dre IS 'Fato do modelo DRE';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.fact_aliquota
+-- Descrição: Fato de alíquotas de imposto
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.fact_aliquota;
+
+CREATE OR REPLACE SEQUENCE dw.fact_aliquota_aliquota_key_seq;
+
+CREATE TABLE dw.fact_aliquota (
+    aliquota_key        INTEGER PRIMARY KEY DEFAULT nextval('dw.fact_aliquota_aliquota_key_seq'),
+    data_key            VARCHAR(10) NOT NULL,
+    tipo_imposto        VARCHAR(100) NOT NULL,
+    aliquota            DECIMAL(10,6) NOT NULL,
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.fact_aliquota IS 'Fato de alíquotas de imposto';
+
+
+-- =============================================================================
+-- AGREGADOS
+-- =============================================================================
+-- Fatos pré-agregados no grão mensal sem a unidade (e sem a conta, na
+-- despesa). A consulta genérica da API (POST /api/v1/query) lê daqui quando
+-- as dimensões pedidas cabem no grão do agregado. Guardam soma, contagem,
+-- mínimo e máximo para que todas as medidas sejam reagregáveis.
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.agg_receita_mensal
+-- Descrição: Receitas por cenário/tipo/mês (todas as unidades)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.agg_receita_mensal;
+
+CREATE TABLE dw.agg_receita_mensal (
+    data_key            VARCHAR(10) NOT NULL,
+    cenario             VARCHAR(20) NOT NULL,
+    tipo_receita        VARCHAR(20) NOT NULL,
+    valor               DECIMAL(18,2) NOT NULL,    -- SUM(valor)
+    linhas              INTEGER NOT NULL,          -- COUNT(*) da fato
+    valor_min           DECIMAL(18,2) NOT NULL,
+    valor_max           DECIMAL(18,2) NOT NULL,
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (data_key, cenario, tipo_receita)
+);
+
+COMMENT ON TABLE dw.agg_receita_mensal IS 'Agregado mensal de receitas (sem unidade)';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.agg_despesa_mensal
+-- Descrição: Despesas por cenário/pacote/mês (todas as unidades e contas)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.agg_despesa_mensal;
+
+CREATE TABLE dw.agg_despesa_mensal (
+    data_key            VARCHAR(10) NOT NULL,
+    cenario             VARCHAR(20) NOT NULL,
+    pacote              VARCHAR(100) NOT NULL,
+    valor               DECIMAL(18,2) NOT NULL,    -- SUM(valor)
+    linhas              INTEGER NOT NULL,          -- COUNT(*) da fato
+    valor_min           DECIMAL(18,2) NOT NULL,
+    valor_max           DECIMAL(18,2) NOT NULL,
+    dw_loaded_at        TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (data_key, cenario, pacote)
+);
+
+COMMENT ON TABLE dw.agg_despesa_mensal IS 'Agregado mensal de despesas (sem unidade/conta)';
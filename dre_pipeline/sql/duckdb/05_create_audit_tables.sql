@@ -0,0 +1,296 @@
+-- =============================================================================
+-- DRE Analytics 2025
+-- duckdb/05_create_audit_tables.sql
+-- =============================================================================
+-- Descrição: Tabelas de auditoria e controle de execução do ETL
+-- =============================================================================
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.etl_run
+-- Descrição: Registro de execuções do pipeline
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.etl_run;
+
+CREATE OR REPLACE SEQUENCE dw.etl_run_run_id_seq;
+
+CREATE TABLE dw.etl_run (
+    run_id              INTEGER PRIMARY KEY DEFAULT nextval('dw.etl_run_run_id_seq'),
+    pipeline_name       VARCHAR(100) DEFAULT 'dre_pipeline',
+    started_at          TIMESTAMPTZ NOT NULL,
+    finished_at         TIMESTAMPTZ,
+    status              VARCHAR(20) NOT NULL,      -- RUNNING, SUCCESS, FAILED
+    duration_seconds    DECIMAL(10,2),
+    total_rows_processed INTEGER DEFAULT 0,
+    triggered_by        VARCHAR(50),               -- MANUAL, SCHEDULED, API
+    error_message       TEXT
+);
+
+COMMENT ON TABLE dw.etl_run IS 'Registro de execuções do pipeline ETL';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.etl_step_log
+-- Descrição: Log detalhado de cada step do pipeline
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.etl_step_log;
+
+CREATE OR REPLACE SEQUENCE dw.etl_step_log_log_id_seq;
+
+CREATE TABLE dw.etl_step_log (
+    log_id              INTEGER PRIMARY KEY DEFAULT nextval('dw.etl_step_log_log_id_seq'),
+    run_id              INTEGER,
+    step_name           VARCHAR(100) NOT NULL,
+    parent_step         VARCHAR(100),              -- Preenchido em sub-steps
+    step_order          INTEGER,
+    started_at          TIMESTAMPTZ,
+    finished_at         TIMESTAMPTZ,
+    status              VARCHAR(20) NOT NULL,      -- RUNNING, SUCCESS, WARNING, FAILED, SKIPPED
+    rows_read           INTEGER DEFAULT 0,
+    rows_written        INTEGER DEFAULT 0,
+    rows_updated        INTEGER DEFAULT 0,
+    rows_deleted        INTEGER DEFAULT 0,
+    duration_seconds    DECIMAL(12,3),             -- Tempo de parede (perf_counter)
+    rows_per_sec        DECIMAL(14,2),
+    cpu_seconds         DECIMAL(12,3),             -- CPU da thread do step
+    process_peak_rss_mb DECIMAL(10,1),             -- Pico de RSS do processo (não do step) ao fim do step
+    error_message       TEXT
+);
+
+COMMENT ON TABLE dw.etl_step_log IS 'Log detalhado de cada step do pipeline';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.etl_checkpoint
+-- Descrição: Steps do DAG concluídos por execução (retomada com --resume)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.etl_checkpoint;
+
+CREATE TABLE dw.etl_checkpoint (
+    run_id              INTEGER NOT NULL,
+    step_name           VARCHAR(100) NOT NULL,
+    completed_at        TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (run_id, step_name)
+);
+
+COMMENT ON TABLE dw.etl_checkpoint IS 'Checkpoints de steps concluídos por execução';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.etl_run_request
+-- Descrição: Disparos pendentes do pipeline, agregados enquanto há uma
+--            execução em andamento (um follow-up atende todos)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.etl_run_request;
+
+CREATE TABLE dw.etl_run_request (
+    pipeline_name       VARCHAR(100) PRIMARY KEY,
+    pending             BOOLEAN NOT NULL DEFAULT FALSE,
+    skip_extract        BOOLEAN NOT NULL DEFAULT FALSE,  -- TRUE só se nenhum disparo pediu extração
+    request_count       INTEGER NOT NULL DEFAULT 0,      -- Disparos agregados no pedido pendente
+    last_triggered_by   VARCHAR(50),
+    requested_at        TIMESTAMPTZ
+);
+
+COMMENT ON TABLE dw.etl_run_request IS 'Disparos pendentes do pipeline (coalescência)';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.etl_job
+-- Descrição: Fila de jobs da API (upload, execução manual); no DuckDB os
+--            workers são threads do processo da API (sem SKIP LOCKED)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.etl_job;
+
+CREATE OR REPLACE SEQUENCE dw.etl_job_job_id_seq;
+
+CREATE TABLE dw.etl_job (
+    job_id              INTEGER PRIMARY KEY DEFAULT nextval('dw.etl_job_job_id_seq'),
+    kind                VARCHAR(20) NOT NULL,      -- upload, pipeline
+    status              VARCHAR(20) NOT NULL,      -- QUEUED, RUNNING, SUCCESS, FAILED, COALESCED
+    params              JSON NOT NULL DEFAULT '{}',
+    triggered_by        VARCHAR(50),
+    run_id              INTEGER,
+    worker              VARCHAR(100),              -- host:pid do worker que executou
+    error_message       TEXT,
+    created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at          TIMESTAMPTZ,
+    finished_at         TIMESTAMPTZ
+);
+
+COMMENT ON TABLE dw.etl_job IS 'Fila de jobs do pipeline disparados pela API';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.etl_query_plan
+-- Descrição: EXPLAIN (ANALYZE, BUFFERS) de cada statement por execução
+--            (--capture-plans), comparado com a execução anterior
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.etl_query_plan;
+
+CREATE OR REPLACE SEQUENCE dw.etl_query_plan_plan_id_seq;
+
+CREATE TABLE dw.etl_query_plan (
+    plan_id             INTEGER PRIMARY KEY DEFAULT nextval('dw.etl_query_plan_plan_id_seq'),
+    run_id              INTEGER NOT NULL,
+    step_name           VARCHAR(100),
+    statement_name      VARCHAR(150) NOT NULL,     -- Ex: fact_dre.insert, dq.receita_positiva
+    plan_hash           VARCHAR(16) NOT NULL,      -- Forma do plano (nós, tabelas, índices)
+    total_cost          DOUBLE PRECISION,
+    plan_rows           BIGINT,                    -- Linhas estimadas
+    actual_rows         BIGINT,                    -- Linhas afetadas/retornadas
+    planning_ms         DOUBLE PRECISION,
+    execution_ms        DOUBLE PRECISION,
+    shared_hit_blocks   BIGINT,
+    shared_read_blocks  BIGINT,
+    plan                JSON NOT NULL,
+    previous_run_id     INTEGER,                   -- Execução usada na comparação
+    plan_changed        BOOLEAN NOT NULL DEFAULT FALSE,
+    duration_regression BOOLEAN NOT NULL DEFAULT FALSE,
+    captured_at         TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.etl_query_plan IS 'Planos de execução capturados por statement e execução';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.data_quality_results
+-- Descrição: Resultados das validações de qualidade de dados
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.data_quality_results;
+
+CREATE OR REPLACE SEQUENCE dw.data_quality_results_result_id_seq;
+
+CREATE TABLE dw.data_quality_results (
+    result_id           INTEGER PRIMARY KEY DEFAULT nextval('dw.data_quality_results_result_id_seq'),
+    run_id              INTEGER,
+    rule_id             INTEGER NOT NULL,
+    rule_name           VARCHAR(100) NOT NULL,
+    rule_description    VARCHAR(500),
+    status              VARCHAR(10) NOT NULL,      -- PASS, FAIL, WARN
+    expected_value      DECIMAL(18,2),
+    actual_value        DECIMAL(18,2),
+    difference_value    DECIMAL(18,2),
+    difference_percent  DECIMAL(10,4),
+    message             TEXT,
+    checked_at          TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.data_quality_results IS 'Resultados das validações de DQ';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.data_quality_samples
+-- Descrição: Amostra limitada das linhas ofensoras de regras em nível de linha
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.data_quality_samples;
+
+CREATE OR REPLACE SEQUENCE dw.data_quality_samples_sample_id_seq;
+
+CREATE TABLE dw.data_quality_samples (
+    sample_id           BIGINT PRIMARY KEY DEFAULT nextval('dw.data_quality_samples_sample_id_seq'),
+    run_id              INTEGER,
+    rule_id             INTEGER NOT NULL,
+    rule_name           VARCHAR(100) NOT NULL,
+    row_data            JSON NOT NULL,            -- Linha ofensora (colunas da query de amostra)
+    captured_at         TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.data_quality_samples IS 'Amostras de linhas que violaram regras de DQ';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.dq_metric_snapshot
+-- Descrição: Foto mensal agregada dos fatos por execução (histórico para
+--            detecção de anomalias; sobrevive aos TRUNCATEs dos fatos)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.dq_metric_snapshot;
+
+CREATE TABLE dw.dq_metric_snapshot (
+    run_id              INTEGER NOT NULL,
+    fonte               VARCHAR(20) NOT NULL,      -- receita, despesa, dre
+    cenario             VARCHAR(20) NOT NULL,
+    unidade             VARCHAR(100) NOT NULL DEFAULT '',
+    item                VARCHAR(100) NOT NULL,     -- tipo_receita, pacote ou linha_dre
+    data_key            VARCHAR(10) NOT NULL,
+    valor               DECIMAL(18,2) NOT NULL,
+    PRIMARY KEY (run_id, fonte, cenario, unidade, item, data_key)
+);
+
+COMMENT ON TABLE dw.dq_metric_snapshot IS 'Histórico mensal agregado para detecção de anomalias';
+
+-- -----------------------------------------------------------------------------
+-- Tabela: dw.data_quality_anomalies
+-- Descrição: Meses fora do padrão histórico (z-score robusto / móvel)
+-- -----------------------------------------------------------------------------
+DROP TABLE IF EXISTS dw.data_quality_anomalies;
+
+CREATE OR REPLACE SEQUENCE dw.data_quality_anomalies_anomaly_id_seq;
+
+CREATE TABLE dw.data_quality_anomalies (
+    anomaly_id          INTEGER PRIMARY KEY DEFAULT nextval('dw.data_quality_anomalies_anomaly_id_seq'),
+    run_id              INTEGER,
+    fonte               VARCHAR(20) NOT NULL,
+    cenario             VARCHAR(20) NOT NULL,
+    unidade             VARCHAR(100) NOT NULL,
+    item                VARCHAR(100) NOT NULL,
+    data_key            VARCHAR(10) NOT NULL,
+    valor               DECIMAL(18,2) NOT NULL,
+    mediana             DECIMAL(18,2),
+    mad                 DECIMAL(18,2),
+    robust_z            DECIMAL(10,2),             -- 0.6745 * (valor - mediana) / MAD
+    rolling_mean        DECIMAL(18,2),
+    rolling_std         DECIMAL(18,2),
+    rolling_z           DECIMAL(10,2),             -- (valor - média móvel) / desvio móvel
+    detected_at         TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE dw.data_quality_anomalies IS 'Anomalias estatísticas detectadas por execução';
+
+-- -----------------------------------------------------------------------------
+-- View: dw.v_etl_run_summary
+-- Descrição: Resumo das últimas execuções
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE VIEW dw.v_etl_run_summary AS
+WITH steps AS (
+    -- Apenas steps de topo (sub-steps já estão contidos no pai)
+    SELECT
+        run_id,
+        COUNT(*) as total_steps,
+        SUM(CASE WHEN status = 'SUCCESS' THEN 1 ELSE 0 END) as steps_success,
+        SUM(CASE WHEN status = 'FAILED' THEN 1 ELSE 0 END) as steps_failed,
+        SUM(rows_read) as rows_read,
+        SUM(rows_written) as rows_written,
+        SUM(cpu_seconds) as cpu_seconds,
+        MAX(process_peak_rss_mb) as process_peak_rss_mb,
+        (ARRAY_AGG(step_name ORDER BY duration_seconds DESC NULLS LAST))[1] as slowest_step,
+        MAX(duration_seconds) as slowest_step_seconds
+    FROM dw.etl_step_log
+    WHERE parent_step IS NULL
+    GROUP BY run_id
+),
+dq AS (
+    SELECT
+        run_id,
+        SUM(CASE WHEN status = 'PASS' THEN 1 ELSE 0 END) as dq_passed,
+        SUM(CASE WHEN status = 'FAIL' THEN 1 ELSE 0 END) as dq_failed
+    FROM dw.data_quality_results
+    GROUP BY run_id
+)
+SELECT 
+    r.run_id,
+    r.started_at,
+    r.finished_at,
+    r.status,
+    r.duration_seconds,
+    r.total_rows_processed,
+    r.triggered_by,
+    COALESCE(s.total_steps, 0) as total_steps,
+    COALESCE(s.steps_success, 0) as steps_success,
+    COALESCE(s.steps_failed, 0) as steps_failed,
+    s.rows_read,
+    s.rows_written,
+    ROUND(s.rows_written / NULLIF(r.duration_seconds, 0), 2) as rows_per_sec,
+    s.cpu_seconds,
+    s.process_peak_rss_mb,
+    s.slowest_step,
+    s.slowest_step_seconds,
+    COALESCE(q.dq_passed, 0) as dq_passed,
+    COALESCE(q.dq_failed, 0) as dq_failed
+FROM dw.etl_run r
+LEFT JOIN steps s ON r.run_id = s.run_id
+LEFT JOIN dq q ON r.run_id = q.run_id
+ORDER BY r.started_at DESC;
+
+COMMENT ON VIEW dw.v_etl_run_summary IS 'Resumo das execuções do ETL';
@@ -0,0 +1,55 @@
+"""
+DRE Analytics 2025 - Fixtures Compartilhadas dos Testes
+"""
+
+import pytest
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+CONFIG_YML = """
+database:
+  backend: duckdb
+  path: {path}
+etl:
+  source_file: {source}
+  ano_referencia: 2025
+  sheets:
+    receita_realizado: Receita_Realizado
+    receita_orcado: Receita_Orç
+    despesas_realizado: Despesas_Realizado
+    despesas_orcado: Despesas_Orç
+    modelo_dre: Modelo DRE
+    aliquotas: Aliquotas
+"""
+
+
+@pytest.fixture
+def duckdb_config(tmp_path):
+    """Config apontando para um DuckDB temporário com os schemas criados"""
+    from etl._00_config import Config
+    from etl._00_backend import init_schema
+    from benchmarks.synthetic_workbook import WorkbookSpec, generate_workbook
+
+    source = tmp_path / 'sintetico.xlsx'
+    generate_workbook(source, WorkbookSpec(unidades=4, pacotes=6, rows=200))
+
+    path = tmp_path / 'config.yml'
+    path.write_text(
+        CONFIG_YML.format(path=(tmp_path / 'dre.duckdb').as_posix(), source=source.as_posix()),
+        encoding='utf-8'
+    )
+
+    previous = Config._instance
+    Config._instance = None
+    try:
+        config = Config(path)
+        init_schema(config.get_engine())
+        yield config
+    finally:
+        if Config._instance is not None and Config._instance._engine is not None:
+            Config._instance._engine.dispose()
+        Config._instance = previous
@@ -0,0 +1,779 @@
+"""
+DRE Analytics 2025 - Testes da API
+"""
+
+import pytest
+import asyncio
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+POSTGRES_YML = """
+database:
+  host: db
+  port: 5432
+  name: dre_db
+  user: dre_user
+  password: dre_pass
+etl:
+  source_file: dados.xlsx
+  ano_referencia: 2025
+  sheets: {{}}
+api:
+  db_pool:
+    pool_size: {pool_size}
+"""
+
+
+@pytest.fixture
+def loaded_api(duckdb_config):
+    """DW DuckDB carregado pelo pipeline (cache de respostas vazio)"""
+    from api.main import response_cache, run_version
+    from etl._05_run_pipeline import run_pipeline
+
+    assert run_pipeline(max_workers=4)['status'] == 'SUCCESS'
+    # Cada teste tem seu próprio banco, com run_ids repetidos
+    response_cache.clear()
+    run_version.expire()
+    yield duckdb_config
+
+
+def asgi_request(method, path, query='', headers=None, body=None):
+    """
+    Requisição direta na app ASGI (sem servidor): (status, cabeçalhos, corpo).
+
+    `body` é uma lista de blocos enviados um por receive(); os blocos que a
+    app não chegou a ler continuam na lista.
+    """
+    from api.main import app
+
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'root_path': '',
+        'query_string': query.encode(), 'server': ('test', 80), 'client': ('test', 1),
+        'headers': [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+    body = body if body is not None else []
+    messages = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested and not body:
+            # Cliente conectado até o fim da resposta (streaming escuta o disconnect)
+            await asyncio.Event().wait()
+        requested = True
+        chunk = body.pop(0) if body else b''
+        return {'type': 'http.request', 'body': chunk, 'more_body': bool(body)}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    content = b''.join(m.get('body', b'') for m in messages[1:])
+    return start['status'], {k.decode(): v.decode() for k, v in start['headers']}, content
+
+
+def asgi_get(path, query='', headers=None):
+    """GET direto na app ASGI (sem servidor): (status, cabeçalhos, corpo)"""
+    return asgi_request('GET', path, query, headers)
+
+
+def multipart_body(data, filename='dados.xlsx', boundary='dre-upload'):
+    """Corpo multipart/form-data com `data` no campo file: (cabeçalhos, corpo)"""
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode() + data + f'\r\n--{boundary}--\r\n'.encode()
+    headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+    return headers, body
+
+
+class TestAsyncEngine:
+    """Testes para o engine assíncrono das consultas"""
+
+    def test_postgres_uses_asyncpg_with_own_pool(self, tmp_path):
+        """PostgreSQL: asyncpg, pool separado e api.db_pool sobrepõe os padrões"""
+        from etl._00_config import Config
+
+        path = tmp_path / 'config.yml'
+        path.write_text(POSTGRES_YML.format(pool_size=3), encoding='utf-8')
+
+        previous = Config._instance
+        Config._instance = None
+        try:
+            config = Config(path)
+            engine = config.get_async_engine()
+            assert engine.url.drivername == 'postgresql+asyncpg'
+            assert engine.url.host == 'db'
+            assert engine.pool.size() == 3
+            # Statements preparados ficam no cache de cada conexão do asyncpg
+            assert config.get_backend().async_engine_options()['connect_args'] == {
+                'prepared_statement_cache_size': 256
+            }
+            asyncio.run(config.dispose_async_engine())
+        finally:
+            Config._instance = previous
+
+    def test_duckdb_has_no_async_driver(self, duckdb_config):
+        """DuckDB: sem driver assíncrono (a API usa o threadpool)"""
+        from etl._00_backend import BackendError
+
+        assert not duckdb_config.get_backend().supports_async
+        with pytest.raises(BackendError):
+            duckdb_config.get_async_engine()
+
+
+class TestQueryEndpoints:
+    """Testes para os endpoints de consulta"""
+
+    def test_dre_and_receita(self, loaded_api):
+        """Resumo da DRE e filtro por cenário validado na dimensão"""
+        from fastapi import HTTPException
+        from api.main import get_dre, get_receita
+
+        resumo = asyncio.run(get_dre())
+        assert resumo.receita_bruta > 0
+
+        receitas = asyncio.run(get_receita(cenario='Realizado'))
+        assert receitas and {r['cenario'] for r in receitas} == {'Realizado'}
+
+        # Valor fora da dimensão: 400 antes de consultar as fatos
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(get_receita(cenario="x' OR '1'='1"))
+        assert exc.value.status_code == 400 and 'Realizado' in exc.value.detail
+
+    def test_despesa_top(self, loaded_api):
+        """LIMIT vem do parâmetro top"""
+        from api.main import get_despesa
+
+        assert len(asyncio.run(get_despesa(top=3))) == 3
+
+    def test_query_does_not_block_event_loop(self, duckdb_config):
+        """Outras tarefas continuam rodando durante uma consulta lenta"""
+        from api.main import fetch_all
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.005)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            await fetch_all("SELECT COUNT(*) FROM range(100000000) t(i) WHERE i % 7 = 3")
+            task.cancel()
+            return ticks
+
+        assert asyncio.run(scenario()) >= 5
+
+
+class TestResponseCache:
+    """Testes para o cache de respostas por execução"""
+
+    def test_lru_eviction(self):
+        """Tamanho limitado: sai a resposta usada há mais tempo"""
+        from api.cache import ResponseCache
+
+        cache = ResponseCache(max_entries=2)
+        cache.set_version(1)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == (True, 1)
+
+        cache.put('c', 3)
+        assert cache.get('b') == (False, None)
+        assert cache.get('a') == (True, 1)
+        assert len(cache) == 2
+
+    def test_new_version_clears(self):
+        """Nova execução com sucesso esvazia o cache"""
+        from api.cache import ResponseCache
+
+        cache = ResponseCache()
+        cache.set_version(1)
+        cache.put('a', 1)
+        cache.set_version(1)
+        assert cache.get('a') == (True, 1)
+
+        cache.set_version(2)
+        assert cache.get('a') == (False, None)
+
+    def test_hits_until_next_run(self, loaded_api):
+        """Consultas repetidas não tocam nas fatos até a próxima execução"""
+        from sqlalchemy import text
+        from api.main import get_despesa, run_version
+        from etl._00_metrics import API_CACHE_REQUESTS
+
+        hits = API_CACHE_REQUESTS.labels('despesa', 'hit')
+        before = hits._value.get()
+
+        first = asyncio.run(get_despesa(top=3))
+        engine = loaded_api.get_engine()
+        with engine.connect() as conn:
+            conn.execute(text("DELETE FROM dw.fact_despesa"))
+            conn.commit()
+
+        # Mesma versão dos dados: resposta vem do cache
+        assert asyncio.run(get_despesa(top=3)) == first
+        assert hits._value.get() == before + 1
+        # Parâmetros diferentes são outra chave
+        assert asyncio.run(get_despesa(top=2)) == []
+
+        # Nova execução com sucesso invalida o cache
+        with engine.connect() as conn:
+            conn.execute(text("""
+                INSERT INTO dw.etl_run (started_at, finished_at, status, triggered_by)
+                VALUES (NOW(), NOW(), 'SUCCESS', 'TEST')
+            """))
+            conn.commit()
+        run_version.expire()
+        assert asyncio.run(get_despesa(top=3)) == []
+
+    def test_bypassed_while_run_active(self, loaded_api):
+        """Execução em andamento: nada é lido nem guardado no cache; ao terminar (mesmo com falha) a chave muda"""
+        from sqlalchemy import text
+        from api.main import get_despesa, response_cache, run_version
+        from etl._00_metrics import API_CACHE_REQUESTS
+
+        def lookups():
+            return sum(API_CACHE_REQUESTS.labels('despesa', r)._value.get() for r in ('hit', 'miss'))
+
+        first = asyncio.run(get_despesa(top=3))
+        assert first
+
+        engine = loaded_api.get_engine()
+        with engine.connect() as conn:
+            conn.execute(text("""
+                INSERT INTO dw.etl_run (started_at, status, triggered_by)
+                VALUES (NOW(), 'RUNNING', 'TEST')
+            """))
+            # Execução nova truncou a fato e ainda não recarregou
+            conn.execute(text("DELETE FROM dw.fact_despesa"))
+            conn.commit()
+        run_version.expire()
+
+        before = lookups()
+        assert asyncio.run(get_despesa(top=3)) == []
+        assert asyncio.run(get_despesa(top=2)) == []
+        assert lookups() == before
+
+        # A execução falha: o DW ficou como está, e o cache passa a refletir isso
+        with engine.connect() as conn:
+            conn.execute(text("""
+                UPDATE dw.etl_run SET status = 'FAILED', finished_at = NOW()
+                WHERE run_id = (SELECT MAX(run_id) FROM dw.etl_run)
+            """))
+            conn.commit()
+        run_version.expire()
+
+        assert asyncio.run(get_despesa(top=3)) == []
+        # Versão nova (execução falhou): só a resposta recalculada no cache
+        assert lookups() == before + 1
+        assert len(response_cache) == 1
+
+
+class TestConditionalGet:
+    """Testes para ETag / Last-Modified por execução"""
+
+    def test_etag_and_precedence(self):
+        """ETag por execução e parâmetros; If-None-Match vence If-Modified-Since"""
+        from datetime import datetime, timezone
+        from api.cache import http_date, is_not_modified, make_etag
+
+        etag = make_etag(7, '/api/v1/despesa', [('top', '3'), ('cenario', 'Orçado')])
+        assert etag == make_etag(7, '/api/v1/despesa', [('cenario', 'Orçado'), ('top', '3')])
+        assert etag != make_etag(8, '/api/v1/despesa', [('top', '3'), ('cenario', 'Orçado')])
+        assert etag != make_etag(7, '/api/v1/despesa', [('top', '2'), ('cenario', 'Orçado')])
+
+        finished = datetime(2025, 3, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+        assert http_date(finished) == 'Sat, 01 Mar 2025 12:00:00 GMT'
+
+        assert is_not_modified(f'"x", {etag}', None, etag, finished)
+        assert is_not_modified(etag[2:], None, etag, finished)      # Comparação fraca
+        assert is_not_modified('*', None, etag, finished)
+        assert is_not_modified(None, http_date(finished), etag, finished)
+        assert not is_not_modified(None, 'Sat, 01 Mar 2025 11:59:59 GMT', etag, finished)
+        assert not is_not_modified('"outro"', http_date(finished), etag, finished)
+        assert not is_not_modified(None, 'data inválida', etag, finished)
+
+    def test_not_modified_until_next_run(self, loaded_api):
+        """304 sem corpo e sem tocar nas fatos; nova execução muda o ETag"""
+        from sqlalchemy import text
+        from api.main import run_version
+        from etl._00_metrics import API_CACHE_REQUESTS
+
+        status, headers, body = asgi_get('/api/v1/receita', 'cenario=Realizado')
+        assert status == 200 and body
+        etag, last_modified = headers['etag'], headers['last-modified']
+        assert etag.startswith('W/"')
+        assert headers['cache-control'] == 'no-cache'
+
+        lookups = API_CACHE_REQUESTS.labels('receita', 'hit')._value.get() + \
+            API_CACHE_REQUESTS.labels('receita', 'miss')._value.get()
+        status, headers, body = asgi_get('/api/v1/receita', 'cenario=Realizado',
+                                         {'If-None-Match': etag})
+        assert status == 304 and body == b''
+        assert headers['etag'] == etag and headers['last-modified'] == last_modified
+        # O endpoint nem chegou a rodar (nem o cache foi consultado)
+        assert API_CACHE_REQUESTS.labels('receita', 'hit')._value.get() + \
+            API_CACHE_REQUESTS.labels('receita', 'miss')._value.get() == lookups
+
+        status, _, _ = asgi_get('/api/v1/receita', 'cenario=Realizado',
+                                {'If-Modified-Since': last_modified})
+        assert status == 304
+        # Outros parâmetros, outro ETag
+        status, _, _ = asgi_get('/api/v1/receita', 'cenario=Or%C3%A7ado', {'If-None-Match': etag})
+        assert status == 200
+
+        with loaded_api.get_engine().connect() as conn:
+            conn.execute(text("""
+                INSERT INTO dw.etl_run (started_at, finished_at, status, triggered_by)
+                VALUES (NOW(), NOW() + INTERVAL 1 HOUR, 'SUCCESS', 'TEST')
+            """))
+            conn.commit()
+        run_version.expire()
+
+        status, headers, _ = asgi_get('/api/v1/receita', 'cenario=Realizado',
+                                      {'If-None-Match': etag, 'If-Modified-Since': last_modified})
+        assert status == 200
+        assert headers['etag'] != etag
+        status, _, _ = asgi_get('/api/v1/receita', 'cenario=Realizado',
+                                {'If-Modified-Since': last_modified})
+        assert status == 200
+
+    def test_no_store_while_run_active(self, loaded_api):
+        """Execução em andamento: sem ETag, no-store e nunca 304; ao falhar, ETag novo"""
+        from sqlalchemy import text
+        from api.main import run_version
+
+        status, headers, _ = asgi_get('/api/v1/receita', 'cenario=Realizado')
+        etag = headers['etag']
+
+        engine = loaded_api.get_engine()
+        with engine.connect() as conn:
+            conn.execute(text("""
+                INSERT INTO dw.etl_run (started_at, status, triggered_by)
+                VALUES (NOW(), 'RUNNING', 'TEST')
+            """))
+            conn.commit()
+        run_version.expire()
+
+        status, headers, body = asgi_get('/api/v1/receita', 'cenario=Realizado',
+                                         {'If-None-Match': etag})
+        assert status == 200 and body
+        assert headers['cache-control'] == 'no-store'
+        assert 'etag' not in headers and 'last-modified' not in headers
+
+        with engine.connect() as conn:
+            conn.execute(text("""
+                UPDATE dw.etl_run SET status = 'FAILED', finished_at = NOW() + INTERVAL 1 HOUR
+                WHERE run_id = (SELECT MAX(run_id) FROM dw.etl_run)
+            """))
+            conn.commit()
+        run_version.expire()
+
+        status, headers, _ = asgi_get('/api/v1/receita', 'cenario=Realizado',
+                                      {'If-None-Match': etag})
+        assert status == 200 and headers['cache-control'] == 'no-cache'
+        assert headers['etag'] != etag
+        status, _, _ = asgi_get('/api/v1/receita', 'cenario=Realizado',
+                                {'If-None-Match': headers['etag']})
+        assert status == 304
+
+
+class TestPagination:
+    """Testes para paginação por cursor e projeção de colunas"""
+
+    def test_cursor_and_fields(self):
+        """Cursor opaco ida e volta; cursor e campos inválidos são rejeitados"""
+        from api.pagination import PaginationError, decode_cursor, encode_cursor, parse_fields
+
+        cursor = encode_cursor(['2025-03', 42])
+        assert '=' not in cursor
+        assert decode_cursor(cursor, 2) == ['2025-03', 42]
+        with pytest.raises(PaginationError):
+            decode_cursor('não-é-cursor', 2)
+        with pytest.raises(PaginationError):
+            decode_cursor(cursor, 3)
+
+        available = {'mes': 'c.mes_nome', 'valor': 'f.valor'}
+        assert parse_fields(None, available, ['mes']) == ['mes']
+        assert parse_fields('valor, mes,valor', available, ['mes']) == ['valor', 'mes']
+        with pytest.raises(PaginationError):
+            parse_fields('valor;DROP', available, ['mes'])
+
+    def test_pages_cover_all_rows(self, loaded_api):
+        """Páginas encadeadas pelo cursor entregam cada linha uma vez, em ordem"""
+        from sqlalchemy import text
+        from api.main import get_dre_mensal
+
+        with loaded_api.get_engine().connect() as conn:
+            total = conn.execute(text("SELECT COUNT(*) FROM dw.fact_dre")).scalar()
+
+        items, cursor, pages = [], None, 0
+        while True:
+            result = asyncio.run(get_dre_mensal(
+                fields='data_key,linha,valor', cursor=cursor, limit=7
+            ))
+            assert len(result.items) <= 7
+            items += result.items
+            pages += 1
+            cursor = result.next_cursor
+            if cursor is None:
+                break
+
+        assert len(items) == total and pages == -(-total // 7)
+        assert set(items[0]) == {'data_key', 'linha', 'valor'}
+        keys = [item['data_key'] for item in items]
+        assert keys == sorted(keys)
+
+    def test_period_filters_and_errors(self, loaded_api):
+        """Filtros de período no SQL; parâmetros inválidos respondem 4xx"""
+        import json
+        from api.main import get_dre_mensal
+
+        result = asyncio.run(get_dre_mensal(
+            fields='ano,data_key', data_key_inicio='2025-03', data_key_fim='2025-04', limit=5000
+        ))
+        assert result.items and result.next_cursor is None
+        assert {item['data_key'] for item in result.items} == {'2025-03', '2025-04'}
+        assert {item['ano'] for item in result.items} == {2025}
+        assert asyncio.run(get_dre_mensal(ano_fim=2024)).items == []
+
+        status, _, body = asgi_get('/api/v1/dre/mensal', 'fields=mes,senha')
+        assert status == 400 and 'senha' in json.loads(body)['detail']
+        status, _, _ = asgi_get('/api/v1/dre/mensal', 'cursor=xyz')
+        assert status == 400
+        status, _, _ = asgi_get('/api/v1/dre/mensal', 'limit=100000')
+        assert status == 422
+        status, _, _ = asgi_get('/api/v1/dre/mensal', 'data_key_inicio=2025-3')
+        assert status == 422
+        status, _, body = asgi_get('/api/v1/dre/mensal', 'limit=2')
+        page = json.loads(body)
+        assert status == 200 and len(page['items']) == 2 and page['next_cursor']
+        assert set(page['items'][0]) == {'mes', 'linha', 'valor'}
+
+
+class TestExport:
+    """Testes para a exportação em massa"""
+
+    def test_formats_match_table(self, loaded_api):
+        """CSV, Parquet e Arrow IPC trazem as mesmas linhas da tabela"""
+        import csv
+        import io
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from sqlalchemy import text
+
+        with loaded_api.get_engine().connect() as conn:
+            total = conn.execute(text("SELECT COUNT(*) FROM dw.fact_despesa")).scalar()
+
+        status, headers, body = asgi_get('/api/v1/export/fact_despesa')
+        assert status == 200 and headers['content-type'].startswith('text/csv')
+        assert 'fact_despesa.csv' in headers['content-disposition']
+        rows = list(csv.reader(io.StringIO(body.decode('utf-8'))))
+        assert rows[0][:3] == ['despesa_key', 'data_key', 'cenario'] and len(rows) == total + 1
+
+        status, _, body = asgi_get('/api/v1/export/fact_despesa', 'format=parquet')
+        assert status == 200
+        assert pq.read_table(io.BytesIO(body)).num_rows == total
+
+        status, _, body = asgi_get('/api/v1/export/fact_despesa', 'format=arrow&cenario=Realizado')
+        table = pa.ipc.open_stream(body).read_all()
+        assert 0 < table.num_rows < total
+        assert set(table.column('cenario').to_pylist()) == {'Realizado'}
+        assert table.schema.field('valor').type == pa.float64()
+
+    def test_streams_in_batches(self, loaded_api):
+        """Um pedaço por lote do cursor (nunca o resultado inteiro de uma vez)"""
+        import io
+        import pyarrow.parquet as pq
+        from api.export import export_stream
+
+        engine = loaded_api.get_engine()
+        chunks = list(export_stream(engine, 'fact_dre', 'parquet', batch_rows=20))
+        parquet = pq.ParquetFile(io.BytesIO(b''.join(chunks)))
+        assert parquet.metadata.num_row_groups > 1
+        assert all(rg <= 20 for rg in
+                   (parquet.metadata.row_group(i).num_rows for i in range(parquet.metadata.num_row_groups)))
+        assert len(chunks) >= parquet.metadata.num_row_groups
+
+        # Cliente desconectado: o gerador fecha e devolve a conexão
+        stream = export_stream(engine, 'fact_dre', 'csv', batch_rows=5)
+        next(stream)
+        stream.close()
+        assert engine.pool.checkedout() == 0
+
+    def test_invalid_requests(self, loaded_api):
+        """Tabela fora da lista (404), filtro sem coluna (400), formato (422)"""
+        status, _, _ = asgi_get('/api/v1/export/etl_run')
+        assert status == 404
+        status, _, _ = asgi_get('/api/v1/export/dim_calendario', 'cenario=Realizado')
+        assert status == 400
+        status, _, _ = asgi_get('/api/v1/export/fact_dre', 'format=xlsx')
+        assert status == 422
+        status, _, body = asgi_get('/api/v1/export/dim_calendario', 'data_key_fim=2025-02')
+        assert status == 200 and len(body.decode('utf-8').strip().splitlines()) == 3
+
+
+class TestPreparedQueries:
+    """Testes para a camada de consultas nomeadas"""
+
+    def test_named_statements_are_compiled_once(self):
+        """SQL compilado com $n (valores nunca no texto) e tipos no PREPARE"""
+        from api.queries import QUERIES, statement
+
+        compiled = statement('despesa_top_por_cenario')
+        assert statement('despesa_top_por_cenario') is compiled
+        assert ':cenario' not in compiled.sql and '$1' in compiled.sql and '$2' in compiled.sql
+        assert compiled.prepare_sql.startswith(f"PREPARE {compiled.name} (text, integer) AS")
+        assert compiled.positional_params({'top': 5, 'cenario': 'Orçado'}) == ('Orçado', 5)
+        assert {f'dim_{d}' for d in ('cenario', 'unidade', 'pacote')} <= set(QUERIES)
+
+    def test_same_shape_reuses_statement(self):
+        """Mesma forma de /dre/mensal → mesmo statement, quaisquer valores e ordem de fields"""
+        from api.main import dre_mensal_query
+
+        first, values = dre_mensal_query(['valor', 'mes'], 'receita', '2025-01', None, None, 10)
+        again, other = dre_mensal_query(['mes', 'valor'], 'lucro', '2026-01', None, None, 99)
+        assert again is first and values != other
+        assert 'receita' not in first.sql and '2025' not in first.sql
+
+        paged, _ = dre_mensal_query(['mes', 'valor'], 'receita', '2025-01', None, ['2025-02', 7], 10)
+        assert paged is not first and paged.name != first.name
+
+    def test_filters_validated_against_dimensions(self, loaded_api):
+        """Cenário, linha e filtros da exportação precisam existir nas dimensões"""
+        from fastapi import HTTPException
+        from api.main import get_despesa, get_dre_mensal
+
+        assert asyncio.run(get_despesa(cenario='Orçado', top=2))
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(get_despesa(cenario='orcado'))
+        assert exc.value.status_code == 400
+
+        assert asyncio.run(get_dre_mensal(linha='receita', limit=1)).items
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(get_dre_mensal(linha='inexistente'))
+        assert exc.value.status_code == 400
+
+        status, _, _ = asgi_get('/api/v1/export/fact_despesa', 'pacote=N%C3%A3o%20existe')
+        assert status == 400
+
+    def test_linha_wildcards_are_literal(self, loaded_api):
+        """% e _ em `linha` não viram curingas do LIKE"""
+        from api.main import dre_mensal_query
+        from api.pagination import contains_pattern
+        from api.queries import run_query
+
+        assert contains_pattern('50%_a\\b') == '%50\\%\\_a\\\\b%'
+
+        for linha, found in (('_', False), ('%', False), ('receita', True)):
+            compiled, values = dre_mensal_query(['linha'], linha, None, None, None, 1)
+            assert bool(asyncio.run(run_query(compiled, values))) == found, linha
+
+
+class TestAggregateQuery:
+    """Testes para a consulta genérica (POST /api/v1/query)"""
+
+    def test_routes_to_aggregate_when_grain_allows(self):
+        """Agregado só quando todas as dimensões usadas cabem no grão dele"""
+        from api.olap import OlapError, build_query
+
+        query = build_query('receita', ['trimestre', 'tipo_receita'], ['total', 'linhas'],
+                            {'cenario': 'Realizado', 'trimestre': ['Q2', 'Q1', 'Q2']})
+        assert query.source == 'dw.agg_receita_mensal'
+        assert 'SUM(f.linhas)' in query.sql and 'dw.dim_calendario' in query.sql
+        assert query.filters == {'cenario': ['Realizado'], 'trimestre': ['Q1', 'Q2']}
+        assert 'Realizado' not in query.sql and 'Q1' not in query.sql
+
+        assert build_query('receita', ['tipo_receita'], filters={'unidade': 'X'}).source == 'dw.fact_receita'
+        assert build_query('despesa', ['unidade', 'pacote']).source == 'dw.fact_despesa'
+        assert build_query('dre', ['linha_dre']).source == 'dw.fact_dre'
+
+        same = build_query('receita', ['cenario'], ['linhas', 'total', 'linhas'])
+        assert same.key == build_query('receita', ['cenario'], ['linhas', 'total']).key
+
+        for args in (('lucro',), ('dre', ['pacote']), ('receita', [], ['soma']),
+                     ('receita', [], None, {'data_key': '2025-1'})):
+            with pytest.raises(OlapError):
+                build_query(*args)
+
+    def test_aggregate_matches_fact(self, loaded_api):
+        """Mesmo resultado lendo o agregado ou a fato"""
+        from sqlalchemy import text
+        from etl._00_config import get_engine
+        from api.main import AggregateQuery, aggregate_query
+
+        body = AggregateQuery(fato='despesa', dimensoes=['cenario', 'trimestre'],
+                              medidas=['total', 'linhas', 'media', 'minimo', 'maximo'])
+        result = asyncio.run(aggregate_query(body))
+        assert result.source == 'dw.agg_despesa_mensal'
+        assert result.columns == ['cenario', 'trimestre', 'total', 'linhas', 'media', 'minimo', 'maximo']
+
+        with get_engine().connect() as conn:
+            expected = conn.execute(text("""
+                SELECT f.cenario, c.trimestre, SUM(f.valor), COUNT(*), AVG(f.valor),
+                       MIN(f.valor), MAX(f.valor)
+                FROM dw.fact_despesa f JOIN dw.dim_calendario c ON f.data_key = c.data_key
+                GROUP BY 1, 2 ORDER BY 1, 2
+            """)).fetchall()
+
+        assert len(result.items) == len(expected) > 0
+        for item, row in zip(result.items, expected):
+            assert (item['cenario'], item['trimestre'], item['linhas']) == (row[0], row[1], row[3])
+            for name, value in zip(['total', 'media', 'minimo', 'maximo'], [row[2], *row[4:]]):
+                assert item[name] == pytest.approx(float(value))
+
+        by_unidade = asyncio.run(aggregate_query(AggregateQuery(
+            fato='despesa', dimensoes=['unidade'], filtros={'cenario': 'Realizado'}
+        )))
+        assert by_unidade.source == 'dw.fact_despesa'
+        realizado = [i['total'] for i in result.items if i['cenario'] == 'Realizado']
+        assert sum(i['total'] for i in by_unidade.items) == pytest.approx(sum(realizado))
+
+    def test_invalid_requests_and_truncation(self, loaded_api):
+        """400 para pedido ou valor de filtro inválido; limit trunca os grupos"""
+        from fastapi import HTTPException
+        from api.main import AggregateQuery, aggregate_query
+
+        for body in (AggregateQuery(fato='receita', dimensoes=['pacote']),
+                     AggregateQuery(fato='receita', filtros={'cenario': ['orcado']})):
+            with pytest.raises(HTTPException) as exc:
+                asyncio.run(aggregate_query(body))
+            assert exc.value.status_code == 400
+
+        full = asyncio.run(aggregate_query(AggregateQuery(fato='dre', dimensoes=['data_key'])))
+        assert not full.truncated and len(full.items) > 2
+        top = asyncio.run(aggregate_query(AggregateQuery(fato='dre', dimensoes=['data_key'], limit=2)))
+        assert top.truncated and top.items == full.items[:2]
+
+        total = asyncio.run(aggregate_query(AggregateQuery(fato='receita')))
+        assert total.columns == ['total'] and len(total.items) == 1
+
+
+class TestUpload:
+    """Testes para o recebimento de arquivos"""
+
+    def test_stage_hashes_and_limits_size(self, tmp_path):
+        """SHA-256 calculado em blocos; acima do limite não sobra temporário"""
+        import hashlib
+        import io
+        from api.upload import UploadTooLarge, stage_upload
+
+        data = b'x' * 2500
+        staged = stage_upload(io.BytesIO(data), tmp_path, max_bytes=2500, chunk_size=1000)
+        assert staged.sha256 == hashlib.sha256(data).hexdigest()
+        assert staged.size == 2500 and staged.path.parent == tmp_path
+
+        dest = tmp_path / 'dados.xlsx'
+        dest.write_bytes(b'anterior')
+        staged.commit(dest)
+        assert dest.read_bytes() == data
+        assert list(tmp_path.iterdir()) == [dest]
+
+        with pytest.raises(UploadTooLarge):
+            stage_upload(io.BytesIO(data), tmp_path, max_bytes=2499, chunk_size=1000)
+        assert list(tmp_path.iterdir()) == [dest]
+
+    def test_repeat_upload_skips_pipeline(self, duckdb_config, tmp_path):
+        """Mesmo arquivo do último processamento: 200 sem novo job"""
+        import json
+        from benchmarks.synthetic_workbook import WorkbookSpec, generate_workbook
+        from etl._05_jobs import JobQueue, JobWorker, JOB_QUEUED
+
+        source = duckdb_config.get_source_file_path()
+        duckdb_config._config['paths'] = {'source_excel': source.as_posix()}
+        duckdb_config._config['api'] = {'upload': {'max_bytes': 10 * 1024 * 1024}}
+        original = source.read_bytes()
+        generate_workbook(tmp_path / 'outro.xlsx', WorkbookSpec(unidades=3, pacotes=4, rows=100))
+        other = (tmp_path / 'outro.xlsx').read_bytes()
+
+        def upload(data):
+            headers, body = multipart_body(data)
+            headers['Content-Length'] = str(len(body))
+            chunks = [body[i:i + 4096] for i in range(0, len(body), 4096)]
+            status, _, content = asgi_request('POST', '/api/v1/upload', headers=headers, body=chunks)
+            return status, json.loads(content)
+
+        engine = duckdb_config.get_engine()
+        status, first = upload(original)
+        assert status == 202 and first['status'] == JOB_QUEUED and not first['duplicate']
+        assert JobQueue(engine).get(first['job_id'])['params']['sha256'] == first['sha256']
+        JobWorker(engine).run_once()
+
+        # Reenvio: aponta para o job que já processou o arquivo
+        status, repeat = upload(original)
+        assert status == 200 and repeat['duplicate']
+        assert repeat['job_id'] == first['job_id'] and repeat['sha256'] == first['sha256']
+        assert JobQueue(engine).pending('upload') == 0
+
+        # Com outro arquivo na fila, o original volta a ser processado
+        status, queued = upload(other)
+        assert status == 202 and source.read_bytes() == other
+        status, again = upload(original)
+        assert status == 202 and not again['duplicate']
+        assert source.read_bytes() == original
+
+        duckdb_config._config['api'] = {'upload': {'max_bytes': 1024}}
+        status, _ = upload(original)
+        assert status == 413
+        assert source.read_bytes() == original
+
+    def test_oversized_upload_cut_off_early(self, duckdb_config):
+        """Content-Length acima do limite: 413 sem ler o corpo; sem ele, para no limite"""
+        source = duckdb_config.get_source_file_path()
+        duckdb_config._config['paths'] = {'source_excel': source.as_posix()}
+        duckdb_config._config['api'] = {'upload': {'max_bytes': 1024}}
+        before = sorted(source.parent.iterdir())
+
+        headers, body = multipart_body(b'x' * 200 * 1024)
+        chunks = [body[i:i + 4096] for i in range(0, len(body), 4096)]
+        total = len(chunks)
+
+        status, _, _ = asgi_request('POST', '/api/v1/upload', body=chunks,
+                                    headers={**headers, 'Content-Length': str(len(body))})
+        assert status == 413 and len(chunks) == total
+
+        # Corpo chunked (sem Content-Length): a leitura para no primeiro bloco acima
+        status, _, _ = asgi_request('POST', '/api/v1/upload', headers=headers, body=chunks)
+        assert status == 413 and len(chunks) > total // 2
+        assert sorted(source.parent.iterdir()) == before
+
+        # Fora do multipart ou com outra extensão: 400
+        status, _, _ = asgi_request('POST', '/api/v1/upload', body=[b'x'],
+                                    headers={'Content-Type': 'application/octet-stream'})
+        assert status == 400
+        headers, body = multipart_body(b'x', filename='dados.csv')
+        status, _, _ = asgi_request('POST', '/api/v1/upload', headers=headers, body=[body])
+        assert status == 400
+        assert sorted(source.parent.iterdir()) == before
+
+
+class TestLoadTest:
+    """Testes para o resumo do teste de carga"""
+
+    def test_summarize_and_scaling(self):
+        """Vazão conta só respostas com sucesso; ganho é relativo ao 1º nível"""
+        from benchmarks.api_load import add_scaling, summarize_level
+
+        one = summarize_level(1, [0.01] * 10, 0.1)
+        four = summarize_level(4, [0.01] * 38 + [None, None], 0.1)
+        assert one['requests_per_sec'] == 100.0
+        assert four['errors'] == 2 and four['requests_per_sec'] == 380.0
+
+        add_scaling([one, four])
+        assert one['speedup'] == 1.0
+        assert four['speedup'] == 3.8
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,123 @@
+"""
+DRE Analytics 2025 - Testes da Gravação em Lote da Auditoria
+"""
+
+import pytest
+import os
+import subprocess
+import sys
+import time
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INSERT = "INSERT INTO audit (step_name, step_order) VALUES (:step_name, :step_order)"
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """Banco SQLite em arquivo com uma tabela de auditoria"""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(f"sqlite:///{(tmp_path / 'audit.db').as_posix()}")
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE audit (step_name TEXT, step_order INTEGER)"))
+        conn.commit()
+    yield engine
+    engine.dispose()
+
+
+def _rows(engine):
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT step_name, step_order FROM audit")).fetchall()
+
+
+class TestAuditWriter:
+    """Testes para o AuditWriter"""
+
+    def test_buffers_until_close(self, sqlite_engine):
+        """Registros ficam no buffer e são gravados em um lote, na ordem"""
+        from etl._00_audit import AuditWriter
+
+        writer = AuditWriter(sqlite_engine, batch_size=100, flush_interval=60)
+        for i in range(5):
+            writer.write(INSERT, {'step_name': f'step_{i}', 'step_order': i})
+
+        assert writer.pending == 5
+        assert _rows(sqlite_engine) == []
+
+        writer.close()
+        assert [order for _, order in _rows(sqlite_engine)] == [0, 1, 2, 3, 4]
+        assert writer.batches_written == 1
+        assert writer.pending == 0
+
+    def test_batch_size_triggers_flush(self, sqlite_engine):
+        """Buffer cheio é gravado pela thread de fundo sem esperar o intervalo"""
+        from etl._00_audit import AuditWriter
+
+        writer = AuditWriter(sqlite_engine, batch_size=3, flush_interval=60)
+        for i in range(3):
+            writer.write(INSERT, {'step_name': f'step_{i}', 'step_order': i})
+
+        deadline = time.time() + 5
+        while writer.rows_written < 3 and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert len(_rows(sqlite_engine)) == 3
+        writer.close()
+
+    def test_failed_batch_is_retried(self, sqlite_engine):
+        """Lote com erro volta ao buffer e é gravado no flush seguinte"""
+        from sqlalchemy import text
+        from etl._00_audit import AuditWriter
+
+        writer = AuditWriter(sqlite_engine, batch_size=100, flush_interval=60)
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("ALTER TABLE audit RENAME TO audit_tmp"))
+            conn.commit()
+
+        writer.write(INSERT, {'step_name': 'extract', 'step_order': 1})
+        with pytest.raises(Exception):
+            writer.flush()
+        assert writer.pending == 1
+
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("ALTER TABLE audit_tmp RENAME TO audit"))
+            conn.commit()
+
+        writer.close()
+        assert _rows(sqlite_engine) == [('extract', 1)]
+
+    def test_close_logs_and_drops_on_failure(self, sqlite_engine, caplog):
+        """close() não propaga erro do banco: registra e descarta"""
+        from etl._00_audit import AuditWriter
+
+        writer = AuditWriter(sqlite_engine, flush_interval=60)
+        writer.write("INSERT INTO tabela_inexistente (a) VALUES (:a)", {'a': 1})
+        writer.close()
+
+        assert writer.pending == 0
+        assert 'Auditoria não gravada' in caplog.text
+
+    def test_flush_on_exit(self, tmp_path, sqlite_engine):
+        """Processo que termina sem close() ainda grava a trilha (atexit)"""
+        script = (
+            "from sqlalchemy import create_engine\n"
+            "from etl._00_audit import AuditWriter\n"
+            f"engine = create_engine('sqlite:///{(tmp_path / 'audit.db').as_posix()}')\n"
+            "writer = AuditWriter(engine, flush_interval=60)\n"
+            f"writer.write({INSERT!r}, {{'step_name': 'extract', 'step_order': 1}})\n"
+            "raise SystemExit(1)\n"
+        )
+        proc = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_ROOT)
+
+        assert proc.returncode == 1
+        assert _rows(sqlite_engine) == [('extract', 1)]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,183 @@
+"""
+DRE Analytics 2025 - Testes do Gerador Sintético e do Benchmark
+"""
+
+import pytest
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestSyntheticWorkbook:
+    """Testes para a planilha sintética"""
+
+    def test_layout_matches_extractor(self, tmp_path):
+        """Abas no layout lido pelo _01_extract_excel"""
+        import pandas as pd
+        from benchmarks.synthetic_workbook import WorkbookSpec, generate_workbook, DEFAULT_SHEETS
+        from etl._00_config import MESES_MAP
+
+        spec = WorkbookSpec(unidades=3, pacotes=4, rows=50)
+        path = tmp_path / 'sintetico.xlsx'
+        rows = generate_workbook(path, spec)
+        sheets = pd.read_excel(path, sheet_name=None, header=None)
+
+        assert set(sheets) == set(DEFAULT_SHEETS.values())
+
+        receita = sheets['Receita_Realizado']
+        meses = [v for v in receita.iloc[0] if str(v).upper() in MESES_MAP]
+        assert len(meses) == 12
+        primeira = receita[0].tolist()
+        assert primeira.index('SERVICE') - primeira.index('SALES') == spec.unidades + 2
+
+        despesas = pd.read_excel(path, sheet_name='Despesas_Realizado')
+        assert list(despesas.columns) == ['Data', 'Unidade', 'Pacote', 'Conta', 'Valor']
+        assert len(despesas) == spec.rows
+        assert (despesas['Valor'] < 0).all()
+        assert rows['despesas_realizado'] == spec.rows + 1
+
+    def test_dre_is_consistent(self, tmp_path):
+        """Modelo DRE bate com a receita e tem margem líquida plausível"""
+        import pandas as pd
+        from benchmarks.synthetic_workbook import WorkbookSpec, generate_workbook
+
+        path = tmp_path / 'sintetico.xlsx'
+        generate_workbook(path, WorkbookSpec(unidades=5, rows=200))
+        receita = pd.read_excel(path, sheet_name='Receita_Realizado', header=None)
+        dre = pd.read_excel(path, sheet_name='Modelo DRE', header=None, index_col=0)
+
+        consolidado = receita[receita[0] == 'CONSOLIDADO'].iloc[0, 1:13].astype(float)
+        bruta = dre.loc['Receita Bruta'].astype(float)
+        assert bruta.sum() == pytest.approx(consolidado.sum(), rel=1e-6)
+
+        margem = dre.loc['Lucro Líquido'].astype(float).sum() / bruta.sum()
+        assert 0.20 <= margem <= 0.40
+
+    def test_scale_presets(self):
+        """Presets crescem com o fator e respeitam o limite do Excel"""
+        from benchmarks.synthetic_workbook import spec_for_scale, EXCEL_MAX_ROWS, WorkbookSpec
+
+        specs = [spec_for_scale(f) for f in (1, 10, 100, 1000)]
+        assert [s.rows for s in specs] == sorted(s.rows for s in specs)
+        assert specs[0].unidades < specs[-1].unidades
+        assert specs[-1].rows <= EXCEL_MAX_ROWS
+
+        with pytest.raises(ValueError):
+            WorkbookSpec(rows=EXCEL_MAX_ROWS + 1)
+
+
+class TestBenchmarkComparison:
+    """Testes para comparação entre execuções do benchmark"""
+
+    def _result(self, rows_per_sec, process_peak_rss_mb):
+        return {'scales': [{
+            'scale': 10,
+            'phases': [{'phase': 'extract', 'rows_per_sec': rows_per_sec,
+                        'process_peak_rss_mb': process_peak_rss_mb}],
+        }]}
+
+    def test_flags_throughput_and_memory(self):
+        """Queda de vazão ou aumento de memória acima do limiar"""
+        from benchmarks.run_benchmark import compare_results
+
+        baseline = self._result(1000.0, 200.0)
+
+        [row] = compare_results(baseline, self._result(850.0, 205.0))
+        assert row['throughput_change'] == pytest.approx(-0.15)
+        assert row['regression'] is True
+
+        [row] = compare_results(baseline, self._result(980.0, 260.0))
+        assert row['regression'] is True
+
+        [row] = compare_results(baseline, self._result(1100.0, 190.0))
+        assert row['regression'] is False
+
+    def test_ignores_missing_scales(self):
+        """Escalas ausentes na baseline não entram na comparação"""
+        from benchmarks.run_benchmark import compare_results
+
+        assert compare_results({'scales': []}, self._result(1000.0, 200.0)) == []
+
+
+class TestBenchmarkOptions:
+    """Testes para as opções de tamanho do benchmark"""
+
+    def test_overrides_reach_spec_and_worker(self, tmp_path):
+        """--unidades/--pacotes/--rows substituem o preset e vão para o subprocesso"""
+        from benchmarks.run_benchmark import benchmark_spec, worker_command
+        from benchmarks.synthetic_workbook import spec_for_scale
+
+        overrides = {'unidades': 7, 'pacotes': None, 'rows': 500}
+        spec = benchmark_spec(10, 2025, overrides=overrides)
+        assert (spec.unidades, spec.rows) == (7, 500)
+        assert spec.pacotes == spec_for_scale(10).pacotes
+
+        command = worker_command(10, tmp_path, tmp_path / 'out.json', 1, overrides)
+        assert command[command.index('--years') + 1] == '1'
+        assert command[command.index('--unidades') + 1] == '7'
+        assert command[command.index('--rows') + 1] == '500'
+        assert '--pacotes' not in command
+
+    def test_options_recorded_in_results(self, tmp_path, monkeypatch):
+        """Anos e dimensões sobrescritas ficam em 'options' no JSON"""
+        import json
+        import benchmarks.run_benchmark as bench
+
+        calls = []
+
+        def fake_isolated(factor, workdir, years, overrides):
+            calls.append((factor, years, overrides))
+            return {'scale': factor, 'phases': [], 'peak_rss_mb': None}
+
+        monkeypatch.setattr(bench, '_run_isolated', fake_isolated)
+        path = bench.run_benchmark([1], tmp_path / 'bench.json', overrides={'rows': 500})
+
+        expected = {'unidades': None, 'pacotes': None, 'rows': 500}
+        assert calls == [(1, 1, expected)]
+        assert json.loads(path.read_text(encoding='utf-8'))['options'] == {'years': 1, **expected}
+
+    def test_refuses_multiple_years(self):
+        """Mais de um ano não cabe no calendário do DW: erro claro"""
+        from benchmarks.run_benchmark import benchmark_spec
+
+        with pytest.raises(ValueError, match='dim_calendario'):
+            benchmark_spec(1, 2025, years=3)
+
+
+class TestImportTime:
+    """Testes para o cold start (imports adiados)"""
+
+    def test_parse_importtime(self):
+        """Linhas do -X importtime viram (módulo, self, cumulativo)"""
+        from benchmarks.import_time import parse_importtime
+
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _io\n"
+            "import time:      3050 |      15400 | etl\n"
+        )
+        assert parse_importtime(stderr) == [('_io', 120, 120), ('etl', 3050, 15400)]
+
+    @pytest.mark.parametrize('module', ['etl', 'etl._05_run_pipeline'])
+    def test_cli_does_not_load_heavy_modules(self, module):
+        """Pacote e CLI não importam pandas/SQLAlchemy/openpyxl no topo"""
+        from benchmarks.import_time import measure_import
+
+        result = measure_import(module)
+        assert result['heavy_loaded'] == []
+
+    def test_lazy_attributes(self):
+        """Atributos públicos do pacote são resolvidos no primeiro acesso"""
+        import etl
+        from etl._01_extract_excel import run_extract
+
+        assert 'run_pipeline' in dir(etl)
+        assert etl.run_extract is run_extract
+        with pytest.raises(AttributeError):
+            etl.nao_existe
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
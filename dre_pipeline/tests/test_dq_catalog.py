@@ -0,0 +1,347 @@
+"""
+DRE Analytics 2025 - Testes do Catálogo de Regras de DQ
+"""
+
+import pytest
+import os
+import sys
+import time
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestCompileRuleSql:
+    """Testes para compilação de placeholders"""
+
+    def test_named_to_positional(self):
+        """Placeholders nomeados viram $n na ordem de declaração"""
+        from etl._04_dq_checks import compile_rule_sql
+
+        params = {'a': {'type': 'numeric'}, 'b': {'type': 'text'}}
+        sql, order = compile_rule_sql("SELECT :b, :a, :a", params)
+
+        assert sql == "SELECT $2, $1, $1"
+        assert order == ['a', 'b']
+
+    def test_casts_and_literals_untouched(self):
+        """Casts (::tipo) e literais SQL não são tratados como parâmetros"""
+        from etl._04_dq_checks import compile_rule_sql
+
+        params = {'ano': {'type': 'integer'}}
+        sql, order = compile_rule_sql(
+            "SELECT total::numeric, 'HH24:MI' WHERE x = :ano::text", params
+        )
+
+        assert sql == "SELECT total::numeric, 'HH24:MI' WHERE x = $1::text"
+        assert order == ['ano']
+
+    def test_undeclared_param_fails(self):
+        """Placeholder sem declaração gera erro"""
+        from etl._04_dq_checks import compile_rule_sql, DQCatalogError
+
+        with pytest.raises(DQCatalogError):
+            compile_rule_sql("SELECT :nao_declarado", {})
+
+
+class TestDQRuleBind:
+    """Testes para resolução de parâmetros"""
+
+    def _rule(self):
+        from etl._04_dq_checks import DQRule
+
+        return DQRule(
+            rule_id=1,
+            rule_name='teste',
+            description='',
+            sql="SELECT :expected, :ano",
+            params={
+                'expected': {'type': 'numeric', 'config': 'data_quality.expected.x', 'default': 1.5},
+                'ano': {'type': 'integer', 'default': 2025},
+            }
+        )
+
+    def test_precedence(self):
+        """overrides > config > default"""
+        rule = self._rule()
+        context = {'data_quality': {'expected': {'x': 10}}}
+
+        assert rule.bind() == {'expected': 1.5, 'ano': 2025}
+        assert rule.bind(context) == {'expected': 10.0, 'ano': 2025}
+        assert rule.bind(context, {'ano': '2026'}) == {'expected': 10.0, 'ano': 2026}
+
+    def test_invalid_type_fails(self):
+        """Valor incompatível com o tipo declarado gera erro"""
+        from etl._04_dq_checks import DQCatalogError
+
+        with pytest.raises(DQCatalogError):
+            self._rule().bind(overrides={'ano': 'dois mil'})
+
+    def test_prepare_and_execute_sql(self):
+        """PREPARE declara tipos e EXECUTE usa binds posicionais"""
+        statement = self._rule().statement
+
+        assert statement.prepare_sql.startswith(f"PREPARE {statement.name} (numeric, integer) AS")
+        assert statement.execute_sql == f"EXECUTE {statement.name} (:p0, :p1)"
+        assert statement.execute_params({'expected': 2.0, 'ano': 2025}) == {'p0': 2.0, 'p1': 2025}
+
+
+class TestSampleStatement:
+    """Testes para captura de amostras de linhas ofensoras"""
+
+    def test_sample_insert_is_bounded(self):
+        """A amostra é um INSERT ... SELECT limitado e parametrizado"""
+        from etl._04_dq_checks import DQRule
+
+        rule = DQRule(
+            rule_id=10,
+            rule_name='orfaos',
+            description='',
+            sql="SELECT 'PASS', 0, 0, 'ok'",
+            params={'max_orphans': {'type': 'integer', 'default': 0}},
+            sample_sql="SELECT * FROM dw.fact_receita WHERE valor > :max_orphans"
+        )
+        statement = rule.sample_statement
+
+        assert 'INSERT INTO dw.data_quality_samples' in statement.sql
+        assert statement.sql.rstrip().endswith('LIMIT $3')
+        assert statement.param_order == ['max_orphans', 'sample_run_id', 'sample_limit']
+        assert statement.param_types == ['integer', 'integer', 'integer']
+
+    def test_rule_without_sample(self):
+        """Regras agregadas não têm statement de amostra"""
+        from etl._04_dq_checks import load_dq_catalog, DEFAULT_CATALOG_PATH
+
+        catalog = load_dq_catalog(DEFAULT_CATALOG_PATH)
+
+        assert catalog.get('receita_realizado_total').sample_statement is None
+        assert catalog.get('data_keys_valid').sample_statement is not None
+
+
+class TestLoadCatalog:
+    """Testes para carga do catálogo YAML"""
+
+    def test_default_catalog(self):
+        """Catálogo padrão carrega as 14 regras"""
+        from etl._04_dq_checks import load_dq_catalog, DEFAULT_CATALOG_PATH
+
+        catalog = load_dq_catalog(DEFAULT_CATALOG_PATH)
+
+        assert len(catalog) == 14
+        assert catalog.get('lucro_liquido_dre') is not None
+
+    def test_raw_catalog(self):
+        """Catálogo RAW compila e não colide com os rule_ids do DW"""
+        from etl._04_dq_checks import load_dq_catalog, DEFAULT_CATALOG_PATH
+        from etl._01_validate_raw import load_raw_catalog
+
+        raw_ids = {r.rule_id for r in load_raw_catalog()}
+        dw_ids = {r.rule_id for r in load_dq_catalog(DEFAULT_CATALOG_PATH)}
+
+        assert len(raw_ids) == 18
+        assert not raw_ids & dw_ids
+
+    def test_raw_sheet_rules_generated(self, tmp_path):
+        """Modelo × abas: rule_id sequencial, `when` filtra e :sheet vem de etl.sheets"""
+        from etl._01_validate_raw import load_raw_catalog
+
+        path = tmp_path / 'raw_rules.yml'
+        path.write_text("""
+version: 1
+sheets:
+  - {key: receita_realizado, name: Receita_Realizado, table: raw.receita, sections: true}
+  - {key: aliquotas, name: Aliquotas, table: raw.aliquota}
+sheet_rules:
+  - first_rule_id: 201
+    rule_name: raw_{sheet}_linhas
+    description: Linhas da aba {name}
+    sql: SELECT 'PASS', COUNT(*), 0, 'ok' FROM {table} WHERE source_sheet = :sheet
+  - first_rule_id: 210
+    when: sections
+    rule_name: raw_{sheet}_secoes
+    sql: SELECT 'PASS', 0, 0, 'ok' FROM {table}
+rules:
+  - rule_id: 220
+    rule_name: raw_fixa
+    sql: SELECT 'PASS', 0, 0, 'ok'
+""", encoding='utf-8')
+
+        catalog = load_raw_catalog(path)
+
+        assert [(r.rule_id, r.rule_name) for r in catalog] == [
+            (201, 'raw_receita_realizado_linhas'), (202, 'raw_aliquotas_linhas'),
+            (210, 'raw_receita_realizado_secoes'), (220, 'raw_fixa'),
+        ]
+        rule = catalog.get('raw_aliquotas_linhas')
+        assert 'FROM raw.aliquota' in rule.sql and rule.description == 'Linhas da aba Aliquotas'
+        assert rule.params['sheet'] == {'type': 'text', 'config': 'etl.sheets.aliquotas', 'default': 'Aliquotas'}
+        assert rule.bind({'etl': {'sheets': {'aliquotas': 'Impostos'}}})['sheet'] == 'Impostos'
+
+    def test_large_catalog_under_one_second(self, tmp_path):
+        """Catálogo com 500 regras carrega em menos de 1 segundo"""
+        import yaml
+        from etl._04_dq_checks import load_dq_catalog
+
+        rules = [
+            {
+                'rule_id': i,
+                'rule_name': f'regra_{i}',
+                'description': f'Regra sintética {i}',
+                'params': {
+                    'ano': {'type': 'integer', 'default': 2025},
+                    'expected': {'type': 'numeric', 'default': i},
+                },
+                'sql': (
+                    "SELECT CASE WHEN SUM(valor) = :expected THEN 'PASS' ELSE 'FAIL' END, "
+                    "SUM(valor)::numeric, :expected, 'ok' FROM dw.fact_receita "
+                    "WHERE LEFT(data_key, 4) = :ano::text"
+                ),
+            }
+            for i in range(500)
+        ]
+        path = tmp_path / 'rules.yml'
+        path.write_text(yaml.safe_dump({'rules': rules}), encoding='utf-8')
+
+        start = time.perf_counter()
+        catalog = load_dq_catalog(path)
+        elapsed = time.perf_counter() - start
+
+        assert len(catalog) == 500
+        assert elapsed < 1.0, f"Carga levou {elapsed:.2f}s"
+
+
+PG_CONFIG_YML = """
+database:
+  host: db
+  port: 5432
+  name: dre_db
+  user: dre_user
+  password: dre_pass
+etl:
+  source_file: dados.xlsx
+  ano_referencia: 2025
+  sheets: {}
+"""
+
+
+class FakePgSession:
+    """Sessão PostgreSQL simulada: PREPARE não é transacional e sobrevive ao rollback"""
+
+    class Error(Exception):
+        def __init__(self, pgcode):
+            super().__init__(pgcode)
+            self.pgcode = pgcode
+
+    def __init__(self, fail_once):
+        self.prepared = set()
+        self.fail_once = set(fail_once)
+        self.info = {}
+
+    def _raise(self, sql, pgcode):
+        from sqlalchemy.exc import ProgrammingError
+        raise ProgrammingError(sql, {}, self.Error(pgcode))
+
+    def execute(self, sql):
+        name = sql.split()[1]
+        if sql.startswith('PREPARE'):
+            if name in self.prepared:
+                self._raise(sql, '42P05')
+            self.prepared.add(name)
+        elif sql.startswith('DEALLOCATE'):
+            if name not in self.prepared:
+                self._raise(sql, '26000')
+            self.prepared.discard(name)
+        elif sql.startswith('EXECUTE'):
+            if name not in self.prepared:
+                self._raise(sql, '26000')
+            if name in self.fail_once:
+                self.fail_once.discard(name)
+                self._raise(sql, '40001')
+            return ('PASS', 1, 1, 'ok')
+
+
+class FakePgConnection:
+    def __init__(self, session, engine):
+        self.session = session
+        self.connection = session      # conexão física (connection.info)
+        self.engine = engine
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        row = self.session.execute(str(statement))
+
+        class _Result:
+            def fetchone(self):
+                return row
+        return _Result()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakePgEngine:
+    """Engine PostgreSQL que sempre devolve a mesma conexão física (pool de 1)"""
+
+    class dialect:
+        name = 'postgresql'
+
+    def __init__(self, session):
+        self.session = session
+
+    def connect(self):
+        return FakePgConnection(self.session, self)
+
+
+class TestPreparedRecovery:
+    """Testes para recuperação de statements após falha no EXECUTE"""
+
+    def test_failed_execute_then_rule_runs_again(self, tmp_path):
+        """Falha num EXECUTE não deixa a regra quebrada na conexão (DEALLOCATE + novo PREPARE)"""
+        from etl._00_config import Config
+        from etl._04_dq_checks import get_dq_checks, run_dq_checks
+
+        path = tmp_path / 'config.yml'
+        path.write_text(PG_CONFIG_YML, encoding='utf-8')
+        previous = Config._instance
+        Config._instance = None
+        try:
+            Config(path)
+            rule = get_dq_checks()[0]
+            session = FakePgSession(fail_once=[rule.statement.name])
+            engine = FakePgEngine(session)
+
+            first = run_dq_checks(engine=engine)
+            assert first['failed'] == 1
+            assert rule.statement.name not in session.prepared
+
+            second = run_dq_checks(engine=engine)
+            assert second['failed'] == 0
+            assert second['passed'] == second['total']
+        finally:
+            Config._instance = previous
+
+    def test_lost_local_registry_is_recovered(self):
+        """Statement já existente na sessão (42P05) só volta a ser registrado"""
+        from etl._00_prepared import PREPARED_INFO_KEY, CompiledStatement, ensure_prepared
+
+        statement = CompiledStatement('dq', "SELECT 1", {})
+        session = FakePgSession(fail_once=[])
+        conn = FakePgEngine(session).connect()
+
+        ensure_prepared(conn, statement)
+        session.info[PREPARED_INFO_KEY].clear()
+        ensure_prepared(conn, statement)
+
+        assert statement.name in session.info[PREPARED_INFO_KEY]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
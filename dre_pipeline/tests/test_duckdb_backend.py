@@ -0,0 +1,109 @@
+"""
+DRE Analytics 2025 - Testes do Backend DuckDB
+"""
+
+import pytest
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestBackendSelection:
+    """Testes para escolha do backend"""
+
+    def test_default_is_postgres(self):
+        """Sem database.backend, o DW é PostgreSQL"""
+        from etl._00_backend import get_backend, BACKEND_POSTGRES
+
+        backend = get_backend({'host': 'h', 'port': 5432, 'name': 'n', 'user': 'u', 'password': 'p'})
+        assert backend.name == BACKEND_POSTGRES
+        assert backend.supports_prepare and backend.supports_advisory_lock
+        assert backend.connection_string({
+            'host': 'h', 'port': 5432, 'name': 'n', 'user': 'u', 'password': 'p'
+        }) == 'postgresql://u:p@h:5432/n'
+
+    def test_duckdb_path_and_capabilities(self, tmp_path):
+        """DuckDB usa um arquivo local e desativa recursos do PostgreSQL"""
+        from etl._00_backend import get_backend
+
+        backend = get_backend({'backend': 'duckdb', 'path': str(tmp_path / 'dw' / 'dre.duckdb')})
+        assert backend.required_keys == ['path']
+        assert backend.connection_string({'path': str(tmp_path / 'dw' / 'dre.duckdb')}).startswith('duckdb:///')
+        assert (tmp_path / 'dw').is_dir()
+        assert not (backend.supports_prepare or backend.supports_explain or backend.supports_anomalies)
+
+    def test_unknown_backend(self):
+        """Backend desconhecido é erro de configuração"""
+        from etl._00_backend import get_backend, BackendError
+
+        with pytest.raises(BackendError):
+            get_backend({'backend': 'oracle'})
+
+
+class TestDuckDBPipeline:
+    """Pipeline completo sobre DuckDB embarcado"""
+
+    def test_run_pipeline(self, duckdb_config):
+        """Extração → STG → DW → DQ sem servidor"""
+        from sqlalchemy import text
+        from etl._05_run_pipeline import run_pipeline
+
+        result = run_pipeline(max_workers=4)
+        assert result['status'] == 'SUCCESS'
+
+        with duckdb_config.get_engine().connect() as conn:
+            fact_despesa = conn.execute(text("SELECT COUNT(*) FROM dw.fact_despesa")).scalar()
+            dims = conn.execute(text("SELECT COUNT(*) FROM dw.dim_pacote")).scalar()
+            steps = conn.execute(text("""
+                SELECT step_name, status FROM dw.etl_step_log
+                WHERE run_id = :run_id AND parent_step IS NULL
+            """), {'run_id': result['run_id']}).fetchall()
+            dq = conn.execute(text("""
+                SELECT COUNT(*) FROM dw.data_quality_results WHERE run_id = :run_id
+            """), {'run_id': result['run_id']}).scalar()
+
+        # Realizado + Orçado
+        assert fact_despesa == 400
+        assert dims == 6
+        names = {name for name, _ in steps}
+        assert 'dq_anomalies' not in names
+        assert {'extract_excel', 'validate_raw', 'fact_dre', 'dq_checks'} <= names
+        assert all(status in ('SUCCESS', 'WARNING') for _, status in steps)
+        assert dq > 0
+
+    def test_dq_samples_without_prepare(self, duckdb_config):
+        """Regras com amostra rodam sem PREPARE e gravam JSON das linhas"""
+        from sqlalchemy import text
+        from etl._01_extract_excel import run_extract
+        from etl._02_transform_raw_to_stg import transform_despesa
+        from etl._03_transform_stg_to_dw import load_dim_pacote, load_fact_despesa
+        from etl._04_dq_checks import run_dq_checks
+        from etl._05_run_pipeline import ETLRun
+
+        engine = duckdb_config.get_engine()
+        run_extract(engine)
+        transform_despesa(engine)
+        load_dim_pacote(engine)
+        load_fact_despesa(engine)
+
+        with engine.connect() as conn:
+            conn.execute(text("DELETE FROM dw.dim_pacote WHERE pacote = (SELECT MIN(pacote) FROM dw.dim_pacote)"))
+            conn.commit()
+
+        run_id = ETLRun(engine).start('TEST')
+        results = run_dq_checks(engine, run_id=run_id, sample_limit=3)
+        [orfaos] = [r for r in results['results'] if r['rule_name'] == 'fact_despesa_pacote_valido']
+        assert orfaos['status'] == 'FAIL'
+        assert orfaos['samples_captured'] == 3
+
+        with engine.connect() as conn:
+            row = conn.execute(text("""
+                SELECT row_data FROM dw.data_quality_samples WHERE run_id = :run_id LIMIT 1
+            """), {'run_id': run_id}).scalar()
+        assert 'pacote' in row
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
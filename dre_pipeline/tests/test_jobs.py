@@ -0,0 +1,137 @@
+"""
+DRE Analytics 2025 - Testes da Fila de Jobs
+"""
+
+import pytest
+import asyncio
+import os
+import sys
+import time
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestJobQueue:
+    """Testes para a fila dw.etl_job"""
+
+    def test_claim_statement_per_backend(self):
+        """PostgreSQL reserva com SKIP LOCKED; DuckDB serializa no processo"""
+        from etl._00_backend import DuckDBBackend, PostgresBackend
+        from etl._05_jobs import claim_statement
+
+        assert 'FOR UPDATE SKIP LOCKED' in claim_statement(PostgresBackend())
+        assert 'SKIP LOCKED' not in claim_statement(DuckDBBackend())
+
+    def test_enqueue_and_claim_in_order(self, duckdb_config):
+        """Jobs saem na ordem de chegada e só uma vez"""
+        from etl._05_jobs import JobQueue, KIND_PIPELINE, KIND_UPLOAD, JOB_RUNNING
+
+        queue = JobQueue(duckdb_config.get_engine())
+        first = queue.enqueue(KIND_UPLOAD, {'filename': 'dados.xlsx'})
+        second = queue.enqueue(KIND_PIPELINE)
+
+        job = queue.claim('worker-a')
+        assert job['job_id'] == first
+        assert job['params'] == {'filename': 'dados.xlsx'}
+        assert queue.claim('worker-b')['job_id'] == second
+        assert queue.claim('worker-c') is None
+
+        status = queue.get(first)
+        assert status['status'] == JOB_RUNNING
+        assert status['worker'] == 'worker-a'
+        assert status['run'] is None
+
+    def test_worker_runs_job_and_reports_progress(self, duckdb_config):
+        """Worker executa o pipeline e o job aponta para a execução e seus steps"""
+        from etl._05_jobs import JobQueue, JobWorker, KIND_PIPELINE, JOB_SUCCESS
+
+        engine = duckdb_config.get_engine()
+        job_id = JobQueue(engine).enqueue(KIND_PIPELINE)
+
+        assert JobWorker(engine).run_once() == job_id
+
+        status = JobQueue(engine).get(job_id)
+        assert status['status'] == JOB_SUCCESS
+        assert status['run']['status'] == 'SUCCESS'
+        assert status['progress']['steps_finished'] > 0
+        assert status['progress']['steps_failed'] == 0
+        assert status['finished_at'] is not None
+
+    def test_coalesced_job_is_settled_by_followup(self, duckdb_config, monkeypatch):
+        """Job COALESCED não é final: o follow-up o vincula e define o status"""
+        import etl._05_run_pipeline as pipeline
+        from etl._05_jobs import (
+            JobQueue, KIND_PIPELINE, JOB_COALESCED, JOB_SUCCESS, final_status, run_job
+        )
+
+        engine = duckdb_config.get_engine()
+        queue = JobQueue(engine)
+        job_id = queue.enqueue(KIND_PIPELINE)
+        job = queue.claim('worker-a')
+
+        # Outro processo detém o lock: o pipeline devolve COALESCED
+        real_run_pipeline = pipeline.run_pipeline
+        monkeypatch.setattr(pipeline, 'run_pipeline',
+                            lambda **kwargs: {'status': JOB_COALESCED, 'run_id': None})
+        assert run_job(queue, job) == JOB_COALESCED
+
+        waiting = queue.get(job_id)
+        assert waiting['status'] == JOB_COALESCED
+        assert waiting['run'] is None and waiting['finished_at'] is None
+        assert queue.pending(KIND_PIPELINE) == 1
+
+        # Follow-up: execução iniciada depois da reserva do job
+        followup = real_run_pipeline(engine=engine)
+        late_id = queue.enqueue(KIND_PIPELINE)
+        queue.wait_followup(queue.claim('worker-b')['job_id'])
+        assert queue.settle_followup(followup['run_id'], final_status(followup)) == 1
+
+        settled = queue.get(job_id)
+        assert settled['status'] == JOB_SUCCESS
+        assert settled['run']['run_id'] == followup['run_id']
+        assert settled['run']['status'] == 'SUCCESS'
+        assert settled['finished_at'] is not None
+        # Reservado depois do início do follow-up: fica para o próximo
+        late = queue.get(late_id)
+        assert late['status'] == JOB_COALESCED and late['run'] is None
+
+
+class TestJobEndpoints:
+    """Testes para os endpoints de jobs"""
+
+    def test_enqueue_returns_job_and_pool_runs_it(self, duckdb_config):
+        """POST enfileira (202) e os workers da API concluem o job"""
+        from fastapi import HTTPException
+        from api.main import app, get_job, trigger_pipeline
+        from etl._05_jobs import JOB_FINAL_STATUSES, JOB_QUEUED, WorkerPool
+
+        route = next(r for r in app.routes if getattr(r, 'path', '') == '/api/v1/pipeline/run')
+        assert route.status_code == 202
+
+        accepted = asyncio.run(trigger_pipeline())
+        assert accepted.status == JOB_QUEUED
+        assert accepted.status_url == f"/api/v1/jobs/{accepted.job_id}"
+        assert asyncio.run(get_job(accepted.job_id))['status'] == JOB_QUEUED
+
+        pool = WorkerPool(duckdb_config.get_engine(), workers=2, poll_interval=0.05).start()
+        assert not pool.uses_processes
+        try:
+            deadline = time.time() + 60
+            status = asyncio.run(get_job(accepted.job_id))
+            while status['status'] not in JOB_FINAL_STATUSES and time.time() < deadline:
+                time.sleep(0.1)
+                status = asyncio.run(get_job(accepted.job_id))
+        finally:
+            pool.stop()
+
+        assert status['status'] == 'SUCCESS'
+        assert status['run']['run_id'] is not None
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(get_job(999999))
+        assert exc.value.status_code == 404
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
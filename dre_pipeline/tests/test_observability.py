@@ -0,0 +1,109 @@
+"""
+DRE Analytics 2025 - Testes de Logging Estruturado e Métricas
+"""
+
+import pytest
+import io
+import json
+import logging
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestJsonLogging:
+    """Testes para registros JSON com contexto da execução"""
+
+    def test_record_has_run_id_and_step(self):
+        """Registros levam run_id do contexto e o step aberto na thread"""
+        from etl._00_logging import ContextFilter, get_json_formatter, set_log_context
+        from etl._00_step_metrics import step_context
+
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(get_json_formatter())
+        handler.addFilter(ContextFilter())
+        log = logging.getLogger('teste.json')
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+
+        try:
+            set_log_context(42)
+            with step_context('fact_dre'):
+                log.info('carregando', extra={'rows_written': 10})
+        finally:
+            set_log_context(None)
+            log.removeHandler(handler)
+
+        record = json.loads(stream.getvalue())
+        assert record['run_id'] == 42
+        assert record['step'] == 'fact_dre'
+        assert record['rows_written'] == 10
+        assert record['message'] == 'carregando'
+
+    def test_pipeline_progress_goes_through_logger(self, duckdb_config, caplog, capsys):
+        """Cabeçalhos, steps e resultados de DQ saem pelo logger, não por print"""
+        from etl._05_run_pipeline import run_pipeline
+
+        with caplog.at_level(logging.INFO):
+            assert run_pipeline(max_workers=2)['status'] == 'SUCCESS'
+
+        messages = [r.getMessage() for r in caplog.records]
+        assert any('PIPELINE CONCLUÍDO COM SUCESSO' in m for m in messages)
+        assert any('Resumo DQ' in m for m in messages)
+        assert any(r.name == 'etl._04_dq_checks' and r.levelno == logging.INFO
+                   and '[' in r.getMessage() for r in caplog.records)
+        written = {getattr(r, 'table', None) for r in caplog.records if hasattr(r, 'rows_written')}
+        assert {'raw.receita', 'stg.receita', 'dw.fact_receita'} <= written
+        out = capsys.readouterr().out
+        assert 'PIPELINE CONCLUÍDO' not in out and 'Resumo DQ' not in out
+        assert 'Extraindo' not in out and 'Inseridos' not in out
+
+
+    def test_aggregate_loaders_log_table_and_rows(self, duckdb_config, caplog, capsys):
+        """Agregados registram tabela e linhas em `extra`, sem print"""
+        from etl._03_transform_stg_to_dw import load_agg_despesa_mensal, load_agg_receita_mensal
+
+        engine = duckdb_config.get_engine()
+        with caplog.at_level(logging.INFO, logger='etl._03_transform_stg_to_dw'):
+            load_agg_receita_mensal(engine)
+            load_agg_despesa_mensal(engine)
+
+        loaded = {r.table: r.rows_written for r in caplog.records if hasattr(r, 'rows_written')}
+        assert loaded == {'dw.agg_receita_mensal': 0, 'dw.agg_despesa_mensal': 0}
+        assert capsys.readouterr().out == ''
+
+
+class TestPrometheusMetrics:
+    """Testes para exposição de métricas"""
+
+    def test_step_and_dq_metrics_exposed(self):
+        """Steps e DQ aparecem no formato de exposição"""
+        from etl._00_metrics import record_step, record_dq, render_latest
+
+        record_step('stg_teste', 1.5, rows_read=100, rows_written=90, cpu_seconds=0.2)
+        record_dq('dw', {'passed': 12, 'warned': 1, 'failed': 1})
+        body, content_type = render_latest()
+        text = body.decode()
+
+        assert content_type.startswith('text/plain')
+        assert 'dre_etl_step_duration_seconds{step="stg_teste"} 1.5' in text
+        assert 'dre_etl_step_rows{direction="written",step="stg_teste"} 90.0' in text
+        assert 'dre_dq_rules{layer="dw",status="FAIL"} 1.0' in text
+
+    def test_textfile_export(self, tmp_path):
+        """Exportador grava o arquivo .prom para o node_exporter"""
+        from etl._00_metrics import record_run, write_textfile
+
+        record_run(7, 'SUCCESS', duration_seconds=10.0, total_rows=500)
+        path = write_textfile(tmp_path / 'metrics' / 'dre_etl.prom')
+
+        text = path.read_text()
+        assert 'dre_etl_last_run_success 1.0' in text
+        assert 'dre_etl_run_rows_per_second 50.0' in text
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
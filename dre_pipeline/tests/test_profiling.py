@@ -0,0 +1,74 @@
+"""
+DRE Analytics 2025 - Testes do Profiling de Steps
+"""
+
+import pytest
+import os
+import sys
+import time
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _trabalho_pesado(segundos=0.1):
+    """Laço Python ocupado (aparece no perfil)"""
+    fim = time.perf_counter() + segundos
+    total = 0
+    while time.perf_counter() < fim:
+        total += sum(range(100))
+    return total
+
+
+class TestProfileStep:
+    """Testes para os arquivos gerados por step"""
+
+    def test_cprofile_writes_pstats(self, tmp_path):
+        """Modo cprofile gera .pstats legível pelo módulo pstats"""
+        import pstats
+        from etl._00_profiling import profile_step
+
+        with profile_step('stg_teste', tmp_path) as report:
+            _trabalho_pesado(0.02)
+
+        assert report['path'] == tmp_path / 'stg_teste.pstats'
+        stats = pstats.Stats(str(report['path']))
+        assert any(func[2] == '_trabalho_pesado' for func in stats.stats)
+
+    def test_sampling_writes_collapsed_stacks(self, tmp_path):
+        """Modo sampling gera pilhas no formato collapsed"""
+        from etl._00_profiling import profile_step, PROFILE_SAMPLING
+
+        with profile_step('fact_teste', tmp_path, mode=PROFILE_SAMPLING) as report:
+            _trabalho_pesado(0.1)
+
+        lines = report['path'].read_text(encoding='utf-8').splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(' ', 1)
+        assert int(count) > 0
+        assert any('_trabalho_pesado' in line for line in lines)
+
+    def test_tracemalloc_peak(self, tmp_path, caplog, capsys):
+        """Pico de alocação reportado para steps com memória rastreada"""
+        import logging
+        import tracemalloc
+        from etl._00_profiling import profile_step
+
+        with caplog.at_level(logging.INFO, logger='etl._00_profiling'):
+            with profile_step('extract_excel', tmp_path, trace_memory=True) as report:
+                blocos = [bytearray(1024 * 1024) for _ in range(5)]
+                del blocos
+
+        assert report['traced_peak_mb'] >= 5
+        assert report['tracemalloc_path'].exists()
+        assert not tracemalloc.is_tracing()
+
+        # Um único registro estruturado, sem print (o DAG roda steps em paralelo)
+        [record] = caplog.records
+        assert record.traced_peak_mb == report['traced_peak_mb']
+        assert record.tracemalloc_path == str(report['tracemalloc_path'])
+        assert capsys.readouterr().out == ''
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,94 @@
+"""
+DRE Analytics 2025 - Testes dos Planos de Execução
+"""
+
+import pytest
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _insert_plan(scan='Seq Scan', rows=100, conflicts=0, execution_ms=10.0):
+    """Saída mínima de EXPLAIN ANALYZE (FORMAT JSON) de um INSERT ... SELECT"""
+    return {
+        'Plan': {
+            'Node Type': 'ModifyTable',
+            'Operation': 'Insert',
+            'Relation Name': 'fact_dre',
+            'Total Cost': 250.0,
+            'Plan Rows': rows,
+            'Actual Rows': 0,
+            'Actual Loops': 1,
+            'Conflict Resolution': 'NOTHING',
+            'Conflicting Tuples': conflicts,
+            'Plans': [{
+                'Node Type': scan,
+                'Parent Relationship': 'Outer',
+                'Relation Name': 'dre',
+                'Total Cost': 200.0,
+                'Plan Rows': rows,
+                'Actual Rows': rows,
+                'Actual Loops': 1,
+            }],
+        },
+        'Planning Time': 0.5,
+        'Execution Time': execution_ms,
+    }
+
+
+class TestPlanParsing:
+    """Testes para leitura dos planos"""
+
+    def test_rows_affected_discounts_conflicts(self):
+        """Linhas do nó filho menos os conflitos ignorados (DO NOTHING)"""
+        from etl._00_query_plans import rows_affected
+
+        assert rows_affected(_insert_plan(rows=100)) == 100
+        assert rows_affected(_insert_plan(rows=100, conflicts=30)) == 70
+
+    def test_shape_hash_ignores_costs(self):
+        """Hash muda com a forma do plano, não com custos ou tempos"""
+        from etl._00_query_plans import plan_shape_hash
+
+        base = plan_shape_hash(_insert_plan())
+        assert plan_shape_hash(_insert_plan(rows=5000, execution_ms=99.0)) == base
+        assert plan_shape_hash(_insert_plan(scan='Index Scan')) != base
+
+    def test_only_dml_is_explained(self):
+        """TRUNCATE não aceita EXPLAIN"""
+        from etl._00_query_plans import is_explainable
+
+        assert is_explainable("\n  INSERT INTO dw.fact_dre SELECT 1")
+        assert is_explainable("EXECUTE dq_regra_1($1)")
+        assert not is_explainable("TRUNCATE TABLE dw.fact_dre")
+
+
+class TestRegressions:
+    """Testes para comparação com a execução anterior"""
+
+    def test_plan_change_and_duration(self):
+        """Sinaliza plano diferente e lentidão acima do limiar"""
+        from etl._00_query_plans import detect_regressions, summarize_plan
+
+        before = summarize_plan(_insert_plan(execution_ms=100.0))
+        after = summarize_plan(_insert_plan(scan='Index Scan', execution_ms=400.0))
+
+        flags = detect_regressions(after, before)
+        assert flags == {'plan_changed': True, 'duration_regression': True}
+        assert detect_regressions(after, None)['plan_changed'] is False
+
+    def test_small_slowdowns_ignored(self):
+        """Diferenças abaixo de min_ms não contam como regressão"""
+        from etl._00_query_plans import detect_regressions, summarize_plan
+
+        before = summarize_plan(_insert_plan(execution_ms=2.0))
+        after = summarize_plan(_insert_plan(execution_ms=20.0))
+
+        assert detect_regressions(after, before)['duration_regression'] is False
+        assert detect_regressions(after, before, min_ms=10)['duration_regression'] is True
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
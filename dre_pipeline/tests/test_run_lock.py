@@ -0,0 +1,139 @@
+"""
+DRE Analytics 2025 - Testes da Coordenação de Execuções
+"""
+
+import pytest
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeRow:
+    def __init__(self, mapping):
+        self._mapping = mapping
+
+
+class FakeResult:
+    def __init__(self, value=None, row=None):
+        self.value = value
+        self.row = row
+
+    def scalar(self):
+        return self.value
+
+    def fetchone(self):
+        return self.row
+
+
+class FakeServer:
+    """Advisory lock e dw.etl_run_request em memória (semântica do PostgreSQL)"""
+
+    def __init__(self):
+        self.lock_holder = None
+        self.request = None
+
+    def execute(self, conn, sql, params):
+        if 'pg_try_advisory_lock' in sql:
+            if self.lock_holder in (None, conn):
+                self.lock_holder = conn
+                return FakeResult(True)
+            return FakeResult(False)
+        if 'pg_advisory_unlock' in sql:
+            self.lock_holder = None
+            return FakeResult(True)
+        if 'INSERT INTO dw.etl_run_request' in sql:
+            pending = self.request is not None and self.request['pending']
+            self.request = {
+                'pending': True,
+                'skip_extract': (self.request['skip_extract'] and params['skip_extract'])
+                                if pending else params['skip_extract'],
+                'request_count': self.request['request_count'] + 1 if pending else 1,
+                'last_triggered_by': params['triggered_by'],
+            }
+            return FakeResult()
+        if 'UPDATE dw.etl_run_request' in sql:
+            if self.request is None or not self.request['pending']:
+                return FakeResult()
+            self.request['pending'] = False
+            row = {k: self.request[k] for k in ('skip_extract', 'request_count', 'last_triggered_by')}
+            return FakeResult(row=FakeRow(row))
+        if 'SELECT pending' in sql:
+            return FakeResult(self.request is not None and self.request['pending'])
+        raise AssertionError(f"SQL inesperado: {sql}")
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        return self.server.execute(self, str(statement), params or {})
+
+    def commit(self):
+        pass
+
+
+class FakeEngine:
+    def __init__(self, server):
+        self.server = server
+
+    def connect(self):
+        return FakeConnection(self.server)
+
+
+class TestRunCoordinator:
+    """Testes para o RunCoordinator (lock e pedidos simulados)"""
+
+    def test_first_run_receives_claimed_request(self):
+        """run_fn recebe o pedido consumido (dict), não só o skip_extract"""
+        from etl._05_run_lock import RunCoordinator
+
+        server = FakeServer()
+        calls = []
+
+        def run_fn(claimed):
+            calls.append(claimed)
+            return {'status': 'SUCCESS', 'run_id': len(calls)}
+
+        result = RunCoordinator(FakeEngine(server)).run(run_fn, 'CRON', skip_extract=True)
+
+        assert calls == [{'skip_extract': True, 'request_count': 1, 'last_triggered_by': 'CRON'}]
+        assert result['status'] == 'SUCCESS' and result['followup_runs'] == []
+        assert server.lock_holder is None and not server.request['pending']
+
+    def test_triggers_during_run_are_coalesced(self):
+        """Disparos durante a execução viram UM follow-up; quem chega com o lock ocupado recebe COALESCED"""
+        from etl._05_run_lock import STATUS_COALESCED, RunCoordinator
+
+        server = FakeServer()
+        other = RunCoordinator(FakeEngine(server))
+        calls, coalesced = [], []
+
+        def run_fn(claimed):
+            calls.append(claimed)
+            if len(calls) == 1:
+                # Outros processos disparam enquanto a primeira execução roda
+                coalesced.append(other.run(lambda c: pytest.fail("não deve executar"), 'API', True))
+                coalesced.append(other.run(lambda c: pytest.fail("não deve executar"), 'UPLOAD', False))
+            return {'status': 'SUCCESS', 'run_id': 10 + len(calls)}
+
+        result = RunCoordinator(FakeEngine(server)).run(run_fn, 'CRON', skip_extract=True)
+
+        assert [r['status'] for r in coalesced] == [STATUS_COALESCED, STATUS_COALESCED]
+        assert len(calls) == 2
+        # Upload pediu extração: o follow-up agregado extrai
+        assert calls[1] == {'skip_extract': False, 'request_count': 2, 'last_triggered_by': 'UPLOAD'}
+        assert result['run_id'] == 11 and result['followup_runs'] == [12]
+        assert server.lock_holder is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,135 @@
+"""
+DRE Analytics 2025 - Testes do Agendador DAG
+"""
+
+import pytest
+import os
+import sys
+import threading
+import time
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestDAGDefinition:
+    """Testes para validação do DAG"""
+
+    def test_topological_order(self):
+        """Ordem respeita as dependências"""
+        from etl._05_scheduler import DAGScheduler, Step
+
+        steps = [
+            Step('fato', lambda: 1, ['stg']),
+            Step('stg', lambda: 1, ['raw']),
+            Step('raw', lambda: 1),
+        ]
+        order = DAGScheduler(steps).order
+
+        assert order.index('raw') < order.index('stg') < order.index('fato')
+
+    def test_cycle_fails(self):
+        """Ciclo de dependências gera erro"""
+        from etl._05_scheduler import DAGScheduler, DAGError, Step
+
+        with pytest.raises(DAGError):
+            DAGScheduler([Step('a', lambda: 1, ['b']), Step('b', lambda: 1, ['a'])])
+
+    def test_unknown_dependency_fails(self):
+        """Dependência inexistente gera erro"""
+        from etl._05_scheduler import DAGScheduler, DAGError, Step
+
+        with pytest.raises(DAGError):
+            DAGScheduler([Step('a', lambda: 1, ['nao_existe'])])
+
+
+class TestDAGExecution:
+    """Testes para execução do DAG"""
+
+    def test_independent_steps_run_in_parallel(self):
+        """Steps sem dependência entre si rodam ao mesmo tempo"""
+        from etl._05_scheduler import DAGScheduler, Step
+
+        barrier = threading.Barrier(3, timeout=5)
+        steps = [Step(f'dim_{i}', lambda: barrier.wait()) for i in range(3)]
+
+        outcomes = DAGScheduler(steps, max_workers=3).run()
+
+        assert all(o.status == 'SUCCESS' for o in outcomes.values())
+
+    def test_failure_skips_only_downstream(self):
+        """Falha cancela os descendentes; ramos independentes continuam"""
+        from etl._05_scheduler import DAGScheduler, Step, summarize
+
+        def _falha():
+            raise ValueError('erro')
+
+        steps = [
+            Step('stg_receita', _falha),
+            Step('fact_receita', lambda: 10, ['stg_receita']),
+            Step('dq', lambda: 0, ['fact_receita']),
+            Step('stg_aliquota', lambda: 5),
+            Step('fact_aliquota', lambda: {'rows_written': 7}, ['stg_aliquota']),
+        ]
+        outcomes = DAGScheduler(steps, max_workers=2).run()
+
+        assert outcomes['stg_receita'].status == 'FAILED'
+        assert outcomes['fact_receita'].status == 'SKIPPED'
+        assert outcomes['dq'].status == 'SKIPPED'
+        assert outcomes['fact_aliquota'].status == 'SUCCESS'
+        assert outcomes['fact_aliquota'].rows_written == 7
+
+        summary = summarize(outcomes)
+        assert summary['status'] == 'FAILED'
+        assert summary['error'].startswith('stg_receita')
+        assert summary['total_rows'] == 12
+
+    def test_non_critical_failure(self):
+        """Falha de step não crítico não derruba a execução"""
+        from etl._05_scheduler import DAGScheduler, Step, summarize
+
+        def _falha():
+            raise ValueError('erro')
+
+        outcomes = DAGScheduler([
+            Step('fato', lambda: 1),
+            Step('anomalias', _falha, ['fato'], critical=False),
+        ]).run()
+
+        assert summarize(outcomes)['status'] == 'SUCCESS'
+
+    def test_resume_skips_completed(self):
+        """Steps com checkpoint não rodam de novo; os pendentes sim"""
+        from etl._05_scheduler import DAGScheduler, Step
+
+        executed = []
+        steps = [
+            Step(name, lambda name=name: executed.append(name), deps)
+            for name, deps in [
+                ('extract_excel', []),
+                ('stg_dre', ['extract_excel']),
+                ('fact_dre', ['stg_dre']),
+            ]
+        ]
+        outcomes = DAGScheduler(steps, completed=['extract_excel', 'stg_dre']).run()
+
+        assert executed == ['fact_dre']
+        assert outcomes['stg_dre'].status == 'SUCCESS'
+        assert outcomes['stg_dre'].started_at is None
+
+    def test_real_timestamps(self):
+        """Cada step registra início e fim reais"""
+        from etl._05_scheduler import DAGScheduler, Step
+
+        outcomes = DAGScheduler([
+            Step('lento', lambda: time.sleep(0.05)),
+            Step('depois', lambda: None, ['lento']),
+        ]).run()
+
+        lento, depois = outcomes['lento'], outcomes['depois']
+        assert lento.duration_seconds >= 0.05
+        assert depois.started_at >= lento.finished_at
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
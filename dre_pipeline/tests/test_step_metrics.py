@@ -0,0 +1,83 @@
+"""
+DRE Analytics 2025 - Testes das Métricas por Step
+"""
+
+import pytest
+import os
+import sys
+import time
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestStepContext:
+    """Testes para o context manager de steps"""
+
+    def test_timing_and_rows(self):
+        """Registra início/fim reais, linhas e vazão"""
+        from etl._00_step_metrics import step_context
+
+        with step_context('stg_receita') as step:
+            time.sleep(0.02)
+            step.add_rows(read=100, written=80)
+
+        assert step.status == 'SUCCESS'
+        assert step.duration_seconds >= 0.02
+        assert step.finished_at > step.started_at
+        assert step.rows_per_sec == pytest.approx(80 / step.duration_seconds)
+        assert step.cpu_seconds >= 0
+
+    def test_memory_is_process_peak(self):
+        """Memória registrada é o pico do processo, com nome que deixa isso claro"""
+        from etl._00_step_metrics import peak_rss_mb, step_context
+
+        with step_context('stg_receita') as step:
+            pass
+
+        data = step.to_dict()
+        assert 'peak_rss_mb' not in data
+        if peak_rss_mb() is not None:
+            assert 0 < data['process_peak_rss_mb'] <= round(peak_rss_mb(), 1)
+
+    def test_substeps_are_children(self):
+        """Steps abertos dentro de outro viram sub-steps"""
+        from etl._00_step_metrics import step_context, track_step, record_rows
+
+        @track_step()
+        def extract_aba():
+            record_rows(read=10)
+            return {'rows_loaded': 7}
+
+        with step_context('extract_excel') as step:
+            extract_aba()
+            record_rows(written=1)
+
+        child = step.children[0]
+        assert child.name == 'extract_aba'
+        assert (child.rows_read, child.rows_written) == (10, 7)
+        assert (step.rows_read, step.rows_written) == (0, 1)
+        assert step.to_dict()['children'][0]['step_name'] == 'extract_aba'
+
+    def test_failure_marks_step(self):
+        """Exceção marca o step como FAILED e é propagada"""
+        from etl._00_step_metrics import step_context, current_step
+
+        with pytest.raises(ValueError):
+            with step_context('fact_dre') as step:
+                raise ValueError('erro')
+
+        assert step.status == 'FAILED'
+        assert step.finished_at is not None
+        assert current_step() is None
+
+    def test_record_rows_outside_step(self):
+        """Fora de um step, registrar linhas não faz nada"""
+        from etl._00_step_metrics import record_rows, record_source_rows
+
+        record_rows(read=5)
+        assert record_source_rows(None, 'raw.receita') is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
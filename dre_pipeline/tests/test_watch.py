@@ -0,0 +1,98 @@
+"""
+DRE Analytics 2025 - Testes do Modo Watch
+"""
+
+import pytest
+import os
+import sys
+import threading
+import time
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+SHEETS = {
+    'receita_realizado': 'Receita_Realizado',
+    'receita_orcado': 'Receita_Orç',
+    'despesas_realizado': 'Despesas_Realizado',
+    'despesas_orcado': 'Despesas_Orç',
+    'modelo_dre': 'Modelo DRE',
+    'aliquotas': 'Aliquotas',
+}
+
+
+def _workbook(path, aliquota=0.0925):
+    """Gera um .xlsx mínimo com as abas do config"""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    for name in SHEETS.values():
+        ws = wb.create_sheet(name)
+        ws.append([1, 2, 3])
+    wb['Aliquotas'].append([aliquota])
+    wb.save(path)
+
+
+class TestFingerprints:
+    """Testes para detecção de abas alteradas"""
+
+    def test_only_changed_table(self, tmp_path):
+        """Mudar uma aba numérica afeta só a tabela RAW dela"""
+        from etl._05_watch import table_fingerprints, changed_tables
+
+        path = tmp_path / 'dados.xlsx'
+        _workbook(path)
+        before = table_fingerprints(path, SHEETS)
+        _workbook(path, aliquota=0.1)
+        after = table_fingerprints(path, SHEETS)
+
+        assert changed_tables(before, after) == ['aliquota']
+        assert changed_tables(None, after) == ['receita', 'despesa', 'dre', 'aliquota']
+
+
+class TestSourceWatcher:
+    """Testes para polling com debounce"""
+
+    def test_debounce_waits_for_stable_file(self, tmp_path):
+        """Escritas em sequência geram uma única mudança"""
+        from etl._05_watch import SourceWatcher
+
+        path = tmp_path / 'dados.xlsx'
+        path.write_bytes(b'v0')
+        watcher = SourceWatcher(path, poll_interval=0.01, debounce=0.1)
+
+        def _escritas():
+            for i in range(1, 4):
+                path.write_bytes(b'v' * (i + 1))
+                time.sleep(0.03)
+
+        writer = threading.Thread(target=_escritas)
+        writer.start()
+        assert watcher.wait_for_change(timeout=2)
+        writer.join()
+
+        assert path.read_bytes() == b'vvvv'
+        assert not watcher.wait_for_change(timeout=0.05)
+
+
+class TestIncrementalDAG:
+    """Testes para seleção de steps na execução incremental"""
+
+    def test_reuses_independent_branches(self):
+        """Só os descendentes das tabelas alteradas rodam"""
+        from etl._05_run_pipeline import build_pipeline_steps, incremental_completed
+
+        steps = build_pipeline_steps(engine=None, run_id=1)
+        reused = incremental_completed(steps, ['aliquota'])
+
+        assert 'stg_aliquota' not in reused
+        assert 'fact_aliquota' not in reused
+        assert {'stg_receita', 'dim_unidade', 'fact_dre'} <= set(reused)
+        assert 'extract_excel' not in reused
+        assert 'dq_checks' not in reused
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])